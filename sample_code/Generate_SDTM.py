@@ -12,6 +12,33 @@
 
 
 """
+To call this script:
+	python3 Generate_SDTM.py
+		Uses the trial design defined by the constants below. The .xpt files are written to the current directory.
+
+	python3 Generate_SDTM.py design_01.json design_02.json ..
+		Batch mode, no user input. Each JSON file holds one trial design; its .xpt files are written to a directory named after its "studyid".
+		JSON format (same sections as the constants below; only "studyid" and "trial_design_matrix" are required):
+			{"studyid": "EX1",
+			 "trial_design_matrix": {"domain": "TA", "tdm": [..]},
+			 "trial_element_matrix": {"domain": "TE", "elements": [{"etcd": "SCRN", "testrl": "..", "teenrl": "..", "tedur": ".."}]},
+			 "trial_visit_matrix": {"domain": "TV", "visits": [..]},
+			 "trial_disease_assessment_matrix": {"domain": "TD", "assessments": [..]},
+			 "trial_disease_milestone_matrix": {"domain": "TM", "milestones": [..]},
+			 "trial_inclusion_exclusion_matrix": {"domain": "TI", "criteria": [..]},
+			 "trial_summary_matrix": {"domain": "TS", "item": [..]}}
+
+	python3 Generate_SDTM.py --verify [design_01.json ..]
+		Same as above, and each .xpt file is read back and compared with the generated data.
+
+	python3 Generate_SDTM.py --incremental [design_01.json ..]
+		Only rewrites the .xpt files whose inputs changed since the last run, as recorded in "Generate_SDTM_manifest.json" beside them.
+
+	python3 Generate_SDTM.py --sql PHUSE_Generate_SDTM.sql [design_01.json ..]
+		Reads the "Num" / "Char" types of the variables from this SQL script, when there is no terminology pack or SQLite3 file in the current directory.
+		Default: "PHUSE_Generate_SDTM.sql" in the current directory.
+
+
 [Wed 11 November 2020]
 
 To do:
@@ -56,6 +83,12 @@ CT_DEBUG = [1, 2, 'TD', 'TE', 'TI', 'TM', 'TS', 'TV']
 # 	2 for JSON parsing
 #	Use the Domain Code to see processing steps for each Domain.
 #
+CT_XPT_VERIFY = False
+# True (or "--verify" on the command line) reads each .xpt file back after writing it, and compares it with the generated data.
+#
+CT_INCREMENTAL_BUILD = False
+# True (or "--incremental" on the command line) only rewrites the .xpt files whose inputs changed since the last run (see CT_DOMAIN_INPUTS below).
+#
 # Trial Design Matrix:
 # The columns of a Trial Design Matrix are the Epochs of the trial, the rows are the Arms of the trial, and the cells of the matrix (the Study Cells) contain Elements.
 #
@@ -108,7 +141,7 @@ if (CT_TA_EXAMPLE_TRIAL == 2):
 			{"etcd": "SCRN", "element": "Screen", "tabranch": "Randomized to 5 mg - 10 mg - Placebo", "tatrans": "", "epoch": "SCREENING"},
 			{"etcd": "5", "element": "5 mg", "tabranch": "", "tatrans": "", "epoch": "TREATMENT 1"},
 			{"etcd": "REST", "element": "Rest", "tabranch": "", "tatrans": "", "epoch": "WASHOUT 1"},
-			{"etcd": "10", "element": "10 mg.", "tabranch": "", "tatrans": "", "epoch": "TREATMENT 2"},
+			{"etcd": "10", "element": "10 mg", "tabranch": "", "tatrans": "", "epoch": "TREATMENT 2"},
 			{"etcd": "REST", "element": "Rest", "tabranch": "", "tatrans": "", "epoch": "WASHOUT 2"},
 			{"etcd": "P", "element": "Placebo", "tabranch": "", "tatrans": "", "epoch": "TREATMENT 3"},
 			{"etcd": "FU", "element": "Follow-up", "tabranch": "", "tatrans": "", "epoch": "FOLLOW-UP"}
@@ -142,19 +175,37 @@ if (CT_TA_EXAMPLE_TRIAL == 3):
 			]}
 	]}
 #
+# Trial Element Matrix:
+# Rules for starting and ending each Element (TE), by Element code. Elements not listed here use default rules based on the Epoch where they first appear in TA: "Start of <Epoch> Epoch" and "End of <Epoch> Epoch".
+CT_TRIAL_ELEMENT_MATRIX = {"domain": "TE", "elements": []}
+#
+# Trial Element Matrix for Example Trial 1 (TE Example 1 in SDTMIG):
+if (CT_TA_EXAMPLE_TRIAL == 1):
+	CT_TRIAL_ELEMENT_MATRIX = {"domain": "TE", "elements": [
+		{"etcd": "SCRN", "testrl": "Informed consent", "teenrl": "Screening assessments are complete, up to 2 weeks after start of Element", "tedur": ""},
+		{"etcd": "RI", "testrl": "Eligibility confirmed", "teenrl": "1 week after start of Element", "tedur": "P7D"},
+		{"etcd": "P", "testrl": "First dose of study drug, where drug is placebo", "teenrl": "2 weeks after start of Element", "tedur": "P14D"},
+		{"etcd": "A", "testrl": "First dose of study drug, where drug is Drug A", "teenrl": "2 weeks after start of Element", "tedur": "P14D"},
+		{"etcd": "B", "testrl": "First dose of study drug, where drug is Drug B", "teenrl": "2 weeks after start of Element", "tedur": "P14D"}
+	]}
+#
+CT_TE_INTERACTIVE = False	# Set to True to type in the rules of Elements that are not listed in CT_TRIAL_ELEMENT_MATRIX.
+#
 #
 # Trial Visit Matrix:
 # Source: Example Trial 1, Parallel Design Planned Visits. Page 383 in SDTMIG.
+# ARMCD and ARM are blank: the schedule of Visits is the same for all Arms. Otherwise they must be an Arm of the Trial Design Matrix.
 CT_TRIAL_VISIT_MATRIX = {"domain": "TV", "visits": [
-	{"visitnum": "1", "visit": "Visit 01", "visitdy": "1", "armcd": "Arm code 01", "arm": "Arm 01", "tvstrl": "Start of Screen Epoch", "tvenrl": "1 hour after start of Visit"},
-	{"visitnum": "2", "visit": "Visit 02", "visitdy": "2", "armcd": "Arm code 02", "arm": "Arm 02", "tvstrl": "30 minutes before end of Screen Epoch", "tvenrl": "30 minutes after start of Run-in Epoch"},
-	{"visitnum": "3", "visit": "Visit 03", "visitdy": "3", "armcd": "Arm code 03", "arm": "Arm 03", "tvstrl": "30 minutes before end of Run-in Epoch", "tvenrl": "1 hour after start of Treatment Epoch"},
-	{"visitnum": "4", "visit": "Visit 04", "visitdy": "4", "armcd": "Arm code 04", "arm": "Arm 04", "tvstrl": "1 week after start of Treatment Epoch", "tvenrl": "1 hour after start of Visit"},
-	{"visitnum": "5", "visit": "Visit 05", "visitdy": "5", "armcd": "Arm code 05", "arm": "Arm 05", "tvstrl": "2 weeks after start of Treatment Epoch", "tvenrl": "1 hour after start of Visit"}
+	{"visitnum": "1", "visit": "Visit 01", "visitdy": "1", "armcd": "", "arm": "", "tvstrl": "Start of Screen Epoch", "tvenrl": "1 hour after start of Visit"},
+	{"visitnum": "2", "visit": "Visit 02", "visitdy": "2", "armcd": "", "arm": "", "tvstrl": "30 minutes before end of Screen Epoch", "tvenrl": "30 minutes after start of Run-in Epoch"},
+	{"visitnum": "3", "visit": "Visit 03", "visitdy": "3", "armcd": "", "arm": "", "tvstrl": "30 minutes before end of Run-in Epoch", "tvenrl": "1 hour after start of Treatment Epoch"},
+	{"visitnum": "4", "visit": "Visit 04", "visitdy": "4", "armcd": "", "arm": "", "tvstrl": "1 week after start of Treatment Epoch", "tvenrl": "1 hour after start of Visit"},
+	{"visitnum": "5", "visit": "Visit 05", "visitdy": "5", "armcd": "", "arm": "", "tvstrl": "2 weeks after start of Treatment Epoch", "tvenrl": "1 hour after start of Visit"}
 ]}
 """
 Pending [Thu 10/08/2020]
 * Design mechanism to encode both TVSTRL and TVENRL to allow for computing dates below.
+  [Mon 19 October 2026] Done: PHUSE_Visit_Schedule.py (rules below are parsed, and resolved against the Epochs of TA and TEDUR of TE).
 Possible parameters:
 	Time unit [hour | day | week | month] after [start | end] Epoch.
 	Time unit [hour | day | week | month] after [start | end] Visit.
@@ -254,6 +305,7 @@ CT_TRIAL_SUMMARY_MATRIX = {"domain": "TS", "item": [
 # Imports Section
 import csv
 import datetime
+import hashlib
 import json
 import os
 import random
@@ -274,415 +326,711 @@ except ImportError:
 	print("https://pandas.pydata.org/pandas-docs/stable/getting_started/install.html")
 	sys.exit(1)
 #
-try:
-	import xport
-	import xport.v56
-except ImportError:
-	print("Install xport: pip3 install xport")
-	print("Source: https://github.com/selik/xport")
-	sys.exit(1)
 #
-def validateJSON(jsonData):
-	"""
-	This function validates that a JSON string is well-formed.
-	Source: https://pynative.com/python-json-validation/
-	"""
-	try:
-		json.loads(jsonData)
-	except ValueError as err:
-		return False
-	return True
+import PHUSE_XPT		# SAS Transport (XPORT) version 5 writer.
+import PHUSE_SDTM_Schema		# "Num" / "Char" types of the SDTM variables.
+import PHUSE_Trial_Design_Validator
+import PHUSE_Visit_Schedule
 #
-
+# Compiled once, used for every trial design:
+validator_trial_design = PHUSE_Trial_Design_Validator.func_nihpo_design_validator_compile(PHUSE_Trial_Design_Validator.CT_TRIAL_DESIGN_SCHEMA)
+dict_sdtm_schema = {}		# Types and labels of the variables, from "cdisc_sdtm_domain_definitions": loaded once the arguments are read.
 #
-# QA: Validate JSON is well-formed first. <<
-if not validateJSON(json.dumps(CT_TRIAL_DESIGN_MATRIX)):
-	print ("There is an error in the JSON definition of the Trial Design Matrix.")
-	print ("Please validate your JSON code here: https://jsonlint.com/?code=")
-	sys.exit(1)
+# Incremental build:
+# Inputs of each domain: (sections of the trial design, domains it is derived from). A domain is rebuilt when the hash of its inputs changes,
+# and its hash includes the hashes of the domains it is derived from: a change to TA also rebuilds TE.
+CT_DOMAIN_INPUTS = {
+	'TA': (['trial_design_matrix'], []),
+	'TE': (['trial_element_matrix'], ['TA']),
+	'TV': (['trial_visit_matrix'], []),
+	'TD': (['trial_disease_assessment_matrix'], []),
+	'TM': (['trial_disease_milestone_matrix'], []),
+	'TI': (['trial_inclusion_exclusion_matrix'], []),
+	'TS': (['trial_summary_matrix'], [])}
+# Domains whose records must be in memory to build another one (without rewriting them): TE is derived from TA; the Visit schedule checks of TV use TA and TE.
+CT_DOMAIN_BUILD_NEEDS = {'TE': ['TA'], 'TV': ['TA', 'TE']}
+CT_MANIFEST_FILENAME = 'Generate_SDTM_manifest.json'
+CT_MANIFEST_VERSION = 3		# Increase when the generated records change for the same inputs, to rebuild everything once.
 #
-elif not validateJSON(json.dumps(CT_TRIAL_VISIT_MATRIX)):
-	print ("There is an error in the JSON definition of the Trial Visit Matrix.")
-	print ("Please validate your JSON code here: https://jsonlint.com/?code=")
-	sys.exit(1)
-#
-elif not validateJSON(json.dumps(CT_TRIAL_DISEASE_ASSESSMENT_MATRIX)):
-	print ("There is an error in the JSON definition of the Trial Assessment Matrix.")
-	print ("Please validate your JSON code here: https://jsonlint.com/?code=")
-	sys.exit(1)
+def func_nihpo_domain_builder (in_domain, in_columns, in_dtypes=None):
+	"""
+	This function starts collecting the records of a domain as one Python list per column.
+	Inputs:
+		in_domain : [String] : Domain code (e.g. 'TA').
+		in_columns : [List] : Column names, in dataset order.
+		in_dtypes : [Dictionary] : NumPy type of columns that are not SDTM variables (e.g. 'Row'). SDTM variables get the type of their definition (see dict_sdtm_schema).
+
+	Return:
+		Dictionary to pass to func_nihpo_domain_add_record() and func_nihpo_domain_dataframe().
+
+	To call this function:
+		func_nihpo_domain_builder('TA', ['Row', 'STUDYID', 'TAETORD'], {'Row': np.int32})
+	"""
+	dict_dtypes = in_dtypes or {}
+	assert (set(dict_dtypes) <= set(in_columns)),"Types given for unknown %s columns: %s" % (in_domain, sorted(set(dict_dtypes) - set(in_columns)))
+	return {'domain': in_domain, 'columns': list(in_columns), 'data': {column: [] for column in in_columns}, 'dtypes': dict_dtypes, 'schema': dict_sdtm_schema.get(in_domain, {})}
 #
-elif not validateJSON(json.dumps(CT_TRIAL_DISEASE_MILESTONE_MATRIX)):
-	print ("There is an error in the JSON definition of the Trial Disease Milestone Matrix.")
-	print ("Please validate your JSON code here: https://jsonlint.com/?code=")
-	sys.exit(1)
 #
-elif not validateJSON(json.dumps(CT_TRIAL_INCLUSION_EXCLUSION_MATRIX)):
-	print ("There is an error in the JSON definition of the Trial Inclusion / Exclusion Matrix.")
-	print ("Please validate your JSON code here: https://jsonlint.com/?code=")
-	sys.exit(1)
-
+def func_nihpo_domain_add_record (in_builder, in_record):
+	"""
+	This function adds one record to a domain builder.
+	Inputs:
+		in_builder : [Dictionary] : Returned by func_nihpo_domain_builder().
+		in_record : [Dictionary] : One value per column.
 
+	To call this function:
+		func_nihpo_domain_add_record(TA_builder, {'Row': 1, 'STUDYID': 'EX1', 'TAETORD': 1})
+	"""
+	assert (len(in_record) == len(in_builder['columns'])),"%s record must have exactly these columns: %s" % (in_builder['domain'], in_builder['columns'])
+	for column in in_builder['columns']:
+		in_builder['data'][column].append(in_record[column])
+#
+#
+def func_nihpo_domain_arrays (in_builder):
+	"""
+	This function converts the records of a domain collected so far into one NumPy array per column.
+	Inputs:
+		in_builder : [Dictionary] : Returned by func_nihpo_domain_builder().
 
+	Return:
+		Dictionary of NumPy arrays, keyed by column name: int64 or float64 for "Num" variables, strings (dtype object) for "Char" variables (see PHUSE_SDTM_Schema.py).
 
+	To call this function:
+		func_nihpo_domain_arrays(TA_builder)
+	"""
+	return PHUSE_SDTM_Schema.func_nihpo_schema_columns(in_builder['schema'], in_builder['columns'], in_builder['data'], in_builder['dtypes'])
 #
-# = = Create base Pandas DataFrames. = =
-# TA - Trial Arms
-TA_data = {'Row': [], 'STUDYID': [], 'DOMAIN': [], 'ARMCD': [], 'ARM': [], 'TAETORD': [], 'ETCD': [], 'ELEMENT': [], 'TABRANCH': [], 'TATRANS': [], 'EPOCH': []}
-TA_df = pd.DataFrame(data=TA_data)
-TA_df.astype(dtype={'TAETORD': np.int32})
-if ('TA' in CT_DEBUG):  print (TA_df)
-#
-# TE - Trial Elements
-TE_data = {'Row': [], 'STUDYID': [], 'DOMAIN': [], 'ETCD': [], 'ELEMENT': [], 'TESTRL': [], 'TEENRL': [], 'TEDUR': []}
-TE_df = pd.DataFrame(data=TE_data)
-if ('TE' in CT_DEBUG):  print (TE_df)
 #
-# TV - Trial Visits
-TV_data = {'Row': [], 'STUDYID': [], 'DOMAIN': [], 'VISITNUM': [], 'VISIT': [], 'VISITDY': [], 'ARMCD': [], 'ARM': [], 'TVSTRL': [], 'TVENRL': []}
-TV_df = pd.DataFrame(data=TV_data)
-if ('TV' in CT_DEBUG):  print (TV_df)
+def func_nihpo_domain_dataframe (in_builder):
+	"""
+	This function creates the DataFrame of a domain, once, from all records collected so far.
+	Inputs:
+		in_builder : [Dictionary] : Returned by func_nihpo_domain_builder().
+
+	Return:
+		Pandas DataFrame, with numeric columns already converted to their NumPy types.
+
+	To call this function:
+		TA_df = func_nihpo_domain_dataframe(TA_builder)
+	"""
+	return pd.DataFrame(data=func_nihpo_domain_arrays(in_builder), columns=in_builder['columns'])
 #
-# TD - Trial Disease Assessments
-TD_data = {'Row': [], 'STUDYID': [], 'DOMAIN': [], 'TDORDER': [], 'TDANCVAR': [], 'TDSTOFF': [], 'TDTGTPAI': [], 'TDMINPAI': [], 'TDMAXPAI': [], 'TDNUMRPT': []}
-TD_df = pd.DataFrame(data=TD_data)
-if ('TD' in CT_DEBUG):  print (TD_df)
 #
-# TM - Trial Disease Milestones
-TM_data = {'Row': [], 'STUDYID': [], 'DOMAIN': [], 'MIDSTYPE': [], 'TMDEF': [], 'TMRPT': []}
-TM_df = pd.DataFrame(data=TM_data)
-if ('TM' in CT_DEBUG):  print (TM_df)
+def func_nihpo_domain_xpt (in_builder, in_label, in_target_directory):
+	"""
+	This function writes a domain as a SAS Transport (XPORT) version 5 file named after the domain, straight from the records collected so far (no DataFrame).
+	Variable types, widths and labels come from the schema of the domain.
+	Inputs:
+		in_builder : [Dictionary] : Returned by func_nihpo_domain_builder().
+		in_label : [String] : Dataset label.
+		in_target_directory : [String] : Directory where the .xpt file is written.
+
+	Return:
+		Number of records written.
+
+	To call this function:
+		func_nihpo_domain_xpt(TA_builder, 'Trial Arms (TA) data', '.')
+	"""
+	var_domain = in_builder['domain']
+	dict_columns = func_nihpo_domain_arrays(in_builder)
+	list_variables = PHUSE_SDTM_Schema.func_nihpo_schema_xpt_variables(in_builder['schema'], in_builder['columns'], dict_columns)
+	return PHUSE_XPT.func_nihpo_xpt_write_dataset(os.path.join(in_target_directory, '%s.xpt' % (var_domain)), var_domain, in_label, in_builder['columns'], dict_columns, list_variables)
 #
-# TI - Trial Inclusion/Exclusion Criteria
-TI_data = {'Row': [], 'STUDYID': [], 'DOMAIN': [], 'IETESTCD': [], 'IETEST': [], 'IECAT': [], 'IESCAT': [], 'TIRL': [], 'TIVERS': []}
-TI_df = pd.DataFrame(data=TI_data)
-if ('TI' in CT_DEBUG):  print (TI_df)
 #
-# TS - Trial Summary
-TS_data = {'Row': [], 'STUDYID': [], 'DOMAIN': [], 'TSSEQ': [], 'TSGRPID': [], 'TSPARMCD': [], 'TSPARM': [], 'TSVAL': [], 'TSVALNF': [], 'TSVALCD': [], 'TSVCDREF': [], 'TSVCDVER': []}
-TS_df = pd.DataFrame(data=TS_data)
-if ('TS' in CT_DEBUG):  print (TS_df)
-
+def func_nihpo_te_default_rules (in_epoch):
+	"""
+	This function returns the default rules of an Element without rules in the trial design, based on the first Epoch where the Element appears in TA.
+	Inputs:
+		in_epoch : [String] : Epoch (e.g. 'RUN-IN').
 
+	Return:
+		TESTRL, TEENRL and TEDUR.
 
+	To call this function:
+		func_nihpo_te_default_rules('RUN-IN')
+	"""
+	var_epoch = in_epoch.title()
+	return "Start of %s Epoch" % (var_epoch), "End of %s Epoch" % (var_epoch), ""
+#
+#
+def func_nihpo_domain_hashes (in_sections, in_studyid):
+	"""
+	This function computes the hash of the inputs of each Trial Design domain (see CT_DOMAIN_INPUTS).
+	Inputs:
+		in_sections : [Dictionary] : Sections of the trial design, by name (e.g. 'trial_design_matrix'), with their defaults.
+		in_studyid : [String] : STUDYID.
 
+	Return:
+		Dictionary { domain : SHA-256 hex digest }.
 
-# = = Process TA = =
-var_domain_ta = CT_TRIAL_DESIGN_MATRIX['domain']
-var_number_arms = len(CT_TRIAL_DESIGN_MATRIX['tdm'])
-if (2 in CT_DEBUG):
-	print ("\n\nThere is(are) %d Arm(s) defined for this trial." % (var_number_arms))
-#
-# Loop through each available Arm:
-var_counter_rows = 1
-var_counter_arms = 0			# Reset counter.
-while var_counter_arms < var_number_arms:
-	var_ta_arm = CT_TRIAL_DESIGN_MATRIX['tdm'][var_counter_arms]['arm']
-	var_ta_armcd = CT_TRIAL_DESIGN_MATRIX['tdm'][var_counter_arms]['armcd']
-	if (2 in CT_DEBUG):
-		print ("\n\tProcessing Arm [%s] : [%s]" % (var_ta_arm, var_ta_armcd))
+	To call this function:
+		func_nihpo_domain_hashes({'trial_design_matrix': CT_TRIAL_DESIGN_MATRIX, ..}, 'EX1')
+	"""
+	# Output parameters: anything besides the matrices that changes the .xpt files, including the types and labels of the variables.
+	list_output_parameters = [CT_MANIFEST_VERSION, in_studyid, PHUSE_XPT.CT_XPT_ENCODING, PHUSE_XPT.CT_XPT_SAS_VERSION]
+	#
+	dict_hashes = {}
+	for domain, (list_sections, list_derived_from) in CT_DOMAIN_INPUTS.items():
+		dict_domain_schema = {variable: dict(definition) for variable, definition in dict_sdtm_schema.get(domain, {}).items()}
+		list_inputs = [domain, list_output_parameters, dict_domain_schema, [in_sections[section] for section in list_sections], [dict_hashes[one_domain] for one_domain in list_derived_from]]
+		if (domain == 'TE'):
+			list_inputs.append(CT_TE_INTERACTIVE)
+		dict_hashes[domain] = hashlib.sha256(json.dumps(list_inputs, sort_keys=True, separators=(',', ':')).encode('utf-8')).hexdigest()
 	#
-	var_counter_epochs = 0
-	var_number_epochs = len(CT_TRIAL_DESIGN_MATRIX['tdm'][var_counter_arms]['epochs'])
-	if (2 in CT_DEBUG):
-		print ("\n\t\tThere is(are) %d Epoch(s) defined for this Arm [%s]" % (var_number_epochs, var_ta_arm))
+	return dict_hashes
+#
+#
+def func_nihpo_manifest_read (in_target_directory):
+	"""
+	This function reads the manifest of a previous run: the hash of the inputs, and the size and time of each .xpt file written.
+	Inputs:
+		in_target_directory : [String] : Directory of the .xpt files.
 
+	Return:
+		Dictionary { domain : {'hash', 'size', 'mtime_ns'} }. Empty if there is no (readable) manifest.
 
-	# For each Arm, generate a record for each Epoch:
-	while var_counter_epochs < var_number_epochs:
-		if (2 in CT_DEBUG):
-			print ("\n\t\t\tInside Arm [%d] and Epoch [%d]." % (var_counter_arms, var_counter_epochs))
-		#
-		var_ta_taetord = var_counter_epochs + 1
-		#
-		var_ta_etcd = CT_TRIAL_DESIGN_MATRIX['tdm'][var_counter_arms]['epochs'][var_counter_epochs]['etcd']
-		var_ta_element = CT_TRIAL_DESIGN_MATRIX['tdm'][var_counter_arms]['epochs'][var_counter_epochs]['element']
-		var_ta_tabranch = CT_TRIAL_DESIGN_MATRIX['tdm'][var_counter_arms]['epochs'][var_counter_epochs]['tabranch']
-		var_ta_tatrans = CT_TRIAL_DESIGN_MATRIX['tdm'][var_counter_arms]['epochs'][var_counter_epochs]['tatrans']
-		var_ta_epoch = CT_TRIAL_DESIGN_MATRIX['tdm'][var_counter_arms]['epochs'][var_counter_epochs]['epoch']
-		#
-		# Insert rows to DataFrame:
-		TA_new_row = {'Row': var_counter_rows, 'STUDYID': CT_STUDYID, 'DOMAIN': var_domain_ta, 'ARMCD': var_ta_armcd, 'ARM': var_ta_arm, 'TAETORD': var_ta_taetord, 'ETCD': var_ta_etcd, 'ELEMENT': var_ta_element, 'TABRANCH': var_ta_tabranch, 'TATRANS': var_ta_tatrans, 'EPOCH': var_ta_epoch}
-		TA_df = TA_df.append(TA_new_row, ignore_index=True)
-		#
-		var_counter_rows += 1
-		#
-		var_counter_epochs += 1
-	
-	var_counter_arms += 1
+	To call this function:
+		func_nihpo_manifest_read('.')
+	"""
+	try:
+		with open(os.path.join(in_target_directory, CT_MANIFEST_FILENAME)) as file_manifest:
+			dict_manifest = json.load(file_manifest)
+	except (OSError, ValueError):
+		return {}
+	#
+	if not isinstance(dict_manifest, dict) or (dict_manifest.get('version') != CT_MANIFEST_VERSION):
+		return {}
+	return dict_manifest.get('domains', {})
+#
+#
+def func_nihpo_domains_outdated (in_hashes, in_manifest, in_target_directory):
+	"""
+	This function returns the domains whose .xpt file must be written again: inputs changed, or file missing or changed since the last run.
+	Inputs:
+		in_hashes : [Dictionary] : Returned by func_nihpo_domain_hashes().
+		in_manifest : [Dictionary] : Returned by func_nihpo_manifest_read().
+		in_target_directory : [String] : Directory of the .xpt files.
 
+	Return:
+		Set of domain codes.
 
-# = = Process TE = =
-# TE – Description/Overview
-# A trial design domain that contains the element code that is unique for each element, the element description, and the rules for starting and ending an element.
-# The Trial Elements (TE) dataset contains the definitions of the Elements that appear in the Trial Arms (TA) dataset. An Element may appear multiple times in the Trial Arms table because it appears either 1) in multiple Arms, 2) multiple times within an Arm, or 3) both. However, an Element will appear only once in the Trial Elements table."
+	To call this function:
+		func_nihpo_domains_outdated(dict_domain_hashes, func_nihpo_manifest_read('.'), '.')
+	"""
+	set_outdated = set()
+	for domain, var_hash in in_hashes.items():
+		dict_entry = in_manifest.get(domain, {})
+		try:
+			stat_xpt = os.stat(os.path.join(in_target_directory, '%s.xpt' % (domain)))
+		except OSError:
+			set_outdated.add(domain)
+			continue
+		if (dict_entry.get('hash') != var_hash) or (dict_entry.get('size') != stat_xpt.st_size) or (dict_entry.get('mtime_ns') != stat_xpt.st_mtime_ns):
+			set_outdated.add(domain)
+	#
+	return set_outdated
 #
-# Process
-# a.) Identify distinct Elements in the Trial Design Matrix
-# 	* Make a copy of the TA_df DataFrame.
-temp_TA_df = TA_df.copy(deep=True)
-# 	* Drop a few columns: 
-# 	TA = {'Row': [], 'STUDYID': [], 'DOMAIN': [], 'ARMCD': [], 'ARM': [], 'TAETORD': [], 'ETCD': [], 'ELEMENT': [], 'TABRANCH': [], 'TATRANS': [], 'EPOCH': []}
-# 	TE = {'Row': [], 'STUDYID': [], 'DOMAIN': [], 'ETCD': [], 'ELEMENT': [], 'TESTRL': [], 'TEENRL': [], 'TEDUR': []}
-temp_TA_df = temp_TA_df.drop(columns=['DOMAIN', 'ARMCD', 'ARM', 'TAETORD', 'TABRANCH', 'TATRANS', 'EPOCH'])
-
-# 	* Identify unique rows
-temp_TA_df = temp_TA_df.drop_duplicates(subset=['ETCD', 'ELEMENT'], keep='last')
 #
-var_number_temp_TA_rows = len(temp_TA_df)	# Number of distinct rows in Data Frame.
+def func_nihpo_manifest_write (in_target_directory, in_hashes, in_manifest):
+	"""
+	This function records the hash of the inputs, and the size and time, of every .xpt file of a trial design.
+	Inputs:
+		in_target_directory : [String] : Directory of the .xpt files.
+		in_hashes : [Dictionary] : Returned by func_nihpo_domain_hashes().
+		in_manifest : [Dictionary] : Previous manifest, returned by func_nihpo_manifest_read().
+
+	To call this function:
+		func_nihpo_manifest_write('.', dict_domain_hashes, dict_manifest)
+	"""
+	dict_domains = {}
+	for domain, var_hash in in_hashes.items():
+		stat_xpt = os.stat(os.path.join(in_target_directory, '%s.xpt' % (domain)))
+		dict_domains[domain] = {'hash': var_hash, 'size': stat_xpt.st_size, 'mtime_ns': stat_xpt.st_mtime_ns}
+	#
+	# Write to a temporary file first: an interrupted run leaves the previous manifest (and forces a rebuild), never a partial one.
+	var_manifest_filename = os.path.join(in_target_directory, CT_MANIFEST_FILENAME)
+	with open(var_manifest_filename + '.tmp', 'w') as file_manifest:
+		json.dump({'version': CT_MANIFEST_VERSION, 'domains': dict_domains}, file_manifest, indent=1, sort_keys=True)
+	os.replace(var_manifest_filename + '.tmp', var_manifest_filename)
 #
-if ('TE' in CT_DEBUG): print(temp_TA_df)
 #
-# 	* Collect new values, transfer to TE DataFrame.
-# 	Now, cycle through each distinct TA row:
-var_counter_temp_TA = 1
-while var_counter_temp_TA < var_number_temp_TA_rows:
-	#
-	var_te_etcd = temp_TA_df.iloc[var_counter_temp_TA]['ETCD']
-	var_te_element = temp_TA_df.iloc[var_counter_temp_TA]['ELEMENT']
-	#
-	# b.) For each unique Element, ask User to enter additional fields:
-	print ("\nPlease enter the following values for ETCD = [%s] and ELEMENT = [%s]:" % (var_te_etcd, var_te_element))
-	var_TESTRL = input('Rule for Start of Element: ')	# Expresses rule for beginning Element.
-	var_TEENRL = input('Rule for End of Element: ')		# Expresses rule for ending Element. Either TEENRL or TEDUR must be present for each Element.
-	var_TEDUR = input('Planned Duration of Element: ')	# Planned Duration of Element in ISO 8601 format. Used when the rule for ending the Element is applied after a fixed duration.
+def func_nihpo_generate_trial_design (in_design, in_target_directory):
+	"""
+	This function generates the Trial Design domains (TA, TE, TV, TD, TM, TI, TS) of one trial and writes them as .xpt files.
+	Inputs:
+		in_design : [Dictionary] : Trial design, with the same sections as the constants at the top of this file (see CT_TRIAL_DESIGN below).
+		in_target_directory : [String] : Directory where the .xpt files are written.
+
+	Return:
+		True if the files were written. False if the trial design has an error.
+
+	To call this function:
+		func_nihpo_generate_trial_design(CT_TRIAL_DESIGN, '.')
+	"""
+	# QA: Validate the trial design first: required keys, types, and references between matrices (e.g. TV ARMCD must be an Arm of TA). <<
+	list_design_errors = PHUSE_Trial_Design_Validator.func_nihpo_design_validate(validator_trial_design, in_design)
+	if (len(list_design_errors) > 0):
+		print ("There is(are) %d error(s) in the trial design [%s]:" % (len(list_design_errors), in_design.get('studyid') if isinstance(in_design, dict) else ''))
+		for var_design_error in list_design_errors:
+			print ("\t%s" % (var_design_error))
+		return False
 	#
-	# c.) Write row to DataFrame:
-	TE_new_row = {'Row': var_counter_temp_TA, 'STUDYID': CT_STUDYID, 'DOMAIN': 'TE', 'ETCD': var_te_etcd, 'ELEMENT': var_te_element, 'TESTRL': var_TESTRL, 'TEENRL': var_TEENRL, 'TEDUR': var_TEDUR}
-	TE_df = TE_df.append(TE_new_row, ignore_index=True)
+	os.makedirs(in_target_directory, exist_ok=True)
+	var_studyid = in_design['studyid']
+	dict_trial_design_matrix = in_design['trial_design_matrix']
+	dict_trial_element_matrix = in_design.get('trial_element_matrix', {"domain": "TE", "elements": []})
+	dict_trial_visit_matrix = in_design.get('trial_visit_matrix', {"domain": "TV", "visits": []})
+	dict_trial_disease_assessment_matrix = in_design.get('trial_disease_assessment_matrix', {"domain": "TD", "assessments": []})
+	dict_trial_disease_milestone_matrix = in_design.get('trial_disease_milestone_matrix', {"domain": "TM", "milestones": []})
+	dict_trial_inclusion_exclusion_matrix = in_design.get('trial_inclusion_exclusion_matrix', {"domain": "TI", "criteria": []})
+	dict_trial_summary_matrix = in_design.get('trial_summary_matrix', {"domain": "TS", "item": []})
 	#
-	var_counter_temp_TA += 1
-
-
-# = = Process TV = =
-# Although the general structure of the Trial Visits dataset is "One Record per Planned Visit per Arm", for many clinical trials, particularly blinded clinical trials, the schedule of Visits is the same for all Arms, and the structure of the Trial Visits dataset will be "One Record per Planned Visit"
-var_domain_tv = CT_TRIAL_VISIT_MATRIX['domain']
-var_number_visits = len(CT_TRIAL_VISIT_MATRIX['visits'])
-if (2 in CT_DEBUG):
-	print ("\n\nThere is(are) %d Visit(s) defined for this trial." % (var_number_visits))
-#
-# Loop through each available Visit:
-var_counter_rows = 1
-var_counter_visits = 0
-while var_counter_visits < var_number_visits:
-	var_tv_visitnum = CT_TRIAL_VISIT_MATRIX['visits'][var_counter_visits]['visitnum']
-	var_tv_visit = CT_TRIAL_VISIT_MATRIX['visits'][var_counter_visits]['visit']
-	var_tv_visitdy = CT_TRIAL_VISIT_MATRIX['visits'][var_counter_visits]['visitdy']
-	var_tv_armcd = CT_TRIAL_VISIT_MATRIX['visits'][var_counter_visits]['armcd']
-	var_tv_arm = CT_TRIAL_VISIT_MATRIX['visits'][var_counter_visits]['arm']
-	var_tv_tvstrl = CT_TRIAL_VISIT_MATRIX['visits'][var_counter_visits]['tvstrl']
-	var_tv_tvenrl = CT_TRIAL_VISIT_MATRIX['visits'][var_counter_visits]['tvenrl']
+	# = = Incremental build = =
+	dict_domain_hashes = func_nihpo_domain_hashes({'trial_design_matrix': dict_trial_design_matrix, 'trial_element_matrix': dict_trial_element_matrix, 'trial_visit_matrix': dict_trial_visit_matrix,
+		'trial_disease_assessment_matrix': dict_trial_disease_assessment_matrix, 'trial_disease_milestone_matrix': dict_trial_disease_milestone_matrix,
+		'trial_inclusion_exclusion_matrix': dict_trial_inclusion_exclusion_matrix, 'trial_summary_matrix': dict_trial_summary_matrix}, var_studyid)
+	dict_manifest = func_nihpo_manifest_read(in_target_directory)
+	if CT_INCREMENTAL_BUILD:
+		set_domains_to_write = func_nihpo_domains_outdated(dict_domain_hashes, dict_manifest, in_target_directory)
+		if CT_TE_INTERACTIVE:
+			set_domains_to_write.add('TE')		# Answers typed in are not part of the inputs.
+	else:
+		set_domains_to_write = set(dict_domain_hashes)
 	#
-	if ('TV' in CT_DEBUG):
-		print ("\n\tProcessing Visit [%s] : [%s]" % (var_tv_visitnum, var_tv_visit))
+	set_domains_to_build = set(set_domains_to_write)
+	for domain in list(set_domains_to_write):
+		set_domains_to_build.update(CT_DOMAIN_BUILD_NEEDS.get(domain, []))
 	#
-	# Insert rows to DataFrame:
-	TV_new_row =  {'Row': var_counter_rows, 'STUDYID': CT_STUDYID, 'DOMAIN': var_domain_tv, 'VISITNUM': var_counter_visits, 'VISIT': var_tv_visit, 'VISITDY': var_tv_visitdy, 'ARMCD': var_tv_armcd, 'ARM': var_tv_arm, 'TVSTRL': var_tv_tvstrl, 'TVENRL': var_tv_tvenrl}
-	TV_df = TV_df.append(TV_new_row, ignore_index=True)
+	if CT_INCREMENTAL_BUILD:
+		print ("Incremental build in [%s]: rewriting %s; up to date: %s." % (in_target_directory, sorted(set_domains_to_write) or 'nothing', sorted(set(dict_domain_hashes) - set_domains_to_write) or 'nothing'))
 	#
-	var_counter_visits += 1
-	var_counter_rows += 1
-
-
-# = = Process TD = =
-var_domain_td = CT_TRIAL_DISEASE_ASSESSMENT_MATRIX['domain']
-var_number_assessments = len(CT_TRIAL_DISEASE_ASSESSMENT_MATRIX['assessments'])
-if (2 in CT_DEBUG):
-	print ("\n\nThere is(are) %d Assessment(s) defined for this trial." % (var_number_assessments))
-#
-# Loop through each available Assesment:
-var_counter_rows = 1
-var_counter_assessments = 0
-while var_counter_assessments < var_number_assessments:
-	var_tv_tdorder = CT_TRIAL_DISEASE_ASSESSMENT_MATRIX['assessments'][var_counter_assessments]['tdorder']
-	var_tv_tdancvar = CT_TRIAL_DISEASE_ASSESSMENT_MATRIX['assessments'][var_counter_assessments]['tdancvar']
-	var_tv_tdstoff = CT_TRIAL_DISEASE_ASSESSMENT_MATRIX['assessments'][var_counter_assessments]['tdstoff']
-	var_tv_tdtgtpai = CT_TRIAL_DISEASE_ASSESSMENT_MATRIX['assessments'][var_counter_assessments]['tdtgtpai']
-	var_tv_tdminpai = CT_TRIAL_DISEASE_ASSESSMENT_MATRIX['assessments'][var_counter_assessments]['tdminpai']
-	var_tv_tdmaxpai = CT_TRIAL_DISEASE_ASSESSMENT_MATRIX['assessments'][var_counter_assessments]['tdmaxpai']
-	var_tv_tdnumrpt = CT_TRIAL_DISEASE_ASSESSMENT_MATRIX['assessments'][var_counter_assessments]['tdnumrpt']
 	#
-	if ('TD' in CT_DEBUG):
-		print ("\n\tProcessing Assessment [%s] : [%s]" % (var_tv_visitnum, var_tv_visit))
+	# = = Domain builders = =
+	# Records are collected as column lists; each DataFrame is created once, after its last record (see func_nihpo_domain_dataframe).
+	# TA - Trial Arms
+	TA_builder = func_nihpo_domain_builder('TA', ['Row', 'STUDYID', 'DOMAIN', 'ARMCD', 'ARM', 'TAETORD', 'ETCD', 'ELEMENT', 'TABRANCH', 'TATRANS', 'EPOCH'], {'Row': np.int32})
 	#
-	# Insert rows to DataFrame:
-	TD_new_row =  {'Row': var_counter_rows, 'STUDYID': CT_STUDYID, 'DOMAIN': var_domain_td, 'TDORDER': var_tv_tdorder, 'TDANCVAR': var_tv_tdancvar, 'TDSTOFF': var_tv_tdstoff, 'TDTGTPAI': var_tv_tdtgtpai, 'TDMINPAI': var_tv_tdminpai, 'TDMAXPAI': var_tv_tdmaxpai, 'TDNUMRPT': var_tv_tdnumrpt}
-	TD_df = TD_df.append(TD_new_row, ignore_index=True)
+	# TE - Trial Elements
+	TE_builder = func_nihpo_domain_builder('TE', ['Row', 'STUDYID', 'DOMAIN', 'ETCD', 'ELEMENT', 'TESTRL', 'TEENRL', 'TEDUR'], {'Row': np.int32})
 	#
-	var_counter_assessments += 1
-	var_counter_rows += 1
-
-
-# = = Process TM = =
-var_domain_tm = CT_TRIAL_DISEASE_MILESTONE_MATRIX['domain']
-var_number_milestones = len(CT_TRIAL_DISEASE_MILESTONE_MATRIX['milestones'])
-if ('TM' in CT_DEBUG):
-	print ("\n\nThere is(are) %d Milestone(s) defined for this trial." % (var_number_milestones))
-#
-# Loop through each available Milestone:
-var_counter_rows = 1
-var_counter_milestones = 0
-while var_counter_milestones < var_number_milestones:
-	var_tm_midstype = CT_TRIAL_DISEASE_MILESTONE_MATRIX['milestones'][var_counter_milestones]['midstype']
-	var_tm_tmdef = CT_TRIAL_DISEASE_MILESTONE_MATRIX['milestones'][var_counter_milestones]['tmdef']
-	var_tm_tmrpt = CT_TRIAL_DISEASE_MILESTONE_MATRIX['milestones'][var_counter_milestones]['tmrpt']
+	# TV - Trial Visits
+	TV_builder = func_nihpo_domain_builder('TV', ['Row', 'STUDYID', 'DOMAIN', 'VISITNUM', 'VISIT', 'VISITDY', 'ARMCD', 'ARM', 'TVSTRL', 'TVENRL'], {'Row': np.int32})
 	#
-	if ('TM' in CT_DEBUG):
-		print ("\n\tProcessing Disease Milestone [%s]" % (var_tm_midstype))
+	# TD - Trial Disease Assessments
+	TD_builder = func_nihpo_domain_builder('TD', ['Row', 'STUDYID', 'DOMAIN', 'TDORDER', 'TDANCVAR', 'TDSTOFF', 'TDTGTPAI', 'TDMINPAI', 'TDMAXPAI', 'TDNUMRPT'], {'Row': np.int32})
 	#
-	# Insert rows to DataFrame:
-	TM_new_row =  {'Row': var_counter_rows, 'STUDYID': CT_STUDYID, 'DOMAIN': var_domain_tm, 'MIDSTYPE': var_tm_midstype, 'TMDEF': var_tm_tmdef, 'TMRPT': var_tm_tmrpt}
-	TM_df = TM_df.append(TM_new_row, ignore_index=True)
+	# TM - Trial Disease Milestones
+	TM_builder = func_nihpo_domain_builder('TM', ['Row', 'STUDYID', 'DOMAIN', 'MIDSTYPE', 'TMDEF', 'TMRPT'], {'Row': np.int32})
 	#
-	var_counter_milestones += 1
-	var_counter_rows += 1
-
-
-# = = Process TI = =
-var_domain_ti = CT_TRIAL_INCLUSION_EXCLUSION_MATRIX['domain']
-var_number_criteria = len(CT_TRIAL_INCLUSION_EXCLUSION_MATRIX['criteria'])
-if ('TI' in CT_DEBUG):
-	print ("\n\nThere is(are) %d Inclusion / Exclusion Criteria defined for this trial." % (var_number_criteria))
-#
-# Loop through each available Inclusion / Exclusion Criteria:
-var_counter_rows = 1
-var_counter_criteria = 0
-while var_counter_criteria < var_number_criteria:
-	var_ti_ietestcd = CT_TRIAL_INCLUSION_EXCLUSION_MATRIX['criteria'][var_counter_criteria]['ietestcd']
-	var_ti_ietest = CT_TRIAL_INCLUSION_EXCLUSION_MATRIX['criteria'][var_counter_criteria]['ietest']
-	var_ti_iecat = CT_TRIAL_INCLUSION_EXCLUSION_MATRIX['criteria'][var_counter_criteria]['iecat']
-	var_ti_iescat = CT_TRIAL_INCLUSION_EXCLUSION_MATRIX['criteria'][var_counter_criteria]['iescat']
-	var_ti_tirl = CT_TRIAL_INCLUSION_EXCLUSION_MATRIX['criteria'][var_counter_criteria]['tirl']
-	var_ti_tivers = CT_TRIAL_INCLUSION_EXCLUSION_MATRIX['criteria'][var_counter_criteria]['tivers']
+	# TI - Trial Inclusion/Exclusion Criteria
+	TI_builder = func_nihpo_domain_builder('TI', ['Row', 'STUDYID', 'DOMAIN', 'IETESTCD', 'IETEST', 'IECAT', 'IESCAT', 'TIRL', 'TIVERS'], {'Row': np.int32})
 	#
-	if ('TD' in CT_DEBUG):
-		print ("\n\tProcessing Inclusion / Exclusion Criteria [%s] : [%s]" % (var_tv_visitnum, var_tv_visit))
+	# TS - Trial Summary
+	TS_builder = func_nihpo_domain_builder('TS', ['Row', 'STUDYID', 'DOMAIN', 'TSSEQ', 'TSGRPID', 'TSPARMCD', 'TSPARM', 'TSVAL', 'TSVALNF', 'TSVALCD', 'TSVCDREF', 'TSVCDVER'], {'Row': np.int32})
+
+
+
+
+
+	# = = Process TA = =
+	if ('TA' in set_domains_to_build):
+		var_domain_ta = dict_trial_design_matrix['domain']
+		var_number_arms = len(dict_trial_design_matrix['tdm'])
+		if (2 in CT_DEBUG):
+			print ("\n\nThere is(are) %d Arm(s) defined for this trial." % (var_number_arms))
+		#
+		# Loop through each available Arm:
+		var_counter_rows = 1
+		var_counter_arms = 0			# Reset counter.
+		while var_counter_arms < var_number_arms:
+			var_ta_arm = dict_trial_design_matrix['tdm'][var_counter_arms]['arm']
+			var_ta_armcd = dict_trial_design_matrix['tdm'][var_counter_arms]['armcd']
+			if (2 in CT_DEBUG):
+				print ("\n\tProcessing Arm [%s] : [%s]" % (var_ta_arm, var_ta_armcd))
+			#
+			var_counter_epochs = 0
+			var_number_epochs = len(dict_trial_design_matrix['tdm'][var_counter_arms]['epochs'])
+			if (2 in CT_DEBUG):
+				print ("\n\t\tThere is(are) %d Epoch(s) defined for this Arm [%s]" % (var_number_epochs, var_ta_arm))
+
+
+			# For each Arm, generate a record for each Epoch:
+			while var_counter_epochs < var_number_epochs:
+				if (2 in CT_DEBUG):
+					print ("\n\t\t\tInside Arm [%d] and Epoch [%d]." % (var_counter_arms, var_counter_epochs))
+				#
+				var_ta_taetord = var_counter_epochs + 1
+				#
+				var_ta_etcd = dict_trial_design_matrix['tdm'][var_counter_arms]['epochs'][var_counter_epochs]['etcd']
+				var_ta_element = dict_trial_design_matrix['tdm'][var_counter_arms]['epochs'][var_counter_epochs]['element']
+				var_ta_tabranch = dict_trial_design_matrix['tdm'][var_counter_arms]['epochs'][var_counter_epochs]['tabranch']
+				var_ta_tatrans = dict_trial_design_matrix['tdm'][var_counter_arms]['epochs'][var_counter_epochs]['tatrans']
+				var_ta_epoch = dict_trial_design_matrix['tdm'][var_counter_arms]['epochs'][var_counter_epochs]['epoch']
+				#
+				# Insert rows to DataFrame:
+				TA_new_row = {'Row': var_counter_rows, 'STUDYID': var_studyid, 'DOMAIN': var_domain_ta, 'ARMCD': var_ta_armcd, 'ARM': var_ta_arm, 'TAETORD': var_ta_taetord, 'ETCD': var_ta_etcd, 'ELEMENT': var_ta_element, 'TABRANCH': var_ta_tabranch, 'TATRANS': var_ta_tatrans, 'EPOCH': var_ta_epoch}
+				func_nihpo_domain_add_record(TA_builder, TA_new_row)
+				#
+				var_counter_rows += 1
+				#
+				var_counter_epochs += 1
+	
+			var_counter_arms += 1
+
+
+		#
+		TA_df = func_nihpo_domain_dataframe(TA_builder)
+		if ('TA' in CT_DEBUG):  print (TA_df)
+
+
+	# = = Process TE = =
+	if ('TE' in set_domains_to_build):
+		# TE – Description/Overview
+		# A trial design domain that contains the element code that is unique for each element, the element description, and the rules for starting and ending an element.
+		# The Trial Elements (TE) dataset contains the definitions of the Elements that appear in the Trial Arms (TA) dataset. An Element may appear multiple times in the Trial Arms table because it appears either 1) in multiple Arms, 2) multiple times within an Arm, or 3) both. However, an Element will appear only once in the Trial Elements table."
+		#
+		# Process
+		# a.) Identify distinct Elements in the Trial Design Matrix
+		# 	* Make a copy of the TA_df DataFrame.
+		temp_TA_df = TA_df.copy(deep=True)
+		# 	* Drop a few columns: 
+		# 	TA = {'Row': [], 'STUDYID': [], 'DOMAIN': [], 'ARMCD': [], 'ARM': [], 'TAETORD': [], 'ETCD': [], 'ELEMENT': [], 'TABRANCH': [], 'TATRANS': [], 'EPOCH': []}
+		# 	TE = {'Row': [], 'STUDYID': [], 'DOMAIN': [], 'ETCD': [], 'ELEMENT': [], 'TESTRL': [], 'TEENRL': [], 'TEDUR': []}
+		temp_TA_df = temp_TA_df.drop(columns=['DOMAIN', 'ARMCD', 'ARM', 'TAETORD', 'TABRANCH', 'TATRANS'])
+
+		# 	* Identify unique rows. Keep the first Epoch where each Element appears (used for default rules):
+		temp_TA_df = temp_TA_df.drop_duplicates(subset=['ETCD', 'ELEMENT'], keep='first')
+		#
+		var_number_temp_TA_rows = len(temp_TA_df)	# Number of distinct rows in Data Frame.
+		#
+		if ('TE' in CT_DEBUG): print(temp_TA_df)
+		#
+		# Element rules from the trial design, by Element code:
+		dict_te_rules = {}
+		for dict_element in dict_trial_element_matrix['elements']:
+			dict_te_rules[dict_element['etcd']] = dict_element
+		#
+		# 	* Collect new values, transfer to TE DataFrame.
+		# 	Now, cycle through each distinct TA row:
+		var_counter_temp_TA = 0
+		while var_counter_temp_TA < var_number_temp_TA_rows:
+			#
+			var_te_etcd = temp_TA_df.iloc[var_counter_temp_TA]['ETCD']
+			var_te_element = temp_TA_df.iloc[var_counter_temp_TA]['ELEMENT']
+			var_te_epoch = temp_TA_df.iloc[var_counter_temp_TA]['EPOCH']
+			#
+			# b.) For each unique Element, use the rules of the trial design (or ask User to enter them, if CT_TE_INTERACTIVE is set):
+			var_TESTRL, var_TEENRL, var_TEDUR = func_nihpo_te_default_rules(var_te_epoch)
+			if var_te_etcd in dict_te_rules:
+				var_TESTRL = dict_te_rules[var_te_etcd].get('testrl', var_TESTRL)	# Expresses rule for beginning Element.
+				var_TEENRL = dict_te_rules[var_te_etcd].get('teenrl', var_TEENRL)	# Expresses rule for ending Element. Either TEENRL or TEDUR must be present for each Element.
+				var_TEDUR = dict_te_rules[var_te_etcd].get('tedur', var_TEDUR)		# Planned Duration of Element in ISO 8601 format. Used when the rule for ending the Element is applied after a fixed duration.
+			elif CT_TE_INTERACTIVE:
+				print ("\nPlease enter the following values for ETCD = [%s] and ELEMENT = [%s]:" % (var_te_etcd, var_te_element))
+				var_TESTRL = input('Rule for Start of Element: ')
+				var_TEENRL = input('Rule for End of Element: ')
+				var_TEDUR = input('Planned Duration of Element: ')
+			#
+			# c.) Write row to DataFrame:
+			TE_new_row = {'Row': var_counter_temp_TA + 1, 'STUDYID': var_studyid, 'DOMAIN': 'TE', 'ETCD': var_te_etcd, 'ELEMENT': var_te_element, 'TESTRL': var_TESTRL, 'TEENRL': var_TEENRL, 'TEDUR': var_TEDUR}
+			func_nihpo_domain_add_record(TE_builder, TE_new_row)
+			#
+			var_counter_temp_TA += 1
+		#
+		if ('TE' in CT_DEBUG):  print (func_nihpo_domain_dataframe(TE_builder))
 	#
-	# Insert rows to DataFrame:
-	TI_new_row =  {'Row': var_counter_rows, 'STUDYID': CT_STUDYID, 'DOMAIN': var_domain_ti, 'IETESTCD': var_ti_ietestcd, 'IETEST': var_ti_ietest, 'IECAT': var_ti_iecat, 'IESCAT': var_ti_iescat, 'TIRL': var_ti_tirl, 'TIVERS': var_ti_tivers}
-	TI_df = TI_df.append(TI_new_row, ignore_index=True)
 	#
-	var_counter_criteria += 1
-	var_counter_rows += 1
+	# = = Process TV = =
+	if ('TV' in set_domains_to_build):
+		# Although the general structure of the Trial Visits dataset is "One Record per Planned Visit per Arm", for many clinical trials, particularly blinded clinical trials, the schedule of Visits is the same for all Arms, and the structure of the Trial Visits dataset will be "One Record per Planned Visit"
+		var_domain_tv = dict_trial_visit_matrix['domain']
+		var_number_visits = len(dict_trial_visit_matrix['visits'])
+		if (2 in CT_DEBUG):
+			print ("\n\nThere is(are) %d Visit(s) defined for this trial." % (var_number_visits))
+		#
+		# Loop through each available Visit:
+		var_counter_rows = 1
+		var_counter_visits = 0
+		while var_counter_visits < var_number_visits:
+			var_tv_visitnum = dict_trial_visit_matrix['visits'][var_counter_visits]['visitnum']
+			var_tv_visit = dict_trial_visit_matrix['visits'][var_counter_visits]['visit']
+			var_tv_visitdy = dict_trial_visit_matrix['visits'][var_counter_visits]['visitdy']
+			var_tv_armcd = dict_trial_visit_matrix['visits'][var_counter_visits]['armcd']
+			var_tv_arm = dict_trial_visit_matrix['visits'][var_counter_visits]['arm']
+			var_tv_tvstrl = dict_trial_visit_matrix['visits'][var_counter_visits]['tvstrl']
+			var_tv_tvenrl = dict_trial_visit_matrix['visits'][var_counter_visits]['tvenrl']
+			#
+			if ('TV' in CT_DEBUG):
+				print ("\n\tProcessing Visit [%s] : [%s]" % (var_tv_visitnum, var_tv_visit))
+			#
+			# Insert rows to DataFrame:
+			TV_new_row =  {'Row': var_counter_rows, 'STUDYID': var_studyid, 'DOMAIN': var_domain_tv, 'VISITNUM': var_tv_visitnum, 'VISIT': var_tv_visit, 'VISITDY': var_tv_visitdy, 'ARMCD': var_tv_armcd, 'ARM': var_tv_arm, 'TVSTRL': var_tv_tvstrl, 'TVENRL': var_tv_tvenrl}
+			func_nihpo_domain_add_record(TV_builder, TV_new_row)
+			#
+			var_counter_visits += 1
+			var_counter_rows += 1
 
 
-# = = Process TS = =
-"""
-TSSEQ
-TSGRPID
-TSPARMCD
-TSPARM
-TSVAL
-TSVALNF
-TSVALCD
-TSVCDREF
-TSVCDVER
-"""
+		#
+		if ('TV' in CT_DEBUG):  print (func_nihpo_domain_dataframe(TV_builder))
+		#
+		# Planned Visit windows: TVSTRL/TVENRL rules are compiled once into minutes after the start of each Arm (see PHUSE_Visit_Schedule.py).
+		schedule_visits, list_schedule_errors = PHUSE_Visit_Schedule.func_nihpo_visit_schedule_compile(dict_trial_design_matrix['tdm'], dict(zip(TE_builder['data']['ETCD'], TE_builder['data']['TEDUR'])), dict_trial_visit_matrix['visits'])
+		for var_schedule_error in list_schedule_errors:
+			print ("Warning: Visit schedule: %s" % (var_schedule_error))
+		if ('TV' in CT_DEBUG):
+			for var_arm, var_visitnum, var_visit, var_start, var_end in zip(schedule_visits['visit_arm'], schedule_visits['visitnum'], schedule_visits['visit'], schedule_visits['start'], schedule_visits['end']):
+				print ("\tArm [%s] Visit [%s] %s: minutes %d to %d after start of Arm." % (schedule_visits['arms'][var_arm], var_visitnum, var_visit, var_start, var_end))
+
+
+	# = = Process TD = =
+	if ('TD' in set_domains_to_build):
+		var_domain_td = dict_trial_disease_assessment_matrix['domain']
+		var_number_assessments = len(dict_trial_disease_assessment_matrix['assessments'])
+		if (2 in CT_DEBUG):
+			print ("\n\nThere is(are) %d Assessment(s) defined for this trial." % (var_number_assessments))
+		#
+		# Loop through each available Assesment:
+		var_counter_rows = 1
+		var_counter_assessments = 0
+		while var_counter_assessments < var_number_assessments:
+			var_tv_tdorder = dict_trial_disease_assessment_matrix['assessments'][var_counter_assessments]['tdorder']
+			var_tv_tdancvar = dict_trial_disease_assessment_matrix['assessments'][var_counter_assessments]['tdancvar']
+			var_tv_tdstoff = dict_trial_disease_assessment_matrix['assessments'][var_counter_assessments]['tdstoff']
+			var_tv_tdtgtpai = dict_trial_disease_assessment_matrix['assessments'][var_counter_assessments]['tdtgtpai']
+			var_tv_tdminpai = dict_trial_disease_assessment_matrix['assessments'][var_counter_assessments]['tdminpai']
+			var_tv_tdmaxpai = dict_trial_disease_assessment_matrix['assessments'][var_counter_assessments]['tdmaxpai']
+			var_tv_tdnumrpt = dict_trial_disease_assessment_matrix['assessments'][var_counter_assessments]['tdnumrpt']
+			#
+			if ('TD' in CT_DEBUG):
+				print ("\n\tProcessing Assessment [%s] : [%s]" % (var_tv_tdorder, var_tv_tdancvar))
+			#
+			# Insert rows to DataFrame:
+			TD_new_row =  {'Row': var_counter_rows, 'STUDYID': var_studyid, 'DOMAIN': var_domain_td, 'TDORDER': var_tv_tdorder, 'TDANCVAR': var_tv_tdancvar, 'TDSTOFF': var_tv_tdstoff, 'TDTGTPAI': var_tv_tdtgtpai, 'TDMINPAI': var_tv_tdminpai, 'TDMAXPAI': var_tv_tdmaxpai, 'TDNUMRPT': var_tv_tdnumrpt}
+			func_nihpo_domain_add_record(TD_builder, TD_new_row)
+			#
+			var_counter_assessments += 1
+			var_counter_rows += 1
 
 
+		#
+		if ('TD' in CT_DEBUG):  print (func_nihpo_domain_dataframe(TD_builder))
+		#
+		# Planned disease assessments: ISO 8601 durations are parsed once, into days after each subject's anchor date (see PHUSE_Visit_Schedule.py).
+		schedule_assessments, list_assessment_errors = PHUSE_Visit_Schedule.func_nihpo_assessment_schedule_compile(dict_trial_disease_assessment_matrix['assessments'])
+		for var_assessment_error in list_assessment_errors:
+			print ("Warning: Disease assessment schedule: %s" % (var_assessment_error))
+		if ('TD' in CT_DEBUG):
+			for var_tdorder in dict.fromkeys(schedule_assessments['tdorder']):
+				array_block = (schedule_assessments['tdorder'] == var_tdorder)
+				print ("\tAssessment block [%s]: %d assessments, planned on days %s after %s." % (var_tdorder, array_block.sum(), schedule_assessments['offset'][array_block].tolist(), schedule_assessments['anchor'][array_block][0]))
 
 
+	# = = Process TM = =
+	if ('TM' in set_domains_to_build):
+		var_domain_tm = dict_trial_disease_milestone_matrix['domain']
+		var_number_milestones = len(dict_trial_disease_milestone_matrix['milestones'])
+		if ('TM' in CT_DEBUG):
+			print ("\n\nThere is(are) %d Milestone(s) defined for this trial." % (var_number_milestones))
+		#
+		# Loop through each available Milestone:
+		var_counter_rows = 1
+		var_counter_milestones = 0
+		while var_counter_milestones < var_number_milestones:
+			var_tm_midstype = dict_trial_disease_milestone_matrix['milestones'][var_counter_milestones]['midstype']
+			var_tm_tmdef = dict_trial_disease_milestone_matrix['milestones'][var_counter_milestones]['tmdef']
+			var_tm_tmrpt = dict_trial_disease_milestone_matrix['milestones'][var_counter_milestones]['tmrpt']
+			#
+			if ('TM' in CT_DEBUG):
+				print ("\n\tProcessing Disease Milestone [%s]" % (var_tm_midstype))
+			#
+			# Insert rows to DataFrame:
+			TM_new_row =  {'Row': var_counter_rows, 'STUDYID': var_studyid, 'DOMAIN': var_domain_tm, 'MIDSTYPE': var_tm_midstype, 'TMDEF': var_tm_tmdef, 'TMRPT': var_tm_tmrpt}
+			func_nihpo_domain_add_record(TM_builder, TM_new_row)
+			#
+			var_counter_milestones += 1
+			var_counter_rows += 1
+
+
+		#
+		if ('TM' in CT_DEBUG):  print (func_nihpo_domain_dataframe(TM_builder))
+
+
+	# = = Process TI = =
+	if ('TI' in set_domains_to_build):
+		var_domain_ti = dict_trial_inclusion_exclusion_matrix['domain']
+		var_number_criteria = len(dict_trial_inclusion_exclusion_matrix['criteria'])
+		if ('TI' in CT_DEBUG):
+			print ("\n\nThere is(are) %d Inclusion / Exclusion Criteria defined for this trial." % (var_number_criteria))
+		#
+		# Loop through each available Inclusion / Exclusion Criteria:
+		var_counter_rows = 1
+		var_counter_criteria = 0
+		while var_counter_criteria < var_number_criteria:
+			var_ti_ietestcd = dict_trial_inclusion_exclusion_matrix['criteria'][var_counter_criteria]['ietestcd']
+			var_ti_ietest = dict_trial_inclusion_exclusion_matrix['criteria'][var_counter_criteria]['ietest']
+			var_ti_iecat = dict_trial_inclusion_exclusion_matrix['criteria'][var_counter_criteria]['iecat']
+			var_ti_iescat = dict_trial_inclusion_exclusion_matrix['criteria'][var_counter_criteria]['iescat']
+			var_ti_tirl = dict_trial_inclusion_exclusion_matrix['criteria'][var_counter_criteria]['tirl']
+			var_ti_tivers = dict_trial_inclusion_exclusion_matrix['criteria'][var_counter_criteria]['tivers']
+			#
+			if ('TI' in CT_DEBUG):
+				print ("\n\tProcessing Inclusion / Exclusion Criteria [%s] : [%s]" % (var_ti_ietestcd, var_ti_ietest))
+			#
+			# Insert rows to DataFrame:
+			TI_new_row =  {'Row': var_counter_rows, 'STUDYID': var_studyid, 'DOMAIN': var_domain_ti, 'IETESTCD': var_ti_ietestcd, 'IETEST': var_ti_ietest, 'IECAT': var_ti_iecat, 'IESCAT': var_ti_iescat, 'TIRL': var_ti_tirl, 'TIVERS': var_ti_tivers}
+			func_nihpo_domain_add_record(TI_builder, TI_new_row)
+			#
+			var_counter_criteria += 1
+			var_counter_rows += 1
+
+
+		#
+		if ('TI' in CT_DEBUG):  print (func_nihpo_domain_dataframe(TI_builder))
+
+
+	# = = Process TS = =
+	if ('TS' in set_domains_to_build):
+		"""
+		TSSEQ
+		TSGRPID
+		TSPARMCD
+		TSPARM
+		TSVAL
+		TSVALNF
+		TSVALCD
+		TSVCDREF
+		TSVCDVER
+		"""
+
+
+
+
+
+		"""
+
+		var_domain_<..> = CT_<..>_MATRIX['domain']
+		var_number_<..> = len(CT_<..>_MATRIX['visits'])
+		if ('<Domain>' in CT_DEBUG):
+			print ("\n\nThere is(are) %d <..> (s) defined for this trial." % (var_number_<..>))
+		#
+		# Loop through each available <..>:
+		var_counter_rows = 1
+		var_counter_<..> = 0
+		while var_counter_<..> < var_number_<..>:
+			var_<Domain>_<..> = CT_<..>_MATRIX['assessments'][var_counter_<..>]['<..>']
+			#
+			if ('TD' in CT_DEBUG):
+				print ("\n\tProcessing Visit [%s] : [%s]" % (var_tv_visitnum, var_tv_visit))
+			#
+			# Insert rows to DataFrame:
+			<Domain>_new_row =  {'Row': var_counter_rows, 'STUDYID': var_studyid, 'DOMAIN': var_domain_<..>, ...}
+			func_nihpo_domain_add_record(<Domain>_builder, <Domain>_new_row)
+			#
+			var_counter_<..> += 1
+			var_counter_rows += 1
+
+		"""
+
+
+		#
+		if ('TS' in CT_DEBUG):  print (func_nihpo_domain_dataframe(TS_builder))
 
-"""
 
-var_domain_<..> = CT_<..>_MATRIX['domain']
-var_number_<..> = len(CT_<..>_MATRIX['visits'])
-if ('<Domain>' in CT_DEBUG):
-	print ("\n\nThere is(are) %d <..> (s) defined for this trial." % (var_number_<..>))
-#
-# Loop through each available <..>:
-var_counter_rows = 1
-var_counter_<..> = 0
-while var_counter_<..> < var_number_<..>:
-	var_<Domain>_<..> = CT_<..>_MATRIX['assessments'][var_counter_<..>]['<..>']
 	#
-	if ('TD' in CT_DEBUG):
-		print ("\n\tProcessing Visit [%s] : [%s]" % (var_tv_visitnum, var_tv_visit))
+	# = Generate SAS files: = =
+	# The SAS Transport (XPORT) format only supports two kinds of data: numeric ("Num" variables, and the NumPy typed columns of each builder) or character (all other columns).
+	# SAS variable names are limited to 8 characters: PHUSE_XPT upper-cases and truncates the column names.
+	for var_domain_builder, var_domain_label in [(TA_builder, 'Trial Arms (TA) data'), (TE_builder, 'Trial Elements (TE) data'), (TV_builder, 'Trial Visits (TV) data'),
+		(TD_builder, 'Trial Disease Assessments (TD) data'), (TM_builder, 'Trial Disease Milestones (TM) data'), (TI_builder, 'Trial Inc/Exc Criteria (TI) data'),
+		(TS_builder, 'Trial Summary (TS) data')]:
+		if (var_domain_builder['domain'] in set_domains_to_write):
+			func_nihpo_domain_xpt(var_domain_builder, var_domain_label, in_target_directory)
 	#
-	# Insert rows to DataFrame:
-	TD_new_row =  {'Row': var_counter_rows, 'STUDYID': CT_STUDYID, 'DOMAIN': var_domain_<..>, ...}
-	TD_df = TV_df.append(TD_new_row, ignore_index=True)
+	# = Round-trip check of the SAS files: = =
+	var_verified = True
+	if CT_XPT_VERIFY:
+		for var_domain_builder in [TA_builder, TE_builder, TV_builder, TD_builder, TM_builder, TI_builder, TS_builder]:
+			if (var_domain_builder['domain'] not in set_domains_to_write):
+				continue
+			var_xpt_filename = os.path.join(in_target_directory, '%s.xpt' % (var_domain_builder['domain']))
+			list_differences = PHUSE_XPT.func_nihpo_xpt_compare(var_xpt_filename, var_domain_builder['columns'], func_nihpo_domain_arrays(var_domain_builder))
+			if (len(list_differences) > 0):
+				print ("[%s] does not match the generated data:\n\t%s" % (var_xpt_filename, '\n\t'.join(list_differences)))
+				var_verified = False
+			else:
+				print ("[%s] verified: %d records." % (var_xpt_filename, len(var_domain_builder['data'][var_domain_builder['columns'][0]])))
 	#
-	var_counter_<..> += 1
-	var_counter_rows += 1
-
-"""
-
+	# = Manifest for the next incremental build: = =
+	if var_verified:
+		func_nihpo_manifest_write(in_target_directory, dict_domain_hashes, dict_manifest)
 
+	#
+	return var_verified
 #
-# = Generate SAS files: = =
-# Source: https://github.com/selik/xport
-# The SAS Transport (XPORT) format only supports two kinds of data. Each value is either numeric or character, so xport.load decodes the values as either str or float.
-#
-# TA:
-TA_ds = xport.Dataset(TA_df, name='TA', label='Trial Arms (TA) data')
-# SAS variable names are limited to 8 characters. As with Pandas dataframes, you must change the name on the dataset rather than the column directly.
-TA_ds = TA_ds.rename(columns={k: k.upper()[:8] for k in TA_ds})
-# Libraries can have multiple datasets.
-TA_library = xport.Library({'TA': TA_ds})
-#
-with open('TA.xpt', 'wb') as f:
-	xport.v56.dump(TA_library, f)
-#
-# TE:
-TE_ds = xport.Dataset(TE_df, name='TE', label='Trial Elements (TE) data')
-# SAS variable names are limited to 8 characters. As with Pandas dataframes, you must change the name on the dataset rather than the column directly.
-TE_ds = TE_ds.rename(columns={k: k.upper()[:8] for k in TE_ds})
-# Libraries can have multiple datasets.
-TE_library = xport.Library({'TE': TE_ds})
-#
-with open('TE.xpt', 'wb') as f:
-	xport.v56.dump(TE_library, f)
-#
-# TV:
-TV_ds = xport.Dataset(TV_df, name='TV', label='Trial Visits (TV) data')
-# SAS variable names are limited to 8 characters. As with Pandas dataframes, you must change the name on the dataset rather than the column directly.
-TV_ds = TV_ds.rename(columns={k: k.upper()[:8] for k in TV_ds})
-# Libraries can have multiple datasets.
-TV_library = xport.Library({'TV': TV_ds})
-#
-with open('TV.xpt', 'wb') as f:
-	xport.v56.dump(TV_library, f)
-#
-# TD:
-TD_ds = xport.Dataset(TD_df, name='TD', label='Trial Disease Assessments (TD) data')
-# SAS variable names are limited to 8 characters. As with Pandas dataframes, you must change the name on the dataset rather than the column directly.
-TD_ds = TD_ds.rename(columns={k: k.upper()[:8] for k in TD_ds})
-# Libraries can have multiple datasets.
-TD_library = xport.Library({'TD': TD_ds})
-#
-with open('TD.xpt', 'wb') as f:
-	xport.v56.dump(TD_library, f)
-#
-# TM:
-TM_ds = xport.Dataset(TM_df, name='TM', label='Trial Disease Milestones (TM) data')
-# SAS variable names are limited to 8 characters. As with Pandas dataframes, you must change the name on the dataset rather than the column directly.
-TM_ds = TM_ds.rename(columns={k: k.upper()[:8] for k in TM_ds})
-# Libraries can have multiple datasets.
-TM_library = xport.Library({'TM': TM_ds})
-#
-with open('TM.xpt', 'wb') as f:
-	xport.v56.dump(TM_library, f)
-#
-# TI:
-TI_ds = xport.Dataset(TI_df, name='TI', label='Trial Inc/Exc Criteria (TI) data')
-# SAS variable names are limited to 8 characters. As with Pandas dataframes, you must change the name on the dataset rather than the column directly.
-TI_ds = TI_ds.rename(columns={k: k.upper()[:8] for k in TI_ds})
-# Libraries can have multiple datasets.
-TI_library = xport.Library({'TI': TI_ds})
-#
-with open('TI.xpt', 'wb') as f:
-	xport.v56.dump(TI_library, f)
-#
-# TS:
-TS_ds = xport.Dataset(TS_df, name='TS', label='Trial Summary (TS) data')
-# SAS variable names are limited to 8 characters. As with Pandas dataframes, you must change the name on the dataset rather than the column directly.
-TS_ds = TS_ds.rename(columns={k: k.upper()[:8] for k in TS_ds})
-# Libraries can have multiple datasets.
-TS_library = xport.Library({'TS': TS_ds})
-#
-with open('TS.xpt', 'wb') as f:
-	xport.v56.dump(TS_library, f)
-
+#
+# Built-in trial design (constants at the top of this file):
+CT_TRIAL_DESIGN = {"studyid": CT_STUDYID, "trial_design_matrix": CT_TRIAL_DESIGN_MATRIX, "trial_element_matrix": CT_TRIAL_ELEMENT_MATRIX, "trial_visit_matrix": CT_TRIAL_VISIT_MATRIX,
+	"trial_disease_assessment_matrix": CT_TRIAL_DISEASE_ASSESSMENT_MATRIX, "trial_disease_milestone_matrix": CT_TRIAL_DISEASE_MILESTONE_MATRIX,
+	"trial_inclusion_exclusion_matrix": CT_TRIAL_INCLUSION_EXCLUSION_MATRIX, "trial_summary_matrix": CT_TRIAL_SUMMARY_MATRIX}
+#
+list_arguments = sys.argv[1:]
+var_sql_filename = PHUSE_SDTM_Schema.CT_SCHEMA_SQL_FILENAME
+if ('--sql' in list_arguments):
+	var_position = list_arguments.index('--sql')
+	assert (var_position + 1 < len(list_arguments)),"Please provide the SQL script after --sql"
+	var_sql_filename = list_arguments[var_position + 1]
+	del list_arguments[var_position:var_position + 2]
+dict_sdtm_schema = PHUSE_SDTM_Schema.func_nihpo_schema_load(in_sql_filename=var_sql_filename)
+#
+list_design_filenames = [argument for argument in list_arguments if (argument not in ('--verify', '--incremental'))]
+if ('--verify' in sys.argv[1:]):
+	CT_XPT_VERIFY = True
+if ('--incremental' in sys.argv[1:]):
+	CT_INCREMENTAL_BUILD = True
+#
+if (len(list_design_filenames) == 0):
+	# Single trial: files are written to the current directory.
+	if not func_nihpo_generate_trial_design(CT_TRIAL_DESIGN, '.'):
+		sys.exit(1)
+else:
+	# Batch mode: one JSON file per trial design. Files are written to a directory named after each STUDYID.
+	list_failed_designs = []
+	dict_batch_studyids = {}		# { STUDYID : trial design file }, to refuse two designs writing to the same directory.
+	for var_design_filename in list_design_filenames:
+		try:
+			with open(var_design_filename) as file_design:
+				dict_design = json.load(file_design)
+		except (OSError, ValueError) as err:
+			print ("Trial design [%s] could not be read: %s" % (var_design_filename, err))
+			list_failed_designs.append(var_design_filename)
+			continue
+		#
+		var_design_studyid = dict_design.get('studyid') if isinstance(dict_design, dict) else None
+		print ("\nProcessing trial design [%s] : [%s]" % (var_design_filename, var_design_studyid))
+		if isinstance(var_design_studyid, str):
+			# The STUDYID names the directory of the .xpt files: a plain file name, not a path (e.g. "../x" or "A/B").
+			if (var_design_studyid in ('', '.', '..')) or (os.path.basename(var_design_studyid) != var_design_studyid) or (os.altsep is not None and os.altsep in var_design_studyid):
+				print ("Trial design [%s]: studyid [%s] must be a plain file name: it names the directory of the .xpt files." % (var_design_filename, var_design_studyid))
+				list_failed_designs.append(var_design_filename)
+				continue
+			if var_design_studyid in dict_batch_studyids:
+				print ("Trial design [%s]: studyid [%s] is also the studyid of trial design [%s]." % (var_design_filename, var_design_studyid, dict_batch_studyids[var_design_studyid]))
+				list_failed_designs.append(var_design_filename)
+				continue
+			dict_batch_studyids[var_design_studyid] = var_design_filename
+		try:
+			if not func_nihpo_generate_trial_design(dict_design, str(var_design_studyid)):
+				list_failed_designs.append(var_design_filename)
+		except Exception as err:
+			# One design with an unexpected error must not stop the batch: report it, and go on with the next design.
+			print ("Trial design [%s] failed: %s: %s" % (var_design_filename, type(err).__name__, err))
+			list_failed_designs.append(var_design_filename)
+	#
+	print ("\n%d trial design(s) processed, %d with errors." % (len(list_design_filenames), len(list_failed_designs)))
+	if (len(list_failed_designs) > 0):
+		print ("Trial designs with errors: %s" % (', '.join(list_failed_designs)))
+		sys.exit(1)
 #
 # = = Clean up. = =
 print("\n\nThis is the end, Beautiful friend. This is the end. My only friend, the end")
\ No newline at end of file
@@ -0,0 +1,444 @@
+#!/usr/bin/python3
+# Author: PHUSE PODR contributors. Builds on Roche_ADaM_Generation.py by Jose.Lacal@NIHPO.com
+# Filename: PHUSE_ADaM_Dataset.py
+# Purpose: Keep an ADaM dataset in memory as typed NumPy columns, with codelist values stored as small integer codes.
+# Version: Mon 19 October 2026.
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, version 3.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+"""
+Column types:
+	'text'						Python strings (NumPy dtype object). Default for columns without a type.
+	'integer'					int64. Values that are not numbers (e.g. "-AGE-") are kept as missing.
+	'float'						float64. Missing values are NaN.
+	'date'						datetime64[D]. Values that are not YYYY-MM-DD dates (e.g. "-TRTSDT-") are NaT.
+	('codelist', 'C66731')		Small integer codes (int8/int16/int32) into a dictionary shared by every dataset using the same key.
+								SEX in ADSL, ADAE and ADLB all use the same codes.
+	('category', 'PARCAT1')		Same as 'codelist', for values that do not come from a CDISC codelist.
+
+Missing codes are -1, the same convention as pandas.Categorical.
+
+To use these functions:
+	import PHUSE_ADaM_Dataset
+	dataset_ADLB = PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_create('ADLB', ['USUBJID', 'SEX', 'AGE', 'TRTSDT'], {'SEX': ('codelist', 'C66731'), 'AGE': 'integer', 'TRTSDT': 'date'})
+	PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_append_columns(dataset_ADLB, {'USUBJID': [..], 'SEX': [..], 'AGE': [..], 'TRTSDT': [..]})		# Whole arrays at once, or:
+	PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_append_row(dataset_ADLB, ['0b2f..', 'F', 54, '2017-03-02'])
+	df_ADLB = PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_to_pandas(dataset_ADLB)		# pandas.Categorical for codelist columns.
+	table_ADLB = PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_to_arrow(dataset_ADLB)		# pyarrow DictionaryArray for codelist columns.
+
+To load a file written by Roche_ADaM_Generation.py (the column types of ADSL and ADAE are CT_ADSL_COLUMN_TYPES and CT_ADAE_COLUMN_TYPES in that script):
+	dataset_ADSL = PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_from_csv('ADSL.csv', 'ADSL', {'SEX': ('codelist', 'C66731'), 'AGE': 'integer'})
+"""
+
+
+# Imports Section
+import csv
+import re
+import sys
+#
+try:
+	import numpy as np
+except ImportError:
+	print("Install NumPy: pip3 install numpy")
+	sys.exit(1)
+#
+# pandas and pyarrow are only needed by func_nihpo_adam_dataset_to_pandas() and func_nihpo_adam_dataset_to_arrow():
+try:
+	import pandas as pd
+except ImportError:
+	pd = None
+#
+try:
+	import pyarrow as pa
+except ImportError:
+	pa = None
+#
+CT_DATASET_ROW_BUFFER = 10000		# Rows kept as Python lists by func_nihpo_adam_dataset_append_row() before they are converted to columns.
+CT_DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}')
+#
+# Dictionaries shared by all datasets in this process: { key : dictionary (see func_nihpo_category_dictionary) }
+dict_shared_dictionaries = {}
+#
+#
+def func_nihpo_category_dictionary (in_key, in_values=None):
+	"""
+	This function returns the dictionary shared by all columns using a particular key (usually a codelist code), creating it if needed.
+	A dictionary keeps the distinct values of a categorical column, in the order they were first seen: code i is dictionary['values'][i]. Code -1 is a missing value (None or '').
+	Inputs:
+		in_key : [String] : Codelist code (e.g. 'C66731') or any other name.
+		in_values : [List] : Optional. Values to add first (e.g. all values of the codelist), so codes do not depend on the order of the data.
+
+	Return:
+		Dictionary {'values': [..], 'codes': {value: code}}.
+
+	To call this function:
+		func_nihpo_category_dictionary('C66731', PHUSE_Codelists.func_nihpo_codelist_values(nihpo_cursor, 'C66731'))
+	"""
+	if in_key not in dict_shared_dictionaries:
+		dict_shared_dictionaries[in_key] = {'values': [], 'codes': {}}
+	if in_values is not None:
+		func_nihpo_category_encode(dict_shared_dictionaries[in_key], in_values)
+	#
+	return dict_shared_dictionaries[in_key]
+#
+#
+def func_nihpo_category_encode (in_dictionary, in_values):
+	"""
+	This function returns the code of each value, adding new values to the dictionary.
+	Inputs:
+		in_dictionary : [Dictionary] : As returned by func_nihpo_category_dictionary().
+		in_values : [List or Array] : Values to encode.
+
+	Return:
+		NumPy array (int32) of codes.
+
+	To call this function:
+		func_nihpo_category_encode(dictionary_SEX, ['F', 'M', 'F'])
+	"""
+	array_values = np.asarray(in_values, dtype=object)
+	dict_codes = in_dictionary['codes']
+	list_values = in_dictionary['values']
+	# Only the distinct values go through the dictionary:
+	dict_lookup = {}
+	for value in dict.fromkeys(array_values.tolist()):
+		if (value is None) or (value == ''):
+			dict_lookup[value] = -1
+			continue
+		if value not in dict_codes:
+			dict_codes[value] = len(list_values)
+			list_values.append(value)
+		dict_lookup[value] = dict_codes[value]
+	#
+	return np.fromiter((dict_lookup[value] for value in array_values.tolist()), dtype=np.int32, count=len(array_values))
+#
+#
+def func_nihpo_category_decode (in_dictionary, in_codes):
+	"""
+	This function returns the values of an array of codes (None for -1).
+	Inputs:
+		in_dictionary : [Dictionary] : As returned by func_nihpo_category_dictionary().
+		in_codes : [Array of Integers] : Codes returned by func_nihpo_category_encode().
+
+	Return:
+		NumPy array of values (dtype object).
+
+	To call this function:
+		func_nihpo_category_decode(dictionary_SEX, np.array([0, 1, -1]))
+	"""
+	array_lookup = np.empty(len(in_dictionary['values']) + 1, dtype=object)
+	array_lookup[:-1] = in_dictionary['values']
+	array_lookup[-1] = None
+	return array_lookup[np.asarray(in_codes)]		# -1 picks the last entry: None.
+#
+#
+def func_nihpo_smallest_code_dtype (in_number_values):
+	"""
+	This function returns the smallest signed integer type able to hold codes 0 .. in_number_values - 1, and -1 for missing values.
+	"""
+	for dtype_codes in (np.int8, np.int16, np.int32):
+		if in_number_values <= np.iinfo(dtype_codes).max:
+			return dtype_codes
+	return np.int64
+#
+#
+def func_nihpo_parse_dates (in_values):
+	"""
+	This function converts values to datetime64[D]. Anything that does not start with YYYY-MM-DD becomes NaT.
+	Inputs:
+		in_values : [List or Array] : Strings, dates or datetime64 values.
+
+	Return:
+		NumPy array (datetime64[D]).
+
+	To call this function:
+		func_nihpo_parse_dates(['2017-03-02', '-TRTSDT-'])
+	"""
+	array_values = np.asarray(in_values)
+	if np.issubdtype(array_values.dtype, np.datetime64):
+		return array_values.astype('datetime64[D]')
+	#
+	array_dates = np.full(len(array_values), np.datetime64('NaT'), dtype='datetime64[D]')
+	for position, value in enumerate(array_values.tolist()):
+		if hasattr(value, 'year'):		# datetime.date and datetime.datetime
+			array_dates[position] = np.datetime64(value, 'D')
+		elif isinstance(value, str) and CT_DATE_PATTERN.match(value):
+			array_dates[position] = np.datetime64(value[0:10], 'D')
+	#
+	return array_dates
+#
+#
+def func_nihpo_parse_numbers (in_values, in_dtype):
+	"""
+	This function converts values to int64 or float64.
+	Inputs:
+		in_values : [List or Array] : Numbers, or strings holding numbers.
+		in_dtype : [NumPy dtype] : np.int64 or np.float64.
+
+	Return:
+		NumPy array of numbers : Missing values are 0 for int64 and NaN for float64.
+		NumPy array (bool) : True where the value is missing.
+
+	To call this function:
+		func_nihpo_parse_numbers(['54', '-AGE-'], np.int64)
+	"""
+	array_values = np.asarray(in_values)
+	if (array_values.dtype.kind in 'iuf'):
+		array_missing = np.isnan(array_values) if (array_values.dtype.kind == 'f') else np.zeros(len(array_values), dtype=bool)
+		return np.where(array_missing, 0, array_values).astype(in_dtype) if (in_dtype == np.int64) else array_values.astype(in_dtype), array_missing
+	#
+	array_numbers = np.zeros(len(array_values), dtype=in_dtype)
+	array_missing = np.zeros(len(array_values), dtype=bool)
+	for position, value in enumerate(array_values.tolist()):
+		try:
+			array_numbers[position] = in_dtype(float(value)) if (in_dtype == np.int64) else float(value)
+		except (TypeError, ValueError):
+			array_missing[position] = True
+	#
+	if (in_dtype == np.float64):
+		array_numbers[array_missing] = np.nan
+	return array_numbers, array_missing
+#
+#
+def func_nihpo_adam_dataset_create (in_name, in_columns, in_column_types=None):
+	"""
+	This function creates an empty ADaM dataset, held as typed NumPy columns (see the top of this file for the column types).
+	Inputs:
+		in_name : [String] : Dataset name (e.g. 'ADLB').
+		in_columns : [List] : Column names, in file order.
+		in_column_types : [Dictionary] : Type of each column. Columns not listed are 'text'.
+
+	Return:
+		Dictionary, to pass to the other functions of this file.
+
+	To call this function:
+		func_nihpo_adam_dataset_create('ADLB', ['USUBJID', 'SEX', 'AGE'], {'SEX': ('codelist', 'C66731'), 'AGE': 'integer'})
+	"""
+	list_columns = list(in_columns)
+	dict_types = in_column_types or {}
+	assert (set(dict_types) <= set(list_columns)),"Column types given for unknown columns: %s" % (sorted(set(dict_types) - set(list_columns)))
+	#
+	dict_column_types = {}
+	dict_dictionaries = {}
+	for column in list_columns:
+		var_type = dict_types.get(column, 'text')
+		if isinstance(var_type, tuple):
+			assert (var_type[0] in ('codelist', 'category')),"Please use ('codelist', code) or ('category', name) for column [%s]" % (column)
+			dict_dictionaries[column] = func_nihpo_category_dictionary(var_type[1])
+			var_type = 'categorical'
+		else:
+			assert (var_type in ('text', 'integer', 'float', 'date')),"Unknown type [%s] for column [%s]" % (var_type, column)
+		dict_column_types[column] = var_type
+	#
+	# Each column is a list of chunks (NumPy arrays), joined into a single array when read:
+	return {'name': in_name, 'columns': list_columns, 'types': dict_column_types, 'dictionaries': dict_dictionaries,
+		'chunks': {column: [] for column in list_columns}, 'missing_chunks': {column: [] for column in list_columns if dict_column_types[column] == 'integer'},
+		'row_buffer': [], 'number_rows': 0}
+#
+#
+def func_nihpo_adam_dataset_append_columns (in_dataset, in_columns):
+	"""
+	This function appends records given as one sequence per column.
+	Inputs:
+		in_dataset : [Dictionary] : As returned by func_nihpo_adam_dataset_create().
+		in_columns : [Dictionary] : One list or array per column, all with the same length.
+
+	To call this function:
+		func_nihpo_adam_dataset_append_columns(dataset_ADLB, {'USUBJID': array_usubjid, 'SEX': array_sex, ..})
+	"""
+	assert (set(in_columns) == set(in_dataset['columns'])),"Please provide exactly these columns: %s" % (in_dataset['columns'])
+	func_nihpo_adam_dataset_flush_rows(in_dataset)
+	set_lengths = set(len(values) for values in in_columns.values())
+	assert (len(set_lengths) == 1),"All columns must have the same number of values"
+	#
+	for column in in_dataset['columns']:
+		var_type = in_dataset['types'][column]
+		if (var_type == 'categorical'):
+			array_column = func_nihpo_category_encode(in_dataset['dictionaries'][column], in_columns[column])
+		elif (var_type == 'date'):
+			array_column = func_nihpo_parse_dates(in_columns[column])
+		elif (var_type == 'integer'):
+			array_column, array_missing = func_nihpo_parse_numbers(in_columns[column], np.int64)
+			in_dataset['missing_chunks'][column].append(array_missing)
+		elif (var_type == 'float'):
+			array_column, array_missing = func_nihpo_parse_numbers(in_columns[column], np.float64)
+		else:
+			array_column = np.empty(len(in_columns[column]), dtype=object)
+			array_column[:] = list(in_columns[column])
+		in_dataset['chunks'][column].append(array_column)
+	#
+	in_dataset['number_rows'] += set_lengths.pop()
+#
+#
+def func_nihpo_adam_dataset_append_row (in_dataset, in_values):
+	"""
+	This function appends one record, with values in column order. Rows are converted to columns every CT_DATASET_ROW_BUFFER rows.
+	Inputs:
+		in_dataset : [Dictionary] : As returned by func_nihpo_adam_dataset_create().
+		in_values : [List] : One value per column.
+
+	To call this function:
+		func_nihpo_adam_dataset_append_row(dataset_ADLB, ['0b2f..', 'F', 54, '2017-03-02'])
+	"""
+	assert (len(in_values) == len(in_dataset['columns'])),"Expected %d values, received %d" % (len(in_dataset['columns']), len(in_values))
+	in_dataset['row_buffer'].append(in_values)
+	if (len(in_dataset['row_buffer']) >= CT_DATASET_ROW_BUFFER):
+		func_nihpo_adam_dataset_flush_rows(in_dataset)
+#
+#
+def func_nihpo_adam_dataset_flush_rows (in_dataset):
+	"""
+	This function converts the rows buffered by func_nihpo_adam_dataset_append_row() into columns.
+	"""
+	if (len(in_dataset['row_buffer']) == 0):
+		return
+	list_rows = in_dataset['row_buffer']
+	in_dataset['row_buffer'] = []
+	func_nihpo_adam_dataset_append_columns(in_dataset, {column: [one_row[position] for one_row in list_rows] for position, column in enumerate(in_dataset['columns'])})
+#
+#
+def func_nihpo_adam_dataset_length (in_dataset):
+	"""
+	This function returns the number of records of a dataset, including rows not yet converted to columns.
+	"""
+	return in_dataset['number_rows'] + len(in_dataset['row_buffer'])
+#
+#
+def func_nihpo_adam_dataset_column (in_dataset, in_column):
+	"""
+	This function returns the stored array of a column: codes for categorical columns, datetime64[D] for dates, int64 / float64 for numbers.
+	Inputs:
+		in_dataset : [Dictionary] : As returned by func_nihpo_adam_dataset_create().
+		in_column : [String] : Column name.
+
+	Return:
+		NumPy array.
+
+	To call this function:
+		func_nihpo_adam_dataset_column(dataset_ADLB, 'SEX')
+	"""
+	func_nihpo_adam_dataset_flush_rows(in_dataset)
+	var_type = in_dataset['types'][in_column]
+	list_chunks = in_dataset['chunks'][in_column]
+	if (len(list_chunks) != 1):
+		# Join the chunks once; later calls return the same array.
+		dtype_empty = {'categorical': np.int32, 'date': 'datetime64[D]', 'integer': np.int64, 'float': np.float64, 'text': object}[var_type]
+		array_column = np.concatenate(list_chunks) if (len(list_chunks) > 0) else np.empty(0, dtype=dtype_empty)
+		list_chunks[:] = [array_column]
+		if in_column in in_dataset['missing_chunks']:
+			list_missing = in_dataset['missing_chunks'][in_column]
+			list_missing[:] = [np.concatenate(list_missing) if (len(list_missing) > 0) else np.empty(0, dtype=bool)]
+	#
+	array_column = list_chunks[0]
+	if (var_type == 'categorical'):
+		# Stored as int32 while the dictionary can still grow; narrowed to the smallest type when read.
+		dtype_codes = func_nihpo_smallest_code_dtype(len(in_dataset['dictionaries'][in_column]['values']))
+		if (array_column.dtype != dtype_codes):
+			array_column = array_column.astype(dtype_codes)
+			list_chunks[0] = array_column
+	return array_column
+#
+#
+def func_nihpo_adam_dataset_missing (in_dataset, in_column):
+	"""
+	This function returns True where an 'integer' column has no value.
+	"""
+	func_nihpo_adam_dataset_column(in_dataset, in_column)
+	return in_dataset['missing_chunks'][in_column][0]
+#
+#
+def func_nihpo_adam_dataset_values (in_dataset, in_column):
+	"""
+	This function returns the values of a column, decoding categorical columns back to strings.
+	"""
+	if (in_dataset['types'][in_column] == 'categorical'):
+		return func_nihpo_category_decode(in_dataset['dictionaries'][in_column], func_nihpo_adam_dataset_column(in_dataset, in_column))
+	return func_nihpo_adam_dataset_column(in_dataset, in_column)
+#
+#
+def func_nihpo_adam_dataset_nbytes (in_dataset):
+	"""
+	This function returns the approximate memory used by the columns, in bytes (text columns count their Python strings).
+	"""
+	var_bytes = 0
+	for column in in_dataset['columns']:
+		array_column = func_nihpo_adam_dataset_column(in_dataset, column)
+		var_bytes += array_column.nbytes
+		if (array_column.dtype == object):
+			var_bytes += sum(sys.getsizeof(value) for value in dict.fromkeys(array_column.tolist()))
+	return var_bytes
+#
+#
+def func_nihpo_adam_dataset_to_pandas (in_dataset):
+	"""
+	This function returns the dataset as a pandas DataFrame. Categorical columns become pandas.Categorical and keep their codes.
+	"""
+	assert (pd is not None),"Install Pandas: pip3 install pandas"
+	dict_series = {}
+	for column in in_dataset['columns']:
+		var_type = in_dataset['types'][column]
+		if (var_type == 'categorical'):
+			dict_series[column] = pd.Categorical.from_codes(func_nihpo_adam_dataset_column(in_dataset, column), categories=in_dataset['dictionaries'][column]['values'])
+		elif (var_type == 'integer'):
+			dict_series[column] = pd.arrays.IntegerArray(func_nihpo_adam_dataset_column(in_dataset, column), func_nihpo_adam_dataset_missing(in_dataset, column))
+		else:
+			dict_series[column] = func_nihpo_adam_dataset_column(in_dataset, column)
+	#
+	return pd.DataFrame(dict_series, copy=False)
+#
+#
+def func_nihpo_adam_dataset_to_arrow (in_dataset):
+	"""
+	This function returns the dataset as a pyarrow Table. Categorical columns become DictionaryArray; numeric and date columns share memory with NumPy where possible.
+	"""
+	assert (pa is not None),"Install PyArrow: pip3 install pyarrow"
+	list_arrays = []
+	for column in in_dataset['columns']:
+		var_type = in_dataset['types'][column]
+		array_column = func_nihpo_adam_dataset_column(in_dataset, column)
+		if (var_type == 'categorical'):
+			array_indices = pa.array(array_column, mask=(array_column < 0))
+			list_arrays.append(pa.DictionaryArray.from_arrays(array_indices, pa.array(in_dataset['dictionaries'][column]['values'], type=pa.string())))
+		elif (var_type == 'integer'):
+			list_arrays.append(pa.array(array_column, mask=func_nihpo_adam_dataset_missing(in_dataset, column)))
+		elif (var_type == 'date'):
+			list_arrays.append(pa.array(array_column, type=pa.date32(), from_pandas=True))
+		elif (var_type == 'float'):
+			list_arrays.append(pa.array(array_column))
+		else:
+			list_arrays.append(pa.array(array_column, type=pa.string(), from_pandas=True))
+	#
+	return pa.Table.from_arrays(list_arrays, names=in_dataset['columns'])
+#
+#
+def func_nihpo_adam_dataset_from_csv (in_filename, in_name, in_column_types=None, in_separator='|'):
+	"""
+	This function loads a file written by Roche_ADaM_Generation.py. Lines starting with '#' are skipped; the first other line holds the column names.
+	Inputs:
+		in_filename : [String] : CSV file.
+		in_name : [String] : Dataset name.
+		in_column_types : [Dictionary] : Type of each column (see the top of this file).
+		in_separator : [String] : CSV separator.
+
+	Return:
+		Dictionary, as returned by func_nihpo_adam_dataset_create().
+
+	To call this function:
+		func_nihpo_adam_dataset_from_csv('ADLB.csv', 'ADLB', {'SEX': ('codelist', 'C66731'), 'AGE': 'integer'})
+	"""
+	dataset_loaded = None
+	with open(in_filename, newline='') as file_input:
+		reader_input = csv.reader(file_input, delimiter=in_separator)
+		for one_row in reader_input:
+			if (len(one_row) == 0) or one_row[0].startswith('#'):
+				continue
+			if dataset_loaded is None:
+				dataset_loaded = func_nihpo_adam_dataset_create(in_name, one_row, in_column_types)
+				continue
+			func_nihpo_adam_dataset_append_row(dataset_loaded, one_row)
+	#
+	assert (dataset_loaded is not None),"File [%s] has no header line." % (in_filename)
+	func_nihpo_adam_dataset_flush_rows(dataset_loaded)
+	return dataset_loaded
+#
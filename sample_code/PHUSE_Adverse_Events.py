@@ -0,0 +1,184 @@
+#!/usr/bin/python3
+# Author: PHUSE PODR contributors. Builds on Roche_ADaM_Generation.py by Jose.Lacal@NIHPO.com
+# Filename: PHUSE_Adverse_Events.py
+# Purpose: Generate multiple Adverse Events per subject, for a whole cohort at once, as column arrays.
+# Version: Mon 19 October 2026.
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, version 3.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+"""
+Process:
+a.) Draw the number of Adverse Events of each subject from a distribution defined per Arm (Poisson or Negative Binomial).
+b.) Expand the cohort into one row per Adverse Event.
+c.) Draw onset, duration, severity, seriousness flags and outcome for all rows at once.
+d.) Assign AESEQ (1, 2, 3.. within each subject, in order of onset) using a cumulative sum of the event counts.
+
+Deaths:
+	Only subjects who die (ADSL DTHFL = 'Y') can have a fatal Adverse Event: the last event of each of these subjects has AEOUT = 'FATAL' and AESDTH = 'Y', and ends on the date of death.
+	For these subjects the window passed in must end on the date of death, so no event starts or ends after it.
+
+Event count distribution, per Arm code:
+	{"ARM01": {"distribution": "poisson", "mean": 0.8},
+	 "ARM02": {"distribution": "negative_binomial", "mean": 1.5, "dispersion": 0.9}}
+
+	"mean" is the average number of Adverse Events per subject.
+	"dispersion" (Negative Binomial only) is the shape parameter: smaller values give more subjects with many events.
+	"maximum" (optional) caps the number of events per subject.
+
+To call this module:
+	import PHUSE_Adverse_Events
+	dict_events = PHUSE_Adverse_Events.func_nihpo_ae_generate_events(rng, arm_codes, reference_dates, window_days, CT_AE_EVENT_COUNT_BY_ARM, dict_codelists, deaths)
+"""
+
+
+# Imports Section
+import sys
+#
+try:
+	import numpy as np
+except ImportError:
+	print("Install NumPy: pip3 install numpy")
+	sys.exit(1)
+#
+import PHUSE_Codelists
+#
+CT_AE_DEFAULT_EVENT_COUNT = {"distribution": "poisson", "mean": 1.0}	# Used for Arms without their own definition.
+CT_AE_MEAN_DURATION_DAYS = 10		# Average duration of an Adverse Event, in days.
+CT_AE_PERCENTAGE_SERIOUS = 8		# Percentage of Adverse Events that are serious.
+CT_AE_SERIOUS_CRITERIA = ['AESCAN', 'AESCONG', 'AESDISAB', 'AESDTH', 'AESHOSP', 'AESLIFE', 'AESOD', 'AESMIE']
+CT_AE_OUTCOME_FATAL = 'FATAL'		# Outcome of Event (C66768) value that sets AESDTH = 'Y'. Only used for the last event of a subject who dies.
+#
+#
+def func_nihpo_ae_event_counts (in_rng, in_arm_codes, in_event_count_distribution):
+	"""
+	This function returns the number of Adverse Events for each subject, drawn from the distribution defined for the subject's Arm.
+	Inputs:
+		in_rng : [NumPy Generator] : Random number generator.
+		in_arm_codes : [List or Array] : Arm code of each subject.
+		in_event_count_distribution : [Dictionary] : Distribution per Arm code (see the top of this file).
+
+	Return:
+		NumPy array (int64) with one count per subject.
+
+	To call this function:
+		func_nihpo_ae_event_counts(rng, ['ARM01', 'ARM02'], {"ARM01": {"distribution": "poisson", "mean": 0.8}})
+	"""
+	array_arm_codes = np.asarray(in_arm_codes)
+	array_counts = np.zeros(len(array_arm_codes), dtype=np.int64)
+	#
+	for arm_code in np.unique(array_arm_codes):
+		mask_arm = (array_arm_codes == arm_code)
+		var_number_subjects = int(mask_arm.sum())
+		dict_distribution = in_event_count_distribution.get(arm_code, CT_AE_DEFAULT_EVENT_COUNT)
+		var_mean = dict_distribution['mean']
+		assert (var_mean >= 0),"Please enter a non-negative mean number of Adverse Events for Arm [%s]" % (arm_code)
+		#
+		if (dict_distribution['distribution'] == 'poisson'):
+			array_counts[mask_arm] = in_rng.poisson(var_mean, var_number_subjects)
+		elif (dict_distribution['distribution'] == 'negative_binomial'):
+			# NumPy's parameters (n, p) from mean and dispersion: n = dispersion, p = dispersion / (dispersion + mean).
+			var_dispersion = dict_distribution['dispersion']
+			assert (var_dispersion > 0),"Please enter a positive dispersion for Arm [%s]" % (arm_code)
+			array_counts[mask_arm] = in_rng.negative_binomial(var_dispersion, var_dispersion / (var_dispersion + var_mean), var_number_subjects)
+		else:
+			assert False,"Please use 'poisson' or 'negative_binomial' as distribution for Arm [%s]" % (arm_code)
+		#
+		if ('maximum' in dict_distribution):
+			array_counts[mask_arm] = np.minimum(array_counts[mask_arm], dict_distribution['maximum'])
+	#
+	return array_counts
+#
+#
+def func_nihpo_ae_generate_events (in_rng, in_arm_codes, in_reference_dates, in_window_days, in_event_count_distribution, in_codelists, in_deaths=False):
+	"""
+	This function generates all Adverse Events of a cohort as column arrays.
+	Inputs:
+		in_rng : [NumPy Generator] : Random number generator.
+		in_arm_codes : [List or Array] : Arm code of each subject.
+		in_reference_dates : [Array of datetime64[D], or a single date] : Reference start date of each subject. Onset is counted from this date.
+		in_window_days : [Array of Integers, or a single Integer] : Number of days after the reference date during which events can happen (until the date of death, or the data cut).
+		in_event_count_distribution : [Dictionary] : Distribution per Arm code (see the top of this file).
+		in_codelists : [Dictionary] : Codelist values as returned by PHUSE_Codelists.func_nihpo_codelist_values(), keyed by:
+			'AESEV' : Severity/Intensity Scale for Adverse Events (C66769)
+			'AEOUT' : Outcome of Event (C66768)
+		in_deaths : [Array of Booleans, or a single Boolean] : True for each subject who dies (ADSL DTHFL = 'Y'). Optional, no deaths by default.
+
+	Return:
+		Dictionary of NumPy arrays, one entry per Adverse Event:
+			'SUBJECT_INDEX' : Position of the subject in the input arrays.
+			'AESEQ' : Sequence number within subject, starting at 1, in order of onset.
+			'AESTDTC', 'AEENDTC' : Start and end dates (datetime64[D]).
+			'AESTDY', 'AEENDY' : Study days of start and end (Day 1 is the reference date).
+			'AEDURD' : Duration in days.
+			'AESEV', 'AEOUT' : Values from the codelists. AEOUT is 'FATAL' only for the last event of a subject who dies.
+			'AESER' and each of CT_AE_SERIOUS_CRITERIA : 'Y' or 'N'.
+
+	To call this function:
+		func_nihpo_ae_generate_events(rng, arm_codes, reference_dates, [1000, 37], CT_AE_EVENT_COUNT_BY_ARM, {'AESEV': [..], 'AEOUT': [..]}, [False, True])
+	"""
+	var_number_subjects = len(in_arm_codes)
+	array_reference_dates = np.broadcast_to(np.asarray(in_reference_dates, dtype='datetime64[D]'), (var_number_subjects,))
+	array_window_days = np.broadcast_to(np.asarray(in_window_days, dtype=np.int64), (var_number_subjects,))
+	array_deaths = np.broadcast_to(np.asarray(in_deaths, dtype=bool), (var_number_subjects,))
+	assert (np.all(array_window_days > 0)),"Please ensure every subject has a window of at least 01 day"
+	#
+	# a.) Number of events per subject:
+	array_counts = func_nihpo_ae_event_counts(in_rng, in_arm_codes, in_event_count_distribution)
+	var_number_events = int(array_counts.sum())
+	#
+	# b.) One row per event. AESEQ restarts at 1 for each subject:
+	array_subject_index = np.repeat(np.arange(var_number_subjects), array_counts)
+	array_first_row = np.cumsum(array_counts) - array_counts
+	array_aeseq = np.arange(var_number_events) - np.repeat(array_first_row, array_counts) + 1
+	#
+	# c.) Timing, within each subject's window. Onsets are sorted within each subject, so AESEQ follows the order of onset:
+	array_event_window = array_window_days[array_subject_index]
+	array_onset = (in_rng.random(var_number_events) * array_event_window).astype(np.int64)		# Days after the reference date.
+	array_onset = array_onset[np.lexsort((array_onset, array_subject_index))]
+	array_duration = in_rng.geometric(1.0 / CT_AE_MEAN_DURATION_DAYS, var_number_events)
+	array_end = np.minimum(array_onset + array_duration, array_event_window)
+	#
+	# The last event of each subject who dies is fatal, and ends on the date of death (the end of the window):
+	array_last_row = (array_first_row + array_counts - 1)[(array_counts > 0) & array_deaths]
+	mask_fatal = np.zeros(var_number_events, dtype=bool)
+	mask_fatal[array_last_row] = True
+	array_end[mask_fatal] = array_event_window[mask_fatal]
+	#
+	dict_events = {}
+	dict_events['SUBJECT_INDEX'] = array_subject_index
+	dict_events['AESEQ'] = array_aeseq
+	dict_events['AESTDTC'] = array_reference_dates[array_subject_index] + array_onset
+	dict_events['AEENDTC'] = array_reference_dates[array_subject_index] + array_end
+	dict_events['AESTDY'] = array_onset + 1
+	dict_events['AEENDY'] = array_end + 1
+	dict_events['AEDURD'] = array_end - array_onset
+	#
+	# Severity, outcome and seriousness. Other events never have a fatal outcome:
+	list_outcomes = [value for value in in_codelists['AEOUT'] if (value != CT_AE_OUTCOME_FATAL)]
+	assert (len(list_outcomes) > 0),"Please provide at least 01 non fatal Outcome of Event (C66768)"
+	dict_events['AESEV'] = PHUSE_Codelists.func_nihpo_codelist_sample(in_rng, in_codelists['AESEV'], var_number_events)
+	dict_events['AEOUT'] = PHUSE_Codelists.func_nihpo_codelist_sample(in_rng, list_outcomes, var_number_events)
+	dict_events['AEOUT'][mask_fatal] = CT_AE_OUTCOME_FATAL
+	#
+	mask_serious = in_rng.random(var_number_events) * 100 < CT_AE_PERCENTAGE_SERIOUS
+	mask_serious |= mask_fatal
+	dict_events['AESER'] = np.where(mask_serious, 'Y', 'N')
+	#
+	# Criteria only apply to serious events. Death follows the outcome:
+	dict_criteria = {}
+	for criterion in CT_AE_SERIOUS_CRITERIA:
+		if (criterion == 'AESDTH'):
+			dict_criteria[criterion] = mask_fatal
+		else:
+			dict_criteria[criterion] = mask_serious & (in_rng.random(var_number_events) < 0.25)
+	#
+	# Every serious event meets at least 01 criterion:
+	mask_any_criterion = np.logical_or.reduce(list(dict_criteria.values()))
+	dict_criteria['AESMIE'] = dict_criteria['AESMIE'] | (mask_serious & ~mask_any_criterion)
+	for criterion in CT_AE_SERIOUS_CRITERIA:
+		dict_events[criterion] = np.where(dict_criteria[criterion], 'Y', 'N')
+	#
+	return dict_events
+#
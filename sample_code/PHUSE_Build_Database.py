@@ -0,0 +1,203 @@
+#!/usr/bin/python3
+# Author: PHUSE PODR contributors. Builds on PHUSE_Generate_SDTM.py by Jose.Lacal@NIHPO.com
+# Filename: PHUSE_Build_Database.py
+# Purpose: Build an optimized, read-only copy of the SQLite3 file "Synthetic_Health_Data_NIHPO.sqlite3" used by the generators.
+# Version: Mon 19 October 2026.
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, version 3.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+"""
+The generators only read the SQLite3 file, and filter every table by a key that had no index: every codelist lookup and definition query was a full scan.
+This script copies all tables into a new file built for reading:
+a.) Large pages (CT_PAGE_SIZE), no journal while building.
+b.) "cdisc_sdtm_domain_rules" and "cdisc_sdtm_domain_definitions" as WITHOUT ROWID tables, clustered by (domain_code) and (domain_code, variable_name).
+c.) A covering index on "cdisc_terminology" (codelist_code, cdisc_submission_value): codelist values are read from the index alone.
+d.) ANALYZE statistics for the query planner, then VACUUM.
+e.) "PRAGMA application_id" set to CT_APPLICATION_ID: marks the file as built by this script.
+
+The new file replaces the old one only once it is complete.
+The generators open a file built by this script with "immutable=1" (no locks, no change detection) and memory-map it: do NOT modify the file while a generator is running.
+Any other file (or one in WAL mode, or with a pending journal) is opened read-only with the usual locking.
+
+Usage:
+	python3 PHUSE_Build_Database.py [Source.sqlite3] [Target.sqlite3] [--sql PHUSE_Generate_SDTM.sql]
+		Source defaults to "Synthetic_Health_Data_NIHPO.sqlite3"; Target defaults to Source (replaced).
+		--sql re-creates the rules and definitions tables from the SQL script instead of copying them from Source.
+"""
+
+
+# Imports Section
+import os
+import sqlite3
+import sys
+import urllib.parse
+#
+#
+CT_DATABASE_FILENAME = 'Synthetic_Health_Data_NIHPO.sqlite3'
+CT_PAGE_SIZE = 65536		# Largest SQLite3 page: fewer, larger reads for a file that is never written again.
+CT_MMAP_SIZE = 268435456	# Used by the generators: "PRAGMA mmap_size" (256 MB, more than the whole file).
+CT_APPLICATION_ID = 0x4E494850	# "NIHP": "PRAGMA application_id" of the files built by this script.
+#
+# Tables created with their own definition, instead of the one in the source file:
+CT_OPTIMIZED_TABLES = {
+	'cdisc_sdtm_domain_rules': """CREATE TABLE cdisc_sdtm_domain_rules (
+	domain_code text PRIMARY KEY,
+	per_trial text,
+	per_subject text,
+	per_arm text,
+	per_visit text,
+	per_visit_measurement text,
+	per_adverse_event text,
+	per_concomitant_prior text) WITHOUT ROWID;""",
+	'cdisc_sdtm_domain_definitions': """CREATE TABLE cdisc_sdtm_domain_definitions (
+	domain_code text,
+	variable_name text,
+	variable_label text,
+	type text,
+	controlled_terms text,
+	role text,
+	cdisc_notes text,
+	core text,
+	PRIMARY KEY (domain_code, variable_name)) WITHOUT ROWID;"""}
+#
+# Indexes added to the copied tables:
+CT_OPTIMIZED_INDEXES = {
+	'cdisc_terminology': ["CREATE INDEX IF NOT EXISTS idx_cdisc_terminology_codelist ON cdisc_terminology (codelist_code, cdisc_submission_value);"]}
+#
+#
+def func_nihpo_database_connect (in_filename=CT_DATABASE_FILENAME):
+	"""
+	This function opens the SQLite3 file read-only and memory-mapped.
+	A file built by this script (application_id is CT_APPLICATION_ID) with a rollback journal, and no journal or WAL file next to it, is opened as immutable: no locks, no change detection.
+	Any other file is opened with the usual locking, so changes made by other connections are seen.
+	Inputs:
+		in_filename : [String] : SQLite3 file.
+
+	Return:
+		SQLite3 connection.
+
+	To call this function:
+		func_nihpo_database_connect('Synthetic_Health_Data_NIHPO.sqlite3')
+	"""
+	if not os.path.isfile(in_filename):
+		raise sqlite3.OperationalError("unable to open database file [%s]" % (in_filename))
+	with open(in_filename, 'rb') as file_database:
+		var_header = file_database.read(100)		# SQLite3 file header: read without taking any lock.
+	var_built = (len(var_header) == 100) and (int.from_bytes(var_header[68:72], 'big') == CT_APPLICATION_ID)
+	var_wal = (len(var_header) == 100) and (var_header[18] == 2)		# File format read version 2: WAL mode.
+	var_uri = 'file:%s?mode=ro' % (urllib.parse.quote(in_filename))		# '?', '#' and '%' in the name are not URI syntax.
+	if var_built and not var_wal and not any(os.path.exists(in_filename + suffix) for suffix in ('-journal', '-wal')):
+		var_uri += '&immutable=1'
+	conn = sqlite3.connect(var_uri, uri=True)
+	conn.execute("PRAGMA mmap_size=%d;" % (CT_MMAP_SIZE))
+	return conn
+#
+#
+def func_nihpo_sql_script (in_sql_filename):
+	"""
+	This function reads an SQL script such as "PHUSE_Generate_SDTM.sql". Lines starting with '#' (used as comments in older copies of the script) are not SQL, and are skipped.
+	Inputs:
+		in_sql_filename : [String] : SQL script.
+
+	Return:
+		String : SQL statements.
+
+	To call this function:
+		func_nihpo_sql_script('PHUSE_Generate_SDTM.sql')
+	"""
+	with open(in_sql_filename, encoding='utf-8') as file_sql:
+		return ''.join([line for line in file_sql if not line.lstrip().startswith('#')])
+#
+#
+def func_nihpo_database_build (in_source_filename, in_target_filename, in_sql_filename=None):
+	"""
+	This function copies every table of the source SQLite3 file into a new file optimized for reading (see the top of this script).
+	Inputs:
+		in_source_filename : [String] : Source SQLite3 file.
+		in_target_filename : [String] : Target SQLite3 file. May be the same as the source: it is replaced once the new file is complete.
+		in_sql_filename : [String] : Optional SQL script that creates and fills the tables in CT_OPTIMIZED_TABLES (instead of copying them).
+
+	Return:
+		Dictionary { table : number of rows }.
+
+	To call this function:
+		func_nihpo_database_build('Synthetic_Health_Data_NIHPO.sqlite3', 'Synthetic_Health_Data_NIHPO.sqlite3', 'PHUSE_Generate_SDTM.sql')
+	"""
+	assert os.path.isfile(in_source_filename),"Source SQLite3 file [%s] does not exist." % (in_source_filename)
+	var_building_filename = in_target_filename + '.building'
+	if os.path.exists(var_building_filename):
+		os.remove(var_building_filename)
+	#
+	conn = sqlite3.connect(var_building_filename, isolation_level=None)
+	conn.execute("PRAGMA page_size=%d;" % (CT_PAGE_SIZE))		# Before anything is written.
+	conn.execute("PRAGMA journal_mode=OFF;")
+	conn.execute("PRAGMA synchronous=OFF;")
+	conn.execute("ATTACH DATABASE ? AS source;", ('file:%s?mode=ro' % (urllib.parse.quote(in_source_filename)),))
+	#
+	list_tables = conn.execute("SELECT name, sql FROM source.sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name;").fetchall()
+	dict_counts = {}
+	conn.execute("BEGIN;")
+	for var_table, var_sql in list_tables:
+		if (in_sql_filename is not None) and (var_table in CT_OPTIMIZED_TABLES):
+			continue		# Created from the SQL script below.
+		conn.execute(CT_OPTIMIZED_TABLES.get(var_table, var_sql))
+		list_columns = ['"%s"' % (one_column[1]) for one_column in conn.execute('PRAGMA source.table_info("%s");' % (var_table))]
+		conn.execute('INSERT INTO main."%s" (%s) SELECT %s FROM source."%s";' % (var_table, ", ".join(list_columns), ", ".join(list_columns), var_table))
+	#
+	# Indexes and views of the source file, except on the tables rebuilt above:
+	for var_type, var_table, var_sql in conn.execute("SELECT type, tbl_name, sql FROM source.sqlite_master WHERE type IN ('index', 'view') AND sql IS NOT NULL ORDER BY type;").fetchall():
+		if (var_table not in CT_OPTIMIZED_TABLES):
+			conn.execute(var_sql)
+	conn.execute("COMMIT;")
+	conn.execute("DETACH DATABASE source;")		# Before the SQL script: its "DROP TABLE IF EXISTS" must not reach the source file.
+	#
+	if (in_sql_filename is not None):
+		conn.executescript(func_nihpo_sql_script(in_sql_filename))
+		# Tables as created by the script, rebuilt with the optimized definition:
+		for var_table, var_sql in CT_OPTIMIZED_TABLES.items():
+			conn.execute("ALTER TABLE main.%s RENAME TO %s_script;" % (var_table, var_table))
+			conn.execute(var_sql)
+			conn.execute("INSERT INTO main.%s SELECT * FROM main.%s_script;" % (var_table, var_table))
+			conn.execute("DROP TABLE main.%s_script;" % (var_table))
+	#
+	for var_table, list_index_sql in CT_OPTIMIZED_INDEXES.items():
+		if conn.execute("SELECT 1 FROM main.sqlite_master WHERE type = 'table' AND name = ?;", (var_table,)).fetchone():
+			for var_index_sql in list_index_sql:
+				conn.execute(var_index_sql)
+	#
+	for (var_table,) in conn.execute("SELECT name FROM main.sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name;").fetchall():
+		dict_counts[var_table] = conn.execute('SELECT COUNT(*) FROM main."%s";' % (var_table)).fetchone()[0]
+	#
+	conn.execute("ANALYZE;")
+	conn.execute("PRAGMA application_id=%d;" % (CT_APPLICATION_ID))		# Marks the file for func_nihpo_database_connect().
+	conn.execute("VACUUM;")
+	conn.execute("PRAGMA journal_mode=DELETE;")		# No WAL file: the file can be opened as immutable.
+	conn.close()
+	#
+	os.replace(var_building_filename, in_target_filename)
+	return dict_counts
+#
+#
+if __name__ == '__main__':
+	list_arguments = sys.argv[1:]
+	var_sql_filename = None
+	if ('--sql' in list_arguments):
+		var_position = list_arguments.index('--sql')
+		assert (var_position + 1 < len(list_arguments)),"Please provide the SQL script after --sql"
+		var_sql_filename = list_arguments[var_position + 1]
+		del list_arguments[var_position:var_position + 2]
+	#
+	var_source_filename = list_arguments[0] if (len(list_arguments) > 0) else CT_DATABASE_FILENAME
+	var_target_filename = list_arguments[1] if (len(list_arguments) > 1) else var_source_filename
+	#
+	try:
+		dict_counts = func_nihpo_database_build(var_source_filename, var_target_filename, var_sql_filename)
+	except (sqlite3.Error, AssertionError) as e:
+		print ("Error: %s" % (e))
+		sys.exit(1)
+	#
+	for var_table, var_count in dict_counts.items():
+		print ("%s: %d rows" % (var_table, var_count))
+	print ("[%s] built: %d bytes." % (var_target_filename, os.path.getsize(var_target_filename)))
@@ -0,0 +1,266 @@
+#!/usr/bin/python3
+# Author: PHUSE PODR contributors. Builds on Roche_ADaM_Generation.py by Jose.Lacal@NIHPO.com
+# Filename: PHUSE_Codelists.py
+# Purpose: Load CDISC codelists from the SQLite3 file "Synthetic_Health_Data_NIHPO.sqlite3" once, and sample from them in memory.
+# Version: Mon 19 October 2026.
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, version 3.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+"""
+The generators used to run one "ORDER BY RANDOM() LIMIT 1" query per codelist value.
+These functions load every value of a codelist the first time it is needed, and then sample from memory.
+
+To use these functions:
+	import PHUSE_Codelists
+	list_values = PHUSE_Codelists.func_nihpo_codelist_values(nihpo_cursor, 'C66742')
+	array_values = PHUSE_Codelists.func_nihpo_codelist_sample(rng, list_values, 1000)
+
+
+Parallel runs:
+The parent process loads the codelists once and publishes them in a single shared memory block.
+Worker processes attach to that block (read-only) instead of opening the SQLite3 file and keeping their own copy.
+
+	Shared memory layout:
+		int64[number_values + 1]	Byte offset of each value in the string area. Value i is string_area[offsets[i]:offsets[i+1]].
+		bytes[string_area_size]		All values, UTF-8 encoded, one after the other.
+
+	In the parent process:
+		shm_codelists, dict_descriptor = PHUSE_Codelists.func_nihpo_codelists_publish(nihpo_cursor, ['C65047', 'C74456', 'C71620'])
+		pool = multiprocessing.Pool(32, initializer=PHUSE_Codelists.func_nihpo_codelists_attach, initargs=(dict_descriptor,))
+		..
+		PHUSE_Codelists.func_nihpo_codelists_release(shm_codelists)
+
+	In each worker:
+		array_values = PHUSE_Codelists.func_nihpo_codelists_shared_sample(rng, 'C65047', 1000)	# Drawn from the shared block: only the values drawn are decoded.
+		list_values = PHUSE_Codelists.func_nihpo_codelist_values(None, 'C66742')	# No SQLite3 cursor needed. Decoded on each call, not kept.
+
+	Any lists of values can be published, keyed by any name (e.g. the controlled terms of a variable):
+		shm_terms, dict_descriptor = PHUSE_Codelists.func_nihpo_codelists_publish_values({'(NY)': ['N', 'Y'], '(SEX)': ['F', 'M', 'U']})
+
+	The publishing process owns the block: workers attach without registering it with their resource tracker, so a worker that exits does not remove it.
+"""
+
+
+# Imports Section
+import sys
+from multiprocessing import resource_tracker
+from multiprocessing import shared_memory
+#
+try:
+	import numpy as np
+except ImportError:
+	print("Install NumPy: pip3 install numpy")
+	sys.exit(1)
+#
+# Codelists already loaded in this process: { codelist_code : [cdisc_submission_value, ..] }
+dict_codelist_cache = {}
+#
+# Shared memory codelist table attached in this process (see func_nihpo_codelists_attach):
+dict_shared_codelists = None
+#
+#
+def func_nihpo_codelist_values (in_sqlite3_cursor, in_codelist):
+	"""
+	This function returns all values of a particular codelist from the SQLite3 file "Synthetic_Health_Data_NIHPO.sqlite3".
+	Values are read from the database only the first time a codelist is requested.
+	Inputs:
+		in_sqlite3_cursor : [SQLite3 cursor] : Cursor to SQLite3 file. May be None in a worker attached to shared codelists.
+		in_codelist : [String] : Code of interest.
+
+	Return:
+		List of values, in a stable order.
+
+	To call this function:
+		func_nihpo_codelist_values(nihpo_cursor, 'C66742')
+	"""
+	if (in_codelist not in dict_codelist_cache) and (dict_shared_codelists is not None) and (in_codelist in dict_shared_codelists['codelists']):
+		# Worker process: decode the values from shared memory instead of querying the SQLite3 file. They are not kept: the shared block is the only copy.
+		var_first, var_count = dict_shared_codelists['codelists'][in_codelist]
+		return func_nihpo_codelists_shared_decode(np.arange(var_first, var_first + var_count))
+	#
+	if in_codelist not in dict_codelist_cache:
+		in_sqlite3_cursor.execute('''SELECT cdisc_submission_value FROM cdisc_terminology WHERE codelist_code = ? ORDER BY cdisc_submission_value;''', (in_codelist,))
+		list_values = [one_row[0] for one_row in in_sqlite3_cursor.fetchall()]
+		assert (len(list_values) > 0),"Codelist [%s] has no values in the SQLite3 file." % (in_codelist)
+		dict_codelist_cache[in_codelist] = list_values
+	#
+	return dict_codelist_cache[in_codelist]
+#
+#
+def func_nihpo_codelist_sample (in_rng, in_values, in_size):
+	"""
+	This function returns an array of values drawn at random (with replacement) from a list of values.
+	Inputs:
+		in_rng : [NumPy Generator] : Random number generator.
+		in_values : [List] : Values to sample from, as returned by func_nihpo_codelist_values().
+		in_size : [Integer] : Number of values to draw.
+
+	Return:
+		NumPy array of values (dtype object).
+
+	To call this function:
+		func_nihpo_codelist_sample(np.random.default_rng(), ['N', 'Y'], 100)
+	"""
+	array_values = np.empty(len(in_values), dtype=object)
+	array_values[:] = in_values
+	#
+	return array_values[in_rng.integers(0, len(in_values), in_size)]
+#
+#
+def func_nihpo_codelists_publish (in_sqlite3_cursor, in_codelists):
+	"""
+	This function loads a list of codelists and copies them into a new shared memory block, so worker processes can attach to them.
+	Inputs:
+		in_sqlite3_cursor : [SQLite3 cursor] : Cursor to SQLite3 file.
+		in_codelists : [List] : Codes of the codelists to publish.
+
+	Return:
+		SharedMemory object : Keep it open while workers run, then call func_nihpo_codelists_release().
+		Dictionary : Descriptor to pass to func_nihpo_codelists_attach() in each worker. It only contains names and numbers, so it is cheap to pickle.
+
+	To call this function:
+		func_nihpo_codelists_publish(nihpo_cursor, ['C65047', 'C74456', 'C71620'])
+	"""
+	return func_nihpo_codelists_publish_values(dict([(codelist, func_nihpo_codelist_values(in_sqlite3_cursor, codelist)) for codelist in in_codelists]))
+#
+#
+def func_nihpo_codelists_publish_values (in_values):
+	"""
+	This function copies lists of values into a new shared memory block, so worker processes can attach to them.
+	Inputs:
+		in_values : [Dictionary] : { name : list of values (strings) }. The names are those given to func_nihpo_codelists_shared_sample() in the workers.
+
+	Return:
+		SharedMemory object : Keep it open while workers run, then call func_nihpo_codelists_release().
+		Dictionary : Descriptor to pass to func_nihpo_codelists_attach() in each worker.
+
+	To call this function:
+		func_nihpo_codelists_publish_values({'(NY)': ['N', 'Y'], '(SEX)': ['F', 'M', 'U']})
+	"""
+	dict_positions = {}
+	list_encoded = []
+	for codelist, list_values in in_values.items():
+		dict_positions[codelist] = (len(list_encoded), len(list_values))
+		list_encoded.extend([value.encode('utf-8') for value in list_values])
+	#
+	var_number_values = len(list_encoded)
+	array_lengths = np.fromiter((len(value) for value in list_encoded), dtype=np.int64, count=var_number_values)
+	array_offsets = np.zeros(var_number_values + 1, dtype=np.int64)
+	np.cumsum(array_lengths, out=array_offsets[1:])
+	var_offsets_size = array_offsets.nbytes
+	var_string_area_size = int(array_offsets[-1])
+	#
+	shm_codelists = shared_memory.SharedMemory(create=True, size=max(var_offsets_size + var_string_area_size, 1))
+	np.ndarray(array_offsets.shape, dtype=np.int64, buffer=shm_codelists.buf)[:] = array_offsets
+	shm_codelists.buf[var_offsets_size:var_offsets_size + var_string_area_size] = b''.join(list_encoded)
+	#
+	dict_descriptor = {'name': shm_codelists.name, 'number_values': var_number_values, 'string_area_size': var_string_area_size, 'codelists': dict_positions}
+	return shm_codelists, dict_descriptor
+#
+#
+def func_nihpo_codelists_attach (in_descriptor):
+	"""
+	This function attaches the current process (read-only) to codelists published by func_nihpo_codelists_publish().
+	It can be used directly as the initializer of a multiprocessing Pool.
+	Inputs:
+		in_descriptor : [Dictionary] : Descriptor returned by func_nihpo_codelists_publish().
+
+	Return:
+		Dictionary describing the attached table (also kept in this module for the other functions).
+
+	To call this function:
+		func_nihpo_codelists_attach(dict_descriptor)
+	"""
+	global dict_shared_codelists
+	#
+	# The publisher owns the block: it must not be registered with the resource tracker of this process, which would remove it when this process exits.
+	if (sys.version_info >= (3, 13)):
+		shm_codelists = shared_memory.SharedMemory(name=in_descriptor['name'], track=False)
+	else:
+		shm_codelists = shared_memory.SharedMemory(name=in_descriptor['name'])
+		resource_tracker.unregister(shm_codelists._name, 'shared_memory')		# Registered by SharedMemory() before Python 3.13.
+	#
+	var_number_values = in_descriptor['number_values']
+	var_offsets_size = (var_number_values + 1) * 8
+	array_offsets = np.ndarray((var_number_values + 1,), dtype=np.int64, buffer=shm_codelists.buf)
+	array_offsets.flags.writeable = False
+	#
+	dict_shared_codelists = {'shm': shm_codelists, 'offsets': array_offsets, 'strings': shm_codelists.buf[var_offsets_size:var_offsets_size + in_descriptor['string_area_size']].toreadonly(), 'codelists': in_descriptor['codelists']}
+	return dict_shared_codelists
+#
+#
+def func_nihpo_codelists_detach ():
+	"""
+	This function detaches the current process from the shared codelist table, without removing it (see func_nihpo_codelists_release() for the publisher).
+
+	To call this function:
+		func_nihpo_codelists_detach()
+	"""
+	global dict_shared_codelists
+	#
+	if dict_shared_codelists is not None:
+		shm_codelists = dict_shared_codelists['shm']
+		dict_shared_codelists['strings'].release()
+		dict_shared_codelists = None		# Drops the offsets array: nothing refers to the buffer any more.
+		shm_codelists.close()
+#
+#
+def func_nihpo_codelists_shared_decode (in_positions):
+	"""
+	This function returns the values stored at some positions of the attached shared codelist table.
+	Inputs:
+		in_positions : [Array of Integers] : Positions in the shared table (not within a codelist).
+
+	Return:
+		List of strings.
+
+	To call this function:
+		func_nihpo_codelists_shared_decode(np.arange(0, 10))
+	"""
+	array_offsets = dict_shared_codelists['offsets']
+	memory_strings = dict_shared_codelists['strings']
+	return [str(memory_strings[array_offsets[position]:array_offsets[position + 1]], 'utf-8') for position in in_positions]
+#
+#
+def func_nihpo_codelists_shared_sample (in_rng, in_codelist, in_size):
+	"""
+	This function returns an array of values drawn at random from a codelist of the attached shared codelist table, straight from the shared buffer.
+	Only the distinct values drawn are decoded. The draws are the same as func_nihpo_codelist_sample() on the same values with the same generator.
+	Inputs:
+		in_rng : [NumPy Generator] : Random number generator.
+		in_codelist : [String] : Code of interest.
+		in_size : [Integer] : Number of values to draw.
+
+	Return:
+		NumPy array of values (dtype object).
+
+	To call this function:
+		func_nihpo_codelists_shared_sample(rng, 'C65047', 1000)
+	"""
+	assert (dict_shared_codelists is not None),"Please call func_nihpo_codelists_attach() first."
+	var_first, var_count = dict_shared_codelists['codelists'][in_codelist]
+	array_positions = in_rng.integers(var_first, var_first + var_count, in_size)
+	array_unique, array_inverse = np.unique(array_positions, return_inverse=True)
+	#
+	array_values = np.empty(len(array_unique), dtype=object)
+	array_values[:] = func_nihpo_codelists_shared_decode(array_unique)
+	return array_values[array_inverse]
+#
+#
+def func_nihpo_codelists_release (in_shm_codelists):
+	"""
+	This function closes and removes a shared memory block created by func_nihpo_codelists_publish(). Call it in the publishing process once all workers are done.
+	Inputs:
+		in_shm_codelists : [SharedMemory] : Object returned by func_nihpo_codelists_publish().
+
+	To call this function:
+		func_nihpo_codelists_release(shm_codelists)
+	"""
+	in_shm_codelists.close()
+	# Pool workers share the resource tracker of this process: the unregister of func_nihpo_codelists_attach() also removed this process' record. Registering is idempotent.
+	if (sys.version_info < (3, 13)):
+		resource_tracker.register(in_shm_codelists._name, 'shared_memory')
+	in_shm_codelists.unlink()
+#
@@ -67,14 +67,32 @@ e.) Write output to SAS file.
 
 
 # Imports Section
+import concurrent.futures
 import csv
 import datetime
+import multiprocessing
 import os
 import random
+import re
 import sqlite3
 import sys
+import types
 import uuid
 #
+import PHUSE_Adverse_Events
+import PHUSE_Build_Database
+import PHUSE_Codelists
+import PHUSE_SDTM_Schema
+import PHUSE_Subject_Index
+import PHUSE_Terminology_Pack
+import PHUSE_XPT
+#
+try:
+	import numpy as np
+except ImportError:
+	print("Install NumPy: pip3 install numpy")
+	sys.exit(1)
+#
 try:
 	import pandas as pd
 except ImportError:
@@ -233,7 +251,16 @@ CT_INVESTIGATORS = [['Investigator 01', 'INV01'], ['Investigator 02', 'INV02'],
 CT_PERCENTAGE_DEATHS = ['DEATH'] * 15 + ['NONE'] * 85					# Percentage of subjects that die during the trial.
 CT_CAUSES_DEATH = ['CAUSE OF DEATH 01'] * 15 + ['CAUSE OF DEATH 02'] * 35 + ['CAUSE OF DEATH 03'] * 50
 CT_PERCENTAGE_DISCONTINUATION = ['DROP-OFF'] * 23 + ['FINISH'] * 77 	# Percentage of subjects that do not finish all phases of the trial.
-CT_PERCENTAGE_ADVERSE_EVENTS = ['ADV-EV'] * 10 + ['NONE'] * 90			# Percentage of subjects taht experience at least 01 adverse event.
+#
+# Number of adverse events per subject, by Arm code (see CT_ARM_NAMES and PHUSE_Adverse_Events.py). Distribution is 'poisson' (with "mean") or 'negative_binomial' (with "mean" and "dispersion").
+# Optional "maximum" caps the number of adverse events per subject.
+CT_AE_EVENT_COUNT_BY_ARM = {
+	'ARM01': {"distribution": "poisson", "mean": 0.6, "maximum": 5},
+	'ARM02': {"distribution": "negative_binomial", "mean": 1.4, "dispersion": 0.8, "maximum": 5},
+	'ARM03': {"distribution": "negative_binomial", "mean": 2.1, "dispersion": 0.8, "maximum": 5},
+}
+CT_MAXIMUM_CONCOMITANT_PRIOR = 4	# Maximum number of concomitant or prior medications per subject.
+CT_DAYS_PRIOR_MEDICATION = 365		# Prior medications start up to this number of days before enrollment.
 #
 CT_GROUPS = ['Group_01'] * 10 + ['Group_02'] * 20 + ['Group_03'] * 50 + ['Group_04'] * 20
 CT_ARM_NAMES = [['Arm 01', 'ARM01'], ['Arm 02', 'ARM02'], ['Arm 03', 'ARM03']]
@@ -242,10 +269,36 @@ CT_COUNTRY_ENROLLMENT = ['DE'] * 30 + ['ES'] * 20 + ['UK'] * 20 + ['VE'] * 10 +
 #
 CT_CSV_SEPARATOR = "|"	# Try NOT to use ',' (commas) to prevent file importing errors.
 #
+CT_RANDOM_SEED = None	# Set to an integer to generate the same data on every run. Also set with --seed.
+#
+CT_PROCESSES = os.cpu_count() or 1		# Number of worker processes. 1 generates all domains in this process. Also set with --processes.
+#
+CT_XPT_OUTPUT = False	# Set to True to also write each domain as a SAS Transport (XPORT) file "PHUSE_TDF_<domain>.xpt".
+#
+CT_THERAPEUTIC_AREA = None	# Therapeutic Area User Guide whose domains are also generated (e.g. 'Breast Cancer'). Also set with --therapeutic-area.
+#
 # = = = = = Do not change anything below this line = = = = =
 #
+if ('--therapeutic-area' in sys.argv):
+	var_position = sys.argv.index('--therapeutic-area')
+	assert (var_position + 1 < len(sys.argv)),"Please provide the name of the Therapeutic Area after --therapeutic-area"
+	CT_THERAPEUTIC_AREA = sys.argv[var_position + 1]
+	del sys.argv[var_position:var_position + 2]
+#
+if ('--processes' in sys.argv):
+	var_position = sys.argv.index('--processes')
+	assert (var_position + 1 < len(sys.argv)) and sys.argv[var_position + 1].isdigit() and (int(sys.argv[var_position + 1]) >= 1),"Please provide a number of processes (1 or more) after --processes"
+	CT_PROCESSES = int(sys.argv[var_position + 1])
+	del sys.argv[var_position:var_position + 2]
+#
+if ('--seed' in sys.argv):
+	var_position = sys.argv.index('--seed')
+	assert (var_position + 1 < len(sys.argv)) and sys.argv[var_position + 1].isdigit(),"Please provide a random seed (0 or more) after --seed"
+	CT_RANDOM_SEED = int(sys.argv[var_position + 1])
+	del sys.argv[var_position:var_position + 2]
+#
 if (len(sys.argv) != 6):
-	print("\n\nUsage: python3 PHUSE_Generate_SDTM.py [StudyID] [TargetDirectory] [NumberSubjects] [DateStartRecruitment] [CurrentDate]\nUse YYYY-MM-DD for dates.\n")
+	print("\n\nUsage: python3 PHUSE_Generate_SDTM.py [StudyID] [TargetDirectory] [NumberSubjects] [DateStartRecruitment] [CurrentDate] [--therapeutic-area 'Breast Cancer'] [--processes 4] [--seed 1234]\nUse YYYY-MM-DD for dates.\n")
 	sys.exit()
 	#
 if (not os.path.isdir(sys.argv[2])):
@@ -386,16 +439,945 @@ def func_nihpo_random_value (in_lower_limit, in_upper_limit, in_fuzz_factor):
 	#
 	return random.uniform(in_lower_limit * (1+in_fuzz_factor), in_upper_limit * (1+in_fuzz_factor))
 #
+#
+# = = Generation plan = =
+CT_PLAN_RULE_FLAGS = ['per_trial', 'per_subject', 'per_arm', 'per_visit', 'per_visit_measurement', 'per_adverse_event', 'per_concomitant_prior']
+CT_PLAN_DEFINITION_FIELDS = ['variable_name', 'variable_label', 'type', 'controlled_terms', 'role', 'cdisc_notes', 'core']
+#
+def func_nihpo_rule_flag (in_value):
+	"""
+	This function converts a flag of table "cdisc_sdtm_domain_rules" to a Boolean. The flags are stored as text ('1', '0' or empty), not as integers.
+	Inputs:
+		in_value : [String, Integer or None] : Value of a per_* column.
+
+	Return:
+		Boolean.
+
+	To call this function:
+		func_nihpo_rule_flag('1')
+	"""
+	return (str(in_value).strip() == '1') if (in_value is not None) else False
+#
+#
+def func_nihpo_generation_plan_compile (in_sqlite3_connection, in_domains=None):
+	"""
+	This function reads tables "cdisc_sdtm_domain_rules" and "cdisc_sdtm_domain_definitions" once (from pack_terminology when it is open), and compiles a read-only generation plan per domain.
+	Inputs:
+		in_sqlite3_connection : [SQLite3 connection] : Connection to SQLite3 file. Not used when pack_terminology is open.
+		in_domains : [List of Strings] : Domain codes to plan. None for all domains with rules.
+
+	Return:
+		Read-only dictionary { domain_code : plan }. Each plan is a read-only dictionary:
+			'domain' : Domain code.
+			'per_trial' .. 'per_concomitant_prior' : [Boolean] : Cardinality flags (see CT_PLAN_RULE_FLAGS).
+			'variables' : Tuple of read-only dictionaries, in the order of the definitions: variable_name, variable_label, type, controlled_terms, role, cdisc_notes, core.
+			'variable_names' : Tuple of variable names, in the same order.
+			'schema' : "Num" / "Char" type and label of each variable (see PHUSE_SDTM_Schema.py).
+
+	To call this function:
+		func_nihpo_generation_plan_compile(conn, ['DM', 'AE'])
+	"""
+	var_sql_rules = "SELECT domain_code, %s FROM cdisc_sdtm_domain_rules" % (", ".join(CT_PLAN_RULE_FLAGS))
+	var_sql_definitions = "SELECT domain_code, %s FROM cdisc_sdtm_domain_definitions" % (", ".join(CT_PLAN_DEFINITION_FIELDS))
+	list_parameters = []
+	if (in_domains is not None):
+		list_parameters = [str(domain).strip().upper() for domain in in_domains]
+		var_sql_filter = " WHERE domain_code IN (%s)" % (", ".join(["?"] * len(list_parameters)))
+		var_sql_rules += var_sql_filter
+		var_sql_definitions += var_sql_filter
+	#
+	# Variables in (domain_code, variable_name) order: the order of "PHUSE_Generate_SDTM.sql", the primary key of the optimized file (see PHUSE_Build_Database.py), and the order of the pack.
+	if pack_terminology is not None:
+		list_definitions = PHUSE_Terminology_Pack.func_nihpo_pack_table_rows(pack_terminology, 'definitions_values', list_parameters if (in_domains is not None) else None)
+		list_rules = PHUSE_Terminology_Pack.func_nihpo_pack_table_rows(pack_terminology, 'rules_values', list_parameters if (in_domains is not None) else None)
+	else:
+		list_definitions = in_sqlite3_connection.execute(var_sql_definitions + " ORDER BY domain_code ASC, variable_name ASC;", list_parameters).fetchall()
+		list_rules = in_sqlite3_connection.execute(var_sql_rules + " ORDER BY domain_code ASC;", list_parameters).fetchall()
+	#
+	dict_variables = {}
+	for one_definition in list_definitions:
+		if (1 in CT_DEBUG):  print (one_definition)
+		dict_variable = dict(zip(CT_PLAN_DEFINITION_FIELDS, [(value.strip() if isinstance(value, str) else value) for value in one_definition[1:]]))
+		dict_variables.setdefault(one_definition[0].strip(), []).append(types.MappingProxyType(dict_variable))
+	#
+	dict_plan = {}
+	for one_rule in list_rules:
+		if (1 in CT_DEBUG):  print (one_rule)
+		var_domain_code = one_rule[0].strip()
+		tuple_variables = tuple(dict_variables.get(var_domain_code, []))
+		dict_domain_plan = {'domain': var_domain_code, 'variables': tuple_variables, 'variable_names': tuple([variable['variable_name'] for variable in tuple_variables]),
+			'schema': PHUSE_SDTM_Schema.func_nihpo_schema_domain([(variable['variable_name'], variable['variable_label'], variable['type']) for variable in tuple_variables])}
+		dict_domain_plan.update(zip(CT_PLAN_RULE_FLAGS, [func_nihpo_rule_flag(value) for value in one_rule[1:]]))
+		dict_plan[var_domain_code] = types.MappingProxyType(dict_domain_plan)
+		if (not tuple_variables):
+			print ("Warning: domain [%s] has rules but no variable definitions." % (var_domain_code))
+	#
+	return types.MappingProxyType(dict_plan)
+#
+# = = Therapeutic Area User Guides = =
+# The SQLite3 file also holds the 'Domains' and 'Variables' sheets of the CDISC Therapeutic Area User Guides (see README.md): one set of rows per Therapeutic Area (TA).
+# They are read only with --therapeutic-area, for that TA alone, and only once.
+# Tables holding the two sheets, and the names their columns may have (first one found is used):
+CT_TA_DOMAINS_TABLE = 'cdisc_ta_domains'
+CT_TA_VARIABLES_TABLE = 'cdisc_ta_variables'
+CT_TA_DOMAIN_COLUMNS = {'therapeutic_area': ['therapeutic_area', 'ta_name', 'ta'], 'domain_code': ['domain_code', 'dataset_name', 'domain'],
+	'class': ['class', 'domain_class', 'observation_class']}
+CT_TA_VARIABLE_COLUMNS = {'therapeutic_area': ['therapeutic_area', 'ta_name', 'ta'], 'domain_code': ['domain_code', 'dataset_name', 'domain'],
+	'variable_name': ['variable_name', 'variable'], 'variable_label': ['variable_label', 'label'], 'type': ['type', 'data_type'],
+	'controlled_terms': ['controlled_terms', 'controlled_terms_codelist_or_format', 'codelist'], 'role': ['role'], 'cdisc_notes': ['cdisc_notes', 'notes'], 'core': ['core']}
+#
+# Cardinality of TA domains without rules in "cdisc_sdtm_domain_rules", from the class of the domain (default: per_subject):
+CT_TA_CLASS_RULES = {'TRIAL DESIGN': 'per_trial', 'SPECIAL-PURPOSE': 'per_subject', 'SPECIAL PURPOSE': 'per_subject', 'INTERVENTIONS': 'per_concomitant_prior',
+	'EVENTS': 'per_adverse_event', 'FINDINGS': 'per_visit', 'FINDINGS ABOUT': 'per_visit'}
+#
+# Definitions already read { therapeutic area (upper case) : {'variables', 'classes'} }:
+dict_ta_definitions_cache = {}
+#
+def func_nihpo_ta_columns (in_sqlite3_connection, in_table, in_candidates):
+	"""
+	This function finds the columns of a TA table (see CT_TA_DOMAIN_COLUMNS and CT_TA_VARIABLE_COLUMNS).
+	Inputs:
+		in_sqlite3_connection : [SQLite3 connection] : Connection to SQLite3 file.
+		in_table : [String] : Table name.
+		in_candidates : [Dictionary] : { field : possible column names }.
+
+	Return:
+		Dictionary { field : column name, or None if the table has none of the candidates }.
+
+	To call this function:
+		func_nihpo_ta_columns(conn, CT_TA_VARIABLES_TABLE, CT_TA_VARIABLE_COLUMNS)
+	"""
+	list_tables = [one_row[0] for one_row in in_sqlite3_connection.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view') ORDER BY name;")]
+	if (in_table not in list_tables):
+		raise sqlite3.OperationalError("Therapeutic Area table [%s] not found. Tables in the SQLite3 file: %s" % (in_table, list_tables))
+	#
+	set_columns = set([one_column[1].lower() for one_column in in_sqlite3_connection.execute('PRAGMA table_info("%s");' % (in_table))])
+	return {field: next((column for column in list_candidates if column in set_columns), None) for field, list_candidates in in_candidates.items()}
+#
+#
+def func_nihpo_ta_definitions (in_sqlite3_connection, in_therapeutic_area):
+	"""
+	This function reads the domain and variable definitions of one Therapeutic Area User Guide, on first use. Only the rows of that TA are read.
+	Inputs:
+		in_sqlite3_connection : [SQLite3 connection] : Connection to SQLite3 file.
+		in_therapeutic_area : [String] : Name of the TA, as in the SQLite3 file (any case), e.g. 'Breast Cancer'.
+
+	Return:
+		Dictionary:
+			'variables' : { domain_code : list of read-only dictionaries with the fields of CT_PLAN_DEFINITION_FIELDS }.
+			'classes' : { domain_code : class of the domain, upper case }. Empty if the TA domains table is missing.
+
+	To call this function:
+		func_nihpo_ta_definitions(conn, 'Breast Cancer')
+	"""
+	var_ta = in_therapeutic_area.strip().upper()
+	if var_ta in dict_ta_definitions_cache:
+		return dict_ta_definitions_cache[var_ta]
+	#
+	dict_variable_columns = func_nihpo_ta_columns(in_sqlite3_connection, CT_TA_VARIABLES_TABLE, CT_TA_VARIABLE_COLUMNS)
+	for field in ['therapeutic_area', 'domain_code', 'variable_name']:
+		assert (dict_variable_columns[field] is not None),"Table [%s] has no column for [%s]: %s" % (CT_TA_VARIABLES_TABLE, field, CT_TA_VARIABLE_COLUMNS[field])
+	var_sql = "SELECT %s, %s FROM %s WHERE UPPER(TRIM(%s)) = ? ORDER BY 1 ASC, 2 ASC;" % (dict_variable_columns['domain_code'],
+		", ".join([(dict_variable_columns[field] or "''") for field in CT_PLAN_DEFINITION_FIELDS]), CT_TA_VARIABLES_TABLE, dict_variable_columns['therapeutic_area'])
+	list_definitions = in_sqlite3_connection.execute(var_sql, (var_ta,)).fetchall()
+	if (len(list_definitions) == 0):
+		list_therapeutic_areas = [one_row[0] for one_row in in_sqlite3_connection.execute("SELECT DISTINCT TRIM(%s) FROM %s ORDER BY 1;" % (dict_variable_columns['therapeutic_area'], CT_TA_VARIABLES_TABLE))]
+		raise ValueError("Therapeutic Area [%s] not found. Available: %s" % (in_therapeutic_area, list_therapeutic_areas))
+	#
+	dict_classes = {}
+	try:
+		dict_domain_columns = func_nihpo_ta_columns(in_sqlite3_connection, CT_TA_DOMAINS_TABLE, CT_TA_DOMAIN_COLUMNS)
+		if None not in dict_domain_columns.values():
+			var_sql = "SELECT %s, %s FROM %s WHERE UPPER(TRIM(%s)) = ?;" % (dict_domain_columns['domain_code'], dict_domain_columns['class'], CT_TA_DOMAINS_TABLE, dict_domain_columns['therapeutic_area'])
+			dict_classes = dict([((domain or '').strip().upper(), (domain_class or '').strip().upper()) for domain, domain_class in in_sqlite3_connection.execute(var_sql, (var_ta,))])
+	except sqlite3.OperationalError as e:
+		if (1 in CT_DEBUG):  print ("Therapeutic Area [%s]: no domain classes (%s)." % (in_therapeutic_area, e))
+	#
+	dict_variables = {}
+	for one_definition in list_definitions:
+		dict_variable = dict(zip(CT_PLAN_DEFINITION_FIELDS, [(value.strip() if isinstance(value, str) else value) for value in one_definition[1:]]))
+		if dict_variable['variable_name']:
+			dict_variables.setdefault((one_definition[0] or '').strip().upper(), []).append(types.MappingProxyType(dict_variable))
+	#
+	dict_ta_definitions_cache[var_ta] = {'variables': dict_variables, 'classes': dict_classes}
+	return dict_ta_definitions_cache[var_ta]
+#
+#
+def func_nihpo_ta_plan_compile (in_sqlite3_connection, in_therapeutic_area, in_plan):
+	"""
+	This function adds the domains and variables of one Therapeutic Area User Guide to a generation plan (see func_nihpo_ta_definitions).
+	TA domains without rules get their cardinality from their class (see CT_TA_CLASS_RULES). Variables of the TA are added to the domains of the plan that lack them.
+	Inputs:
+		in_sqlite3_connection : [SQLite3 connection] : Connection to SQLite3 file.
+		in_therapeutic_area : [String] : Name of the TA, as in the SQLite3 file (any case), e.g. 'Breast Cancer'.
+		in_plan : [Dictionary] : Returned by func_nihpo_generation_plan_compile().
+
+	Return:
+		Read-only dictionary { domain_code : plan }, as func_nihpo_generation_plan_compile() returns.
+
+	To call this function:
+		func_nihpo_ta_plan_compile(conn, 'Breast Cancer', dict_generation_plan)
+	"""
+	dict_ta_definitions = func_nihpo_ta_definitions(in_sqlite3_connection, in_therapeutic_area)
+	dict_classes = dict_ta_definitions['classes']
+	dict_plan = dict(in_plan)
+	for var_domain_code, list_variables in dict_ta_definitions['variables'].items():
+		if (var_domain_code in dict_plan):
+			dict_domain_plan = dict(dict_plan[var_domain_code])
+			set_names = set(dict_domain_plan['variable_names'])
+			list_variables = list(dict_domain_plan['variables']) + [variable for variable in list_variables if variable['variable_name'] not in set_names]
+		else:
+			var_rule = CT_TA_CLASS_RULES.get(dict_classes.get(var_domain_code, ''), 'per_subject')
+			dict_domain_plan = dict([(flag, flag == var_rule) for flag in CT_PLAN_RULE_FLAGS])
+			dict_domain_plan['domain'] = var_domain_code
+		list_variables = sorted(list_variables, key=lambda variable: variable['variable_name'])
+		dict_domain_plan['variables'] = tuple(list_variables)
+		dict_domain_plan['variable_names'] = tuple([variable['variable_name'] for variable in list_variables])
+		dict_domain_plan['schema'] = PHUSE_SDTM_Schema.func_nihpo_schema_domain([(variable['variable_name'], variable['variable_label'], variable['type']) for variable in list_variables])
+		dict_plan[var_domain_code] = types.MappingProxyType(dict_domain_plan)
+	#
+	return types.MappingProxyType(dict_plan)
+#
+#
+# = = Vectorized domain generator = =
+# Each domain is built in three steps, on whole columns instead of one record at a time:
+#	a.) func_nihpo_cohort_generate: the subjects (DM backbone), once per study.
+#	b.) func_nihpo_domain_index: one entry per record, from the cardinality flags of the domain: subject x arm x visit x measurement (or adverse event, medication).
+#	c.) func_nihpo_domain_generate: every variable of the domain, filled from the index by name, controlled terms or type.
+#
+# Subject-level variables taken from the cohort:
+CT_COHORT_VARIABLES = ['USUBJID', 'SUBJID', 'SITEID', 'INVID', 'INVNAM', 'COUNTRY', 'SEX', 'RACE', 'ETHNIC', 'AGE', 'AGEU', 'BRTHDTC',
+	'RFSTDTC', 'RFENDTC', 'RFXSTDTC', 'RFXENDTC', 'RFICDTC', 'RFPENDTC', 'DTHDTC', 'DTHFL']
+#
+# --TESTCD values: at most 8 characters, starting with a letter, then letters, digits or underscores.
+CT_SDTM_TESTCD_PATTERN = re.compile(r'^[A-Z][A-Z0-9_]{0,7}$')
+#
+def func_nihpo_visit_parameters_compile (in_visit_analysis_parameter):
+	"""
+	This function flattens the Visit => Analysis => Parameter definition (see CT_VISIT_ANALYSIS_PARAMETER) into arrays.
+	Inputs:
+		in_visit_analysis_parameter : [Dictionary] : Same structure as CT_VISIT_ANALYSIS_PARAMETER.
+
+	Return:
+		Dictionary of NumPy arrays:
+			'visit_id', 'visit_name', 'visit_day', 'visit_rate' : One entry per visit.
+			'parameter_visit' (position of the visit), 'parameter_id', 'parameter_name', 'parameter_delay', 'parameter_low', 'parameter_high', 'parameter_fuzz' : One entry per parameter of each visit.
+			'parameter_testcd' : --TESTCD of each parameter: its "parameter_id" when it is a valid test code (see CT_SDTM_TESTCD_PATTERN), otherwise "PARM0001", "PARM0002".. one per distinct "parameter_name".
+
+	To call this function:
+		func_nihpo_visit_parameters_compile(CT_VISIT_ANALYSIS_PARAMETER)
+	"""
+	dict_visits = {'visit_id': [], 'visit_name': [], 'visit_day': [], 'visit_rate': [],
+		'parameter_visit': [], 'parameter_id': [], 'parameter_name': [], 'parameter_delay': [], 'parameter_low': [], 'parameter_high': [], 'parameter_fuzz': []}
+	for var_visit_position, one_visit in enumerate(in_visit_analysis_parameter['visits']):
+		dict_visits['visit_id'].append(one_visit['visit_id'])
+		dict_visits['visit_name'].append(one_visit['visit_name'])
+		dict_visits['visit_day'].append(one_visit['days_after_enrollment'])
+		dict_visits['visit_rate'].append(one_visit['participation_rate'] / 100.0)
+		for one_analysis in one_visit['analysis_list']:
+			for one_parameter in one_analysis['parameter_list']:
+				dict_limits = {}
+				for one_value in one_parameter['value_list']:
+					dict_limits.update(one_value)
+				assert (dict_limits['Lower limit'] < dict_limits['Upper limit']),"Please ensure Lower limit value is smaller than Upper limit value: %s" % (one_parameter['parameter_name'])
+				dict_visits['parameter_visit'].append(var_visit_position)
+				dict_visits['parameter_id'].append(one_parameter['parameter_id'])
+				dict_visits['parameter_name'].append(one_parameter['parameter_name'])
+				dict_visits['parameter_delay'].append(one_parameter['days_delay'])
+				dict_visits['parameter_low'].append(dict_limits['Lower limit'])
+				dict_visits['parameter_high'].append(dict_limits['Upper limit'])
+				dict_visits['parameter_fuzz'].append(dict_limits['Fuzz factor'])
+	#
+	# Test codes: at most 8 characters. Parameter names without a valid id get their own generated code:
+	dict_testcd_generated = {}
+	dict_visits['parameter_testcd'] = []
+	for var_parameter_id, var_parameter_name in zip(dict_visits['parameter_id'], dict_visits['parameter_name']):
+		if CT_SDTM_TESTCD_PATTERN.match(str(var_parameter_id).upper()):
+			dict_visits['parameter_testcd'].append(str(var_parameter_id).upper())
+			continue
+		if var_parameter_name not in dict_testcd_generated:
+			dict_testcd_generated[var_parameter_name] = "PARM%04d" % (len(dict_testcd_generated) + 1)
+		dict_visits['parameter_testcd'].append(dict_testcd_generated[var_parameter_name])
+	assert (len(dict_testcd_generated) <= 9999),"Please give at least some parameters a valid parameter_id: too many test codes to generate."
+	#
+	dict_arrays = {key: np.array(values, dtype=object) for key, values in dict_visits.items() if key in ('visit_id', 'visit_name', 'parameter_id', 'parameter_name', 'parameter_testcd')}
+	dict_arrays.update({key: np.array(values, dtype=np.int64) for key, values in dict_visits.items() if key in ('visit_day', 'parameter_visit', 'parameter_delay')})
+	dict_arrays.update({key: np.array(values, dtype=np.float64) for key, values in dict_visits.items() if key in ('visit_rate', 'parameter_low', 'parameter_high', 'parameter_fuzz')})
+	return dict_arrays
+#
+#
+def func_nihpo_iso_dates (in_dates):
+	"""
+	This function formats an array of dates as ISO 8601 strings (YYYY-MM-DD). Missing dates (NaT) become empty strings.
+	Inputs:
+		in_dates : [NumPy array of datetime64[D]] : Dates.
+
+	Return:
+		NumPy array of strings (dtype object).
+
+	To call this function:
+		func_nihpo_iso_dates(np.array(['2020-01-25', 'NaT'], dtype='datetime64[D]'))
+	"""
+	array_text = np.datetime_as_string(in_dates, unit='D').astype(object)
+	array_text[np.isnat(in_dates)] = ''
+	return array_text
+#
+#
+def func_nihpo_cohort_generate (in_rng, in_number_subjects):
+	"""
+	This function generates all Synthetic Subjects of the study at once: the DM backbone used by every other domain.
+	Inputs:
+		in_rng : [NumPy Generator] : Random number generator.
+		in_number_subjects : [Integer] : Number of subjects.
+
+	Return:
+		Dictionary of NumPy arrays, one entry per subject: the variables in CT_COHORT_VARIABLES, plus
+			'arm_position' (position in CT_ARM_NAMES), 'rfstdtc_date', 'rfendtc_date' and 'dthdtc_date' (datetime64[D], NaT if alive).
+
+	To call this function:
+		func_nihpo_cohort_generate(np.random.default_rng(), 100)
+	"""
+	var_start = np.datetime64(CT_DATE_START_RECRUITMENT.date(), 'D')
+	var_end = np.datetime64(CT_DATE_CURRENT_DATE.date(), 'D')
+	assert (var_start < var_end),"Please ensure DateStartRecruitment is earlier than CurrentDate"
+	var_recruitment_days = int((var_end - var_start) / np.timedelta64(1, 'D'))
+	var_last_visit_day = max([one_visit['days_after_enrollment'] for one_visit in CT_VISIT_ANALYSIS_PARAMETER['visits']])
+	#
+	dict_cohort = {}
+	array_sites = in_rng.choice(CT_SITE_IDS, in_number_subjects).astype(object)
+	dict_cohort['SITEID'] = array_sites
+	dict_cohort['SUBJID'] = np.char.mod('%04d', np.arange(1, in_number_subjects + 1)).astype(object)
+	dict_cohort['USUBJID'] = CT_STUDY_ID + '-' + array_sites + '-' + dict_cohort['SUBJID']
+	array_investigators = in_rng.integers(0, len(CT_INVESTIGATORS), in_number_subjects)
+	dict_cohort['INVNAM'] = np.array([name for name, code in CT_INVESTIGATORS], dtype=object)[array_investigators]
+	dict_cohort['INVID'] = np.array([code for name, code in CT_INVESTIGATORS], dtype=object)[array_investigators]
+	dict_cohort['COUNTRY'] = in_rng.choice(CT_COUNTRY_ENROLLMENT, in_number_subjects).astype(object)
+	dict_cohort['SEX'] = in_rng.choice(CT_GENDER_SPLIT, in_number_subjects).astype(object)
+	dict_cohort['RACE'] = in_rng.choice(CT_RACE_SPLIT, in_number_subjects).astype(object)
+	dict_cohort['ETHNIC'] = np.where(in_rng.choice(CT_ETHNICITY, in_number_subjects) == 'Hispanic', 'HISPANIC OR LATINO', 'NOT HISPANIC OR LATINO').astype(object)
+	#
+	# Enrollment (reference start) and end of participation. Subjects that drop off leave half way:
+	array_rfstdtc = var_start + in_rng.integers(0, var_recruitment_days, in_number_subjects).astype('timedelta64[D]')
+	array_participation_days = in_rng.integers(var_last_visit_day, var_last_visit_day + CT_DELAY_ANALYSIS_RESULT + 1, in_number_subjects)
+	array_discontinued = in_rng.choice(CT_PERCENTAGE_DISCONTINUATION, in_number_subjects) == 'DROP-OFF'
+	array_participation_days[array_discontinued] = array_participation_days[array_discontinued] // 2
+	array_rfendtc = np.minimum(array_rfstdtc + array_participation_days.astype('timedelta64[D]'), var_end)
+	dict_cohort['rfstdtc_date'] = array_rfstdtc
+	dict_cohort['rfendtc_date'] = array_rfendtc
+	dict_cohort['RFSTDTC'] = func_nihpo_iso_dates(array_rfstdtc)
+	dict_cohort['RFENDTC'] = func_nihpo_iso_dates(array_rfendtc)
+	dict_cohort['RFXSTDTC'] = dict_cohort['RFSTDTC']
+	dict_cohort['RFXENDTC'] = dict_cohort['RFENDTC']
+	dict_cohort['RFICDTC'] = func_nihpo_iso_dates(array_rfstdtc - in_rng.integers(1, 15, in_number_subjects).astype('timedelta64[D]'))
+	dict_cohort['RFPENDTC'] = dict_cohort['RFENDTC']
+	#
+	# Age at enrollment, and date of birth:
+	array_age = in_rng.integers(CT_AGE_MINIMUM, CT_AGE_MAXIMUM + 1, in_number_subjects)
+	dict_cohort['AGE'] = array_age
+	dict_cohort['AGEU'] = np.full(in_number_subjects, 'YEARS', dtype=object)
+	dict_cohort['BRTHDTC'] = func_nihpo_iso_dates(array_rfstdtc - (array_age * 365 + in_rng.integers(0, 365, in_number_subjects)).astype('timedelta64[D]'))
+	#
+	array_death = in_rng.choice(CT_PERCENTAGE_DEATHS, in_number_subjects) == 'DEATH'
+	dict_cohort['DTHFL'] = np.where(array_death, 'Y', '').astype(object)
+	dict_cohort['DTHDTC'] = np.where(array_death, dict_cohort['RFENDTC'], '').astype(object)
+	dict_cohort['dthdtc_date'] = np.where(array_death, array_rfendtc, np.datetime64('NaT'))
+	#
+	dict_cohort['arm_position'] = in_rng.integers(0, len(CT_ARM_NAMES), in_number_subjects)
+	return dict_cohort
+#
+#
+def func_nihpo_domain_index (in_plan, in_subjects, in_visits, in_rng):
+	"""
+	This function builds the record index of a domain from its cardinality flags: one entry per record of the whole cohort.
+		per_trial : One record for the trial.
+		per_arm : One record per arm (for subject-level domains: the arm of each subject).
+		per_subject : One record per subject.
+		per_visit : One record per subject and visit attended (see "participation_rate").
+		per_visit_measurement : One record per subject, visit attended and parameter measured at that visit.
+		per_adverse_event : One record per adverse event: the number of adverse events of each subject is drawn from the distribution of the subject's arm (see CT_AE_EVENT_COUNT_BY_ARM).
+		per_concomitant_prior : One record per concomitant or prior medication: 0 to CT_MAXIMUM_CONCOMITANT_PRIOR per subject.
+	Inputs:
+		in_plan : [Dictionary] : Plan of the domain, from func_nihpo_generation_plan_compile().
+		in_subjects : [Dictionary] : Subject index of the cohort (see PHUSE_Subject_Index.py).
+		in_visits : [Dictionary] : Returned by func_nihpo_visit_parameters_compile().
+		in_rng : [NumPy Generator] : Random number generator.
+
+	Return:
+		Dictionary of NumPy arrays, one entry per record, grouped by subject. Records of a subject fall within the study window of the subject:
+			'subject', 'arm', 'visit', 'parameter' : Positions in the cohort, CT_ARM_NAMES, visits and parameters. -1 when not applicable.
+			'date' : [datetime64[D]] : Date of the record. NaT when not applicable.
+
+	To call this function:
+		func_nihpo_domain_index(dict_generation_plan['LB'], index_subjects, dict_visits, rng)
+	"""
+	dict_cohort = in_subjects['columns']
+	var_subject_level = in_plan['per_subject'] or in_plan['per_visit'] or in_plan['per_visit_measurement'] or in_plan['per_adverse_event'] or in_plan['per_concomitant_prior']
+	#
+	if var_subject_level:
+		array_subject = np.arange(in_subjects['size'])
+		array_arm = dict_cohort['arm_position']
+		array_date = in_subjects['window_start'].copy()
+	else:
+		array_arm = np.arange(len(CT_ARM_NAMES)) if in_plan['per_arm'] else np.full(1, -1)
+		array_subject = np.full(len(array_arm), -1)
+		array_date = np.full(len(array_arm), np.datetime64('NaT'), dtype='datetime64[D]')
+	array_visit = np.full(len(array_subject), -1)
+	array_parameter = np.full(len(array_subject), -1)
+	#
+	if in_plan['per_visit'] or in_plan['per_visit_measurement']:
+		# Every subject x every visit, then keep the visits attended:
+		var_number_visits = len(in_visits['visit_id'])
+		array_visit = np.tile(np.arange(var_number_visits), len(array_subject))
+		array_subject = np.repeat(array_subject, var_number_visits)
+		array_arm = np.repeat(array_arm, var_number_visits)
+		array_date = np.repeat(array_date, var_number_visits) + in_visits['visit_day'][array_visit].astype('timedelta64[D]')
+		array_attended = in_rng.random(len(array_visit)) < in_visits['visit_rate'][array_visit]
+		array_attended &= PHUSE_Subject_Index.func_nihpo_subject_index_within(in_subjects, array_subject, array_date)		# No visits after the end of participation, or death.
+		array_subject, array_arm, array_visit, array_date = array_subject[array_attended], array_arm[array_attended], array_visit[array_attended], array_date[array_attended]
+		array_parameter = np.full(len(array_subject), -1)
+	#
+	if in_plan['per_visit_measurement']:
+		# Each visit attended x the parameters measured at that visit. Parameters of a visit are next to each other:
+		array_visit_first = np.searchsorted(in_visits['parameter_visit'], np.arange(len(in_visits['visit_id'])), side='left')
+		array_visit_count = np.searchsorted(in_visits['parameter_visit'], np.arange(len(in_visits['visit_id'])), side='right') - array_visit_first
+		array_counts = array_visit_count[array_visit]
+		array_parameter = np.repeat(array_visit_first[array_visit], array_counts) + func_nihpo_sequence_numbers(np.repeat(np.arange(len(array_visit)), array_counts)) - 1
+		array_subject = np.repeat(array_subject, array_counts)
+		array_arm = np.repeat(array_arm, array_counts)
+		array_visit = np.repeat(array_visit, array_counts)
+		array_date = np.repeat(array_date, array_counts) + in_visits['parameter_delay'][array_parameter].astype('timedelta64[D]')
+		array_measured = PHUSE_Subject_Index.func_nihpo_subject_index_within(in_subjects, array_subject, array_date)
+		array_subject, array_arm, array_visit, array_parameter, array_date = array_subject[array_measured], array_arm[array_measured], array_visit[array_measured], array_parameter[array_measured], array_date[array_measured]
+	#
+	if in_plan['per_adverse_event'] or in_plan['per_concomitant_prior']:
+		if in_plan['per_adverse_event']:
+			array_arm_codes = np.array([code for name, code in CT_ARM_NAMES], dtype=object)[array_arm]
+			array_counts = PHUSE_Adverse_Events.func_nihpo_ae_event_counts(in_rng, array_arm_codes, CT_AE_EVENT_COUNT_BY_ARM)
+		else:
+			array_counts = in_rng.integers(0, CT_MAXIMUM_CONCOMITANT_PRIOR + 1, len(array_subject))
+		array_subject = np.repeat(array_subject, array_counts)
+		array_arm = np.repeat(array_arm, array_counts)
+		array_visit = np.repeat(array_visit, array_counts)
+		array_parameter = np.repeat(array_parameter, array_counts)
+		array_rfstdtc = in_subjects['window_start'][array_subject]
+		if in_plan['per_adverse_event']:
+			# Adverse events start within the study window: between enrollment and end of participation (or death):
+			array_days = ((in_subjects['window_end'][array_subject] - array_rfstdtc) / np.timedelta64(1, 'D')).astype(np.int64)
+			array_date = array_rfstdtc + np.floor(in_rng.random(len(array_subject)) * (array_days + 1)).astype(np.int64).astype('timedelta64[D]')
+		else:
+			# Medications start up to CT_DAYS_PRIOR_MEDICATION days before enrollment:
+			array_date = array_rfstdtc - in_rng.integers(0, CT_DAYS_PRIOR_MEDICATION + 1, len(array_subject)).astype('timedelta64[D]')
+	#
+	return {'subject': array_subject, 'arm': array_arm, 'visit': array_visit, 'parameter': array_parameter, 'date': array_date}
+#
+#
+def func_nihpo_sequence_numbers (in_groups):
+	"""
+	This function numbers the records of each group (e.g. subject): 1, 2, .. in record order, as needed for the --SEQ variables. Records of a group must be next to each other.
+	Inputs:
+		in_groups : [NumPy array of Integers] : Group of each record.
+
+	Return:
+		NumPy array of Integers.
+
+	To call this function:
+		func_nihpo_sequence_numbers(np.array([0, 0, 1, 2, 2, 2]))	# [1, 2, 1, 1, 2, 3]
+	"""
+	if (len(in_groups) == 0):
+		return np.zeros(0, dtype=np.int64)
+	array_starts = np.flatnonzero(np.r_[True, in_groups[1:] != in_groups[:-1]])
+	array_lengths = np.diff(np.r_[array_starts, len(in_groups)])
+	return np.arange(len(in_groups)) - np.repeat(array_starts, array_lengths) + 1
+#
+#
+def func_nihpo_integer_column (in_values, in_present):
+	"""
+	This function returns an integer column that is empty where a value does not apply (instead of turning the whole column into floats).
+	Inputs:
+		in_values : [NumPy array of Integers] : Values.
+		in_present : [NumPy array of Booleans] : True where the value applies.
+
+	Return:
+		Pandas nullable integer array ("Int64").
+
+	To call this function:
+		func_nihpo_integer_column(np.array([1, 2, 3]), np.array([True, False, True]))
+	"""
+	array_column = pd.array(np.where(in_present, in_values, 0).astype(np.int64), dtype='Int64')
+	array_column[~np.asarray(in_present)] = pd.NA
+	return array_column
+#
+#
+# = = Controlled terms = =
+# Column "controlled_terms" of "cdisc_sdtm_domain_definitions" names codelists by their submission value, e.g. "(NY)" or "(NCOMPLT)(PROTMLST)".
+# Table "cdisc_terminology" keys the values by C-code: the header row of each codelist (empty codelist_code) maps its name to its C-code.
+# When the header row is missing, this table is used instead:
+CT_CODELIST_CODES = {'NY': 'C66742', 'AESEV': 'C66769', 'ACN': 'C66767', 'LOC': 'C74456', 'SEX': 'C66731', 'RACE': 'C74457', 'AGEU': 'C66781', 'OUT': 'C66768',
+	'EPOCH': 'C99079', 'UNIT': 'C71620', 'LBTESTCD': 'C65047', 'LBTEST': 'C67154', 'SPECTYPE': 'C78734', 'SPECCOND': 'C78733',
+	'NRIND': 'C78736', 'METHOD': 'C85492', 'ND': 'C66789', 'LBSTRESC': 'C102580', 'STENRF': 'C66728', 'NCOMPLT': 'C66727', 'DOMAIN': 'C66734',
+	'ETHNIC': 'C66790', 'ROUTE': 'C66729', 'FRM': 'C66726', 'VSTESTCD': 'C66741', 'VSTEST': 'C67153', 'VSRESU': 'C66770',
+	'TSPARMCD': 'C66738', 'TSPARM': 'C67152', 'FREQ': 'C71113', 'LAT': 'C99073', 'DIR': 'C99074', 'POSITION': 'C71148', 'DSCAT': 'C74558', 'PROTMLST': 'C114118'}
+#
+# References that are not CDISC codelists, generated here instead:
+CT_ISO3166_ALPHA3 = ['DEU', 'ESP', 'GBR', 'VEN', 'ZAF', 'USA', 'CAN', 'FRA', 'ITA', 'JPN']
+CT_ISO8601_DURATION_DAYS_MAXIMUM = 30
+CT_ISO8601_DURATION_SUFFIXES = ('DUR', 'ELTM', 'EVLINT')		# ISO 8601 variables holding durations (e.g. "P3D", "PT2H"), not dates.
+CT_ISO8601_ELAPSED_HOURS_MAXIMUM = 24						# --ELTM: planned elapsed time from the reference time point, in hours.
+#
+# Codelist headers { submission value : C-code }, read once (see func_nihpo_codelist_headers):
+dict_codelist_headers = None
+#
+# Resolved references: { controlled_terms : {'kind', 'codelists', 'values'} }
+dict_controlled_terms_cache = {}
+#
+# Memory-mapped terminology pack (see PHUSE_Terminology_Pack.py). None: read the SQLite3 file.
+pack_terminology = None
+#
+def func_nihpo_codelist_headers (in_sqlite3_cursor):
+	"""
+	This function reads the header row of every codelist in table "cdisc_terminology" once, to map codelist names (e.g. "NY") to C-codes (e.g. "C66742").
+	Inputs:
+		in_sqlite3_cursor : [SQLite3 cursor] : Cursor to SQLite3 file.
+
+	Return:
+		Dictionary { codelist name : C-code }.
+
+	To call this function:
+		func_nihpo_codelist_headers(cursor)
+	"""
+	global dict_codelist_headers
+	#
+	if dict_codelist_headers is None:
+		in_sqlite3_cursor.execute("SELECT cdisc_submission_value, code FROM cdisc_terminology WHERE (codelist_code IS NULL) OR (codelist_code = '');")
+		dict_codelist_headers = dict([(name.strip().upper(), code.strip()) for name, code in in_sqlite3_cursor.fetchall() if name and code])
+	return dict_codelist_headers
+#
+#
+def func_nihpo_controlled_terms_resolve (in_sqlite3_cursor, in_controlled_terms):
+	"""
+	This function resolves the controlled terms of a variable definition once, into something the generator can sample from without querying.
+	Inputs:
+		in_sqlite3_cursor : [SQLite3 cursor] : Cursor to SQLite3 file. May be None once the reference is in dict_controlled_terms_cache.
+		in_controlled_terms : [String] : Column "controlled_terms" of the variable definition.
+
+	Return:
+		Dictionary:
+			'kind' : 'codelist', 'iso8601' (dates and durations), 'iso3166' (country codes), or None (free text, MedDRA, '*', unknown codelists..).
+			'codelists' : List of the C-codes referenced.
+			'values' : NumPy array (dtype object) of all values of those codelists, for 'codelist'.
+
+	To call this function:
+		func_nihpo_controlled_terms_resolve(cursor, '(NY)')
+	"""
+	var_reference = (in_controlled_terms or '').strip()
+	if var_reference in dict_controlled_terms_cache:
+		return dict_controlled_terms_cache[var_reference]
+	#
+	dict_terms = {'kind': None, 'codelists': [], 'values': np.empty(0, dtype=object)}
+	var_reference_upper = var_reference.upper()
+	if var_reference_upper.startswith('ISO 8601'):
+		dict_terms['kind'] = 'iso8601'
+	elif var_reference_upper.startswith('ISO 3166'):
+		dict_terms['kind'] = 'iso3166'
+		dict_terms['values'] = np.array(CT_ISO3166_ALPHA3, dtype=object)
+	else:
+		dict_headers = func_nihpo_codelist_headers(in_sqlite3_cursor) if (pack_terminology is None) else {}
+		list_values = []
+		for var_name in re.findall(r'\(([^()]+)\)', var_reference):
+			var_name = var_name.strip().upper()
+			if pack_terminology is not None:
+				var_code = PHUSE_Terminology_Pack.func_nihpo_pack_codelist_code(pack_terminology, var_name) or CT_CODELIST_CODES.get(var_name)
+			else:
+				var_code = dict_headers.get(var_name, CT_CODELIST_CODES.get(var_name))
+			if var_code is None:
+				if (1 in CT_DEBUG):  print ("Controlled terms [%s]: codelist [%s] not found." % (var_reference, var_name))
+				continue
+			if pack_terminology is not None:
+				list_codelist_values = PHUSE_Terminology_Pack.func_nihpo_pack_codelist_values(pack_terminology, var_code) or []
+			else:
+				in_sqlite3_cursor.execute("SELECT cdisc_submission_value FROM cdisc_terminology WHERE codelist_code = ? ORDER BY cdisc_submission_value;", (var_code,))
+				list_codelist_values = [one_row[0] for one_row in in_sqlite3_cursor.fetchall()]
+			dict_terms['codelists'].append(var_code)
+			list_values.extend([value for value in list_codelist_values if value not in list_values])
+		if list_values:
+			dict_terms['kind'] = 'codelist'
+			dict_terms['values'] = np.array(list_values, dtype=object)
+	#
+	dict_controlled_terms_cache[var_reference] = dict_terms
+	return dict_terms
+#
+#
+def func_nihpo_controlled_terms_sample (in_rng, in_terms, in_variable_name, in_dates):
+	"""
+	This function draws the values of a variable from its resolved controlled terms.
+	Inputs:
+		in_rng : [NumPy Generator] : Random number generator.
+		in_terms : [Dictionary] : Returned by func_nihpo_controlled_terms_resolve(). 'kind' must not be None.
+		in_variable_name : [String] : Name of the variable: ISO 8601 variables ending in one of CT_ISO8601_DURATION_SUFFIXES get durations ("PT<hours>H" for --ELTM, "P<days>D" otherwise), the others get dates.
+		in_dates : [NumPy array of Strings] : ISO 8601 date of each record.
+
+	Return:
+		NumPy array (dtype object), one value per record.
+
+	To call this function:
+		func_nihpo_controlled_terms_sample(rng, func_nihpo_controlled_terms_resolve(cursor, '(NY)'), 'AESER', array_dates)
+	"""
+	var_number_records = len(in_dates)
+	if (in_terms['kind'] == 'iso8601'):
+		if in_variable_name.endswith('ELTM'):
+			return np.char.mod('PT%dH', in_rng.integers(1, CT_ISO8601_ELAPSED_HOURS_MAXIMUM + 1, var_number_records)).astype(object)
+		if in_variable_name.endswith(CT_ISO8601_DURATION_SUFFIXES):
+			return np.char.mod('P%dD', in_rng.integers(1, CT_ISO8601_DURATION_DAYS_MAXIMUM + 1, var_number_records)).astype(object)
+		return in_dates
+	#
+	if (in_terms['values'] is None):
+		# Worker process: values drawn from the shared table published by func_nihpo_generate_domains(), the same draws as below.
+		return PHUSE_Codelists.func_nihpo_codelists_shared_sample(in_rng, in_terms['shared'], var_number_records)
+	return in_terms['values'][in_rng.integers(0, len(in_terms['values']), var_number_records)]
+#
+#
+def func_nihpo_domain_generate (in_plan, in_subjects, in_visits, in_rng, in_sqlite3_cursor):
+	"""
+	This function generates all records of a domain, one whole column at a time.
+	Each variable is filled, in this order of preference:
+		a.) By name: study, arm and subject variables (see CT_COHORT_VARIABLES), visits, --SEQ, dates (--DTC, --STDTC, --ENDTC), study days (--DY, --STDY, --ENDY), --DUR, tests and results.
+			--ENDY and --DUR are derived from the --STDTC and --ENDTC of the same record.
+		b.) From its controlled terms: values drawn from the codelists, ISO 8601 dates and durations, ISO 3166 country codes (see func_nihpo_controlled_terms_resolve).
+		c.) Otherwise the variable is left empty (missing for "Num").
+	Inputs:
+		in_plan : [Dictionary] : Plan of the domain, from func_nihpo_generation_plan_compile().
+		in_subjects : [Dictionary] : Subject index of the cohort (see PHUSE_Subject_Index.py).
+		in_visits : [Dictionary] : Returned by func_nihpo_visit_parameters_compile().
+		in_rng : [NumPy Generator] : Random number generator.
+		in_sqlite3_cursor : [SQLite3 cursor] : Cursor to SQLite3 file, for controlled terms.
+
+	Return:
+		Pandas DataFrame, with the variables of the domain in plan order: int64 or float64 for "Num" variables, strings for "Char" variables (see PHUSE_SDTM_Schema.py).
+
+	To call this function:
+		func_nihpo_domain_generate(dict_generation_plan['LB'], index_subjects, dict_visits, rng, cursor)
+	"""
+	var_domain = in_plan['domain']
+	dict_index = func_nihpo_domain_index(in_plan, in_subjects, in_visits, in_rng)
+	var_number_records = len(dict_index['subject'])
+	#
+	# Positions that are safe to use as indexes (0 instead of -1), and where they apply:
+	array_has_subject = dict_index['subject'] >= 0
+	array_subject = np.where(array_has_subject, dict_index['subject'], 0)
+	array_has_arm = dict_index['arm'] >= 0
+	array_arm = np.where(array_has_arm, dict_index['arm'], 0)
+	array_has_visit = dict_index['visit'] >= 0
+	array_visit = np.where(array_has_visit, dict_index['visit'], 0)
+	array_has_parameter = dict_index['parameter'] >= 0
+	array_parameter = np.where(array_has_parameter, dict_index['parameter'], 0)
+	array_has_date = ~np.isnat(dict_index['date'])
+	#
+	# Results of each measurement. The fuzz factor pushes some of them outside the normal range:
+	if array_has_parameter.any():
+		array_low = in_visits['parameter_low'][array_parameter]
+		array_high = in_visits['parameter_high'][array_parameter]
+		array_result = np.round(in_rng.uniform(array_low * (1 - in_visits['parameter_fuzz'][array_parameter]), array_high * (1 + in_visits['parameter_fuzz'][array_parameter])), 4)
+		array_range = np.where(array_result < array_low, 'LOW', np.where(array_result > array_high, 'HIGH', 'NORMAL')).astype(object)
+	#
+	array_dates = func_nihpo_iso_dates(dict_index['date'])
+	array_study_day = np.where(array_has_date, dict_index['date'], in_subjects['window_start'][array_subject]) - in_subjects['window_start'][array_subject]
+	array_study_day = array_study_day.astype(np.int64)
+	array_study_day = np.where(array_study_day >= 0, array_study_day + 1, array_study_day)		# There is no study day 0.
+	#
+	# End of each record, never before its start. --ENDTC, --ENDY and --DUR all use it:
+	set_suffixes = set([(one_variable['variable_name'][len(var_domain):] if one_variable['variable_name'].startswith(var_domain) else one_variable['variable_name']) for one_variable in in_plan['variables']])
+	if (set_suffixes & set(['ENDTC', 'ENDY', 'DUR'])):
+		array_end_date = PHUSE_Subject_Index.func_nihpo_subject_index_clip(in_subjects, dict_index['subject'], dict_index['date'] + in_rng.integers(1, 15, var_number_records).astype('timedelta64[D]'))
+		array_end_date = np.where(array_end_date < dict_index['date'], dict_index['date'], array_end_date)
+		array_end_day = (np.where(array_has_date, array_end_date, in_subjects['window_start'][array_subject]) - in_subjects['window_start'][array_subject]).astype(np.int64)
+		array_end_day = np.where(array_end_day >= 0, array_end_day + 1, array_end_day)
+		array_duration = np.where(array_has_date, (array_end_date - np.where(array_has_date, dict_index['date'], array_end_date)).astype(np.int64), 0)
+	#
+	dict_columns = {}
+	for one_variable in in_plan['variables']:
+		var_name = one_variable['variable_name']
+		var_suffix = var_name[len(var_domain):] if var_name.startswith(var_domain) else var_name
+		#
+		if (var_name == 'STUDYID'):
+			array_column = np.full(var_number_records, CT_STUDY_ID, dtype=object)
+		elif (var_name == 'DOMAIN'):
+			array_column = np.full(var_number_records, var_domain, dtype=object)
+		elif (var_name in ('ARM', 'ARMCD', 'ACTARM', 'ACTARMCD')):
+			array_column = np.array([(code if var_name.endswith('CD') else name) for name, code in CT_ARM_NAMES], dtype=object)[array_arm]
+			array_column = np.where(array_has_arm, array_column, '')
+		elif (var_name in CT_COHORT_VARIABLES):
+			array_column = PHUSE_Subject_Index.func_nihpo_subject_index_take(in_subjects, var_name, dict_index['subject'], np.nan if (in_subjects['columns'][var_name].dtype.kind in 'iu') else '')
+		elif (var_name == 'VISITNUM'):
+			array_column = func_nihpo_integer_column(array_visit + 1, array_has_visit)
+		elif (var_name == 'VISIT'):
+			array_column = np.where(array_has_visit, in_visits['visit_name'][array_visit], '')
+		elif (var_name == 'VISITDY'):
+			array_column = func_nihpo_integer_column(in_visits['visit_day'][array_visit] + 1, array_has_visit)
+		elif (var_suffix == 'SEQ'):
+			array_column = func_nihpo_sequence_numbers(dict_index['subject'])
+		elif (var_suffix in ('DTC', 'STDTC')):
+			array_column = array_dates
+		elif (var_suffix == 'ENDTC'):
+			array_column = func_nihpo_iso_dates(array_end_date)
+		elif (var_suffix in ('DY', 'STDY')):
+			array_column = func_nihpo_integer_column(array_study_day, array_has_subject & array_has_date)
+		elif (var_suffix == 'ENDY'):
+			array_column = func_nihpo_integer_column(array_end_day, array_has_subject & array_has_date)
+		elif (var_suffix == 'DUR'):
+			array_column = np.where(array_has_date, np.char.mod('P%dD', array_duration).astype(object), '')
+		elif (var_suffix in ('TESTCD', 'TEST')) and array_has_parameter.any():
+			array_column = in_visits['parameter_testcd' if (var_suffix == 'TESTCD') else 'parameter_name'][array_parameter]
+		elif (var_suffix in ('ORRES', 'STRESC')) and array_has_parameter.any():
+			array_column = array_result.astype(str).astype(object)
+		elif (var_suffix == 'STRESN') and array_has_parameter.any():
+			array_column = array_result
+		elif (var_suffix in ('ORNRLO', 'STNRLO', 'ORNRHI', 'STNRHI')) and array_has_parameter.any():
+			array_column = (array_low if var_suffix.endswith('LO') else array_high).astype(str).astype(object)
+		elif (var_suffix == 'NRIND') and array_has_parameter.any():
+			array_column = array_range
+		else:
+			dict_terms = func_nihpo_controlled_terms_resolve(in_sqlite3_cursor, one_variable['controlled_terms'])
+			if dict_terms['kind']:
+				array_column = func_nihpo_controlled_terms_sample(in_rng, dict_terms, var_name, array_dates)
+			elif (one_variable['type'] or '').upper().startswith('NUM'):
+				array_column = np.full(var_number_records, np.nan)		# Nothing to derive it from: missing, not made up.
+			else:
+				array_column = np.full(var_number_records, '', dtype=object)
+		#
+		dict_columns[var_name] = array_column
+	#
+	list_columns = list(in_plan['variable_names'])
+	return pd.DataFrame(PHUSE_SDTM_Schema.func_nihpo_schema_columns(in_plan['schema'], list_columns, dict_columns), columns=list_columns)
+#
+#
+def func_nihpo_domain_write_csv (in_domain, in_dataframe, in_target_directory):
+	"""
+	This function writes the records of a domain to "PHUSE_TDF_<domain>.csv" in the target directory.
+	Inputs:
+		in_domain : [String] : Domain code.
+		in_dataframe : [Pandas DataFrame] : Returned by func_nihpo_domain_generate().
+		in_target_directory : [String] : Target directory.
+
+	Return:
+		String : Name of the file written.
+
+	To call this function:
+		func_nihpo_domain_write_csv('DM', dataframe_DM, CT_TARGET_DIRECTORY)
+	"""
+	var_output_file_name = "%s%s.csv" % (os.path.join(in_target_directory, "PHUSE_TDF_"), in_domain)
+	list_columns = list(in_dataframe.columns)
+	PHUSE_SDTM_Schema.func_nihpo_schema_csv_write(var_output_file_name, list_columns, {column: in_dataframe[column].to_numpy() for column in list_columns}, CT_CSV_SEPARATOR)
+	return var_output_file_name
+#
+#
+def func_nihpo_domain_write_xpt (in_domain_plan, in_dataframe, in_target_directory):
+	"""
+	This function writes the records of a domain to the SAS Transport (XPORT) file "PHUSE_TDF_<domain>.xpt" in the target directory, with the types and labels of the definitions.
+	Inputs:
+		in_domain_plan : [Dictionary] : Plan of the domain.
+		in_dataframe : [Pandas DataFrame] : Returned by func_nihpo_domain_generate().
+		in_target_directory : [String] : Target directory.
+
+	Return:
+		String : Name of the file written.
+
+	To call this function:
+		func_nihpo_domain_write_xpt(dict_generation_plan['DM'], dataframe_DM, CT_TARGET_DIRECTORY)
+	"""
+	var_domain = in_domain_plan['domain']
+	var_output_file_name = "%s%s.xpt" % (os.path.join(in_target_directory, "PHUSE_TDF_"), var_domain)
+	list_columns = list(in_dataframe.columns)
+	dict_typed = {column: in_dataframe[column].to_numpy() for column in list_columns}
+	list_variables = PHUSE_SDTM_Schema.func_nihpo_schema_xpt_variables(in_domain_plan['schema'], list_columns, dict_typed)
+	PHUSE_XPT.func_nihpo_xpt_write_dataset(var_output_file_name, var_domain, var_domain, list_columns, dict_typed, list_variables)
+	return var_output_file_name
+#
+#
+# = = Parallel generation = =
+# DM is generated first, in this process. Its cohort is then published read-only, and the other domains are generated concurrently in worker processes.
+# A domain is started once all the domains it depends on are written. Domains not listed here depend on DM if they have subject-level records, and on nothing otherwise.
+CT_DOMAIN_DEPENDENCIES = {'DM': [], 'TA': [], 'TE': [], 'TV': [], 'TI': [], 'TS': [], 'TD': [], 'TM': [], 'SV': ['DM'], 'SE': ['DM'], 'DS': ['DM'], 'RELREC': ['DM']}
+#
+# Read-only state of a worker process (see func_nihpo_domain_worker_start):
+dict_worker_state = None
+#
+def func_nihpo_domain_dependencies (in_plan):
+	"""
+	This function returns the dependency graph of the domains in a generation plan (see CT_DOMAIN_DEPENDENCIES).
+	Inputs:
+		in_plan : [Dictionary] : Returned by func_nihpo_generation_plan_compile().
+
+	Return:
+		Dictionary { domain_code : set of domain codes it depends on }. Only domains of the plan are included.
+
+	To call this function:
+		func_nihpo_domain_dependencies(dict_generation_plan)
+	"""
+	dict_dependencies = {}
+	for var_domain_code, one_domain_plan in in_plan.items():
+		if (var_domain_code in CT_DOMAIN_DEPENDENCIES):
+			list_dependencies = CT_DOMAIN_DEPENDENCIES[var_domain_code]
+		elif (var_domain_code != 'DM') and (one_domain_plan['per_subject'] or one_domain_plan['per_visit'] or one_domain_plan['per_visit_measurement'] or one_domain_plan['per_adverse_event'] or one_domain_plan['per_concomitant_prior']):
+			list_dependencies = ['DM']
+		else:
+			list_dependencies = []
+		dict_dependencies[var_domain_code] = set([domain for domain in list_dependencies if domain in in_plan])
+	#
+	# Detect cycles before starting any process:
+	set_resolved = set()
+	while (len(set_resolved) < len(dict_dependencies)):
+		set_ready = set([domain for domain, dependencies in dict_dependencies.items() if (domain not in set_resolved) and (dependencies <= set_resolved)])
+		assert (len(set_ready) > 0),"Circular dependencies between domains: %s" % (sorted(set(dict_dependencies) - set_resolved))
+		set_resolved |= set_ready
+	#
+	return dict_dependencies
+#
+#
+def func_nihpo_domain_weight (in_domain_plan):
+	"""
+	This function estimates the relative size of a domain from its cardinality flags, so the largest domains are started first.
+	Inputs:
+		in_domain_plan : [Dictionary] : Plan of the domain.
+
+	Return:
+		Integer : Higher for larger domains.
+
+	To call this function:
+		func_nihpo_domain_weight(dict_generation_plan['LB'])
+	"""
+	return (8 * in_domain_plan['per_visit_measurement']) + (4 * in_domain_plan['per_visit']) + (2 * (in_domain_plan['per_adverse_event'] or in_domain_plan['per_concomitant_prior'])) + in_domain_plan['per_subject']
+#
+#
+def func_nihpo_domain_worker_start (in_state):
+	"""
+	This function keeps the read-only state shared by all domains in a worker process. It is the initializer of the process pool.
+	Inputs:
+		in_state : [Dictionary] : 'plan', 'subjects' (subject index), 'visits', 'controlled_terms' (resolved references, without their values), 'codelists' (descriptor of the shared
+			codelist table, see PHUSE_Codelists.func_nihpo_codelists_publish_values) and 'target_directory'.
+
+	To call this function:
+		concurrent.futures.ProcessPoolExecutor(4, initializer=func_nihpo_domain_worker_start, initargs=(dict_state,))
+	"""
+	global dict_worker_state
+	#
+	dict_worker_state = in_state
+	PHUSE_Codelists.func_nihpo_codelists_attach(in_state['codelists'])		# No SQLite3 cursor, and no private copy of the values, in the workers.
+	dict_controlled_terms_cache.update(in_state['controlled_terms'])
+#
+#
+def func_nihpo_domain_worker (in_domain_code, in_seed_sequence):
+	"""
+	This function generates and writes one domain, in a worker process started with func_nihpo_domain_worker_start().
+	Inputs:
+		in_domain_code : [String] : Domain code.
+		in_seed_sequence : [NumPy SeedSequence] : Seed of this domain: results do not depend on which process runs it, or when.
+
+	Return:
+		Tuple : (domain code, number of records, name of the file written, seconds).
+
+	To call this function:
+		func_nihpo_domain_worker('LB', np.random.SeedSequence(12345))
+	"""
+	var_start = datetime.datetime.now()
+	dataframe_domain = func_nihpo_domain_generate(dict_worker_state['plan'][in_domain_code], dict_worker_state['subjects'], dict_worker_state['visits'], np.random.default_rng(in_seed_sequence), None)
+	var_output_file_name = func_nihpo_domain_write_csv(in_domain_code, dataframe_domain, dict_worker_state['target_directory'])
+	if CT_XPT_OUTPUT:
+		func_nihpo_domain_write_xpt(dict_worker_state['plan'][in_domain_code], dataframe_domain, dict_worker_state['target_directory'])
+	return in_domain_code, len(dataframe_domain), var_output_file_name, (datetime.datetime.now() - var_start).total_seconds()
+#
+#
+def func_nihpo_generate_domains (in_plan, in_sqlite3_cursor, in_number_subjects, in_target_directory, in_processes=CT_PROCESSES, in_seed=CT_RANDOM_SEED):
+	"""
+	This function generates all domains of a plan: DM (the cohort) first, then the other domains in a process pool, in dependency order.
+	Inputs:
+		in_plan : [Dictionary] : Returned by func_nihpo_generation_plan_compile().
+		in_sqlite3_cursor : [SQLite3 cursor] : Cursor to SQLite3 file. Only used in this process, to read the codelists once.
+		in_number_subjects : [Integer] : Number of subjects.
+		in_target_directory : [String] : Target directory for the "PHUSE_TDF_<domain>.csv" files.
+		in_processes : [Integer] : Number of worker processes. 1 generates everything in this process.
+		in_seed : [Integer or None] : Random seed. The same seed gives the same files, whatever the number of processes.
+
+	Return:
+		List of tuples (domain code, number of records, name of the file written, seconds), in completion order.
+
+	To call this function:
+		func_nihpo_generate_domains(dict_generation_plan, cursor, 100, '/tmp/TDF')
+	"""
+	global dict_worker_state
+	#
+	dict_dependencies = func_nihpo_domain_dependencies(in_plan)
+	list_domains = sorted(in_plan)
+	dict_seeds = dict(zip(['(cohort)'] + list_domains, np.random.SeedSequence(in_seed).spawn(len(list_domains) + 1)))
+	#
+	# DM backbone, published read-only as the subject index: every domain reads subject attributes by position.
+	dict_cohort = func_nihpo_cohort_generate(np.random.default_rng(dict_seeds['(cohort)']), in_number_subjects)
+	index_subjects = PHUSE_Subject_Index.func_nihpo_subject_index_build(dict_cohort, 'rfstdtc_date', ['rfendtc_date', 'dthdtc_date'])
+	#
+	# Codelists are read once here. Worker processes attach to one shared copy of their values (see PHUSE_Codelists.py):
+	for one_domain_plan in in_plan.values():
+		for one_variable in one_domain_plan['variables']:
+			func_nihpo_controlled_terms_resolve(in_sqlite3_cursor, one_variable['controlled_terms'])
+	dict_state = {'plan': in_plan, 'subjects': index_subjects, 'visits': func_nihpo_visit_parameters_compile(CT_VISIT_ANALYSIS_PARAMETER), 'target_directory': in_target_directory}
+	#
+	# Worker processes inherit this script's settings (CT_STUDY_ID, dates..): they need the "fork" start method.
+	var_parallel = (in_processes > 1) and ('fork' in multiprocessing.get_all_start_methods())
+	if (in_processes > 1) and not var_parallel:
+		print ("Warning: %d processes requested, but worker processes need the 'fork' start method, which this platform does not have: all domains are generated in this process." % (in_processes))
+	#
+	list_results = []
+	set_done = set()
+	set_pending = set(list_domains)
+	#
+	def func_ready ():
+		# Domains whose dependencies are written, largest first:
+		list_ready = [domain for domain in set_pending if dict_dependencies[domain] <= set_done]
+		return sorted(list_ready, key=lambda domain: (-func_nihpo_domain_weight(in_plan[domain]), domain))
+	#
+	if var_parallel:
+		dict_shared_values = dict([(reference, list(terms['values'])) for reference, terms in dict_controlled_terms_cache.items() if (terms['kind'] in ('codelist', 'iso3166'))])
+		shm_codelists, dict_state['codelists'] = PHUSE_Codelists.func_nihpo_codelists_publish_values(dict_shared_values)
+		dict_state['controlled_terms'] = dict([(reference, dict(terms, values=None, shared=reference) if (reference in dict_shared_values) else terms) for reference, terms in dict_controlled_terms_cache.items()])
+		try:
+			with concurrent.futures.ProcessPoolExecutor(max_workers=in_processes, mp_context=multiprocessing.get_context('fork'), initializer=func_nihpo_domain_worker_start, initargs=(dict_state,)) as pool:
+				dict_running = {}
+				while set_pending or dict_running:
+					for var_domain_code in func_ready():
+						set_pending.discard(var_domain_code)
+						dict_running[pool.submit(func_nihpo_domain_worker, var_domain_code, dict_seeds[var_domain_code])] = var_domain_code
+					set_finished, set_running = concurrent.futures.wait(dict_running, return_when=concurrent.futures.FIRST_COMPLETED)
+					for one_future in set_finished:
+						list_results.append(one_future.result())
+						set_done.add(dict_running.pop(one_future))
+		finally:
+			PHUSE_Codelists.func_nihpo_codelists_release(shm_codelists)
+	else:
+		# Same schedule in this process, with the values already in dict_controlled_terms_cache:
+		dict_worker_state = dict_state
+		while set_pending:
+			for var_domain_code in func_ready():
+				set_pending.discard(var_domain_code)
+				list_results.append(func_nihpo_domain_worker(var_domain_code, dict_seeds[var_domain_code]))
+				set_done.add(var_domain_code)
+	#
+	return list_results
+#
 
 # = = Database connections = =
-# Open SQLite3 file:
-try:
-	conn = sqlite3.connect('file:Synthetic_Health_Data_NIHPO.sqlite3?mode=ro', uri=True)
-	cursor = conn.cursor()
-except sqlite3.Error as e:
-	print ("The SQLite3 file 'Synthetic_Health_Data_NIHPO.sqlite3' should be in your local path.")
-	print ("Error {}:".format(e.args[0]))
-	sys.exit(1)
+# Terminology pack first: no SQLite3 file needed when it is current.
+conn = None
+cursor = None
+pack_terminology = PHUSE_Terminology_Pack.func_nihpo_pack_open(PHUSE_Terminology_Pack.CT_PACK_FILENAME, 'Synthetic_Health_Data_NIHPO.sqlite3')
+if pack_terminology is None:
+	print ("Terminology pack [%s] missing or stale: reading 'Synthetic_Health_Data_NIHPO.sqlite3'. Run PHUSE_Terminology_Pack.py to (re)compile it." % (PHUSE_Terminology_Pack.CT_PACK_FILENAME))
+if (pack_terminology is None) or (CT_THERAPEUTIC_AREA is not None):
+	# Open SQLite3 file (Therapeutic Area User Guides are not in the pack):
+	try:
+		conn = PHUSE_Build_Database.func_nihpo_database_connect('Synthetic_Health_Data_NIHPO.sqlite3')		# Read-only and memory-mapped (immutable when built by PHUSE_Build_Database.py).
+		cursor = conn.cursor()
+	except sqlite3.Error as e:
+		print ("The SQLite3 file 'Synthetic_Health_Data_NIHPO.sqlite3' should be in your local path.")
+		print ("Error {}:".format(e.args[0]))
+		sys.exit(1)
 #
 """
 CREATE TABLE cdisc_sdtm_domain_rules (
@@ -420,72 +1402,27 @@ CREATE TABLE cdisc_sdtm_domain_definitions (
 	core text);
 """
 #
-sql_select_rules = conn.execute("SELECT * FROM cdisc_sdtm_domain_rules ORDER BY domain_code ASC;")
-for one_rule in sql_select_rules:
-	if (1 in CT_DEBUG):  print (one_rule)
-	#
-	one_rule_domain_code = one_rule[0]
-	one_rule_per_trial = one_rule[1]
-	one_rule_per_subject = one_rule[2]
-	one_rule_per_arm = one_rule[3]
-	one_rule_per_visit = one_rule[4]
-	one_rule_per_visit_measurement = one_rule[5]
-	one_rule_per_adverse_event = one_rule[6]
-	one_rule_per_concomitant_prior = one_rule[7]
-	#
-	# = = Open output files for writing = =
-	var_output_file_name = "%s%s.csv" % (os.path.join(CT_TARGET_DIRECTORY, "PHUSE_TDF_"), one_rule_domain_code)
-	output_file = csv.writer(open(var_output_file_name, "w"), delimiter=CT_CSV_SEPARATOR, quoting=csv.QUOTE_MINIMAL)
-	#
-	# Retrieve field definition for this domain:
-	sql_select_domain_definition = conn.execute("SELECT * FROM cdisc_sdtm_domain_definitions WHERE domain_code = '%s' ORDER BY domain_code ASC;" % (one_rule_domain_code))
-	for one_definition in sql_select_domain_definition:
-		if (1 in CT_DEBUG):  print (one_definition)
-		#
-		one_definition_domain_code = one_definition[0]
-		one_definition_variable_name = one_definition[1]
-		one_definition_variable_label = one_definition[2]
-		one_definition_type = one_definition[3]
-		one_definition_controlled_terms = one_definition[4]
-		one_definition_role = one_definition[5]
-		one_definition_cdisc_notes = one_definition[6]
-		one_definition_core = one_definition[7]
-		#
-		# Process rules:
-		if (one_rule_per_trial == 1):
-			# One entry per trial.
-			output_file.writerow
-			print (one_definition_domain_code)
-
-		if (one_rule_per_subject == 1):
-			# One entry per subject
-			print (one_definition_domain_code)
-
-		if (one_rule_per_arm == 1):
-			# One entry per arm
-			print (one_definition_domain_code)
-
-		if (one_rule_per_visit == 1):
-			# One entry per visit
-			print (one_definition_domain_code)
-
-		if (one_rule_per_visit_measurement == 1):
-			# One measurement per visit
-			print (one_definition_domain_code)
-
-		if (one_rule_per_adverse_event == 1):
-			# One entry per Adverse Event
-			print (one_definition_domain_code)
-
-		if (one_rule_per_concomitant_prior == 1):
-			# One entry per concomitant prior
-			print (one_definition_domain_code)
-
-
+# Both tables are read once; the loop below only uses the in-memory plan:
+dict_generation_plan = func_nihpo_generation_plan_compile(conn)
+if (CT_THERAPEUTIC_AREA is not None):
+	try:
+		dict_generation_plan = func_nihpo_ta_plan_compile(conn, CT_THERAPEUTIC_AREA, dict_generation_plan)
+	except (sqlite3.Error, ValueError, AssertionError) as e:
+		print ("Error: %s" % (e))
+		sys.exit(1)
+	print ("Therapeutic Area [%s]: %d domains to generate." % (CT_THERAPEUTIC_AREA, len(dict_generation_plan)))
+#
+#
+# = = Generate all domains = =
+var_start = datetime.datetime.now()
+for var_domain_code, var_records, var_output_file_name, var_seconds in func_nihpo_generate_domains(dict_generation_plan, cursor, CT_NUMBER_SUBJECTS, CT_TARGET_DIRECTORY, CT_PROCESSES, CT_RANDOM_SEED):
+	print ("[%s] %d records written to [%s] in %.2f seconds." % (var_domain_code, var_records, var_output_file_name, var_seconds))
+print ("%d domains generated in %.2f seconds." % (len(dict_generation_plan), (datetime.datetime.now() - var_start).total_seconds()))
 
 #
 # = = Clean up. = =
-conn.close()
+if conn is not None:
+	conn.close()
 print("\n\nThis is the end, Beautiful friend. This is the end. My only friend, the end")
 
 
@@ -535,6 +1472,8 @@ with open('example.xpt', 'wb') as f:
 
 # = = Open Questions = =
 """
+[Mon 10/19/2026] Resolved by func_nihpo_controlled_terms_resolve(): codelists by name (header rows of "cdisc_terminology", then CT_CODELIST_CODES), ISO 8601 and ISO 3166-1 Alpha-3.
+Still generated from the variable type: MedDRA, ISO 21090 NullFlavor, and '*'.
 
 [Thu 09/24/2020]
 
@@ -26,7 +26,8 @@ CREATE TABLE cdisc_sdtm_domain_rules (
 	per_visit text,
 	per_visit_measurement text,
 	per_adverse_event text,
-	per_concomitant_prior text);
+	per_concomitant_prior text,
+	PRIMARY KEY (domain_code)) WITHOUT ROWID;
 --
 /*
 ae.xpt, Adverse Events — Events, Version 3.3. One record per adverse event per subject, Tabulation.
@@ -41,8 +42,8 @@ ts.xpt, Trial Summary Information — Trial Design, Version 3.2. One record per
 tv.xpt, Trial Visits — Trial Design, Version 3.2. One record per planned Visit per Arm, Tabulation.
 vs.xpt, Vital Signs — Findings, Version 3.3. One record per vital sign measurement per time point per visit per subject, Tabulation.
 */
-#
-# This table definition maps out 
+--
+-- This table definition maps out 
 INSERT INTO cdisc_sdtm_domain_rules (domain_code, per_trial, per_subject, per_arm, per_visit, per_visit_measurement, per_adverse_event, per_concomitant_prior) VALUES 
 ('AE', '0', '1', '0', '0', '0', '1', '0'),
 ('CM', '0', '1', '0', '0', '0', '0', '1'),
@@ -68,7 +69,8 @@ CREATE TABLE cdisc_sdtm_domain_definitions (
 	controlled_terms text,
 	role text,
 	cdisc_notes text,
-	core text);
+	core text,
+	PRIMARY KEY (domain_code, variable_name)) WITHOUT ROWID;
 --
 -- Domain: AE
 INSERT INTO cdisc_sdtm_domain_definitions (domain_code, variable_name, variable_label, type, controlled_terms, role, cdisc_notes, core) VALUES 
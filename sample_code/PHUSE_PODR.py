@@ -7,6 +7,7 @@
 Purpose:
 * This sample Python code connects with PHUSE's Open Data Repository ("PODR") and runs a couple of queries.
 * Please keep in mind that you are only allowed 01 connection at the time to PODR's database.
+  To share that one connection between several local tools (notebooks, dashboards, batch jobs), run PHUSE_PODR_Broker.py and query through it.
 
 If you are a PHUSE member: please contact Jose.Lacal@NIHPO.com to request a Username and Password to access PODR.
 
@@ -38,7 +39,7 @@ b.) Run this script:
 """
 # - - - - -
 # Imports Section
-import os, sys
+import os, sys, uuid
 try:
 	import psycopg2
 	import psycopg2.extras
@@ -62,6 +63,68 @@ pgsql_dbname = "nihpo"
 pgsql_host = "podr.phuse.global"
 pgsql_port = 5432
 #
+CT_PODR_BATCH_SIZE = 10000		# Rows fetched from the server at a time by func_nihpo_podr_stream().
+#
+#
+def func_nihpo_podr_stream_batches (in_connection, in_query, in_parameters=None, in_batch_size=CT_PODR_BATCH_SIZE, in_cursor_factory=psycopg2.extras.DictCursor, in_columns=None):
+	"""
+	This function runs a query with a named (server-side) cursor and yields its rows in batches: only one batch is in memory at a time, whatever the size of the result.
+	The cursor is closed when the last batch has been read, and also when the caller stops early (break, exception, or close() of the generator).
+	If no transaction was open before the query, the one opened for the cursor is ended too, so the connection is not left "idle in transaction".
+	Inputs:
+		in_connection : [psycopg2 connection] : Connection to PODR.
+		in_query : [String or psycopg2.sql.Composed] : SELECT query.
+		in_parameters : [Tuple or Dictionary] : Query parameters.
+		in_batch_size : [Integer] : Rows per batch (one round trip to the server per batch).
+		in_cursor_factory : [psycopg2 cursor class] : DictCursor to access fields by fieldname.
+		in_columns : [List] : Optional. Filled with the column names once the query has run, also when it returns no rows.
+
+	Return:
+		Generator of lists of rows.
+
+	To call this function:
+		for list_rows in func_nihpo_podr_stream_batches(con_nihpo_target, "SELECT drugname FROM nihpo_fda_aers_drug WHERE drugname = %s;", ('IMURAN',), 5000):
+	"""
+	assert (in_batch_size > 0),"Batch size must be a positive number of rows, not [%s]" % (in_batch_size)
+	var_own_transaction = (not in_connection.autocommit) and (in_connection.status == psycopg2.extensions.STATUS_READY)
+	# Outside a transaction (autocommit), a server-side cursor must be declared WITH HOLD to exist at all:
+	cur_stream = in_connection.cursor(name='podr_stream_%s' % (uuid.uuid4().hex), cursor_factory=in_cursor_factory, withhold=in_connection.autocommit)
+	cur_stream.itersize = in_batch_size
+	try:
+		cur_stream.execute(in_query, in_parameters)
+		while True:
+			list_rows = cur_stream.fetchmany(in_batch_size)
+			if (in_columns is not None) and (len(in_columns) == 0) and (cur_stream.description is not None):		# A named cursor has a description only after the first fetch.
+				in_columns.extend([column[0] for column in cur_stream.description])
+			if (len(list_rows) == 0):
+				break
+			yield list_rows
+	finally:
+		if not in_connection.closed:
+			cur_stream.close()
+			if var_own_transaction:
+				in_connection.rollback()		# Read-only: nothing to commit.
+#
+#
+def func_nihpo_podr_stream (in_connection, in_query, in_parameters=None, in_batch_size=CT_PODR_BATCH_SIZE, in_cursor_factory=psycopg2.extras.DictCursor):
+	"""
+	This function runs a query with a named (server-side) cursor and yields its rows one at a time, fetched from the server in batches (see func_nihpo_podr_stream_batches).
+	Inputs:
+		in_connection : [psycopg2 connection] : Connection to PODR.
+		in_query : [String or psycopg2.sql.Composed] : SELECT query.
+		in_parameters : [Tuple or Dictionary] : Query parameters.
+		in_batch_size : [Integer] : Rows fetched from the server at a time.
+		in_cursor_factory : [psycopg2 cursor class] : DictCursor to access fields by fieldname.
+
+	Return:
+		Generator of rows.
+
+	To call this function:
+		for adverse_event in func_nihpo_podr_stream(con_nihpo_target, "SELECT * FROM nihpo_fda_aers_drug;"):
+	"""
+	for list_rows in func_nihpo_podr_stream_batches(in_connection, in_query, in_parameters, in_batch_size, in_cursor_factory):
+		yield from list_rows
+#
 # = = = Main Processing = = =
 if __name__ == "__main__":
 	#
@@ -71,8 +134,7 @@ if __name__ == "__main__":
 	try:
 		con_string_nihpo = "dbname='%s' user='%s' password='%s' host='%s' port='%s'" % (pgsql_dbname, pgsql_user, pgsql_password, pgsql_host, pgsql_port)
 		con_nihpo_target = psycopg2.connect(con_string_nihpo)
-		cur = con_nihpo_target.cursor(cursor_factory=psycopg2.extras.DictCursor)	# To be able to access fields by fieldname.
-		cur.itersize = 10000 # Define how many records to buffer server-side.
+		cur = con_nihpo_target.cursor(cursor_factory=psycopg2.extras.DictCursor)	# To be able to access fields by fieldname. Client-side: for small results only (see func_nihpo_podr_stream for large ones).
 		print ("\nConnected to PostgreSQL database :: [%s]" % (pgsql_dbname))
 		print ("At host [%s] with port [%d]\n" % (pgsql_host, pgsql_port))
 		#
@@ -97,6 +159,12 @@ if __name__ == "__main__":
 	for adverse_event in cur.fetchall():
 		print(adverse_event)
 	#
+	# 03. Stream all FDA Adverse Events for drug "IMURAN", without holding them all in memory:
+	var_count = 0
+	for adverse_event in func_nihpo_podr_stream(con_nihpo_target, """SELECT caseid, drugname, route FROM nihpo_fda_aers_drug WHERE drugname = %s;""", ('IMURAN',)):
+		var_count += 1
+	print ("\n\n%d Adverse Events from FDA's AERS for drug 'IMURAN', streamed %d rows at a time." % (var_count, CT_PODR_BATCH_SIZE))
+	#
 	#
 	# = = = The end = = =
 	#
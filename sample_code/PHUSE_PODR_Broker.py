@@ -0,0 +1,469 @@
+#!/usr/bin/python3
+# Author: PHUSE PODR contributors. Builds on PHUSE_PODR.py by Jose.Lacal@NIHPO.com
+# Filename: PHUSE_PODR_Broker.py
+# Purpose: Local broker that shares the one connection allowed to PODR between many local tools (notebooks, dashboards, batch jobs).
+# Version: Mon 19 October 2026.
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, version 3.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+# License notice: Please notice that PODR is provided to PHUSE members for non-commercial use only.
+#
+"""
+Only one connection to PODR is allowed at a time (see PHUSE_PODR.py). The broker holds that connection, and local clients talk to the broker instead:
+	a.) Clients connect to a Unix socket (CT_BROKER_SOCKET), and send one request per line (JSON).
+	b.) Queries wait in one queue per client, and are run one at a time, taking clients in turn (round robin): a client with many queries does not hold up the others.
+	c.) Results are streamed back in batches, as they are read from PODR (see PHUSE_PODR.func_nihpo_podr_stream_batches). A client that disconnects early cancels its query.
+
+Requests (one JSON object per line):
+	{"query": "SELECT .. WHERE drugname = %s", "parameters": ["IMURAN"], "batch_size": 5000, "client": "notebook-1"}
+		"parameters", "batch_size" and "client" are optional. Queries from the same "client" name share one turn; default: one client per connection.
+	{"stats": true}
+
+Replies (one JSON object per line):
+	{"columns": [..]}		First batch only (none if the result is empty).
+	{"rows": [[..], ..]}	One line per batch.
+	{"done": true, "rows": 123, "wait_seconds": 0.5, "run_seconds": 2.1}
+	{"error": ".."}
+	{"stats": {..}}			Queue depth, clients, waiting and running times.
+
+Usage:
+	python3 PHUSE_PODR_Broker.py [--socket /tmp/phuse_podr_broker.sock] [--dsn "dbname=test host=localhost"]
+		--dsn connects to another PostgreSQL database instead of PODR, e.g. a local stand-in for testing.
+
+To use these functions from a client:
+	import PHUSE_PODR_Broker
+	for adverse_event in PHUSE_PODR_Broker.func_nihpo_broker_query(PHUSE_PODR_Broker.CT_BROKER_SOCKET, "SELECT caseid, drugname FROM nihpo_fda_aers_drug WHERE drugname = %s;", ['IMURAN']):
+		print (adverse_event)
+	print (PHUSE_PODR_Broker.func_nihpo_broker_stats(PHUSE_PODR_Broker.CT_BROKER_SOCKET))
+"""
+# - - - - -
+# Imports Section
+import collections
+import datetime
+import itertools
+import json
+import os
+import queue
+import socket
+import socketserver
+import sys
+import threading
+import time
+#
+import PHUSE_PODR		# Connection details and streaming of PODR. Exits if psycopg2 is not installed.
+import psycopg2
+#
+#
+CT_BROKER_SOCKET = '/tmp/phuse_podr_broker.sock'
+CT_BROKER_SOCKET_MODE = 0o600		# Only the user running the broker may connect.
+CT_BROKER_PENDING_BATCHES = 4		# Batches read from PODR and not yet sent to a client. Bounds the memory used per query.
+CT_BROKER_POLL_SECONDS = 0.5		# How often a query waiting on a slow client checks whether the client is gone.
+#
+#
+def func_nihpo_broker_connect_podr ():
+	"""
+	This function opens the one connection to PODR, read-only, with the details in PHUSE_PODR.py.
+	Return:
+		psycopg2 connection.
+
+	To call this function:
+		func_nihpo_broker_connect_podr()
+	"""
+	con_podr = psycopg2.connect(dbname=PHUSE_PODR.pgsql_dbname, user=PHUSE_PODR.pgsql_user, password=PHUSE_PODR.pgsql_password, host=PHUSE_PODR.pgsql_host, port=PHUSE_PODR.pgsql_port)
+	con_podr.set_session(readonly=True)
+	return con_podr
+#
+#
+def func_nihpo_broker_create (in_connect=func_nihpo_broker_connect_podr):
+	"""
+	This function creates the state of a broker: queues, statistics and the (not yet opened) upstream connection.
+	Inputs:
+		in_connect : [Function] : Opens the upstream connection, without arguments. Called on first use, and again after the connection is lost.
+
+	Return:
+		Dictionary, to pass to the other functions of this script.
+
+	To call this function:
+		func_nihpo_broker_create(lambda: psycopg2.connect("dbname=test host=localhost"))
+	"""
+	return {'connect': in_connect, 'connection': None, 'condition': threading.Condition(), 'queues': collections.OrderedDict(), 'stop': False,
+		'client_ids': itertools.count(1), 'clients_connected': 0, 'running': None, 'started': time.monotonic(),
+		'stats': {'queries_done': 0, 'queries_failed': 0, 'queries_cancelled': 0, 'rows_sent': 0, 'wait_seconds_total': 0.0, 'wait_seconds_maximum': 0.0, 'run_seconds_total': 0.0}}
+#
+#
+def func_nihpo_broker_check (in_query, in_parameters=None, in_batch_size=PHUSE_PODR.CT_PODR_BATCH_SIZE):
+	"""
+	This function checks a request before it is queued, so that a bad request is answered at once and never reaches the upstream connection.
+	Inputs:
+		in_query : [String] : SELECT query.
+		in_parameters : [List or Dictionary] : Query parameters.
+		in_batch_size : [Integer] : Rows per batch.
+
+	Return:
+		Nothing. Raises ValueError, with the reason, if the request is not valid.
+
+	To call this function:
+		func_nihpo_broker_check("SELECT caseid FROM nihpo_fda_aers_drug WHERE drugname = %s;", ['IMURAN'], 5000)
+	"""
+	if not isinstance(in_query, str) or (len(in_query.strip()) == 0):
+		raise ValueError("'query' must be a non-empty string.")
+	if isinstance(in_batch_size, bool) or not isinstance(in_batch_size, int) or (in_batch_size <= 0):
+		raise ValueError("'batch_size' must be a positive integer, not [%s]." % (in_batch_size,))
+	if (in_parameters is not None) and not isinstance(in_parameters, (list, tuple, dict)):
+		raise ValueError("'parameters' must be a list or an object, not [%s]." % (type(in_parameters).__name__))
+	if isinstance(in_parameters, (list, tuple)) and ('%%(' not in in_query):
+		# Positional parameters: one per %s. "%%" is a literal percent sign.
+		var_placeholders = in_query.replace('%%', '').count('%s')
+		if (var_placeholders != len(in_parameters)):
+			raise ValueError("The query has %d %%s placeholders, but %d parameters were given." % (var_placeholders, len(in_parameters)))
+#
+#
+def func_nihpo_broker_submit (in_broker, in_client, in_query, in_parameters=None, in_batch_size=PHUSE_PODR.CT_PODR_BATCH_SIZE):
+	"""
+	This function queues a query for a client. Replies are read from the 'replies' queue of the request.
+	Inputs:
+		in_broker : [Dictionary] : Returned by func_nihpo_broker_create().
+		in_client : [String] : Client name. Clients take turns; queries of one client run in the order submitted.
+		in_query : [String] : SELECT query.
+		in_parameters : [List or Dictionary] : Query parameters.
+		in_batch_size : [Integer] : Rows per batch.
+
+	Return:
+		Dictionary: the request. Its 'replies' queue receives the messages described at the top of this script; 'cancelled' is an Event to set if the client goes away.
+		A request that is not valid (see func_nihpo_broker_check) raises ValueError, and is not queued.
+
+	To call this function:
+		func_nihpo_broker_submit(broker, 'notebook-1', "SELECT 1;")
+	"""
+	func_nihpo_broker_check(in_query, in_parameters, in_batch_size)
+	dict_request = {'client': in_client, 'query': in_query, 'parameters': in_parameters, 'batch_size': in_batch_size, 'submitted': time.monotonic(),
+		'replies': queue.Queue(maxsize=CT_BROKER_PENDING_BATCHES), 'cancelled': threading.Event()}
+	with in_broker['condition']:
+		in_broker['queues'].setdefault(in_client, collections.deque()).append(dict_request)
+		in_broker['condition'].notify()
+	return dict_request
+#
+#
+def func_nihpo_broker_next (in_broker):
+	"""
+	This function waits for the next query to run, taking clients in turn (round robin).
+	Inputs:
+		in_broker : [Dictionary] : Returned by func_nihpo_broker_create().
+
+	Return:
+		Dictionary: the request, or None once the broker is stopping.
+
+	To call this function:
+		func_nihpo_broker_next(broker)
+	"""
+	with in_broker['condition']:
+		while (not in_broker['stop']) and (len(in_broker['queues']) == 0):
+			in_broker['condition'].wait()
+		if in_broker['stop']:
+			return None
+		var_client, deque_requests = next(iter(in_broker['queues'].items()))
+		dict_request = deque_requests.popleft()
+		if (len(deque_requests) > 0):
+			in_broker['queues'].move_to_end(var_client)		# Back of the line for its next query.
+		else:
+			del in_broker['queues'][var_client]
+		dict_request['started'] = time.monotonic()
+		in_broker['running'] = dict_request
+		return dict_request
+#
+#
+def func_nihpo_broker_reply (in_request, in_message):
+	"""
+	This function hands a message to the client of a request, waiting while the client is slow (at most CT_BROKER_PENDING_BATCHES messages wait).
+	Inputs:
+		in_request : [Dictionary] : Returned by func_nihpo_broker_submit().
+		in_message : [Dictionary] : Message.
+
+	Return:
+		False if the client is gone (the query should stop), True otherwise.
+
+	To call this function:
+		func_nihpo_broker_reply(dict_request, {'rows': list_rows})
+	"""
+	while not in_request['cancelled'].is_set():
+		try:
+			in_request['replies'].put(in_message, timeout=CT_BROKER_POLL_SECONDS)
+			return True
+		except queue.Full:
+			continue
+	return False
+#
+#
+def func_nihpo_broker_run (in_broker, in_request):
+	"""
+	This function runs one query on the upstream connection and streams its rows to the client. The connection is opened again if it was lost.
+	Inputs:
+		in_broker : [Dictionary] : Returned by func_nihpo_broker_create().
+		in_request : [Dictionary] : Returned by func_nihpo_broker_next().
+
+	To call this function:
+		func_nihpo_broker_run(broker, dict_request)
+	"""
+	var_start = in_request['started']
+	var_wait = var_start - in_request['submitted']
+	var_rows = 0
+	var_outcome = 'queries_done'
+	try:
+		if (in_broker['connection'] is None) or in_broker['connection'].closed:
+			in_broker['connection'] = in_broker['connect']()
+		generator_batches = PHUSE_PODR.func_nihpo_podr_stream_batches(in_broker['connection'], in_request['query'], in_request['parameters'], in_request['batch_size'])
+		try:
+			for list_rows in generator_batches:
+				if (var_rows == 0) and hasattr(list_rows[0], 'keys'):
+					func_nihpo_broker_reply(in_request, {'columns': list(list_rows[0].keys())})
+				if not func_nihpo_broker_reply(in_request, {'rows': [list(row) for row in list_rows]}):
+					var_outcome = 'queries_cancelled'
+					break
+				var_rows += len(list_rows)
+		finally:
+			generator_batches.close()		# Closes the server-side cursor, also when the client left early.
+		if (var_outcome == 'queries_done'):
+			func_nihpo_broker_reply(in_request, {'done': True, 'rows': var_rows, 'wait_seconds': round(var_wait, 3), 'run_seconds': round(time.monotonic() - var_start, 3)})
+	except Exception as e:
+		# Any error (PostgreSQL, wrong number of parameters, ..) ends this query only: the worker goes on with the next one.
+		var_outcome = 'queries_failed'
+		func_nihpo_broker_recover(in_broker)
+		func_nihpo_broker_reply(in_request, {'error': str(e).strip() if isinstance(e, psycopg2.Error) else "%s: %s" % (type(e).__name__, e)})
+	finally:
+		with in_broker['condition']:
+			dict_stats = in_broker['stats']
+			dict_stats[var_outcome] += 1
+			dict_stats['rows_sent'] += var_rows
+			dict_stats['wait_seconds_total'] += var_wait
+			dict_stats['wait_seconds_maximum'] = max(dict_stats['wait_seconds_maximum'], var_wait)
+			dict_stats['run_seconds_total'] += time.monotonic() - var_start
+			in_broker['running'] = None
+#
+#
+def func_nihpo_broker_recover (in_broker):
+	"""
+	This function leaves the upstream connection ready for the next query after an error: rolled back, or dropped (and opened again later) if it is lost or cannot be rolled back.
+	Inputs:
+		in_broker : [Dictionary] : Returned by func_nihpo_broker_create().
+
+	To call this function:
+		func_nihpo_broker_recover(broker)
+	"""
+	con_upstream = in_broker['connection']
+	if (con_upstream is None):
+		return
+	try:
+		if not con_upstream.closed:
+			con_upstream.rollback()
+			return
+	except Exception:
+		try:
+			con_upstream.close()
+		except Exception:
+			pass
+	in_broker['connection'] = None
+#
+#
+def func_nihpo_broker_worker (in_broker):
+	"""
+	This function runs queries one at a time until the broker stops. It is the only user of the upstream connection.
+	Inputs:
+		in_broker : [Dictionary] : Returned by func_nihpo_broker_create().
+
+	To call this function:
+		threading.Thread(target=func_nihpo_broker_worker, args=(broker,), daemon=True).start()
+	"""
+	while True:
+		dict_request = func_nihpo_broker_next(in_broker)
+		if dict_request is None:
+			break
+		if dict_request['cancelled'].is_set():
+			with in_broker['condition']:
+				in_broker['stats']['queries_cancelled'] += 1
+				in_broker['running'] = None
+			continue
+		func_nihpo_broker_run(in_broker, dict_request)
+	#
+	if (in_broker['connection'] is not None) and not in_broker['connection'].closed:
+		in_broker['connection'].close()
+#
+#
+def func_nihpo_broker_stats (in_broker_or_socket):
+	"""
+	This function returns the statistics of a broker: queue depth (in total and per client), clients, queries and waiting times.
+	Inputs:
+		in_broker_or_socket : [Dictionary or String] : Broker returned by func_nihpo_broker_create(), or path of the socket of a running broker.
+
+	Return:
+		Dictionary.
+
+	To call this function:
+		func_nihpo_broker_stats(CT_BROKER_SOCKET)
+	"""
+	if isinstance(in_broker_or_socket, str):
+		with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as socket_broker:
+			socket_broker.connect(in_broker_or_socket)
+			socket_broker.sendall(b'{"stats": true}\n')
+			return json.loads(socket_broker.makefile('rb').readline())['stats']
+	#
+	with in_broker_or_socket['condition']:
+		dict_stats = dict(in_broker_or_socket['stats'])
+		dict_queue_depth = {client: len(deque_requests) for client, deque_requests in in_broker_or_socket['queues'].items()}
+		dict_running = in_broker_or_socket['running']
+		dict_stats['clients_connected'] = in_broker_or_socket['clients_connected']
+	var_now = time.monotonic()
+	for var_key in ['wait_seconds_total', 'wait_seconds_maximum', 'run_seconds_total']:
+		dict_stats[var_key] = round(dict_stats[var_key], 3)
+	var_queries = dict_stats['queries_done'] + dict_stats['queries_failed'] + dict_stats['queries_cancelled']
+	dict_stats['queue_depth'] = sum(dict_queue_depth.values())
+	dict_stats['queue_depth_by_client'] = dict_queue_depth
+	dict_stats['wait_seconds_mean'] = round(in_broker_or_socket['stats']['wait_seconds_total'] / var_queries, 3) if var_queries else 0.0
+	dict_stats['running_client'] = dict_running['client'] if dict_running else None
+	dict_stats['running_seconds'] = round(var_now - dict_running['started'], 3) if dict_running else 0.0
+	dict_stats['uptime_seconds'] = round(var_now - in_broker_or_socket['started'], 3)
+	return dict_stats
+#
+#
+def func_nihpo_broker_json (in_message):
+	"""
+	This function encodes one reply as a line of JSON. Dates, decimals and other PostgreSQL types are sent as text.
+	Inputs:
+		in_message : [Dictionary] : Message.
+
+	Return:
+		Bytes, ending with a new line.
+
+	To call this function:
+		func_nihpo_broker_json({'rows': [[1, datetime.date.today()]]})
+	"""
+	return (json.dumps(in_message, default=lambda value: value.isoformat() if isinstance(value, (datetime.date, datetime.time)) else str(value)) + '\n').encode('utf-8')
+#
+#
+class NIHPO_Broker_Handler (socketserver.StreamRequestHandler):
+	"""
+	One thread per connected client: reads its requests, queues them, and writes back the replies.
+	"""
+	def handle (self):
+		dict_broker = self.server.broker
+		with dict_broker['condition']:
+			var_connection_id = 'connection-%d' % (next(dict_broker['client_ids']))
+			dict_broker['clients_connected'] += 1
+		try:
+			for var_line in self.rfile:
+				try:
+					dict_message = json.loads(var_line)
+					assert isinstance(dict_message, dict),"Each request must be a JSON object."
+				except (ValueError, AssertionError) as e:
+					self.wfile.write(func_nihpo_broker_json({'error': "Invalid request: %s" % (e)}))
+					continue
+				#
+				if dict_message.get('stats'):
+					self.wfile.write(func_nihpo_broker_json({'stats': func_nihpo_broker_stats(dict_broker)}))
+					continue
+				try:
+					dict_request = func_nihpo_broker_submit(dict_broker, str(dict_message.get('client') or var_connection_id), dict_message.get('query'),
+						dict_message.get('parameters'), dict_message.get('batch_size') or PHUSE_PODR.CT_PODR_BATCH_SIZE)
+				except ValueError as e:
+					self.wfile.write(func_nihpo_broker_json({'error': "Invalid request: %s" % (e)}))
+					continue
+				try:
+					while True:
+						dict_reply = dict_request['replies'].get()
+						self.wfile.write(func_nihpo_broker_json(dict_reply))
+						if ('done' in dict_reply) or ('error' in dict_reply):
+							break
+				except OSError:
+					dict_request['cancelled'].set()		# Client gone: the query stops at its next batch.
+					raise
+		except OSError:
+			pass
+		finally:
+			with dict_broker['condition']:
+				dict_broker['clients_connected'] -= 1
+#
+#
+def func_nihpo_broker_serve (in_socket_path=CT_BROKER_SOCKET, in_connect=func_nihpo_broker_connect_podr):
+	"""
+	This function runs a broker on a Unix socket until interrupted (Ctrl-C).
+	Inputs:
+		in_socket_path : [String] : Path of the Unix socket. An old socket file at that path is replaced.
+		in_connect : [Function] : Opens the upstream connection (see func_nihpo_broker_create).
+
+	To call this function:
+		func_nihpo_broker_serve('/tmp/phuse_podr_broker.sock')
+	"""
+	if os.path.exists(in_socket_path):
+		os.remove(in_socket_path)
+	dict_broker = func_nihpo_broker_create(in_connect)
+	thread_worker = threading.Thread(target=func_nihpo_broker_worker, args=(dict_broker,), daemon=True)
+	thread_worker.start()
+	#
+	socketserver.ThreadingUnixStreamServer.daemon_threads = True
+	with socketserver.ThreadingUnixStreamServer(in_socket_path, NIHPO_Broker_Handler) as server_broker:
+		os.chmod(in_socket_path, CT_BROKER_SOCKET_MODE)
+		server_broker.broker = dict_broker
+		print ("PODR broker listening on [%s]." % (in_socket_path))
+		try:
+			server_broker.serve_forever()
+		except KeyboardInterrupt:
+			print ("\nStopping the PODR broker.")
+		finally:
+			with dict_broker['condition']:
+				dict_broker['stop'] = True
+				dict_broker['condition'].notify_all()
+			thread_worker.join(timeout=5)
+			if os.path.exists(in_socket_path):
+				os.remove(in_socket_path)
+#
+#
+def func_nihpo_broker_query (in_socket_path, in_query, in_parameters=None, in_batch_size=PHUSE_PODR.CT_PODR_BATCH_SIZE, in_client=None):
+	"""
+	This function sends a query to a running broker and yields the rows as they arrive. Stopping early (break) disconnects, which cancels the query.
+	Inputs:
+		in_socket_path : [String] : Path of the Unix socket of the broker.
+		in_query : [String] : SELECT query.
+		in_parameters : [List or Dictionary] : Query parameters.
+		in_batch_size : [Integer] : Rows per batch.
+		in_client : [String] : Client name, shared by the queries that should take turns as one client. None: this connection.
+
+	Return:
+		Generator of rows (lists).
+
+	To call this function:
+		for adverse_event in func_nihpo_broker_query(CT_BROKER_SOCKET, "SELECT caseid FROM nihpo_fda_aers_drug WHERE drugname = %s;", ['IMURAN']):
+	"""
+	with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as socket_broker:
+		socket_broker.connect(in_socket_path)
+		dict_request = {'query': in_query, 'parameters': in_parameters, 'batch_size': in_batch_size}
+		if in_client:
+			dict_request['client'] = in_client
+		socket_broker.sendall(func_nihpo_broker_json(dict_request))
+		with socket_broker.makefile('rb') as file_replies:
+			for var_line in file_replies:
+				dict_reply = json.loads(var_line)
+				if ('error' in dict_reply):
+					raise RuntimeError("PODR broker: %s" % (dict_reply['error']))
+				if ('done' in dict_reply):
+					return
+				yield from dict_reply.get('rows', [])
+		raise RuntimeError("PODR broker: connection closed before the end of the results.")
+#
+#
+if __name__ == '__main__':
+	list_arguments = sys.argv[1:]
+	var_socket_path = CT_BROKER_SOCKET
+	func_connect = func_nihpo_broker_connect_podr
+	if ('--socket' in list_arguments):
+		var_position = list_arguments.index('--socket')
+		assert (var_position + 1 < len(list_arguments)),"Please provide the path of the Unix socket after --socket"
+		var_socket_path = list_arguments[var_position + 1]
+	if ('--dsn' in list_arguments):
+		var_position = list_arguments.index('--dsn')
+		assert (var_position + 1 < len(list_arguments)),"Please provide a PostgreSQL connection string after --dsn"
+		var_dsn = list_arguments[var_position + 1]
+		func_connect = lambda: psycopg2.connect(var_dsn)
+	#
+	print ("License notice: Please notice that PODR is provided to PHUSE members for non-commercial use only.")
+	func_nihpo_broker_serve(var_socket_path, func_connect)
@@ -0,0 +1,339 @@
+#!/usr/bin/python3
+# Author: PHUSE PODR contributors. Builds on PHUSE_PODR.py by Jose.Lacal@NIHPO.com
+# Filename: PHUSE_PODR_Cache.py
+# Purpose: Local cache of PODR query results, so repeated queries do not use the one PODR connection again.
+# Version: Mon 19 October 2026.
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, version 3.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+# License notice: Please notice that PODR is provided to PHUSE members for non-commercial use only.
+#
+"""
+The data in PODR (FDA AERS, EMA, WHO) changes rarely, but notebooks and dashboards run the same queries again and again.
+This script keeps their results in a local SQLite3 file (CT_CACHE_FILENAME):
+	a.) Key: the query, normalized (case and spaces outside quotes do not matter), plus its parameters.
+	b.) Value: the result set, stored by column and compressed.
+	c.) Each result expires after the TTL of the tables it reads (CT_CACHE_TABLE_TTL, by table name prefix; the shortest applies), or CT_CACHE_TTL_SECONDS.
+	d.) When the file holds more than CT_CACHE_MAX_BYTES of results, the least recently used ones are removed.
+	e.) in_bypass=True runs the query on PODR even if a result is cached, and stores the new result.
+
+The cache file can only be read by its owner: results are stored with pickle, so never use a cache file written by someone else.
+
+To use these functions:
+	import PHUSE_PODR, PHUSE_PODR_Cache
+	dict_result = PHUSE_PODR_Cache.func_nihpo_podr_cache_query(con_nihpo_target, "SELECT caseid, drugname FROM nihpo_fda_aers_drug WHERE drugname = %s;", ('IMURAN',))
+	for adverse_event in dict_result['rows']:
+		print (dict(zip(dict_result['columns'], adverse_event)))
+
+Usage:
+	python3 PHUSE_PODR_Cache.py [--stats] [--expired] [--clear] [--cache Cache.sqlite3]
+		--stats shows the size of the cache; --expired removes expired results; --clear removes all results.
+"""
+# - - - - -
+# Imports Section
+import hashlib
+import os
+import pickle
+import re
+import sqlite3
+import sys
+import time
+import zlib
+#
+import PHUSE_PODR		# Streaming of PODR queries. Exits if psycopg2 is not installed.
+#
+#
+CT_CACHE_FILENAME = os.path.join(os.path.expanduser('~'), '.phuse_podr_cache.sqlite3')
+CT_CACHE_MAX_BYTES = 1073741824			# 1 GB of compressed results.
+CT_CACHE_TTL_SECONDS = 86400			# 1 day, for queries on tables not listed below.
+CT_CACHE_TABLE_TTL = {					# Table name prefix : seconds.
+	'nihpo_fda_aers_': 30 * 86400,		# Quarterly FDA AERS releases.
+	'nihpo_ema_': 30 * 86400,
+	'nihpo_who_': 30 * 86400,
+	'information_schema.': 3600}
+CT_CACHE_COMPRESSION = 6				# zlib level.
+#
+CT_CACHE_SQL = """CREATE TABLE IF NOT EXISTS podr_cache (
+	cache_key text PRIMARY KEY,
+	query text,
+	tables text,
+	created real,
+	expires real,
+	last_used real,
+	row_count integer,
+	bytes integer,
+	result blob);
+CREATE INDEX IF NOT EXISTS idx_podr_cache_last_used ON podr_cache (last_used);"""
+#
+# Parts of a query kept as they are: quoted strings, quoted identifiers, dollar-quoted strings. Everything else is case and space insensitive.
+CT_CACHE_QUOTED = re.compile(r"""[eE]'(?:[^'\\]|\\.|'')*'|'(?:[^']|'')*'|"(?:[^"]|"")*"|(\$\w*\$).*?\1""", re.DOTALL)
+# Tables read by a query: the comma-separated list after FROM (up to the next clause), and the table after each JOIN. Subqueries in parentheses are read on their own.
+CT_CACHE_FROM_LIST = re.compile(r"""\bfrom\s+(.*?)(?=[();]|\b(?:where|join|inner|left|right|full|cross|natural|on|using|group|order|having|window|limit|offset|fetch|for|union|intersect|except|select|from|lateral)\b|$)""", re.DOTALL)
+CT_CACHE_TABLES = re.compile(r"""\bjoin\s+((?:[a-z_][a-z0-9_$]*\.)?[a-z_][a-z0-9_$]*)""")
+CT_CACHE_PARENTHESES = re.compile(r"""\(([^()]*)\)""")
+CT_CACHE_TABLE_NAME = re.compile(r"""(?:[a-z_][a-z0-9_$]*\.)?[a-z_][a-z0-9_$]*""")
+#
+#
+def func_nihpo_podr_cache_open (in_filename=CT_CACHE_FILENAME):
+	"""
+	This function opens the cache file, and creates it (readable by its owner only) if needed.
+	Inputs:
+		in_filename : [String] : SQLite3 file of the cache.
+
+	Return:
+		SQLite3 connection.
+
+	To call this function:
+		func_nihpo_podr_cache_open('/home/me/.phuse_podr_cache.sqlite3')
+	"""
+	if not os.path.exists(in_filename):
+		os.close(os.open(in_filename, os.O_CREAT | os.O_WRONLY, 0o600))
+	conn_cache = sqlite3.connect(in_filename, timeout=30, isolation_level=None)
+	conn_cache.execute("PRAGMA journal_mode=WAL;")		# Notebooks and dashboards read while another one writes.
+	conn_cache.executescript(CT_CACHE_SQL)
+	return conn_cache
+#
+#
+def func_nihpo_podr_cache_normalize (in_query):
+	"""
+	This function normalizes a query: lower case and single spaces outside quotes, no final semicolon. Unquoted SQL is case insensitive in PostgreSQL, so the result is the same query.
+	Inputs:
+		in_query : [String] : Query.
+
+	Return:
+		String.
+
+	To call this function:
+		func_nihpo_podr_cache_normalize("SELECT  caseid FROM nihpo_fda_aers_drug WHERE drugname = 'IMURAN';")
+	"""
+	list_parts = []
+	var_position = 0
+	for match_quoted in CT_CACHE_QUOTED.finditer(in_query):
+		list_parts.append(re.sub(r'\s+', ' ', in_query[var_position:match_quoted.start()].lower()))
+		list_parts.append(match_quoted.group(0))
+		var_position = match_quoted.end()
+	list_parts.append(re.sub(r'\s+', ' ', in_query[var_position:].lower()))
+	return ''.join(list_parts).strip().rstrip(';').rstrip()
+#
+#
+def func_nihpo_podr_cache_key (in_query, in_parameters=None):
+	"""
+	This function returns the cache key of a query and its parameters.
+	Inputs:
+		in_query : [String] : Query.
+		in_parameters : [Tuple or Dictionary] : Query parameters.
+
+	Return:
+		String: SHA-256, in hexadecimal.
+
+	To call this function:
+		func_nihpo_podr_cache_key("SELECT caseid FROM nihpo_fda_aers_drug WHERE drugname = %s;", ('IMURAN',))
+	"""
+	if in_parameters is None:
+		var_parameters = ''
+	elif isinstance(in_parameters, dict):
+		var_parameters = repr(sorted(in_parameters.items()))
+	else:
+		var_parameters = repr(tuple(in_parameters))		# Lists and tuples of parameters are the same; nested ones keep their type (psycopg2 adapts them differently).
+	return hashlib.sha256(('%s\n%s' % (func_nihpo_podr_cache_normalize(in_query), var_parameters)).encode('utf-8')).hexdigest()
+#
+#
+def func_nihpo_podr_cache_ttl (in_query, in_table_ttl=CT_CACHE_TABLE_TTL):
+	"""
+	This function returns the tables read by a query, and how long its result can be kept: the shortest TTL of those tables.
+	Inputs:
+		in_query : [String] : Query.
+		in_table_ttl : [Dictionary] : { table name prefix : seconds }.
+
+	Return:
+		Tuple: (list of table names, seconds).
+
+	To call this function:
+		func_nihpo_podr_cache_ttl("SELECT caseid FROM nihpo_fda_aers_drug;")
+	"""
+	var_query = CT_CACHE_QUOTED.sub(' 0 ', func_nihpo_podr_cache_normalize(in_query))		# Quoted strings do not name tables.
+	list_parts = []
+	match_subquery = CT_CACHE_PARENTHESES.search(var_query)
+	while match_subquery is not None:		# Innermost parentheses first: each subquery is read on its own, then replaced in its query.
+		list_parts.append(match_subquery.group(1))
+		var_query = var_query[:match_subquery.start()] + ' 0 ' + var_query[match_subquery.end():]
+		match_subquery = CT_CACHE_PARENTHESES.search(var_query)
+	list_parts.append(var_query)
+	set_tables = set()
+	for var_part in list_parts:
+		set_tables.update(CT_CACHE_TABLES.findall(var_part))
+		for var_from_list in CT_CACHE_FROM_LIST.findall(var_part):
+			for var_item in var_from_list.split(','):
+				match_table = CT_CACHE_TABLE_NAME.match(var_item.strip())		# "table", "table alias", "table AS alias".
+				if match_table is not None:
+					set_tables.add(match_table.group(0))
+	list_tables = sorted(set_tables)
+	list_ttl = [seconds for table in list_tables for prefix, seconds in in_table_ttl.items() if table.startswith(prefix)]
+	return list_tables, (min(list_ttl) if list_ttl else CT_CACHE_TTL_SECONDS)
+#
+#
+def func_nihpo_podr_cache_get (in_cache, in_key):
+	"""
+	This function reads a result from the cache, if it is there and has not expired.
+	Inputs:
+		in_cache : [SQLite3 connection] : Returned by func_nihpo_podr_cache_open().
+		in_key : [String] : Returned by func_nihpo_podr_cache_key().
+
+	Return:
+		Dictionary: 'columns', 'rows' (list of tuples), 'cached' (True), 'created', 'expires'. None if not cached.
+
+	To call this function:
+		func_nihpo_podr_cache_get(conn_cache, var_key)
+	"""
+	var_now = time.time()
+	row_cache = in_cache.execute("SELECT result, created, expires FROM podr_cache WHERE cache_key = ?;", (in_key,)).fetchone()
+	if row_cache is None:
+		return None
+	if (row_cache[2] <= var_now):
+		in_cache.execute("DELETE FROM podr_cache WHERE cache_key = ?;", (in_key,))
+		return None
+	in_cache.execute("UPDATE podr_cache SET last_used = ? WHERE cache_key = ?;", (var_now, in_key))
+	list_columns, list_values = pickle.loads(zlib.decompress(row_cache[0]))
+	return {'columns': list_columns, 'rows': list(zip(*list_values)), 'cached': True, 'created': row_cache[1], 'expires': row_cache[2]}
+#
+#
+def func_nihpo_podr_cache_put (in_cache, in_key, in_query, in_columns, in_rows, in_ttl=None, in_max_bytes=CT_CACHE_MAX_BYTES):
+	"""
+	This function stores a result in the cache, by column and compressed, then removes the least recently used results above the size limit.
+	A result larger than the whole limit is not stored.
+	Inputs:
+		in_cache : [SQLite3 connection] : Returned by func_nihpo_podr_cache_open().
+		in_key : [String] : Returned by func_nihpo_podr_cache_key().
+		in_query : [String] : Query.
+		in_columns : [List of Strings] : Column names.
+		in_rows : [List of Tuples] : Rows.
+		in_ttl : [Integer] : Seconds to keep the result. None: from the tables read by the query (see func_nihpo_podr_cache_ttl).
+		in_max_bytes : [Integer] : Size limit of the cache.
+
+	Return:
+		Float: expiry time of the result (time.time()), or None if it was not stored.
+
+	To call this function:
+		func_nihpo_podr_cache_put(conn_cache, var_key, var_query, ['caseid'], [(1,), (2,)])
+	"""
+	list_tables, var_ttl = func_nihpo_podr_cache_ttl(in_query)
+	if in_ttl is not None:
+		var_ttl = in_ttl
+	var_result = zlib.compress(pickle.dumps((list(in_columns), list(zip(*in_rows))), protocol=pickle.HIGHEST_PROTOCOL), CT_CACHE_COMPRESSION)
+	if (len(var_result) > in_max_bytes):
+		return None
+	var_now = time.time()
+	in_cache.execute("BEGIN IMMEDIATE;")
+	try:
+		in_cache.execute("INSERT OR REPLACE INTO podr_cache (cache_key, query, tables, created, expires, last_used, row_count, bytes, result) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);",
+			(in_key, in_query, ','.join(list_tables), var_now, var_now + var_ttl, var_now, len(in_rows), len(var_result), var_result))
+		func_nihpo_podr_cache_evict(in_cache, in_max_bytes)
+		in_cache.execute("COMMIT;")
+	except sqlite3.Error:
+		in_cache.execute("ROLLBACK;")
+		raise
+	return var_now + var_ttl
+#
+#
+def func_nihpo_podr_cache_evict (in_cache, in_max_bytes=CT_CACHE_MAX_BYTES):
+	"""
+	This function removes expired results, then the least recently used ones until the cache holds at most in_max_bytes.
+	Inputs:
+		in_cache : [SQLite3 connection] : Returned by func_nihpo_podr_cache_open().
+		in_max_bytes : [Integer] : Size limit of the cache.
+
+	Return:
+		Integer: number of results removed.
+
+	To call this function:
+		func_nihpo_podr_cache_evict(conn_cache, 536870912)
+	"""
+	var_removed = in_cache.execute("DELETE FROM podr_cache WHERE expires <= ?;", (time.time(),)).rowcount
+	var_total_bytes = in_cache.execute("SELECT COALESCE(SUM(bytes), 0) FROM podr_cache;").fetchone()[0]
+	if (var_total_bytes <= in_max_bytes):
+		return var_removed
+	list_remove = []
+	for var_key, var_bytes in in_cache.execute("SELECT cache_key, bytes FROM podr_cache ORDER BY last_used;").fetchall():
+		if (var_total_bytes <= in_max_bytes):
+			break
+		list_remove.append((var_key,))
+		var_total_bytes -= var_bytes
+	in_cache.executemany("DELETE FROM podr_cache WHERE cache_key = ?;", list_remove)
+	return var_removed + len(list_remove)
+#
+#
+def func_nihpo_podr_cache_query (in_connection, in_query, in_parameters=None, in_bypass=False, in_cache=CT_CACHE_FILENAME, in_ttl=None, in_max_bytes=CT_CACHE_MAX_BYTES):
+	"""
+	This function returns the result of a query from the cache, or runs it on PODR (streamed, see PHUSE_PODR.func_nihpo_podr_stream_batches) and caches it.
+	Inputs:
+		in_connection : [psycopg2 connection] : Connection to PODR. Not used when the result is cached.
+		in_query : [String or psycopg2.sql.Composed] : SELECT query.
+		in_parameters : [Tuple or Dictionary] : Query parameters.
+		in_bypass : [Boolean] : True: run the query even if its result is cached, and replace the cached result.
+		in_cache : [String or SQLite3 connection] : Cache file, or connection returned by func_nihpo_podr_cache_open().
+		in_ttl : [Integer] : Seconds to keep the result. None: from the tables read by the query.
+		in_max_bytes : [Integer] : Size limit of the cache.
+
+	Return:
+		Dictionary: 'columns', 'rows' (list of tuples), 'cached' (True if read from the cache), 'created', 'expires'.
+
+	To call this function:
+		func_nihpo_podr_cache_query(con_nihpo_target, "SELECT caseid, drugname FROM nihpo_fda_aers_drug WHERE drugname = %s;", ('IMURAN',))
+	"""
+	var_query = in_query if isinstance(in_query, str) else in_query.as_string(in_connection)
+	var_key = func_nihpo_podr_cache_key(var_query, in_parameters)
+	conn_cache = func_nihpo_podr_cache_open(in_cache) if isinstance(in_cache, str) else in_cache
+	try:
+		if not in_bypass:
+			dict_result = func_nihpo_podr_cache_get(conn_cache, var_key)
+			if dict_result is not None:
+				return dict_result
+		#
+		list_columns = []		# Filled from the cursor description: also when the query returns no rows.
+		list_rows = []
+		for list_batch in PHUSE_PODR.func_nihpo_podr_stream_batches(in_connection, var_query, in_parameters, in_columns=list_columns):
+			list_rows.extend([tuple(row) for row in list_batch])
+		var_created = time.time()
+		var_expires = func_nihpo_podr_cache_put(conn_cache, var_key, var_query, list_columns, list_rows, in_ttl, in_max_bytes)
+		return {'columns': list_columns, 'rows': list_rows, 'cached': False, 'created': var_created, 'expires': var_expires}
+	finally:
+		if isinstance(in_cache, str):
+			conn_cache.close()
+#
+#
+def func_nihpo_podr_cache_stats (in_cache):
+	"""
+	This function returns the size of the cache.
+	Inputs:
+		in_cache : [SQLite3 connection] : Returned by func_nihpo_podr_cache_open().
+
+	Return:
+		Dictionary: 'results', 'expired', 'rows', 'bytes'.
+
+	To call this function:
+		func_nihpo_podr_cache_stats(conn_cache)
+	"""
+	var_results, var_rows, var_bytes = in_cache.execute("SELECT COUNT(*), COALESCE(SUM(row_count), 0), COALESCE(SUM(bytes), 0) FROM podr_cache;").fetchone()
+	var_expired = in_cache.execute("SELECT COUNT(*) FROM podr_cache WHERE expires <= ?;", (time.time(),)).fetchone()[0]
+	return {'results': var_results, 'expired': var_expired, 'rows': var_rows, 'bytes': var_bytes}
+#
+#
+if __name__ == '__main__':
+	list_arguments = sys.argv[1:]
+	var_cache_filename = CT_CACHE_FILENAME
+	if ('--cache' in list_arguments):
+		var_position = list_arguments.index('--cache')
+		assert (var_position + 1 < len(list_arguments)),"Please provide the cache file after --cache"
+		var_cache_filename = list_arguments[var_position + 1]
+	#
+	conn_cache = func_nihpo_podr_cache_open(var_cache_filename)
+	if ('--clear' in list_arguments):
+		print ("%d results removed." % (conn_cache.execute("DELETE FROM podr_cache;").rowcount))
+		conn_cache.execute("VACUUM;")
+	elif ('--expired' in list_arguments):
+		print ("%d results removed." % (conn_cache.execute("DELETE FROM podr_cache WHERE expires <= ?;", (time.time(),)).rowcount))
+	dict_stats = func_nihpo_podr_cache_stats(conn_cache)
+	print ("[%s]: %d results (%d expired), %d rows, %d bytes." % (var_cache_filename, dict_stats['results'], dict_stats['expired'], dict_stats['rows'], dict_stats['bytes']))
+	conn_cache.close()
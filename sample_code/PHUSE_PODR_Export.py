@@ -0,0 +1,282 @@
+#!/usr/bin/python3
+# Author: PHUSE PODR contributors. Builds on PHUSE_PODR.py by Jose.Lacal@NIHPO.com
+# Filename: PHUSE_PODR_Export.py
+# Purpose: Bulk export of PODR tables to local compressed CSV or Parquet files, with PostgreSQL's COPY.
+# Version: Mon 19 October 2026.
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, version 3.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+# License notice: Please notice that PODR is provided to PHUSE members for non-commercial use only.
+#
+"""
+Reading a whole table through a cursor builds one Python row per record. For tables the size of "nihpo_fda_aers_drug", this script asks PostgreSQL for
+"COPY (SELECT ..) TO STDOUT WITH (FORMAT csv, HEADER true)" instead: the server sends CSV text, written straight to a gzip file as it arrives (psycopg2's copy_expert).
+	a.) Columns: all, or a selection (projection).
+	b.) Rows: all, or those matching a WHERE filter (with %s parameters, bound before the COPY), optionally limited.
+	c.) Progress: rows and MB written, speed, and percent of the (estimated) table size when there is no filter.
+	d.) Target "*.parquet": the gzip CSV is written next to it first, then converted in batches (requires pyarrow), with column types from PostgreSQL.
+
+Usage:
+	python3 PHUSE_PODR_Export.py Table [Target] [--columns caseid,drugname] [--where "drugname = %s"] [--parameter IMURAN] [--limit 1000] [--dsn "dbname=test host=localhost"]
+		Target: "*.csv.gz" (default: Table.csv.gz), "*.csv" or "*.parquet". --parameter can be repeated, one per %s. --dsn exports from another PostgreSQL database instead of PODR.
+
+To use these functions:
+	import PHUSE_PODR_Export
+	dict_export = PHUSE_PODR_Export.func_nihpo_podr_export(con_nihpo_target, 'nihpo_fda_aers_drug', 'IMURAN.csv.gz', ['caseid', 'drugname', 'route'], "drugname = %s", ('IMURAN',))
+"""
+# - - - - -
+# Imports Section
+import gzip
+import os
+import sys
+import time
+#
+import PHUSE_PODR		# Connection details of PODR. Exits if psycopg2 is not installed.
+import psycopg2
+from psycopg2 import sql
+#
+# pyarrow is only needed for Parquet targets:
+try:
+	import pyarrow as pa
+	import pyarrow.csv
+	import pyarrow.parquet
+except ImportError:
+	pa = None
+#
+#
+CT_EXPORT_BUFFER_SIZE = 1048576			# Bytes read from the server by copy_expert() at a time.
+CT_EXPORT_COMPRESSION = 6				# gzip level: level 9 is much slower for little gain on CSV.
+CT_EXPORT_PROGRESS_SECONDS = 1.0		# How often progress is shown.
+CT_EXPORT_PARQUET_BLOCK_SIZE = 16777216	# Bytes of CSV converted to Parquet at a time.
+#
+# PostgreSQL type OID : pyarrow type name. Other types (numeric, text, ..) are kept as strings.
+CT_EXPORT_ARROW_TYPES = {16: 'bool_', 20: 'int64', 21: 'int16', 23: 'int32', 700: 'float32', 701: 'float64', 1082: 'date32', 1114: 'timestamp', 1184: 'timestamptz'}
+#
+#
+class NIHPO_Export_Progress:
+	"""
+	File-like target of copy_expert(): writes to the output file and shows progress.
+	Rows are counted as lines: a value with a line break inside counts more than once.
+	"""
+	def __init__ (self, in_file, in_estimated_rows=None, in_stream=sys.stderr):
+		self.file = in_file
+		self.estimated_rows = in_estimated_rows
+		self.stream = in_stream
+		self.rows = -1		# The header line is not a row.
+		self.bytes = 0
+		self.started = time.monotonic()
+		self.shown = self.started
+	#
+	def write (self, in_data):
+		self.file.write(in_data)
+		self.bytes += len(in_data)
+		self.rows += in_data.count(b'\n')
+		var_now = time.monotonic()
+		if (self.stream is not None) and (var_now - self.shown >= CT_EXPORT_PROGRESS_SECONDS):
+			self.shown = var_now
+			self.show(var_now)
+	#
+	def show (self, in_now, in_end=''):
+		var_seconds = max(in_now - self.started, 1e-6)
+		var_percent = (" (%.0f%%)" % (min(100.0, 100.0 * self.rows / self.estimated_rows))) if self.estimated_rows else ""
+		self.stream.write("\r%d rows%s, %.1f MB, %.1f MB/s, %.0f s.%s" % (max(self.rows, 0), var_percent, self.bytes / 1048576, self.bytes / 1048576 / var_seconds, var_seconds, in_end))
+		self.stream.flush()
+#
+#
+def func_nihpo_podr_export_select (in_table, in_columns=None, in_where=None, in_limit=None):
+	"""
+	This function builds the SELECT of an export. Table and column names are quoted as identifiers; the WHERE filter is SQL, with %s parameters.
+	Inputs:
+		in_table : [String] : Table, optionally with its schema ("information_schema.tables").
+		in_columns : [List of Strings] : Columns to export. None: all.
+		in_where : [String] : WHERE filter, without "WHERE". None: all rows.
+		in_limit : [Integer] : Maximum number of rows. None: no limit.
+
+	Return:
+		psycopg2.sql.Composed.
+
+	To call this function:
+		func_nihpo_podr_export_select('nihpo_fda_aers_drug', ['caseid', 'drugname'], "drugname = %s")
+	"""
+	composed_select = sql.SQL("SELECT {columns} FROM {table}").format(
+		columns=sql.SQL(', ').join([sql.Identifier(column) for column in in_columns]) if in_columns else sql.SQL('*'),
+		table=sql.Identifier(*in_table.split('.')))
+	if in_where:
+		composed_select += sql.SQL(" WHERE ") + sql.SQL(in_where)
+	if in_limit is not None:
+		assert (int(in_limit) >= 0),"Limit must be a number of rows, not [%s]" % (in_limit)
+		composed_select += sql.SQL(" LIMIT {limit}").format(limit=sql.Literal(int(in_limit)))
+	return composed_select
+#
+#
+def func_nihpo_podr_export_estimate (in_cursor, in_table):
+	"""
+	This function returns the number of rows of a table as estimated by PostgreSQL (pg_class.reltuples): instant, unlike COUNT(*).
+	Inputs:
+		in_cursor : [psycopg2 cursor] : Cursor on PODR.
+		in_table : [String] : Table, optionally with its schema.
+
+	Return:
+		Integer, or None if there is no estimate (views, tables never analyzed).
+
+	To call this function:
+		func_nihpo_podr_export_estimate(cur, 'nihpo_fda_aers_drug')
+	"""
+	in_cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s);", (in_table,))
+	row_estimate = in_cursor.fetchone()
+	return row_estimate[0] if (row_estimate is not None) and (row_estimate[0] is not None) and (row_estimate[0] > 0) else None
+#
+#
+def func_nihpo_podr_export_arrow_schema (in_cursor, in_select):
+	"""
+	This function returns the pyarrow types of the columns of a SELECT, from the PostgreSQL types (the query is run with LIMIT 0: no rows are read).
+	Inputs:
+		in_cursor : [psycopg2 cursor] : Cursor on PODR.
+		in_select : [psycopg2.sql.Composed] : Returned by func_nihpo_podr_export_select(), with its parameters bound.
+
+	Return:
+		Dictionary { column : pyarrow type }.
+
+	To call this function:
+		func_nihpo_podr_export_arrow_schema(cur, composed_select)
+	"""
+	in_cursor.execute(sql.SQL("SELECT * FROM ({select}) AS podr_export LIMIT 0").format(select=in_select))
+	dict_types = {}
+	for column in in_cursor.description:
+		var_type = CT_EXPORT_ARROW_TYPES.get(column[1], 'string')
+		if (var_type == 'timestamp'):
+			dict_types[column[0]] = pa.timestamp('us')
+		elif (var_type == 'timestamptz'):
+			dict_types[column[0]] = pa.timestamp('us', tz='UTC')		# COPY writes the offset of each value.
+		else:
+			dict_types[column[0]] = getattr(pa, var_type)()
+	return dict_types
+#
+#
+def func_nihpo_podr_export_parquet (in_csv_filename, in_parquet_filename, in_types):
+	"""
+	This function converts a gzip CSV file written by COPY into a Parquet file, a block at a time.
+	COPY writes NULL as an empty field, and an empty string as "": only the first becomes null. Booleans are written as 't' and 'f'.
+	Inputs:
+		in_csv_filename : [String] : gzip CSV file, with a header line.
+		in_parquet_filename : [String] : Parquet file.
+		in_types : [Dictionary] : { column : pyarrow type }, returned by func_nihpo_podr_export_arrow_schema().
+
+	Return:
+		Integer: number of rows.
+
+	To call this function:
+		func_nihpo_podr_export_parquet('IMURAN.csv.gz', 'IMURAN.parquet', dict_types)
+	"""
+	var_rows = 0
+	with pa.input_stream(in_csv_filename, compression='gzip') as stream_csv:
+		reader_csv = pyarrow.csv.open_csv(stream_csv, read_options=pyarrow.csv.ReadOptions(block_size=CT_EXPORT_PARQUET_BLOCK_SIZE),
+			convert_options=pyarrow.csv.ConvertOptions(column_types=in_types, null_values=[''], strings_can_be_null=True, quoted_strings_can_be_null=False, true_values=['t'], false_values=['f']))
+		with pyarrow.parquet.ParquetWriter(in_parquet_filename, reader_csv.schema) as writer_parquet:
+			for batch_rows in reader_csv:
+				writer_parquet.write_batch(batch_rows)
+				var_rows += batch_rows.num_rows
+	return var_rows
+#
+#
+def func_nihpo_podr_export (in_connection, in_table, in_target_filename=None, in_columns=None, in_where=None, in_parameters=None, in_limit=None, in_progress=sys.stderr):
+	"""
+	This function exports a table (or some of its columns and rows) to a local file with COPY (see the top of this script).
+	The file is written under a temporary name, and renamed once complete.
+	Inputs:
+		in_connection : [psycopg2 connection] : Connection to PODR.
+		in_table : [String] : Table, optionally with its schema.
+		in_target_filename : [String] : "*.csv.gz", "*.csv" or "*.parquet". None: in_table + ".csv.gz".
+		in_columns : [List of Strings] : Columns to export. None: all.
+		in_where : [String] : WHERE filter, without "WHERE", with %s parameters. None: all rows.
+		in_parameters : [Tuple or Dictionary] : Parameters of the WHERE filter.
+		in_limit : [Integer] : Maximum number of rows.
+		in_progress : [File] : Where progress is shown. None: no progress.
+
+	Return:
+		Dictionary: 'filename', 'rows', 'bytes' (CSV received from the server), 'seconds'.
+
+	To call this function:
+		func_nihpo_podr_export(con_nihpo_target, 'nihpo_fda_aers_drug', 'IMURAN.csv.gz', ['caseid', 'drugname', 'route'], "drugname = %s", ('IMURAN',))
+	"""
+	var_target_filename = in_target_filename or (in_table + '.csv.gz')
+	var_parquet = var_target_filename.endswith('.parquet')
+	assert (pa is not None) or not var_parquet,"Install PyArrow for Parquet targets: pip3 install pyarrow"
+	var_csv_filename = (var_target_filename[:-len('.parquet')] + '.csv.gz') if var_parquet else var_target_filename
+	var_building_filename = var_csv_filename + '.building'
+	var_own_transaction = (not in_connection.autocommit) and (in_connection.status == psycopg2.extensions.STATUS_READY)
+	#
+	cur_export = in_connection.cursor()
+	try:
+		# COPY has no parameters: they are bound into the query text by psycopg2, with the same quoting as execute().
+		composed_select = sql.SQL(cur_export.mogrify(func_nihpo_podr_export_select(in_table, in_columns, in_where, in_limit), in_parameters).decode(psycopg2.extensions.encodings.get(in_connection.encoding, 'utf-8')))
+		var_estimated_rows = func_nihpo_podr_export_estimate(cur_export, in_table) if (not in_where) else None
+		if (var_estimated_rows is not None) and (in_limit is not None):
+			var_estimated_rows = min(var_estimated_rows, int(in_limit))
+		dict_types = func_nihpo_podr_export_arrow_schema(cur_export, composed_select) if var_parquet else None
+		#
+		composed_copy = sql.SQL("COPY ({select}) TO STDOUT WITH (FORMAT csv, HEADER true)").format(select=composed_select)
+		file_target = gzip.open(var_building_filename, 'wb', compresslevel=CT_EXPORT_COMPRESSION) if var_csv_filename.endswith('.gz') else open(var_building_filename, 'wb')
+		try:
+			with file_target:
+				progress_export = NIHPO_Export_Progress(file_target, var_estimated_rows, in_progress)
+				cur_export.copy_expert(composed_copy, progress_export, size=CT_EXPORT_BUFFER_SIZE)
+			os.replace(var_building_filename, var_csv_filename)
+		finally:
+			if os.path.exists(var_building_filename):
+				os.remove(var_building_filename)
+	finally:
+		cur_export.close()
+		if var_own_transaction and not in_connection.closed:
+			in_connection.rollback()		# Read-only: nothing to commit.
+	#
+	if (in_progress is not None):
+		progress_export.show(time.monotonic(), '\n')
+	var_rows = max(progress_export.rows, 0)
+	if var_parquet:
+		try:
+			var_rows = func_nihpo_podr_export_parquet(var_csv_filename, var_target_filename, dict_types)
+		finally:
+			os.remove(var_csv_filename)
+	return {'filename': var_target_filename, 'rows': var_rows, 'bytes': progress_export.bytes, 'seconds': round(time.monotonic() - progress_export.started, 3)}
+#
+#
+if __name__ == '__main__':
+	list_arguments = sys.argv[1:]
+	dict_options = {'--columns': None, '--where': None, '--limit': None, '--dsn': None}
+	list_parameters = []
+	for var_option in list(dict_options.keys()) + ['--parameter']:
+		while (var_option in list_arguments):
+			var_position = list_arguments.index(var_option)
+			assert (var_position + 1 < len(list_arguments)),"Please provide a value after %s" % (var_option)
+			if (var_option == '--parameter'):
+				list_parameters.append(list_arguments[var_position + 1])
+			else:
+				dict_options[var_option] = list_arguments[var_position + 1]
+			del list_arguments[var_position:var_position + 2]
+	if (len(list_arguments) not in (1, 2)):
+		print ("Usage: python3 PHUSE_PODR_Export.py Table [Target.csv.gz|Target.parquet] [--columns a,b] [--where \"a = %s\"] [--parameter value] [--limit N] [--dsn DSN]")
+		sys.exit(1)
+	#
+	print ("License notice: Please notice that PODR is provided to PHUSE members for non-commercial use only.")
+	try:
+		if dict_options['--dsn']:
+			con_nihpo_target = psycopg2.connect(dict_options['--dsn'])
+		else:
+			con_nihpo_target = psycopg2.connect(dbname=PHUSE_PODR.pgsql_dbname, user=PHUSE_PODR.pgsql_user, password=PHUSE_PODR.pgsql_password, host=PHUSE_PODR.pgsql_host, port=PHUSE_PODR.pgsql_port)
+		con_nihpo_target.set_session(readonly=True)
+	except psycopg2.DatabaseError as e:
+		print ("\nPostgreSQL error %s" % e)
+		sys.exit("There was an error connecting to PHUSE's Open Data Repository.")
+	#
+	try:
+		dict_export = func_nihpo_podr_export(con_nihpo_target, list_arguments[0], list_arguments[1] if (len(list_arguments) > 1) else None,
+			dict_options['--columns'].split(',') if dict_options['--columns'] else None, dict_options['--where'], tuple(list_parameters) or None, dict_options['--limit'])
+	except (psycopg2.Error, AssertionError) as e:
+		print ("\nError: %s" % (e))
+		sys.exit(1)
+	finally:
+		con_nihpo_target.close()
+	print ("[%s]: %d rows in %.1f seconds." % (dict_export['filename'], dict_export['rows'], dict_export['seconds']))
@@ -0,0 +1,140 @@
+#!/usr/bin/python3
+# Author: PHUSE PODR contributors. Builds on Roche_ADaM_Generation.py by Jose.Lacal@NIHPO.com
+# Filename: PHUSE_Row_Templates.py
+# Purpose: Write CSV rows whose subject-level columns are serialized once per subject.
+# Version: Mon 19 October 2026.
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, version 3.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+"""
+Most ADaM records repeat about 20 ADSL columns (STUDYID, USUBJID, SEX, RACE, ..) for every record of a subject.
+Instead of copying them into new variables and building a new list for every record:
+a.) Compile a template once per file: which columns come from the subject, and which come from each record.
+b.) Bind the template once per subject: the subject columns are serialized to text (with their separators).
+c.) For each record, only the record columns are serialized, and glued between the pre-serialized pieces.
+
+Output is the same as csv.writer(.., delimiter=separator, quoting=csv.QUOTE_MINIMAL).
+
+To use these functions:
+	import PHUSE_Row_Templates
+	template_ADLB = PHUSE_Row_Templates.func_nihpo_row_template_compile(list_header_ADLB, ['STUDYID', 'USUBJID', ..], '|')
+	row_template_ADLB = PHUSE_Row_Templates.func_nihpo_row_template_bind(template_ADLB, {'STUDYID': .., 'USUBJID': .., ..})
+	PHUSE_Row_Templates.func_nihpo_row_template_write(output_file, row_template_ADLB, [ASEQ, DOMAIN, LBSEQ, ..])
+"""
+#
+#
+def func_nihpo_csv_field (in_value, in_separator):
+	"""
+	This function returns a value as CSV text, quoted only when needed (same rules as csv.QUOTE_MINIMAL).
+	Inputs:
+		in_value : [Any] : Value to write. None is written as an empty field.
+		in_separator : [String] : CSV separator.
+
+	Return:
+		String.
+
+	To call this function:
+		func_nihpo_csv_field('A|B', '|')
+	"""
+	if in_value is None:
+		return ''
+	#
+	var_text = str(in_value)
+	if (in_separator in var_text) or ('"' in var_text) or ('\n' in var_text) or ('\r' in var_text):
+		return '"' + var_text.replace('"', '""') + '"'
+	return var_text
+#
+#
+def func_nihpo_row_template_compile (in_header, in_subject_columns, in_separator, in_line_terminator='\r\n'):
+	"""
+	This function splits the columns of a file into runs of subject columns and runs of record columns.
+	Inputs:
+		in_header : [List] : Column names, in file order.
+		in_subject_columns : [List] : Column names whose values are the same for all records of a subject.
+		in_separator : [String] : CSV separator.
+		in_line_terminator : [String] : End of line. Defaults to the csv.writer default.
+
+	Return:
+		Dictionary describing the template. Record values must be given in file order, skipping the subject columns.
+
+	To call this function:
+		func_nihpo_row_template_compile(['STUDYID', 'USUBJID', 'ASEQ', 'SEX'], ['STUDYID', 'USUBJID', 'SEX'], '|')
+	"""
+	set_subject_columns = set(in_subject_columns)
+	assert (set_subject_columns <= set(in_header)),"Subject columns not in header: %s" % (sorted(set_subject_columns - set(in_header)))
+	#
+	# Runs: [is_subject_run, [column names]]
+	list_runs = []
+	for column in in_header:
+		var_is_subject = column in set_subject_columns
+		if (len(list_runs) == 0) or (list_runs[-1][0] != var_is_subject):
+			list_runs.append([var_is_subject, []])
+		list_runs[-1][1].append(column)
+	#
+	# Number of record values in each record run:
+	list_record_run_lengths = [len(columns) for is_subject, columns in list_runs if not is_subject]
+	#
+	return {'header': list(in_header), 'subject_columns': list(in_subject_columns), 'runs': list_runs, 'record_run_lengths': list_record_run_lengths, 'separator': in_separator, 'line_terminator': in_line_terminator}
+#
+#
+def func_nihpo_row_template_bind (in_template, in_subject_values):
+	"""
+	This function serializes the subject columns of a template, once per subject.
+	Inputs:
+		in_template : [Dictionary] : Template returned by func_nihpo_row_template_compile().
+		in_subject_values : [Dictionary] : Value of each subject column, keyed by column name.
+
+	Return:
+		Dictionary to pass to func_nihpo_row_template_write() for each record of this subject.
+
+	To call this function:
+		func_nihpo_row_template_bind(template_ADLB, {'STUDYID': '1234', 'USUBJID': '..', 'SEX': 'F'})
+	"""
+	assert (set(in_subject_values) == set(in_template['subject_columns'])),"Please provide a value for exactly these columns: %s" % (in_template['subject_columns'])
+	var_separator = in_template['separator']
+	#
+	# Pieces of text around the record runs: row = piece_0 + record_run_0 + piece_1 + record_run_1 + .. + piece_n + line terminator.
+	list_pieces = ['']
+	var_number_runs = len(in_template['runs'])
+	for var_position, (var_is_subject, list_columns) in enumerate(in_template['runs']):
+		if var_is_subject:
+			var_text = var_separator.join([func_nihpo_csv_field(in_subject_values[column], var_separator) for column in list_columns])
+			if (var_position > 0):
+				var_text = var_separator + var_text		# After a record run.
+			if (var_position < var_number_runs - 1):
+				var_text = var_text + var_separator		# Before a record run.
+			list_pieces[-1] = var_text
+		else:
+			if (var_position > 0) and (not in_template['runs'][var_position - 1][0]):
+				list_pieces.append(var_separator)
+			list_pieces.append('')
+	#
+	list_pieces[-1] = list_pieces[-1] + in_template['line_terminator']
+	return {'pieces': list_pieces, 'record_run_lengths': in_template['record_run_lengths'], 'separator': var_separator}
+#
+#
+def func_nihpo_row_template_write (in_file, in_row_template, in_record_values):
+	"""
+	This function writes one record, using the pre-serialized subject columns.
+	Inputs:
+		in_file : [File object] : Output file, opened for writing in text mode.
+		in_row_template : [Dictionary] : Returned by func_nihpo_row_template_bind() for the subject of this record.
+		in_record_values : [List] : Record values in file order, without the subject columns.
+
+	To call this function:
+		func_nihpo_row_template_write(output_file, row_template_ADLB, [ASEQ, DOMAIN, ..])
+	"""
+	var_separator = in_row_template['separator']
+	list_pieces = in_row_template['pieces']
+	list_parts = [list_pieces[0]]
+	var_start = 0
+	for var_run, var_length in enumerate(in_row_template['record_run_lengths']):
+		list_parts.append(var_separator.join([func_nihpo_csv_field(value, var_separator) for value in in_record_values[var_start:var_start + var_length]]))
+		list_parts.append(list_pieces[var_run + 1])
+		var_start += var_length
+	#
+	assert (var_start == len(in_record_values)),"Expected %d record values, received %d" % (var_start, len(in_record_values))
+	in_file.write(''.join(list_parts))
+#
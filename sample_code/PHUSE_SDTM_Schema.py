@@ -0,0 +1,310 @@
+#!/usr/bin/python3
+# Author: PHUSE PODR contributors. Builds on PHUSE_Generate_SDTM.py by Jose.Lacal@NIHPO.com
+# Filename: PHUSE_SDTM_Schema.py
+# Purpose: Typed columns for SDTM domains, driven by the "Num" / "Char" type of each variable in table "cdisc_sdtm_domain_definitions".
+# Version: Mon 19 October 2026.
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, version 3.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+"""
+Every SDTM variable is either "Num" or "Char" (column "type" of "cdisc_sdtm_domain_definitions").
+The generators used to keep whatever Python or Pandas type a column happened to get: integers as objects, or as floats once a value was missing.
+This script converts the columns of a domain once, before they are written, so all writers get the same data:
+	'num'	NumPy int64 when every value is present and whole, float64 otherwise (NaN for missing values).
+	'char'	NumPy array of strings (dtype object), '' for missing values. Its width is the length of its longest value, once encoded for SAS.
+
+The definitions are read from the terminology pack, or the SQLite3 file, or the SQL script "PHUSE_Generate_SDTM.sql" (in memory), whichever is found first.
+Like the SQLite3 file, the SQL script is looked for in the working directory unless the caller gives its path.
+Columns that are not SDTM variables (e.g. "Row") keep the NumPy type given by the generator, or are 'char'.
+
+To use these functions:
+	import PHUSE_SDTM_Schema
+	dict_schema = PHUSE_SDTM_Schema.func_nihpo_schema_load()
+	dict_typed = PHUSE_SDTM_Schema.func_nihpo_schema_columns(dict_schema['TV'], ['STUDYID', 'VISITNUM'], {'STUDYID': ['EX1', 'EX1'], 'VISITNUM': [1, 2]})
+	PHUSE_SDTM_Schema.func_nihpo_schema_csv_write('TV.csv', ['STUDYID', 'VISITNUM'], dict_typed, ',')
+	PHUSE_XPT.func_nihpo_xpt_write_dataset('tv.xpt', 'TV', 'Trial Visits', ['STUDYID', 'VISITNUM'], dict_typed, PHUSE_SDTM_Schema.func_nihpo_schema_xpt_variables(dict_schema['TV'], ['STUDYID', 'VISITNUM'], dict_typed))
+"""
+
+
+# Imports Section
+import csv
+import os
+import sqlite3
+import sys
+import types
+#
+try:
+	import numpy as np
+except ImportError:
+	print("Install NumPy: pip3 install numpy")
+	sys.exit(1)
+#
+try:
+	import pandas as pd
+except ImportError:
+	print("Install Pandas: pip3 install pandas")
+	print("https://pandas.pydata.org/pandas-docs/stable/getting_started/install.html")
+	sys.exit(1)
+#
+import PHUSE_Build_Database
+import PHUSE_Terminology_Pack
+import PHUSE_XPT
+#
+#
+CT_SCHEMA_SQL_FILENAME = 'PHUSE_Generate_SDTM.sql'
+CT_SCHEMA_INTEGER_DTYPE = np.int64
+CT_SCHEMA_FLOAT_DTYPE = np.float64
+CT_SCHEMA_INTEGER_LIMIT = 2 ** 53		# Larger whole numbers are not exact as float64: they stay float64.
+#
+#
+def func_nihpo_schema_type (in_type):
+	"""
+	This function maps the "type" column of a definition to a variable type.
+	Inputs:
+		in_type : [String] : "Num" or "Char" (any case, blanks allowed).
+
+	Return:
+		'num' or 'char'. Anything but "Num" is 'char'.
+
+	To call this function:
+		func_nihpo_schema_type('Num')
+	"""
+	return 'num' if (in_type or '').strip().upper().startswith('NUM') else 'char'
+#
+#
+def func_nihpo_schema_domain (in_variables):
+	"""
+	This function compiles the schema of one domain.
+	Inputs:
+		in_variables : [List] : Tuples (variable_name, variable_label, type), as in "cdisc_sdtm_domain_definitions".
+
+	Return:
+		Read-only dictionary { variable_name : read-only dictionary {'type': 'num' or 'char', 'label': variable_label} }.
+
+	To call this function:
+		func_nihpo_schema_domain([('VISITNUM', 'Visit Number', 'Num'), ('VISIT', 'Visit Name', 'Char')])
+	"""
+	dict_domain_schema = {}
+	for var_name, var_label, var_type in in_variables:
+		dict_domain_schema[var_name.strip()] = types.MappingProxyType({'type': func_nihpo_schema_type(var_type), 'label': (var_label or '').strip()})
+	return types.MappingProxyType(dict_domain_schema)
+#
+#
+def func_nihpo_schema_compile (in_definitions):
+	"""
+	This function compiles the schema of all domains from rows of "cdisc_sdtm_domain_definitions".
+	Inputs:
+		in_definitions : [List] : Tuples (domain_code, variable_name, variable_label, type).
+
+	Return:
+		Read-only dictionary { domain_code : schema of the domain (see func_nihpo_schema_domain) }.
+
+	To call this function:
+		func_nihpo_schema_compile([('TV', 'VISITNUM', 'Visit Number', 'Num')])
+	"""
+	dict_variables = {}
+	for var_domain_code, var_name, var_label, var_type in in_definitions:
+		dict_variables.setdefault(var_domain_code.strip().upper(), []).append((var_name, var_label, var_type))
+	return types.MappingProxyType({domain: func_nihpo_schema_domain(list_variables) for domain, list_variables in dict_variables.items()})
+#
+#
+def func_nihpo_schema_load (in_pack_filename=PHUSE_Terminology_Pack.CT_PACK_FILENAME, in_sqlite3_filename=PHUSE_Terminology_Pack.CT_DATABASE_FILENAME, in_sql_filename=CT_SCHEMA_SQL_FILENAME):
+	"""
+	This function reads the definitions of all domains from the first source found: terminology pack, SQLite3 file, SQL script.
+	Inputs:
+		in_pack_filename : [String] : Terminology pack (see PHUSE_Terminology_Pack.py). Used only if current.
+		in_sqlite3_filename : [String] : SQLite3 file.
+		in_sql_filename : [String] : SQL script that creates and fills "cdisc_sdtm_domain_definitions".
+
+	Return:
+		Read-only dictionary { domain_code : schema of the domain }. Empty if no source was found.
+
+	To call this function:
+		func_nihpo_schema_load()
+	"""
+	var_sql = "SELECT domain_code, variable_name, variable_label, type FROM cdisc_sdtm_domain_definitions;"
+	pack_terminology = PHUSE_Terminology_Pack.func_nihpo_pack_open(in_pack_filename, in_sqlite3_filename)
+	if pack_terminology is not None:
+		return func_nihpo_schema_compile([one_row[:4] for one_row in PHUSE_Terminology_Pack.func_nihpo_pack_table_rows(pack_terminology, 'definitions_values')])
+	#
+	try:
+		conn = PHUSE_Build_Database.func_nihpo_database_connect(in_sqlite3_filename)
+		try:
+			return func_nihpo_schema_compile(conn.execute(var_sql).fetchall())
+		finally:
+			conn.close()
+	except sqlite3.Error:
+		pass
+	#
+	if os.path.isfile(in_sql_filename):
+		conn = sqlite3.connect(':memory:')
+		try:
+			conn.executescript(PHUSE_Build_Database.func_nihpo_sql_script(in_sql_filename))
+			return func_nihpo_schema_compile(conn.execute(var_sql).fetchall())
+		finally:
+			conn.close()
+	#
+	print ("Warning: no SDTM domain definitions found: all variables are written as text.")
+	return types.MappingProxyType({})
+#
+#
+def func_nihpo_schema_numeric (in_name, in_values):
+	"""
+	This function converts the values of a 'num' variable.
+	Inputs:
+		in_name : [String] : Variable name, for error messages.
+		in_values : [Array or List] : Values. None, NaN, pd.NA and '' are missing.
+
+	Return:
+		NumPy array of int64 if every value is present and whole, of float64 (NaN where missing) otherwise.
+
+	To call this function:
+		func_nihpo_schema_numeric('VISITNUM', [1, 2, 3])
+	"""
+	if isinstance(in_values, np.ndarray) and (in_values.dtype.kind in 'iub'):
+		return in_values.astype(CT_SCHEMA_INTEGER_DTYPE, copy=False)
+	#
+	if isinstance(in_values, np.ndarray) and (in_values.dtype.kind == 'f'):
+		array_float = in_values.astype(CT_SCHEMA_FLOAT_DTYPE, copy=False)
+	else:
+		array_object = np.asarray(in_values, dtype=object)
+		array_missing = np.asarray(pd.isna(array_object), dtype=bool) | (array_object == '')
+		array_float = np.full(len(array_object), np.nan, dtype=CT_SCHEMA_FLOAT_DTYPE)
+		try:
+			array_float[~array_missing] = array_object[~array_missing].astype(CT_SCHEMA_FLOAT_DTYPE)
+		except (ValueError, TypeError):
+			raise ValueError("Numeric variable [%s] has values that are not numbers: %s" % (in_name, sorted(set([str(value) for value in array_object[~array_missing] if not isinstance(value, (int, float))]))[:5]))
+	#
+	if (len(array_float) > 0) and not np.isnan(array_float).any() and (np.abs(array_float) < CT_SCHEMA_INTEGER_LIMIT).all() and (array_float == np.floor(array_float)).all():
+		return array_float.astype(CT_SCHEMA_INTEGER_DTYPE)
+	return array_float
+#
+#
+def func_nihpo_schema_character (in_values):
+	"""
+	This function converts the values of a 'char' variable.
+	Inputs:
+		in_values : [Array or List] : Values. None, NaN and pd.NA are missing.
+
+	Return:
+		NumPy array of strings (dtype object), '' where missing.
+
+	To call this function:
+		func_nihpo_schema_character(['SCREENING', None])
+	"""
+	array_object = np.asarray(in_values, dtype=object)
+	if (len(array_object) == 0):
+		return array_object
+	array_missing = np.asarray(pd.isna(array_object), dtype=bool)
+	return np.where(array_missing, '', array_object.astype(str)).astype(object)
+#
+#
+def func_nihpo_schema_columns (in_domain_schema, in_columns, in_data, in_dtypes=None):
+	"""
+	This function converts all columns of a domain to their types, once, for every writer (CSV, XPT, DataFrame).
+	Inputs:
+		in_domain_schema : [Dictionary] : Schema of the domain (see func_nihpo_schema_domain). May be None or empty.
+		in_columns : [List] : Column names, in dataset order.
+		in_data : [Dictionary] : Values of each column (NumPy array, Pandas array or list).
+		in_dtypes : [Dictionary] : NumPy type of columns that are not SDTM variables (e.g. {'Row': np.int32}). They take precedence.
+
+	Return:
+		Dictionary of NumPy arrays, keyed by column name.
+
+	To call this function:
+		func_nihpo_schema_columns(dict_schema['TV'], ['Row', 'VISITNUM'], {'Row': [1, 2], 'VISITNUM': [1, 2]}, {'Row': np.int32})
+	"""
+	dict_domain_schema = in_domain_schema or {}
+	dict_dtypes = in_dtypes or {}
+	dict_typed = {}
+	for column in in_columns:
+		values = in_data[column]
+		if (column in dict_dtypes):
+			dict_typed[column] = np.asarray(values, dtype=dict_dtypes[column])
+		elif (column in dict_domain_schema):
+			dict_typed[column] = func_nihpo_schema_numeric(column, values) if (dict_domain_schema[column]['type'] == 'num') else func_nihpo_schema_character(values)
+		elif isinstance(values, np.ndarray) and (values.dtype.kind in 'iuf'):
+			dict_typed[column] = values
+		else:
+			dict_typed[column] = func_nihpo_schema_character(values)
+	#
+	return dict_typed
+#
+#
+def func_nihpo_schema_char_lengths (in_columns, in_typed):
+	"""
+	This function computes the width of each character column: the length of its longest value once encoded for SAS (see PHUSE_XPT.CT_XPT_ENCODING), at least 1.
+	Inputs:
+		in_columns : [List] : Column names.
+		in_typed : [Dictionary] : Returned by func_nihpo_schema_columns().
+
+	Return:
+		Dictionary { column name : width in bytes }, for character columns only.
+
+	To call this function:
+		func_nihpo_schema_char_lengths(['STUDYID', 'VISIT'], dict_typed)
+	"""
+	dict_lengths = {}
+	for column in in_columns:
+		values = in_typed[column]
+		if (values.dtype.kind not in 'iufb'):
+			dict_lengths[column] = max(PHUSE_XPT.func_nihpo_xpt_encode(values).dtype.itemsize, 1) if (len(values) > 0) else 1
+	return dict_lengths
+#
+#
+def func_nihpo_schema_xpt_variables (in_domain_schema, in_columns, in_typed):
+	"""
+	This function describes the variables of a SAS Transport file from the schema: types, widths and labels.
+	Inputs:
+		in_domain_schema : [Dictionary] : Schema of the domain. May be None or empty.
+		in_columns : [List] : Column names, in dataset order.
+		in_typed : [Dictionary] : Returned by func_nihpo_schema_columns().
+
+	Return:
+		List of dictionaries, to pass to PHUSE_XPT.func_nihpo_xpt_open() or PHUSE_XPT.func_nihpo_xpt_write_dataset().
+
+	To call this function:
+		func_nihpo_schema_xpt_variables(dict_schema['TV'], ['STUDYID', 'VISITNUM'], dict_typed)
+	"""
+	dict_domain_schema = in_domain_schema or {}
+	dict_lengths = func_nihpo_schema_char_lengths(in_columns, in_typed)
+	list_variables = []
+	for column in in_columns:
+		var_label = dict_domain_schema[column]['label'] if (column in dict_domain_schema) else ''
+		if (column in dict_lengths):
+			list_variables.append(PHUSE_XPT.func_nihpo_xpt_variable(column, 'char', dict_lengths[column], var_label))
+		else:
+			list_variables.append(PHUSE_XPT.func_nihpo_xpt_variable(column, 'num', 8, var_label))
+	return list_variables
+#
+#
+def func_nihpo_schema_csv_write (in_filename, in_columns, in_typed, in_separator=','):
+	"""
+	This function writes typed columns to a CSV file. Whole numbers are written without decimals, even in float64 columns with missing values; missing values are empty.
+	Inputs:
+		in_filename : [String] : CSV file.
+		in_columns : [List] : Column names, in dataset order.
+		in_typed : [Dictionary] : Returned by func_nihpo_schema_columns().
+		in_separator : [String] : Field separator.
+
+	Return:
+		Number of records written.
+
+	To call this function:
+		func_nihpo_schema_csv_write('TV.csv', ['STUDYID', 'VISITNUM'], dict_typed, ',')
+	"""
+	dict_output = {}
+	for column in in_columns:
+		values = in_typed[column]
+		if (values.dtype.kind == 'f'):
+			array_present = ~np.isnan(values)
+			if (np.abs(values[array_present]) < CT_SCHEMA_INTEGER_LIMIT).all() and (values[array_present] == np.floor(values[array_present])).all():
+				values = pd.array(np.where(array_present, values, 0).astype(CT_SCHEMA_INTEGER_DTYPE), dtype='Int64')
+				values[~array_present] = pd.NA
+		dict_output[column] = values
+	#
+	dataframe_output = pd.DataFrame(data=dict_output, columns=in_columns)
+	dataframe_output.to_csv(in_filename, sep=in_separator, index=False, quoting=csv.QUOTE_MINIMAL)
+	return len(dataframe_output)
@@ -0,0 +1,163 @@
+#!/usr/bin/python3
+# Author: PHUSE PODR contributors. Builds on PHUSE_Generate_SDTM.py by Jose.Lacal@NIHPO.com
+# Filename: PHUSE_Subject_Index.py
+# Purpose: Subject index shared by all domains of a study: one row per subject (DM / ADSL), keyed by USUBJID.
+# Version: Mon 19 October 2026.
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, version 3.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+"""
+Every domain refers to the same subjects, and to their attributes: arm, site, reference start and end dates, death date.
+The index is built once, after DM (or ADSL):
+	'columns'	One read-only NumPy array per attribute, one entry per subject. A subject is its position in these arrays.
+	'positions'	Hash index { USUBJID : position }, to turn keys read from elsewhere into positions once.
+	'window_start', 'window_end'	Study window of each subject (datetime64[D]): from the reference start date to the earliest of the end dates (end of participation, death).
+
+Domains keep the position of the subject of each record (an array of integers, -1 for records without a subject), and read attributes with NumPy indexing:
+no string lookups and no rescans, whatever the number of records.
+
+To use these functions:
+	import PHUSE_Subject_Index
+	index_subjects = PHUSE_Subject_Index.func_nihpo_subject_index_build(dict_cohort, 'rfstdtc_date', ['rfendtc_date', 'dthdtc_date'])
+	array_positions = PHUSE_Subject_Index.func_nihpo_subject_index_positions(index_subjects, ['EX1-Site_01-0001', 'EX1-Site_02-0002'])
+	array_site = PHUSE_Subject_Index.func_nihpo_subject_index_take(index_subjects, 'SITEID', array_positions)
+	array_dates = PHUSE_Subject_Index.func_nihpo_subject_index_clip(index_subjects, array_positions, array_dates)
+"""
+
+
+# Imports Section
+import sys
+import types
+#
+try:
+	import numpy as np
+except ImportError:
+	print("Install NumPy: pip3 install numpy")
+	sys.exit(1)
+#
+#
+CT_SUBJECT_INDEX_KEY = 'USUBJID'
+#
+#
+def func_nihpo_subject_index_build (in_columns, in_window_start, in_window_ends, in_key=CT_SUBJECT_INDEX_KEY):
+	"""
+	This function builds the subject index of a study, once, from the columns of DM (or ADSL).
+	Inputs:
+		in_columns : [Dictionary] : One NumPy array (or list) per attribute, one entry per subject.
+		in_window_start : [String] : Column with the first day of the study window of each subject (datetime64[D]).
+		in_window_ends : [List of Strings] : Columns with candidate last days of the study window (datetime64[D], NaT when not applicable). The earliest one is used.
+		in_key : [String] : Column with the unique key of each subject.
+
+	Return:
+		Dictionary: 'key', 'size', 'columns' (read-only), 'positions', 'window_start', 'window_end'.
+
+	To call this function:
+		func_nihpo_subject_index_build(dict_cohort, 'rfstdtc_date', ['rfendtc_date', 'dthdtc_date'])
+	"""
+	assert (in_key in in_columns),"Subject index: key column [%s] is missing." % (in_key)
+	var_number_subjects = len(in_columns[in_key])
+	dict_columns = {}
+	for column, values in in_columns.items():
+		array_values = np.array(values, copy=True) if not isinstance(values, np.ndarray) else values
+		assert (len(array_values) == var_number_subjects),"Subject index: column [%s] has %d values, for %d subjects." % (column, len(array_values), var_number_subjects)
+		array_values.flags.writeable = False
+		dict_columns[column] = array_values
+	#
+	dict_positions = dict(zip(dict_columns[in_key].tolist(), range(var_number_subjects)))
+	assert (len(dict_positions) == var_number_subjects),"Subject index: %d duplicate values of [%s]." % (var_number_subjects - len(dict_positions), in_key)
+	#
+	array_window_start = dict_columns[in_window_start].astype('datetime64[D]')
+	array_window_end = np.full(var_number_subjects, np.datetime64('NaT'), dtype='datetime64[D]')
+	for column in in_window_ends:
+		array_end = dict_columns[column].astype('datetime64[D]')
+		array_window_end = np.where(np.isnat(array_window_end) | (~np.isnat(array_end) & (array_end < array_window_end)), array_end, array_window_end)
+	array_window_start.flags.writeable = False
+	array_window_end.flags.writeable = False
+	#
+	return {'key': in_key, 'size': var_number_subjects, 'columns': types.MappingProxyType(dict_columns), 'positions': dict_positions,
+		'window_start': array_window_start, 'window_end': array_window_end}
+#
+#
+def func_nihpo_subject_index_positions (in_index, in_keys):
+	"""
+	This function converts subject keys (e.g. USUBJID read from a file) into positions in the index: one hash lookup per key.
+	Inputs:
+		in_index : [Dictionary] : Returned by func_nihpo_subject_index_build().
+		in_keys : [Array or List] : Subject keys.
+
+	Return:
+		NumPy array of int64: position of each subject, -1 for unknown keys.
+
+	To call this function:
+		func_nihpo_subject_index_positions(index_subjects, ['EX1-Site_01-0001'])
+	"""
+	dict_positions = in_index['positions']
+	return np.fromiter((dict_positions.get(key, -1) for key in in_keys), dtype=np.int64, count=len(in_keys))
+#
+#
+def func_nihpo_subject_index_take (in_index, in_column, in_positions, in_missing=''):
+	"""
+	This function reads an attribute of the subject of each record.
+	Inputs:
+		in_index : [Dictionary] : Returned by func_nihpo_subject_index_build().
+		in_column : [String] : Attribute (column of the index).
+		in_positions : [NumPy array of Integers] : Position of the subject of each record, -1 for records without a subject.
+		in_missing : [Any] : Value of records without a subject. NaT for date columns.
+
+	Return:
+		NumPy array, one value per record.
+
+	To call this function:
+		func_nihpo_subject_index_take(index_subjects, 'SITEID', array_positions)
+	"""
+	array_column = in_index['columns'][in_column]
+	array_present = in_positions >= 0
+	array_values = array_column[np.where(array_present, in_positions, 0)] if (in_index['size'] > 0) else np.empty(len(in_positions), dtype=array_column.dtype)
+	if array_present.all():
+		return array_values
+	if (array_column.dtype.kind == 'M'):
+		return np.where(array_present, array_values, np.datetime64('NaT'))
+	return np.where(array_present, array_values, in_missing)
+#
+#
+def func_nihpo_subject_index_within (in_index, in_positions, in_dates):
+	"""
+	This function tells which records fall within the study window of their subject.
+	Inputs:
+		in_index : [Dictionary] : Returned by func_nihpo_subject_index_build().
+		in_positions : [NumPy array of Integers] : Position of the subject of each record, -1 for records without a subject.
+		in_dates : [NumPy array of datetime64[D]] : Date of each record.
+
+	Return:
+		NumPy array of Booleans. Records without a subject or without a date are always within.
+
+	To call this function:
+		func_nihpo_subject_index_within(index_subjects, array_positions, array_dates)
+	"""
+	array_start = in_index['window_start'][np.maximum(in_positions, 0)]
+	array_end = in_index['window_end'][np.maximum(in_positions, 0)]
+	array_checked = (in_positions >= 0) & ~np.isnat(in_dates)
+	return ~array_checked | ((in_dates >= array_start) & ~(in_dates > array_end))
+#
+#
+def func_nihpo_subject_index_clip (in_index, in_positions, in_dates):
+	"""
+	This function moves dates outside the study window of their subject to the nearest day of the window.
+	Inputs:
+		in_index : [Dictionary] : Returned by func_nihpo_subject_index_build().
+		in_positions : [NumPy array of Integers] : Position of the subject of each record, -1 for records without a subject.
+		in_dates : [NumPy array of datetime64[D]] : Date of each record.
+
+	Return:
+		NumPy array of datetime64[D]. Records without a subject or without a date are unchanged.
+
+	To call this function:
+		func_nihpo_subject_index_clip(index_subjects, array_positions, array_end_dates)
+	"""
+	array_present = in_positions >= 0
+	array_start = in_index['window_start'][np.maximum(in_positions, 0)]
+	array_end = in_index['window_end'][np.maximum(in_positions, 0)]
+	array_dates = np.where(array_present & (in_dates < array_start), array_start, in_dates)
+	return np.where(array_present & ~np.isnat(array_end) & (array_dates > array_end), array_end, array_dates)
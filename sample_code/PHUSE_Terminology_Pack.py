@@ -0,0 +1,334 @@
+#!/usr/bin/python3
+# Author: PHUSE PODR contributors. Builds on PHUSE_Generate_SDTM.py by Jose.Lacal@NIHPO.com
+# Filename: PHUSE_Terminology_Pack.py
+# Purpose: Compile the codelists and SDTM domain tables of "Synthetic_Health_Data_NIHPO.sqlite3" into a binary pack that generators memory-map at startup.
+# Version: Mon 19 October 2026.
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, version 3.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+"""
+Every generator run used to open the SQLite3 file and query each codelist and domain definition.
+The pack holds the same data as arrays, ready to use as soon as the file is memory-mapped: nothing is parsed or decoded until a value is needed.
+
+Pack layout (little-endian):
+	Header	: CT_PACK_HEADER_STRUCT : magic, pack version, number of sections, size and modification time (ns) of the SQLite3 file it was compiled from.
+	Table of sections	: CT_PACK_SECTION_DTYPE x number of sections : name, NumPy dtype, byte offset, number of rows and columns.
+	Sections, each aligned to 8 bytes:
+		strings_offsets	int64[number_strings + 1]	Byte offset of each string in "strings". String i is strings[offsets[i]:offsets[i+1]], UTF-8.
+		strings	uint8[]	All distinct strings, one after the other.
+		codelist_keys	S[number_codelists]	C-codes of the codelists, sorted (binary search).
+		codelist_first, codelist_count	int64[number_codelists]	Position and number of the values of each codelist in "codelist_values".
+		codelist_values	int32[]	String ids of the values (cdisc_submission_value), codelist by codelist, sorted.
+		header_names	S[number_headers]	Names of the codelists (e.g. "NY"), upper case, sorted.
+		header_codes	int32[number_headers]	String id of the C-code of each name.
+		rules_values	int32[number_rules, 8]	String ids of the columns of "cdisc_sdtm_domain_rules", by domain_code.
+		definitions_values	int32[number_definitions, 8]	String ids of the columns of "cdisc_sdtm_domain_definitions", by (domain_code, variable_name).
+
+The pack is stale when it was compiled by another version of this script, or from another SQLite3 file (size or modification time differ).
+Generators then fall back to the SQLite3 file.
+
+Usage:
+	python3 PHUSE_Terminology_Pack.py [Source.sqlite3] [Target.pack]
+		Defaults: "Synthetic_Health_Data_NIHPO.sqlite3" and "Synthetic_Health_Data_NIHPO.pack".
+
+To use these functions:
+	import PHUSE_Terminology_Pack
+	pack_terminology = PHUSE_Terminology_Pack.func_nihpo_pack_open('Synthetic_Health_Data_NIHPO.pack', 'Synthetic_Health_Data_NIHPO.sqlite3')
+	if pack_terminology is not None:
+		list_values = PHUSE_Terminology_Pack.func_nihpo_pack_codelist_values(pack_terminology, 'C66742')
+"""
+
+
+# Imports Section
+import mmap
+import os
+import sqlite3
+import struct
+import sys
+import urllib.parse
+#
+try:
+	import numpy as np
+except ImportError:
+	print("Install NumPy: pip3 install numpy")
+	sys.exit(1)
+#
+#
+CT_PACK_FILENAME = 'Synthetic_Health_Data_NIHPO.pack'
+CT_DATABASE_FILENAME = 'Synthetic_Health_Data_NIHPO.sqlite3'
+CT_PACK_MAGIC = b'NIHPOTP\x00'
+CT_PACK_VERSION = 1		# Increase whenever the layout or the content of the pack changes.
+CT_PACK_HEADER_STRUCT = struct.Struct('<8sIIqq')
+CT_PACK_SECTION_DTYPE = np.dtype([('name', 'S24'), ('dtype', 'S8'), ('offset', '<i8'), ('rows', '<i8'), ('columns', '<i8')])
+#
+CT_PACK_RULES_COLUMNS = ['domain_code', 'per_trial', 'per_subject', 'per_arm', 'per_visit', 'per_visit_measurement', 'per_adverse_event', 'per_concomitant_prior']
+CT_PACK_DEFINITIONS_COLUMNS = ['domain_code', 'variable_name', 'variable_label', 'type', 'controlled_terms', 'role', 'cdisc_notes', 'core']
+#
+#
+def func_nihpo_pack_source_signature (in_sqlite3_filename):
+	"""
+	This function returns what identifies a version of the SQLite3 file: its size and modification time.
+	Inputs:
+		in_sqlite3_filename : [String] : SQLite3 file.
+
+	Return:
+		Tuple (size, modification time in ns), or None if the file does not exist.
+
+	To call this function:
+		func_nihpo_pack_source_signature('Synthetic_Health_Data_NIHPO.sqlite3')
+	"""
+	try:
+		stat_source = os.stat(in_sqlite3_filename)
+	except OSError:
+		return None
+	return (stat_source.st_size, stat_source.st_mtime_ns)
+#
+#
+def func_nihpo_pack_compile (in_sqlite3_filename, in_pack_filename):
+	"""
+	This function compiles the codelists ("cdisc_terminology") and the SDTM domain tables of the SQLite3 file into a pack.
+	Inputs:
+		in_sqlite3_filename : [String] : Source SQLite3 file.
+		in_pack_filename : [String] : Pack file to write. Replaced only once complete.
+
+	Return:
+		Dictionary { section name : number of rows }.
+
+	To call this function:
+		func_nihpo_pack_compile('Synthetic_Health_Data_NIHPO.sqlite3', 'Synthetic_Health_Data_NIHPO.pack')
+	"""
+	var_signature = func_nihpo_pack_source_signature(in_sqlite3_filename)
+	assert (var_signature is not None),"Source SQLite3 file [%s] does not exist." % (in_sqlite3_filename)
+	conn = sqlite3.connect('file:%s?mode=ro' % (urllib.parse.quote(in_sqlite3_filename)), uri=True)		# '?', '#' and '%' in the name are not URI syntax.
+	#
+	dict_string_ids = {}
+	def func_string_id (in_value):
+		var_text = '' if (in_value is None) else str(in_value)
+		if var_text not in dict_string_ids:
+			dict_string_ids[var_text] = len(dict_string_ids)
+		return dict_string_ids[var_text]
+	#
+	# Codelist values:
+	list_codelist_keys, list_codelist_first, list_codelist_count, list_codelist_values = [], [], [], []
+	for var_codelist_code, var_value in conn.execute("SELECT TRIM(codelist_code), cdisc_submission_value FROM cdisc_terminology WHERE (codelist_code IS NOT NULL) AND (codelist_code <> '') ORDER BY 1, 2;"):
+		if (not list_codelist_keys) or (list_codelist_keys[-1] != var_codelist_code):
+			list_codelist_keys.append(var_codelist_code)
+			list_codelist_first.append(len(list_codelist_values))
+			list_codelist_count.append(0)
+		list_codelist_values.append(func_string_id(var_value))
+		list_codelist_count[-1] += 1
+	#
+	# Codelist names, from the header row of each codelist:
+	dict_headers = {}
+	for var_name, var_code in conn.execute("SELECT cdisc_submission_value, code FROM cdisc_terminology WHERE (codelist_code IS NULL) OR (codelist_code = '');"):
+		if var_name and var_code:
+			dict_headers[var_name.strip().upper()] = var_code.strip()
+	list_header_names = sorted(dict_headers)
+	#
+	dict_tables = {}
+	for var_table, list_columns, var_order in [('cdisc_sdtm_domain_rules', CT_PACK_RULES_COLUMNS, 'domain_code'), ('cdisc_sdtm_domain_definitions', CT_PACK_DEFINITIONS_COLUMNS, 'domain_code, variable_name')]:
+		try:
+			list_rows = conn.execute("SELECT %s FROM %s ORDER BY %s;" % (", ".join(list_columns), var_table, var_order)).fetchall()
+		except sqlite3.OperationalError:
+			list_rows = []		# Table not in this file.
+		dict_tables[var_table] = np.array([[func_string_id(value.strip() if isinstance(value, str) else value) for value in one_row] for one_row in list_rows], dtype='<i4').reshape(-1, len(list_columns))
+	conn.close()
+	#
+	array_header_codes = np.array([func_string_id(dict_headers[name]) for name in list_header_names], dtype='<i4')
+	#
+	# String table, once every string has an id:
+	list_encoded = [text.encode('utf-8') for text in dict_string_ids]
+	array_offsets = np.zeros(len(list_encoded) + 1, dtype='<i8')
+	np.cumsum([len(value) for value in list_encoded], out=array_offsets[1:])
+	#
+	def func_keys (in_keys):
+		# Sorted fixed-width byte strings, searchable with np.searchsorted:
+		return np.array([key.encode('utf-8') for key in in_keys], dtype='S%d' % (max([len(key.encode('utf-8')) for key in in_keys] + [1])))
+	#
+	list_sections = [
+		('strings_offsets', array_offsets),
+		('strings', np.frombuffer(b''.join(list_encoded), dtype=np.uint8)),
+		('codelist_keys', func_keys(list_codelist_keys)),
+		('codelist_first', np.array(list_codelist_first, dtype='<i8')),
+		('codelist_count', np.array(list_codelist_count, dtype='<i8')),
+		('codelist_values', np.array(list_codelist_values, dtype='<i4')),
+		('header_names', func_keys(list_header_names)),
+		('header_codes', array_header_codes),
+		('rules_values', dict_tables['cdisc_sdtm_domain_rules']),
+		('definitions_values', dict_tables['cdisc_sdtm_domain_definitions'])]
+	# Table of sections, then the sections aligned to 8 bytes:
+	array_toc = np.zeros(len(list_sections), dtype=CT_PACK_SECTION_DTYPE)
+	var_offset = CT_PACK_HEADER_STRUCT.size + array_toc.nbytes
+	for var_position, (var_name, array_section) in enumerate(list_sections):
+		var_offset = (var_offset + 7) // 8 * 8
+		array_toc[var_position] = (var_name.encode('ascii'), array_section.dtype.str.encode('ascii'), var_offset, array_section.shape[0], array_section.shape[1] if (array_section.ndim == 2) else 0)
+		var_offset += array_section.nbytes
+	#
+	var_writing_filename = in_pack_filename + '.writing'
+	with open(var_writing_filename, 'wb') as file_pack:
+		file_pack.write(CT_PACK_HEADER_STRUCT.pack(CT_PACK_MAGIC, CT_PACK_VERSION, len(list_sections), var_signature[0], var_signature[1]))
+		file_pack.write(array_toc.tobytes())
+		for var_position, (var_name, array_section) in enumerate(list_sections):
+			file_pack.write(b'\x00' * (int(array_toc[var_position]['offset']) - file_pack.tell()))
+			file_pack.write(np.ascontiguousarray(array_section).tobytes())
+	os.replace(var_writing_filename, in_pack_filename)
+	#
+	return dict([(var_name, array_section.shape[0]) for var_name, array_section in list_sections])
+#
+#
+def func_nihpo_pack_open (in_pack_filename=CT_PACK_FILENAME, in_sqlite3_filename=CT_DATABASE_FILENAME):
+	"""
+	This function memory-maps a pack, read-only. Sections are NumPy views of the mapped file: nothing is copied or parsed.
+	Inputs:
+		in_pack_filename : [String] : Pack file.
+		in_sqlite3_filename : [String] : SQLite3 file the pack must have been compiled from. If it does not exist, the pack is used as is.
+
+	Return:
+		Dictionary { section name : NumPy array } plus 'mmap' and 'filename', or None if the pack is missing, damaged or stale.
+
+	To call this function:
+		func_nihpo_pack_open('Synthetic_Health_Data_NIHPO.pack', 'Synthetic_Health_Data_NIHPO.sqlite3')
+	"""
+	try:
+		with open(in_pack_filename, 'rb') as file_pack:
+			mmap_pack = mmap.mmap(file_pack.fileno(), 0, access=mmap.ACCESS_READ)
+	except (OSError, ValueError):
+		return None
+	#
+	if (len(mmap_pack) < CT_PACK_HEADER_STRUCT.size):
+		return None
+	var_magic, var_version, var_number_sections, var_source_size, var_source_mtime_ns = CT_PACK_HEADER_STRUCT.unpack_from(mmap_pack, 0)
+	if (var_magic != CT_PACK_MAGIC) or (var_version != CT_PACK_VERSION):
+		return None
+	var_signature = func_nihpo_pack_source_signature(in_sqlite3_filename)
+	if (var_signature is not None) and (var_signature != (var_source_size, var_source_mtime_ns)):
+		return None
+	#
+	dict_pack = {'mmap': mmap_pack, 'filename': in_pack_filename}
+	try:
+		array_toc = np.frombuffer(mmap_pack, dtype=CT_PACK_SECTION_DTYPE, count=var_number_sections, offset=CT_PACK_HEADER_STRUCT.size)
+		for one_section in array_toc:
+			var_dtype = np.dtype(one_section['dtype'].decode('ascii'))
+			var_rows, var_columns = int(one_section['rows']), int(one_section['columns'])
+			array_section = np.frombuffer(mmap_pack, dtype=var_dtype, count=var_rows * max(var_columns, 1), offset=int(one_section['offset']))
+			dict_pack[one_section['name'].decode('ascii')] = array_section.reshape(var_rows, var_columns) if var_columns else array_section
+	except (ValueError, TypeError):
+		return None
+	return dict_pack
+#
+#
+def func_nihpo_pack_strings (in_pack, in_string_ids):
+	"""
+	This function decodes some strings of a pack.
+	Inputs:
+		in_pack : [Dictionary] : Returned by func_nihpo_pack_open().
+		in_string_ids : [Array of Integers] : String ids.
+
+	Return:
+		List of strings.
+
+	To call this function:
+		func_nihpo_pack_strings(pack_terminology, [0, 1, 2])
+	"""
+	array_offsets = in_pack['strings_offsets']
+	array_strings = in_pack['strings']
+	return [array_strings[array_offsets[string_id]:array_offsets[string_id + 1]].tobytes().decode('utf-8') for string_id in in_string_ids]
+#
+#
+def func_nihpo_pack_search (in_keys, in_key):
+	"""
+	This function finds a key in a sorted section of fixed-width byte strings (binary search).
+	Inputs:
+		in_keys : [NumPy array of bytes] : Sorted keys, e.g. in_pack['codelist_keys'].
+		in_key : [String] : Key of interest.
+
+	Return:
+		Position of the key, or -1.
+
+	To call this function:
+		func_nihpo_pack_search(pack_terminology['codelist_keys'], 'C66742')
+	"""
+	var_key = in_key.encode('utf-8')
+	if (len(in_keys) == 0) or (len(var_key) > in_keys.dtype.itemsize):
+		return -1
+	var_position = int(np.searchsorted(in_keys, var_key))
+	return var_position if (var_position < len(in_keys)) and (in_keys[var_position] == var_key) else -1
+#
+#
+def func_nihpo_pack_codelist_values (in_pack, in_codelist):
+	"""
+	This function returns all values of a codelist, sorted, as func_nihpo_codelist_values() in PHUSE_Codelists.py does from the SQLite3 file.
+	Inputs:
+		in_pack : [Dictionary] : Returned by func_nihpo_pack_open().
+		in_codelist : [String] : C-code of the codelist.
+
+	Return:
+		List of values, or None if the codelist is not in the pack.
+
+	To call this function:
+		func_nihpo_pack_codelist_values(pack_terminology, 'C66742')
+	"""
+	var_position = func_nihpo_pack_search(in_pack['codelist_keys'], in_codelist)
+	if (var_position < 0):
+		return None
+	var_first = int(in_pack['codelist_first'][var_position])
+	return func_nihpo_pack_strings(in_pack, in_pack['codelist_values'][var_first:var_first + int(in_pack['codelist_count'][var_position])])
+#
+#
+def func_nihpo_pack_codelist_code (in_pack, in_name):
+	"""
+	This function returns the C-code of a codelist from its name, using the header rows of "cdisc_terminology".
+	Inputs:
+		in_pack : [Dictionary] : Returned by func_nihpo_pack_open().
+		in_name : [String] : Name of the codelist, e.g. "NY".
+
+	Return:
+		C-code, or None.
+
+	To call this function:
+		func_nihpo_pack_codelist_code(pack_terminology, 'NY')
+	"""
+	var_position = func_nihpo_pack_search(in_pack['header_names'], in_name.strip().upper())
+	if (var_position < 0):
+		return None
+	return func_nihpo_pack_strings(in_pack, [in_pack['header_codes'][var_position]])[0]
+#
+#
+def func_nihpo_pack_table_rows (in_pack, in_section, in_domains=None):
+	"""
+	This function returns the rows of "cdisc_sdtm_domain_rules" or "cdisc_sdtm_domain_definitions" stored in a pack, as the SQLite3 query would.
+	Inputs:
+		in_pack : [Dictionary] : Returned by func_nihpo_pack_open().
+		in_section : [String] : 'rules_values' or 'definitions_values'.
+		in_domains : [List of Strings] : Only rows of these domain codes. None for all rows.
+
+	Return:
+		List of tuples of strings, columns as in CT_PACK_RULES_COLUMNS or CT_PACK_DEFINITIONS_COLUMNS.
+
+	To call this function:
+		func_nihpo_pack_table_rows(pack_terminology, 'definitions_values', ['DM'])
+	"""
+	array_rows = in_pack[in_section]
+	if (in_domains is not None) and len(array_rows):
+		list_domain_ids = [string_id for string_id, text in zip(np.unique(array_rows[:, 0]), func_nihpo_pack_strings(in_pack, np.unique(array_rows[:, 0]))) if text in set(in_domains)]
+		array_rows = array_rows[np.isin(array_rows[:, 0], list_domain_ids)]
+	#
+	array_unique, array_inverse = np.unique(array_rows, return_inverse=True)
+	array_text = np.array(func_nihpo_pack_strings(in_pack, array_unique), dtype=object)[array_inverse.reshape(array_rows.shape)]
+	return [tuple(one_row) for one_row in array_text]
+#
+#
+if __name__ == '__main__':
+	var_sqlite3_filename = sys.argv[1] if (len(sys.argv) > 1) else CT_DATABASE_FILENAME
+	var_pack_filename = sys.argv[2] if (len(sys.argv) > 2) else CT_PACK_FILENAME
+	try:
+		dict_counts = func_nihpo_pack_compile(var_sqlite3_filename, var_pack_filename)
+	except (sqlite3.Error, AssertionError) as e:
+		print ("Error: %s" % (e))
+		sys.exit(1)
+	#
+	for var_section, var_count in dict_counts.items():
+		print ("%s: %d" % (var_section, var_count))
+	print ("[%s] compiled: %d bytes." % (var_pack_filename, os.path.getsize(var_pack_filename)))
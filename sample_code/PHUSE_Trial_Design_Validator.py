@@ -0,0 +1,251 @@
+#!/usr/bin/python3
+# Author: PHUSE PODR contributors. Builds on Generate_SDTM.py by Jose.Lacal@NIHPO.com
+# Filename: PHUSE_Trial_Design_Validator.py
+# Purpose: Check a trial design (TA, TE, TV, TD, TM, TI, TS matrices) against a schema, including references between matrices, in one pass.
+# Version: Mon 19 October 2026.
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, version 3.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+"""
+The schema describes each section of a trial design (see Generate_SDTM.py):
+	'domain'		Expected value of the section's "domain" key.
+	'rows'			Key of the list of rows (e.g. "tdm" for TA).
+	'fields'		Required keys of each row, and their types.
+	'optional'		Optional keys of each row, and their types.
+	'nested'		(key, schema) : List of sub-rows inside each row (e.g. the Epochs of each Arm in TA).
+	'index'			{key: attribute} : Values of "key" become an index named "<domain>.<key>", that later sections can refer to.
+					Every row with the same key must have the same attribute (e.g. one ELEMENT per ETCD).
+	'references'	{key: (index, attribute)} : Non-empty values of "key" must exist in an index built by an earlier section. If "attribute" is given, it must match too (e.g. ARM for ARMCD).
+	'unique'		[(key, ..)] : Combinations of keys that must not repeat (e.g. IETESTCD within a TIVERS).
+
+The schema is compiled once. Each validation then reads every cell of the design once, builds the indexes as it goes, and returns all errors found.
+
+To use these functions:
+	import PHUSE_Trial_Design_Validator
+	validator_trial_design = PHUSE_Trial_Design_Validator.func_nihpo_design_validator_compile(PHUSE_Trial_Design_Validator.CT_TRIAL_DESIGN_SCHEMA)
+	list_errors = PHUSE_Trial_Design_Validator.func_nihpo_design_validate(validator_trial_design, dict_design)
+"""
+#
+#
+CT_TEXT = (str,)
+CT_NUMBER_OR_TEXT = (str, int, float)		# Values such as VISITNUM may be written as "1" or 1.
+#
+CT_TRIAL_DESIGN_SCHEMA = {
+	"studyid": CT_TEXT,
+	"trial_design_matrix": {"domain": "TA", "rows": "tdm", "required": True,
+		"fields": {"arm": CT_TEXT, "armcd": CT_TEXT, "epochs": (list,)},
+		"index": {"armcd": "arm"},
+		"unique": [("armcd",)],
+		"nested": ("epochs", {
+			"fields": {"etcd": CT_TEXT, "element": CT_TEXT, "tabranch": CT_TEXT, "tatrans": CT_TEXT, "epoch": CT_TEXT},
+			"index": {"etcd": "element"}})},
+	"trial_element_matrix": {"domain": "TE", "rows": "elements",
+		"fields": {"etcd": CT_TEXT},
+		"optional": {"testrl": CT_TEXT, "teenrl": CT_TEXT, "tedur": CT_TEXT},
+		"references": {"etcd": ("TA.etcd", None)},
+		"unique": [("etcd",)]},
+	"trial_visit_matrix": {"domain": "TV", "rows": "visits",
+		"fields": {"visitnum": CT_NUMBER_OR_TEXT, "visit": CT_TEXT, "visitdy": CT_NUMBER_OR_TEXT, "armcd": CT_TEXT, "arm": CT_TEXT, "tvstrl": CT_TEXT, "tvenrl": CT_TEXT},
+		"references": {"armcd": ("TA.armcd", "arm")},
+		"unique": [("visitnum", "armcd")]},
+	"trial_disease_assessment_matrix": {"domain": "TD", "rows": "assessments",
+		"fields": {"tdorder": CT_NUMBER_OR_TEXT, "tdancvar": CT_TEXT, "tdstoff": CT_TEXT, "tdtgtpai": CT_TEXT, "tdminpai": CT_TEXT, "tdmaxpai": CT_TEXT, "tdnumrpt": CT_NUMBER_OR_TEXT},
+		"unique": [("tdorder",)]},
+	"trial_disease_milestone_matrix": {"domain": "TM", "rows": "milestones",
+		"fields": {"midstype": CT_TEXT, "tmdef": CT_TEXT, "tmrpt": CT_TEXT},
+		"unique": [("midstype",)]},
+	"trial_inclusion_exclusion_matrix": {"domain": "TI", "rows": "criteria",
+		"fields": {"ietestcd": CT_TEXT, "ietest": CT_TEXT, "iecat": CT_TEXT, "iescat": CT_TEXT, "tirl": CT_TEXT, "tivers": CT_NUMBER_OR_TEXT},
+		"unique": [("ietestcd", "tivers")]},
+	"trial_summary_matrix": {"domain": "TS", "rows": "item",
+		"fields": {"tsseq": CT_NUMBER_OR_TEXT, "tsgrpid": CT_TEXT, "tsparmcd": CT_TEXT, "tsparm": CT_TEXT, "tsval": CT_TEXT, "tsvalnf": CT_TEXT, "tsvalcd": CT_TEXT, "tsvcdref": CT_TEXT, "tsvcdver": CT_TEXT}}
+}
+#
+#
+def func_nihpo_design_rows_compile (in_name, in_schema, in_known_indexes):
+	"""
+	This function compiles the schema of the rows of one section (or of the nested rows of a section).
+	Inputs:
+		in_name : [String] : Name used in error messages and index names (e.g. 'TA').
+		in_schema : [Dictionary] : Schema of the rows.
+		in_known_indexes : [Set] : Indexes built by earlier sections. Indexes built by this section are added to it.
+
+	Return:
+		Dictionary.
+
+	To call this function:
+		func_nihpo_design_rows_compile('TE', CT_TRIAL_DESIGN_SCHEMA['trial_element_matrix'], set(['TA.etcd']))
+	"""
+	dict_types = dict(in_schema.get('fields', {}))
+	dict_types.update(in_schema.get('optional', {}))
+	#
+	dict_references = in_schema.get('references', {})
+	for key, (index, attribute) in dict_references.items():
+		assert (index in in_known_indexes),"[%s.%s] refers to index [%s], which is not built by an earlier section." % (in_name, key, index)
+	#
+	dict_compiled = {'name': in_name, 'required': frozenset(in_schema.get('fields', {})), 'types': dict_types,
+		'index': [(key, attribute, "%s.%s" % (in_name, key)) for key, attribute in in_schema.get('index', {}).items()],
+		'references': list(dict_references.items()), 'unique': [tuple(keys) for keys in in_schema.get('unique', [])], 'nested': None}
+	in_known_indexes.update([index for key, attribute, index in dict_compiled['index']])
+	#
+	if ('nested' in in_schema):
+		var_nested_key, dict_nested_schema = in_schema['nested']
+		dict_compiled['nested'] = (var_nested_key, func_nihpo_design_rows_compile(in_name, dict_nested_schema, in_known_indexes))
+	#
+	return dict_compiled
+#
+#
+def func_nihpo_design_validator_compile (in_schema):
+	"""
+	This function compiles a trial design schema once, so that many designs can be validated with it.
+	Sections are checked in schema order: a section can only refer to indexes built by the sections before it.
+	Inputs:
+		in_schema : [Dictionary] : Schema, like CT_TRIAL_DESIGN_SCHEMA.
+
+	Return:
+		Validator to pass to func_nihpo_design_validate().
+
+	To call this function:
+		func_nihpo_design_validator_compile(CT_TRIAL_DESIGN_SCHEMA)
+	"""
+	list_sections = []
+	dict_scalar_types = {}
+	set_known_indexes = set()
+	for key, section in in_schema.items():
+		if isinstance(section, tuple):
+			dict_scalar_types[key] = section
+			continue
+		#
+		dict_section = func_nihpo_design_rows_compile(section['domain'], section, set_known_indexes)
+		dict_section.update({'key': key, 'domain': section['domain'], 'rows': section['rows'], 'section_required': section.get('required', False)})
+		list_sections.append(dict_section)
+	#
+	return {'scalars': dict_scalar_types, 'sections': list_sections}
+#
+#
+def func_nihpo_design_type_name (in_types):
+	"""
+	This function returns the names of some types, for error messages.
+	Inputs:
+		in_types : [Tuple] : Types.
+
+	Return:
+		String.
+
+	To call this function:
+		func_nihpo_design_type_name((str, int))
+	"""
+	return ' or '.join([one_type.__name__ for one_type in in_types])
+#
+#
+def func_nihpo_design_rows_validate (in_rows_schema, in_rows, in_path, in_indexes, in_errors):
+	"""
+	This function checks a list of rows (and their nested rows), builds their indexes and checks their references.
+	Inputs:
+		in_rows_schema : [Dictionary] : Returned by func_nihpo_design_rows_compile().
+		in_rows : [List] : Rows of the design.
+		in_path : [String] : Location of the rows, for error messages.
+		in_indexes : [Dictionary] : Indexes built so far: { index name : { value : attribute } }. Updated by this function.
+		in_errors : [List] : Errors found so far. Updated by this function.
+
+	To call this function:
+		func_nihpo_design_rows_validate(validator['sections'][0], dict_design['trial_design_matrix']['tdm'], 'trial_design_matrix.tdm', {}, [])
+	"""
+	set_required = in_rows_schema['required']
+	dict_types = in_rows_schema['types']
+	list_seen = [(keys, {}) for keys in in_rows_schema['unique']]
+	for var_position, row in enumerate(in_rows):
+		var_row_path = "%s[%d]" % (in_path, var_position)
+		if not isinstance(row, dict):
+			in_errors.append("%s: must be an object, not %s." % (var_row_path, type(row).__name__))
+			continue
+		#
+		set_missing = set_required - row.keys()
+		if (len(set_missing) > 0):
+			in_errors.append("%s: missing %s." % (var_row_path, ', '.join(sorted(set_missing))))
+		set_wrong_types = set()
+		for key, value in row.items():
+			if (key in dict_types) and not isinstance(value, dict_types[key]):
+				in_errors.append("%s.%s: must be %s, not %s." % (var_row_path, key, func_nihpo_design_type_name(dict_types[key]), type(value).__name__))
+				set_wrong_types.add(key)
+		#
+		# Keys that are missing or have the wrong type are already reported: they are not indexed nor cross-checked.
+		for key, attribute, index in in_rows_schema['index']:
+			if (key not in row) or (key in set_wrong_types):
+				continue
+			dict_index = in_indexes.setdefault(index, {})
+			var_attribute = row.get(attribute)
+			if (row[key] in dict_index) and (dict_index[row[key]] != var_attribute):
+				in_errors.append("%s.%s: [%s] is already used with %s [%s], not [%s]." % (var_row_path, key, row[key], attribute, dict_index[row[key]], var_attribute))
+			else:
+				dict_index[row[key]] = var_attribute
+		#
+		for key, (index, attribute) in in_rows_schema['references']:
+			if (row.get(key, '') == '') or (key in set_wrong_types):
+				continue
+			dict_index = in_indexes.get(index, {})
+			if (row[key] not in dict_index):
+				in_errors.append("%s.%s: [%s] is not defined in %s." % (var_row_path, key, row[key], index))
+			elif (attribute is not None) and (row.get(attribute) != dict_index[row[key]]):
+				in_errors.append("%s.%s: [%s] does not match %s [%s] for [%s] in %s." % (var_row_path, attribute, row.get(attribute), attribute, dict_index[row[key]], row[key], index))
+		#
+		for keys, dict_seen in list_seen:
+			var_combination = tuple([str(row.get(key)) for key in keys])		# "1" and 1 are the same VISITNUM.
+			if (var_combination in dict_seen):
+				in_errors.append("%s: %s [%s] repeats %s[%d]." % (var_row_path, '/'.join(keys), '/'.join(var_combination), in_path, dict_seen[var_combination]))
+			else:
+				dict_seen[var_combination] = var_position
+		#
+		if (in_rows_schema['nested'] is not None):
+			var_nested_key, dict_nested_schema = in_rows_schema['nested']
+			if isinstance(row.get(var_nested_key), list):
+				func_nihpo_design_rows_validate(dict_nested_schema, row[var_nested_key], "%s.%s" % (var_row_path, var_nested_key), in_indexes, in_errors)
+#
+#
+def func_nihpo_design_validate (in_validator, in_design):
+	"""
+	This function checks a trial design, and returns all errors found (not only the first one).
+	Inputs:
+		in_validator : [Dictionary] : Returned by func_nihpo_design_validator_compile().
+		in_design : [Dictionary] : Trial design.
+
+	Return:
+		List of error messages. Empty if the design is valid.
+
+	To call this function:
+		func_nihpo_design_validate(validator_trial_design, CT_TRIAL_DESIGN)
+	"""
+	list_errors = []
+	if not isinstance(in_design, dict):
+		return ["The trial design must be an object, not %s." % (type(in_design).__name__)]
+	#
+	for key, types in in_validator['scalars'].items():
+		if (key not in in_design):
+			list_errors.append("%s: missing." % (key))
+		elif not isinstance(in_design[key], types):
+			list_errors.append("%s: must be %s, not %s." % (key, func_nihpo_design_type_name(types), type(in_design[key]).__name__))
+	#
+	dict_indexes = {}
+	for section in in_validator['sections']:
+		var_key = section['key']
+		if (var_key not in in_design):
+			if section['section_required']:
+				list_errors.append("%s: missing." % (var_key))
+			continue
+		#
+		dict_section = in_design[var_key]
+		if not isinstance(dict_section, dict):
+			list_errors.append("%s: must be an object, not %s." % (var_key, type(dict_section).__name__))
+			continue
+		if (dict_section.get('domain') != section['domain']):
+			list_errors.append("%s.domain: must be [%s], not [%s]." % (var_key, section['domain'], dict_section.get('domain')))
+		if not isinstance(dict_section.get(section['rows']), list):
+			list_errors.append("%s.%s: must be a list." % (var_key, section['rows']))
+			continue
+		#
+		func_nihpo_design_rows_validate(section, dict_section[section['rows']], "%s.%s" % (var_key, section['rows']), dict_indexes, list_errors)
+	#
+	return list_errors
+#
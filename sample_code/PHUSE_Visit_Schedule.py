@@ -0,0 +1,393 @@
+#!/usr/bin/python3
+# Author: PHUSE PODR contributors. Builds on Generate_SDTM.py by Jose.Lacal@NIHPO.com
+# Filename: PHUSE_Visit_Schedule.py
+# Purpose: Compile the TVSTRL/TVENRL rules (TV) and disease assessment schedules (TD) of a trial into numeric offsets once, then compute planned and actual dates for every subject as NumPy arrays.
+# Version: Mon 19 October 2026.
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, version 3.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+"""
+Rules understood (case does not matter, units may be singular or plural):
+	"Start of Screen Epoch"
+	"30 minutes before end of Screen Epoch"
+	"1 week after start of Treatment Epoch"
+	"2 days after end of Run-in Element"
+	"1 hour after start of Visit"				(TVENRL only: relative to the start of the same Visit.)
+Units: minute, hour, day, week, month (30 days), year (365 days).
+
+Epoch names are matched against the Epochs of TA, then against the Elements of TA ("Screen Epoch" is the Epoch of the "Screen" Element), then as the start of an Epoch name ("Run-in" for "RUN-IN").
+
+Timing:
+	Every arm starts at minute 0 (the subject's anchor date, e.g. informed consent).
+	Each Element lasts its TEDUR (ISO 8601 duration). Elements without TEDUR last "in_default_duration".
+	TV rows with a blank ARMCD apply to every Arm.
+
+To use these functions:
+	import PHUSE_Visit_Schedule
+	schedule, list_errors = PHUSE_Visit_Schedule.func_nihpo_visit_schedule_compile(dict_trial_design_matrix['tdm'], {'SCRN': '', 'RI': 'P7D', ..}, dict_trial_visit_matrix['visits'])
+	dict_windows = PHUSE_Visit_Schedule.func_nihpo_visit_schedule_windows(schedule, array_subject_armcd, array_rficdtc, rng, 'P2D')
+	dict_windows['planned_start'], dict_windows['actual_start'], ..		# One element per subject and planned Visit.
+
+
+Disease assessments (TD):
+	Each row of TD is a block of TDNUMRPT assessments. Assessment k (1 to TDNUMRPT) of a block is planned TDSTOFF + k * TDTGTPAI after the subject's anchor date (TDANCVAR).
+	The actual date is drawn between TDMINPAI and TDMAXPAI after the previous planned date (i.e. within the allowed window around the planned date, without drifting).
+	Durations are parsed once; the whole cohort is expanded with NumPy.
+
+	assessments, list_errors = PHUSE_Visit_Schedule.func_nihpo_assessment_schedule_compile(dict_trial_disease_assessment_matrix['assessments'])
+	dict_dates = PHUSE_Visit_Schedule.func_nihpo_assessment_schedule_expand(assessments, {'ANCH1DT': array_anch1dt}, rng)
+"""
+
+
+# Imports Section
+import re
+import sys
+#
+try:
+	import numpy as np
+except ImportError:
+	print("Install NumPy: pip3 install numpy")
+	sys.exit(1)
+#
+CT_MINUTES_PER_UNIT = {'minute': 1, 'hour': 60, 'day': 1440, 'week': 10080, 'month': 43200, 'year': 525600}
+CT_DEFAULT_ELEMENT_DURATION = 'P14D'
+#
+CT_RULE_PATTERN = re.compile(r'^\s*(?:(?P<amount>\d+(?:\.\d+)?)\s+(?P<unit>minute|hour|day|week|month|year)s?\s+(?P<direction>before|after)\s+)?(?P<boundary>start|end)\s+of\s+(?:the\s+)?(?:(?P<name>.+?)\s+)?(?P<kind>epoch|element|visit)\s*\.?\s*$', re.IGNORECASE)
+CT_DURATION_PATTERN = re.compile(r'^P(?:(?P<year>\d+(?:\.\d+)?)Y)?(?:(?P<month>\d+(?:\.\d+)?)M)?(?:(?P<week>\d+(?:\.\d+)?)W)?(?:(?P<day>\d+(?:\.\d+)?)D)?(?:T(?:(?P<hour>\d+(?:\.\d+)?)H)?(?:(?P<minute>\d+(?:\.\d+)?)M)?(?:(?P<second>\d+(?:\.\d+)?)S)?)?$')
+#
+#
+def func_nihpo_iso8601_duration_minutes (in_duration):
+	"""
+	This function converts an ISO 8601 duration (e.g. "P14D", "P8W", "PT30M") to minutes. Months are 30 days and years 365 days.
+	Inputs:
+		in_duration : [String] : ISO 8601 duration.
+
+	Return:
+		Integer (minutes), or None if the text is not an ISO 8601 duration.
+
+	To call this function:
+		func_nihpo_iso8601_duration_minutes('P2W')
+	"""
+	var_match = CT_DURATION_PATTERN.match(in_duration.strip().upper()) if isinstance(in_duration, str) else None
+	if (var_match is None) or (in_duration.strip().upper() in ('P', 'PT')) or in_duration.strip().upper().endswith('T'):
+		return None
+	#
+	var_minutes = 0.0
+	for unit, value in var_match.groupdict().items():
+		if (value is not None):
+			var_minutes += float(value) * (CT_MINUTES_PER_UNIT[unit] if (unit != 'second') else (1.0 / 60))
+	#
+	return int(round(var_minutes))
+#
+#
+def func_nihpo_visit_rule_parse (in_rule):
+	"""
+	This function parses one TVSTRL/TVENRL rule.
+	Inputs:
+		in_rule : [String] : Rule text.
+
+	Return:
+		Tuple (kind, name, boundary, offset in minutes), e.g. ('epoch', 'Treatment', 'start', 10080). None if the rule is not understood.
+
+	To call this function:
+		func_nihpo_visit_rule_parse('1 week after start of Treatment Epoch')
+	"""
+	var_match = CT_RULE_PATTERN.match(in_rule)
+	if (var_match is None):
+		return None
+	#
+	var_offset = 0
+	if (var_match.group('amount') is not None):
+		var_offset = int(round(float(var_match.group('amount')) * CT_MINUTES_PER_UNIT[var_match.group('unit').lower()]))
+		if (var_match.group('direction').lower() == 'before'):
+			var_offset = -var_offset
+	#
+	return (var_match.group('kind').lower(), var_match.group('name'), var_match.group('boundary').lower(), var_offset)
+#
+#
+def func_nihpo_visit_schedule_epochs (in_arm, in_element_durations, in_default_duration):
+	"""
+	This function computes when each Epoch and Element of an Arm starts and ends, in minutes after the start of the Arm.
+	Inputs:
+		in_arm : [Dictionary] : One Arm of the Trial Design Matrix ('armcd', 'epochs').
+		in_element_durations : [Dictionary] : TEDUR by ETCD.
+		in_default_duration : [String] : ISO 8601 duration of Elements without TEDUR.
+
+	Return:
+		Dictionary { 'epoch': {EPOCH: (start, end)}, 'element': {ELEMENT: (start, end)} }, with upper-case names.
+
+	To call this function:
+		func_nihpo_visit_schedule_epochs(dict_trial_design_matrix['tdm'][0], {'RI': 'P7D'}, 'P14D')
+	"""
+	var_default_minutes = func_nihpo_iso8601_duration_minutes(in_default_duration)
+	dict_timing = {'epoch': {}, 'element': {}}
+	var_start = 0
+	for one_epoch in in_arm['epochs']:
+		var_duration = func_nihpo_iso8601_duration_minutes(in_element_durations.get(one_epoch['etcd'], ''))
+		var_end = var_start + (var_duration if (var_duration is not None) else var_default_minutes)
+		dict_timing['epoch'].setdefault(one_epoch['epoch'].upper(), (var_start, var_end))
+		dict_timing['element'].setdefault(one_epoch['element'].upper(), (var_start, var_end))
+		var_start = var_end
+	#
+	return dict_timing
+#
+#
+def func_nihpo_visit_rule_resolve (in_parsed_rule, in_timing, in_visit_start=None):
+	"""
+	This function converts a parsed rule to minutes after the start of an Arm.
+	Inputs:
+		in_parsed_rule : [Tuple] : Returned by func_nihpo_visit_rule_parse().
+		in_timing : [Dictionary] : Returned by func_nihpo_visit_schedule_epochs() for the Arm.
+		in_visit_start : [Integer] : Start of the Visit (minutes), for rules relative to the Visit. None for TVSTRL.
+
+	Return:
+		Integer (minutes), or an error message (String).
+
+	To call this function:
+		func_nihpo_visit_rule_resolve(('epoch', 'Treatment', 'start', 10080), dict_timing)
+	"""
+	var_kind, var_name, var_boundary, var_offset = in_parsed_rule
+	if (var_kind == 'visit'):
+		if (in_visit_start is None) or (var_boundary != 'start'):
+			return "a Visit can only start or end relative to the start of the same Visit"
+		return in_visit_start + var_offset
+	#
+	var_key = (var_name or '').strip().upper()
+	var_window = None
+	if (var_kind == 'epoch'):
+		var_window = in_timing['epoch'].get(var_key) or in_timing['element'].get(var_key)
+		if (var_window is None):
+			list_prefixed = [epoch for epoch in in_timing['epoch'] if epoch.startswith(var_key)]
+			var_window = in_timing['epoch'][list_prefixed[0]] if (len(list_prefixed) == 1) else None
+	else:
+		var_window = in_timing['element'].get(var_key)
+	#
+	if (var_window is None):
+		return "%s [%s] is not part of this Arm" % (var_kind.title(), var_name)
+	#
+	return (var_window[0] if (var_boundary == 'start') else var_window[1]) + var_offset
+#
+#
+def func_nihpo_visit_schedule_compile (in_tdm, in_element_durations, in_visits, in_default_duration=CT_DEFAULT_ELEMENT_DURATION):
+	"""
+	This function compiles the planned Visits of a trial: every TVSTRL/TVENRL rule is parsed once, and resolved against the Epochs of each Arm.
+	Inputs:
+		in_tdm : [List] : Arms of the Trial Design Matrix (CT_TRIAL_DESIGN_MATRIX['tdm']).
+		in_element_durations : [Dictionary] : TEDUR by ETCD (from TE).
+		in_visits : [List] : Visits of the Trial Visit Matrix (CT_TRIAL_VISIT_MATRIX['visits']).
+		in_default_duration : [String] : ISO 8601 duration of Elements without TEDUR.
+
+	Return:
+		Dictionary : Compiled schedule, one row per Arm and Visit: 'arms' (ARMCD list), 'visit_arm' (index into 'arms'), 'visitnum', 'visit', 'start' and 'end' (minutes after the start of the Arm).
+		List : Errors (rules that could not be parsed or resolved). Those Visits are left out of the schedule.
+
+	To call this function:
+		func_nihpo_visit_schedule_compile(dict_trial_design_matrix['tdm'], {'RI': 'P7D', 'P': 'P14D'}, dict_trial_visit_matrix['visits'])
+	"""
+	list_arms = [one_arm['armcd'] for one_arm in in_tdm]
+	list_timings = [func_nihpo_visit_schedule_epochs(one_arm, in_element_durations, in_default_duration) for one_arm in in_tdm]
+	#
+	dict_parsed_rules = {}		# Each distinct rule text is parsed once.
+	list_errors = []
+	list_rows = []
+	for var_position, one_visit in enumerate(in_visits):
+		list_parsed = []
+		for key in ('tvstrl', 'tvenrl'):
+			var_rule = one_visit.get(key, '')
+			if (var_rule not in dict_parsed_rules):
+				dict_parsed_rules[var_rule] = func_nihpo_visit_rule_parse(var_rule)
+			if (dict_parsed_rules[var_rule] is None):
+				list_errors.append("visits[%d].%s: rule [%s] is not understood." % (var_position, key, var_rule))
+			list_parsed.append(dict_parsed_rules[var_rule])
+		if (None in list_parsed):
+			continue
+		#
+		# Blank ARMCD: the Visit applies to every Arm.
+		list_arm_positions = range(len(list_arms)) if (one_visit.get('armcd', '') == '') else [position for position, armcd in enumerate(list_arms) if (armcd == one_visit['armcd'])]
+		for var_arm in list_arm_positions:
+			var_start = func_nihpo_visit_rule_resolve(list_parsed[0], list_timings[var_arm])
+			var_end = func_nihpo_visit_rule_resolve(list_parsed[1], list_timings[var_arm], var_start) if not isinstance(var_start, str) else var_start
+			if isinstance(var_start, str) or isinstance(var_end, str):
+				list_errors.append("visits[%d] in Arm [%s]: %s." % (var_position, list_arms[var_arm], var_start if isinstance(var_start, str) else var_end))
+				continue
+			if (var_end < var_start):
+				list_errors.append("visits[%d] in Arm [%s]: ends %d minutes before it starts." % (var_position, list_arms[var_arm], var_start - var_end))
+				continue
+			list_rows.append((var_arm, one_visit['visitnum'], one_visit['visit'], var_start, var_end))
+	#
+	array_visitnum = np.empty(len(list_rows), dtype=object)
+	array_visit = np.empty(len(list_rows), dtype=object)
+	array_visitnum[:] = [row[1] for row in list_rows]
+	array_visit[:] = [row[2] for row in list_rows]
+	schedule = {'arms': list_arms, 'visit_arm': np.array([row[0] for row in list_rows], dtype=np.int32), 'visitnum': array_visitnum, 'visit': array_visit,
+		'start': np.array([row[3] for row in list_rows], dtype=np.int64), 'end': np.array([row[4] for row in list_rows], dtype=np.int64)}
+	return schedule, list_errors
+#
+#
+def func_nihpo_visit_schedule_windows (in_schedule, in_subject_armcd, in_anchor, in_rng=None, in_jitter='PT0M'):
+	"""
+	This function computes the planned and actual window of every planned Visit of every subject, at once.
+	Inputs:
+		in_schedule : [Dictionary] : Returned by func_nihpo_visit_schedule_compile().
+		in_subject_armcd : [Array or List] : ARMCD of each subject. Subjects in an Arm without Visits (e.g. screen failures) get no rows.
+		in_anchor : [Array] : Start of the Arm for each subject (anything NumPy converts to datetime64, e.g. "2020-10-08" or "2020-10-08T09:30").
+		in_rng : [NumPy Generator] : Random number generator for the actual windows. None: actual windows are the planned ones.
+		in_jitter : [String] : ISO 8601 duration. Actual Visits are moved by up to this much, earlier or later.
+
+	Return:
+		Dictionary of arrays, one element per subject and Visit, sorted by subject then Visit start:
+			'subject' (position in the inputs), 'visit' (row of the schedule), 'visitnum', 'visit_name',
+			'planned_start', 'planned_end', 'actual_start', 'actual_end' (datetime64[m]).
+
+	To call this function:
+		func_nihpo_visit_schedule_windows(schedule, ['P', 'A', 'B'], np.array(['2020-01-06', '2020-01-08', '2020-02-01'], dtype='datetime64[D]'), np.random.default_rng(), 'P2D')
+	"""
+	array_anchor = np.asarray(in_anchor, dtype='datetime64[m]')
+	array_arms, array_subject_arm = np.unique(np.asarray(in_subject_armcd, dtype=object).astype(str), return_inverse=True)
+	dict_arm_positions = {armcd: position for position, armcd in enumerate(in_schedule['arms'])}
+	#
+	list_subjects = []
+	list_visits = []
+	for var_unique, armcd in enumerate(array_arms):
+		array_subjects = np.flatnonzero(array_subject_arm == var_unique)
+		array_visits = np.flatnonzero(in_schedule['visit_arm'] == dict_arm_positions.get(armcd, -1))
+		list_subjects.append(np.repeat(array_subjects, len(array_visits)))
+		list_visits.append(np.tile(array_visits, len(array_subjects)))
+	#
+	array_subject = np.concatenate(list_subjects) if (len(list_subjects) > 0) else np.empty(0, dtype=np.int64)
+	array_visit = np.concatenate(list_visits) if (len(list_visits) > 0) else np.empty(0, dtype=np.int64)
+	array_order = np.lexsort((in_schedule['start'][array_visit], array_subject))
+	array_subject = array_subject[array_order]
+	array_visit = array_visit[array_order]
+	#
+	array_planned_start = array_anchor[array_subject] + in_schedule['start'][array_visit].astype('timedelta64[m]')
+	array_planned_end = array_anchor[array_subject] + in_schedule['end'][array_visit].astype('timedelta64[m]')
+	#
+	var_jitter = func_nihpo_iso8601_duration_minutes(in_jitter)
+	assert (var_jitter is not None),"Jitter [%s] is not an ISO 8601 duration." % (in_jitter)
+	array_shift = np.zeros(len(array_subject), dtype=np.int64)
+	if (in_rng is not None) and (var_jitter > 0):
+		array_shift = in_rng.integers(-var_jitter, var_jitter + 1, len(array_subject))
+	array_shift = array_shift.astype('timedelta64[m]')
+	#
+	return {'subject': array_subject, 'visit': array_visit, 'visitnum': in_schedule['visitnum'][array_visit], 'visit_name': in_schedule['visit'][array_visit],
+		'planned_start': array_planned_start, 'planned_end': array_planned_end, 'actual_start': array_planned_start + array_shift, 'actual_end': array_planned_end + array_shift}
+#
+#
+def func_nihpo_assessment_schedule_compile (in_assessments):
+	"""
+	This function compiles the disease assessment blocks of TD into one row per planned assessment, with offsets in days. ISO 8601 durations are parsed once.
+	Inputs:
+		in_assessments : [List] : Rows of the Trial Disease Assessment Matrix (CT_TRIAL_DISEASE_ASSESSMENT_MATRIX['assessments']).
+
+	Return:
+		Dictionary of arrays, one element per planned assessment: 'tdorder', 'anchor' (TDANCVAR), 'repeat' (1 to TDNUMRPT),
+			'offset' (planned day after the anchor), 'window_low' and 'window_high' (earliest and latest day allowed after the anchor).
+		List : Errors (blocks that could not be compiled are left out).
+
+	To call this function:
+		func_nihpo_assessment_schedule_compile(CT_TRIAL_DISEASE_ASSESSMENT_MATRIX['assessments'])
+	"""
+	list_errors = []
+	list_tdorder = []
+	list_anchor = []
+	list_repeat = []
+	list_offset = []
+	list_low = []
+	list_high = []
+	for var_position, one_block in enumerate(in_assessments):
+		dict_days = {}
+		for key in ('tdstoff', 'tdtgtpai', 'tdminpai', 'tdmaxpai'):
+			var_minutes = func_nihpo_iso8601_duration_minutes(one_block.get(key, ''))
+			if (var_minutes is None):
+				list_errors.append("assessments[%d].%s: [%s] is not an ISO 8601 duration." % (var_position, key, one_block.get(key, '')))
+			else:
+				dict_days[key] = var_minutes // 1440
+		try:
+			var_number = int(one_block.get('tdnumrpt', ''))
+		except ValueError:
+			list_errors.append("assessments[%d].tdnumrpt: [%s] is not a number." % (var_position, one_block.get('tdnumrpt', '')))
+			continue
+		if (len(dict_days) < 4):
+			continue
+		if not (dict_days['tdminpai'] <= dict_days['tdtgtpai'] <= dict_days['tdmaxpai']):
+			list_errors.append("assessments[%d]: TDTGTPAI must be between TDMINPAI and TDMAXPAI." % (var_position))
+			continue
+		#
+		array_repeat = np.arange(1, var_number + 1)
+		array_offset = dict_days['tdstoff'] + array_repeat * dict_days['tdtgtpai']
+		list_tdorder.extend([one_block['tdorder']] * var_number)
+		list_anchor.extend([one_block['tdancvar']] * var_number)
+		list_repeat.append(array_repeat)
+		list_offset.append(array_offset)
+		list_low.append(array_offset - (dict_days['tdtgtpai'] - dict_days['tdminpai']))
+		list_high.append(array_offset + (dict_days['tdmaxpai'] - dict_days['tdtgtpai']))
+	#
+	array_tdorder = np.empty(len(list_tdorder), dtype=object)
+	array_tdorder[:] = list_tdorder
+	array_anchor = np.empty(len(list_anchor), dtype=object)
+	array_anchor[:] = list_anchor
+	assessments = {'tdorder': array_tdorder, 'anchor': array_anchor}
+	for key, list_arrays in (('repeat', list_repeat), ('offset', list_offset), ('window_low', list_low), ('window_high', list_high)):
+		assessments[key] = np.concatenate(list_arrays).astype(np.int64) if (len(list_arrays) > 0) else np.empty(0, dtype=np.int64)
+	#
+	return assessments, list_errors
+#
+#
+def func_nihpo_assessment_schedule_expand (in_assessments, in_anchors, in_rng=None):
+	"""
+	This function expands the compiled disease assessments for every subject: planned dates, allowed windows and actual dates, at once.
+	Inputs:
+		in_assessments : [Dictionary] : Returned by func_nihpo_assessment_schedule_compile().
+		in_anchors : [Dictionary] : Anchor date of each subject, by TDANCVAR (e.g. {'ANCH1DT': array of dates}). All arrays have one element per subject. NaT: the subject has no assessments for that anchor.
+		in_rng : [NumPy Generator] : Random number generator for the actual dates. None: actual dates are the planned ones.
+
+	Return:
+		Dictionary of arrays, one element per subject and planned assessment, sorted by subject then planned date:
+			'subject' (position in the anchor arrays), 'assessment' (row of the compiled assessments), 'tdorder', 'repeat',
+			'planned', 'window_low', 'window_high', 'actual' (datetime64[D]).
+
+	To call this function:
+		func_nihpo_assessment_schedule_expand(assessments, {'ANCH1DT': np.array(['2020-01-06', '2020-02-11'], dtype='datetime64[D]')}, np.random.default_rng())
+	"""
+	dict_anchors = {anchor: np.asarray(dates, dtype='datetime64[D]') for anchor, dates in in_anchors.items()}
+	list_subjects = []
+	list_rows = []
+	list_dates = []
+	for anchor in np.unique(in_assessments['anchor']) if (len(in_assessments['anchor']) > 0) else []:
+		assert (anchor in dict_anchors),"Please provide the anchor dates [%s] of every subject." % (anchor)
+		array_anchor = dict_anchors[anchor]
+		array_subjects = np.flatnonzero(~np.isnat(array_anchor))
+		array_rows = np.flatnonzero(in_assessments['anchor'] == anchor)
+		list_subjects.append(np.repeat(array_subjects, len(array_rows)))
+		list_rows.append(np.tile(array_rows, len(array_subjects)))
+		list_dates.append(np.repeat(array_anchor[array_subjects], len(array_rows)))
+	#
+	if (len(list_subjects) == 0):
+		array_subject = np.empty(0, dtype=np.int64)
+		array_row = np.empty(0, dtype=np.int64)
+		array_anchor_date = np.empty(0, dtype='datetime64[D]')
+	else:
+		array_subject = np.concatenate(list_subjects)
+		array_row = np.concatenate(list_rows)
+		array_anchor_date = np.concatenate(list_dates)
+	#
+	array_planned = array_anchor_date + in_assessments['offset'][array_row].astype('timedelta64[D]')
+	array_order = np.lexsort((array_planned, array_subject))
+	array_subject = array_subject[array_order]
+	array_row = array_row[array_order]
+	array_anchor_date = array_anchor_date[array_order]
+	array_planned = array_planned[array_order]
+	#
+	array_low = in_assessments['window_low'][array_row]
+	array_high = in_assessments['window_high'][array_row]
+	array_actual_offset = in_assessments['offset'][array_row]
+	if (in_rng is not None):
+		array_actual_offset = in_rng.integers(array_low, array_high + 1)		# One draw per row, each within its own window.
+	#
+	return {'subject': array_subject, 'assessment': array_row, 'tdorder': in_assessments['tdorder'][array_row], 'repeat': in_assessments['repeat'][array_row],
+		'planned': array_planned, 'window_low': array_anchor_date + array_low.astype('timedelta64[D]'), 'window_high': array_anchor_date + array_high.astype('timedelta64[D]'),
+		'actual': array_anchor_date + array_actual_offset.astype('timedelta64[D]')}
+#
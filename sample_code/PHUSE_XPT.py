@@ -0,0 +1,587 @@
+#!/usr/bin/python3
+# Author: PHUSE PODR contributors. Builds on Generate_SDTM.py by Jose.Lacal@NIHPO.com
+# Filename: PHUSE_XPT.py
+# Purpose: Write and read SAS Transport (XPORT) version 5 files with NumPy, without pandas and without keeping the whole dataset in memory.
+# Version: Mon 19 October 2026.
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, version 3.
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License along with this program.  If not, see https://www.gnu.org/licenses/gpl-3.0.html
+#
+"""
+Format: SAS Technical Support TS-140, "The Record Layout of a Data Set in SAS Transport (XPORT) Format".
+A transport file is a sequence of 80-byte records:
+	Library header			3 records.
+	Member header			4 records. One member (dataset) per file, as FDA submissions require.
+	Namestr header			1 record, then one 140-byte namestr per variable, padded with blanks to a multiple of 80 bytes.
+	Observation header		1 record, then the observations one after the other, padded with blanks to a multiple of 80 bytes.
+
+Only two kinds of variables exist:
+	'num'	8 bytes, IBM mainframe (System/360) double precision. Missing values are written as SAS "." (0x2E followed by zeros).
+	'char'	Fixed width, padded with blanks. Widths must be known before the first observation is written.
+
+Each batch of observations is converted with NumPy (one operation per column, not per value) into a block of bytes and written straight away.
+Memory use depends on the size of the batch, not on the size of the dataset.
+
+To write a large dataset in batches:
+	import PHUSE_XPT
+	list_variables = [PHUSE_XPT.func_nihpo_xpt_variable('USUBJID', 'char', 40), PHUSE_XPT.func_nihpo_xpt_variable('LBSTRESN', 'num', in_label='Numeric Result')]
+	xpt_LB = PHUSE_XPT.func_nihpo_xpt_open('lb.xpt', 'LB', 'Laboratory Test Results', list_variables)
+	PHUSE_XPT.func_nihpo_xpt_write_columns(xpt_LB, {'USUBJID': array_usubjid, 'LBSTRESN': array_lbstresn})		# Column arrays, or:
+	PHUSE_XPT.func_nihpo_xpt_write_rows(xpt_LB, [['0b2f..', 5.4], ['0b2f..', 6.1]])								# Rows, in variable order.
+	PHUSE_XPT.func_nihpo_xpt_close(xpt_LB)
+
+To write a small dataset already in memory (character widths are taken from the data):
+	PHUSE_XPT.func_nihpo_xpt_write_dataset('ta.xpt', 'TA', 'Trial Arms', ['STUDYID', 'TAETORD'], {'STUDYID': [..], 'TAETORD': np.array([..], dtype=np.int32)})
+
+To read a transport file (memory-mapped: only the observations used are read from disk):
+	xpt_LB = PHUSE_XPT.func_nihpo_xpt_reader_open('lb.xpt')
+	array_lbstresn = PHUSE_XPT.func_nihpo_xpt_reader_column(xpt_LB, 'LBSTRESN', 1000000, 1000100)	# Observations 1,000,000 to 1,000,099.
+	dict_observation = PHUSE_XPT.func_nihpo_xpt_reader_row(xpt_LB, 5)
+	PHUSE_XPT.func_nihpo_xpt_reader_close(xpt_LB)
+
+To check a file against the data it was written from:
+	list_differences = PHUSE_XPT.func_nihpo_xpt_compare('ta.xpt', ['STUDYID', 'TAETORD'], {'STUDYID': [..], 'TAETORD': np.array([..], dtype=np.int32)})
+
+To look at transport files from the command line:
+	python3 PHUSE_XPT.py lb.xpt
+"""
+
+
+# Imports Section
+import datetime
+import mmap
+import platform
+import struct
+import sys
+#
+try:
+	import numpy as np
+except ImportError:
+	print("Install NumPy: pip3 install numpy")
+	sys.exit(1)
+#
+CT_XPT_RECORD_LENGTH = 80
+CT_XPT_NAMESTR_LENGTH = 140
+CT_XPT_ROW_BATCH = 100000			# Rows converted at once by func_nihpo_xpt_write_dataset().
+CT_XPT_ENCODING = 'ISO-8859-1'		# Same default as the xport package.
+CT_XPT_SAS_VERSION = '9.4'
+CT_XPT_MONTHS = ['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC']
+#
+CT_XPT_LIBRARY_HEADER = b'HEADER RECORD*******LIBRARY HEADER RECORD!!!!!!!000000000000000000000000000000  '
+CT_XPT_MEMBER_HEADER = b'HEADER RECORD*******MEMBER  HEADER RECORD!!!!!!!000000000000000001600000000140  '
+CT_XPT_DESCRIPTOR_HEADER = b'HEADER RECORD*******DSCRPTR HEADER RECORD!!!!!!!000000000000000000000000000000  '
+CT_XPT_NAMESTR_HEADER = 'HEADER RECORD*******NAMESTR HEADER RECORD!!!!!!!000000%04d00000000000000000000  '
+CT_XPT_OBS_HEADER = b'HEADER RECORD*******OBS     HEADER RECORD!!!!!!!000000000000000000000000000000  '
+#
+# ntype, nhfun, nlng, nvar0, nname, nlabel, nform, nfl, nfd, nfj, nfill, niform, nifl, nifd, npos, rest:
+CT_XPT_NAMESTR_STRUCT = struct.Struct('>hhhh8s40s8shhh2s8shhl52s')
+assert (CT_XPT_NAMESTR_STRUCT.size == CT_XPT_NAMESTR_LENGTH),"Namestr layout must be %d bytes." % (CT_XPT_NAMESTR_LENGTH)
+#
+CT_XPT_IBM_MISSING = np.uint64(0x2E00000000000000)
+#
+#
+def func_nihpo_xpt_ieee_to_ibm (in_values):
+	"""
+	This function converts numbers to IBM mainframe double precision, the only numeric format of SAS Transport files.
+	The conversion is exact: IEEE doubles have 53 bits of mantissa, IBM doubles have 56.
+	Inputs:
+		in_values : [Array of numbers] : Values to convert. NaN (or None) is written as a SAS missing value.
+
+	Return:
+		NumPy array of uint8, one row of 8 bytes (big-endian) per value.
+
+	To call this function:
+		func_nihpo_xpt_ieee_to_ibm(np.array([1.0, -118.625, np.nan]))
+	"""
+	array_values = np.asarray(in_values, dtype=np.float64).ravel()
+	assert (not np.isinf(array_values).any()),"SAS Transport files can not store infinite values."
+	#
+	array_bits = array_values.view(np.uint64)
+	array_sign = array_bits & np.uint64(0x8000000000000000)
+	array_exponent = ((array_bits >> np.uint64(52)) & np.uint64(0x7FF)).astype(np.int64)
+	array_mantissa = (array_bits & np.uint64(0x000FFFFFFFFFFFFF)) | np.uint64(0x0010000000000000)
+	#
+	# value = (mantissa / 2**53) * 2**p, with p = exponent - 1022. In base 16: value = fraction * 16**q, with q = ceil(p / 4).
+	array_p = array_exponent - 1022
+	array_q = -((-array_p) // 4)
+	array_shift = (3 + array_p - 4 * array_q).astype(np.uint64)		# 0..3: 53-bit mantissa into a 56-bit fraction.
+	array_ibm_exponent = array_q + 64
+	#
+	array_zero = (array_exponent == 0) | (array_ibm_exponent < 0)		# Zero, IEEE subnormals and values too small for IBM.
+	assert (not (array_ibm_exponent[~array_zero & ~np.isnan(array_values)] > 127).any()),"Value too large for a SAS Transport file."
+	#
+	array_ibm = array_sign | (np.clip(array_ibm_exponent, 0, 127).astype(np.uint64) << np.uint64(56)) | (array_mantissa << array_shift)
+	array_ibm[array_zero] = 0
+	array_ibm[np.isnan(array_values)] = CT_XPT_IBM_MISSING
+	#
+	return array_ibm.astype('>u8').view(np.uint8).reshape(len(array_values), 8)
+#
+#
+def func_nihpo_xpt_encode (in_values, in_encoding=CT_XPT_ENCODING):
+	"""
+	This function encodes text values as a NumPy array of bytes, as wide as the longest value.
+	Inputs:
+		in_values : [Array or List] : Values to encode. None is encoded as an empty value. Other values are converted with str().
+		in_encoding : [String] : Character encoding.
+
+	Return:
+		NumPy array of dtype "S<n>".
+
+	To call this function:
+		func_nihpo_xpt_encode(['SCRN', 'RI', None])
+	"""
+	array_objects = np.asarray(in_values, dtype=object).ravel()
+	array_objects = np.where(array_objects == None, '', array_objects)
+	return np.char.encode(array_objects.astype(str), in_encoding)
+#
+#
+def func_nihpo_xpt_char_bytes (in_values, in_length, in_encoding=CT_XPT_ENCODING):
+	"""
+	This function converts text values to fixed-width bytes, padded with blanks.
+	Inputs:
+		in_values : [Array or List] : Values to convert. None is written as blanks. Other values are converted with str().
+		in_length : [Integer] : Width of the variable, in bytes.
+		in_encoding : [String] : Character encoding.
+
+	Return:
+		NumPy array of uint8, one row of "in_length" bytes per value.
+
+	To call this function:
+		func_nihpo_xpt_char_bytes(['SCRN', 'RI', None], 8)
+	"""
+	var_number_values = len(in_values)
+	if (var_number_values == 0):
+		return np.empty((0, in_length), dtype=np.uint8)
+	#
+	array_encoded = func_nihpo_xpt_encode(in_values, in_encoding)
+	assert (array_encoded.dtype.itemsize <= in_length),"Value longer than %d bytes: [%s]" % (in_length, array_encoded[np.char.str_len(array_encoded) > in_length][0])
+	#
+	# Fixed-width bytes are padded with NUL; SAS pads with blanks.
+	array_bytes = array_encoded.astype('S%d' % (in_length)).view(np.uint8).reshape(var_number_values, in_length)
+	return np.where(array_bytes == 0, np.uint8(32), array_bytes)
+#
+#
+def func_nihpo_xpt_variable (in_name, in_type, in_length=8, in_label=''):
+	"""
+	This function describes one variable of a transport file.
+	Inputs:
+		in_name : [String] : Variable name. Upper-cased and truncated to 8 characters, as SAS requires.
+		in_type : [String] : 'num' or 'char'.
+		in_length : [Integer] : Width in bytes. 8 for 'num' variables (3 to 8 allowed), 1 to 200 for 'char' variables.
+		in_label : [String] : Variable label, up to 40 characters.
+
+	Return:
+		Dictionary.
+
+	To call this function:
+		func_nihpo_xpt_variable('ETCD', 'char', 8, 'Element Code')
+	"""
+	assert (in_type in ('num', 'char')),"Variable type must be 'num' or 'char', not [%s]" % (in_type)
+	if (in_type == 'num'):
+		assert (3 <= in_length <= 8),"Numeric variable [%s] must be 3 to 8 bytes long." % (in_name)
+	else:
+		assert (1 <= in_length <= 200),"Character variable [%s] must be 1 to 200 bytes long in a version 5 transport file." % (in_name)
+	#
+	return {'name': in_name.upper()[:8], 'type': in_type, 'length': in_length, 'label': in_label[:40], 'source': in_name}
+#
+#
+def func_nihpo_xpt_variables (in_columns, in_data):
+	"""
+	This function describes the variables of a dataset already in memory: NumPy numeric columns are 'num', all other columns are 'char', as wide as their longest value.
+	Inputs:
+		in_columns : [List] : Column names, in dataset order.
+		in_data : [Dictionary] : Values of each column (NumPy array or list).
+
+	Return:
+		List of dictionaries, to pass to func_nihpo_xpt_open().
+
+	To call this function:
+		func_nihpo_xpt_variables(['STUDYID', 'TAETORD'], {'STUDYID': ['EX1'], 'TAETORD': np.array([1], dtype=np.int32)})
+	"""
+	list_variables = []
+	for column in in_columns:
+		values = in_data[column]
+		if isinstance(values, np.ndarray) and (values.dtype.kind in 'iufb'):
+			list_variables.append(func_nihpo_xpt_variable(column, 'num'))
+		else:
+			var_length = func_nihpo_xpt_encode(values).dtype.itemsize if (len(values) > 0) else 1
+			list_variables.append(func_nihpo_xpt_variable(column, 'char', max(var_length, 1)))
+	#
+	return list_variables
+#
+#
+def func_nihpo_xpt_timestamp (in_datetime):
+	"""
+	This function formats a date and time as SAS does in transport headers ("ddMMMyy:hh:mm:ss"), without depending on the locale.
+	Inputs:
+		in_datetime : [datetime] : Date and time.
+
+	Return:
+		String of 16 characters.
+
+	To call this function:
+		func_nihpo_xpt_timestamp(datetime.datetime.now())
+	"""
+	return "%02d%s%02d:%02d:%02d:%02d" % (in_datetime.day, CT_XPT_MONTHS[in_datetime.month - 1], in_datetime.year % 100, in_datetime.hour, in_datetime.minute, in_datetime.second)
+#
+#
+def func_nihpo_xpt_record (in_text):
+	"""
+	This function returns one 80-byte header record, padded with blanks.
+	Inputs:
+		in_text : [String] : Contents of the record.
+
+	Return:
+		Bytes.
+
+	To call this function:
+		func_nihpo_xpt_record('SAS     SAS     SASLIB  9.4')
+	"""
+	var_record = in_text.encode(CT_XPT_ENCODING)
+	assert (len(var_record) <= CT_XPT_RECORD_LENGTH),"Header record longer than %d bytes: [%s]" % (CT_XPT_RECORD_LENGTH, in_text)
+	return var_record.ljust(CT_XPT_RECORD_LENGTH, b' ')
+#
+#
+def func_nihpo_xpt_open (in_filename, in_dataset_name, in_dataset_label, in_variables):
+	"""
+	This function creates a transport file with one dataset, and writes all its headers.
+	Inputs:
+		in_filename : [String] : File to create.
+		in_dataset_name : [String] : Dataset name, up to 8 characters (e.g. 'LB').
+		in_dataset_label : [String] : Dataset label, up to 40 characters.
+		in_variables : [List] : Variables, as returned by func_nihpo_xpt_variable() or func_nihpo_xpt_variables().
+
+	Return:
+		Dictionary to pass to func_nihpo_xpt_write_columns(), func_nihpo_xpt_write_rows() and func_nihpo_xpt_close().
+
+	To call this function:
+		func_nihpo_xpt_open('ta.xpt', 'TA', 'Trial Arms', list_variables)
+	"""
+	list_names = [variable['name'] for variable in in_variables]
+	assert (len(list_names) == len(set(list_names))),"Variable names must be unique in their first 8 characters: %s" % (list_names)
+	#
+	var_timestamp = func_nihpo_xpt_timestamp(datetime.datetime.now())
+	var_os = platform.system()[:8]
+	#
+	list_header = [CT_XPT_LIBRARY_HEADER,
+		func_nihpo_xpt_record('SAS     SAS     SASLIB  %-8s%-8s%24s%s' % (CT_XPT_SAS_VERSION, var_os, '', var_timestamp)),
+		func_nihpo_xpt_record(var_timestamp),
+		CT_XPT_MEMBER_HEADER,
+		CT_XPT_DESCRIPTOR_HEADER,
+		func_nihpo_xpt_record('SAS     %-8sSASDATA %-8s%-8s%24s%s' % (in_dataset_name.upper()[:8], CT_XPT_SAS_VERSION, var_os, '', var_timestamp)),
+		func_nihpo_xpt_record('%s%16s%-40s%-8s' % (var_timestamp, '', in_dataset_label[:40], '')),
+		func_nihpo_xpt_record(CT_XPT_NAMESTR_HEADER % (len(in_variables)))]
+	#
+	# Namestrs: position of each variable within an observation.
+	list_namestrs = []
+	list_offsets = []
+	var_position = 0
+	for var_number, variable in enumerate(in_variables):
+		list_offsets.append(var_position)
+		list_namestrs.append(CT_XPT_NAMESTR_STRUCT.pack(1 if (variable['type'] == 'num') else 2, 0, variable['length'], var_number + 1,
+			variable['name'].ljust(8).encode(CT_XPT_ENCODING), variable['label'].ljust(40).encode(CT_XPT_ENCODING)[:40],
+			b' ' * 8, 0, 0, 0, b'\x00\x00', b' ' * 8, 0, 0, var_position, b'\x00' * 52))
+		var_position += variable['length']
+	#
+	var_namestrs = b''.join(list_namestrs)
+	var_namestrs = var_namestrs + b' ' * (-len(var_namestrs) % CT_XPT_RECORD_LENGTH)
+	#
+	file_xpt = open(in_filename, 'wb')
+	file_xpt.write(b''.join(list_header) + var_namestrs + CT_XPT_OBS_HEADER)
+	#
+	return {'file': file_xpt, 'filename': in_filename, 'variables': list(in_variables), 'offsets': list_offsets, 'row_length': var_position, 'rows': 0, 'bytes': 0}
+#
+#
+def func_nihpo_xpt_write_columns (in_writer, in_columns):
+	"""
+	This function converts a batch of observations, given as one array per variable, and appends it to a transport file.
+	Inputs:
+		in_writer : [Dictionary] : Returned by func_nihpo_xpt_open().
+		in_columns : [Dictionary] : Values of each variable (same length for all), keyed by the column name given to func_nihpo_xpt_variable().
+
+	To call this function:
+		func_nihpo_xpt_write_columns(xpt_LB, {'USUBJID': array_usubjid, 'LBSTRESN': array_lbstresn})
+	"""
+	list_lengths = [len(in_columns[variable['source']]) for variable in in_writer['variables']]
+	assert (len(set(list_lengths)) <= 1),"All columns of a batch must have the same number of values: %s" % (list_lengths)
+	var_number_rows = list_lengths[0] if (len(list_lengths) > 0) else 0
+	if (var_number_rows == 0):
+		return
+	#
+	array_rows = np.empty((var_number_rows, in_writer['row_length']), dtype=np.uint8)
+	for variable, var_offset in zip(in_writer['variables'], in_writer['offsets']):
+		var_length = variable['length']
+		if (variable['type'] == 'num'):
+			array_rows[:, var_offset:var_offset + var_length] = func_nihpo_xpt_ieee_to_ibm(in_columns[variable['source']])[:, :var_length]
+		else:
+			array_rows[:, var_offset:var_offset + var_length] = func_nihpo_xpt_char_bytes(in_columns[variable['source']], var_length)
+	#
+	in_writer['file'].write(array_rows.data)
+	in_writer['rows'] += var_number_rows
+	in_writer['bytes'] += array_rows.nbytes
+#
+#
+def func_nihpo_xpt_write_rows (in_writer, in_rows):
+	"""
+	This function appends a batch of observations, given as rows, to a transport file.
+	Inputs:
+		in_writer : [Dictionary] : Returned by func_nihpo_xpt_open().
+		in_rows : [List] : Rows, each with one value per variable, in variable order.
+
+	To call this function:
+		func_nihpo_xpt_write_rows(xpt_LB, [['0b2f..', 5.4], ['0b2f..', 6.1]])
+	"""
+	if (len(in_rows) == 0):
+		return
+	#
+	list_columns = list(zip(*in_rows))
+	assert (len(list_columns) == len(in_writer['variables'])),"Each row must have %d values." % (len(in_writer['variables']))
+	func_nihpo_xpt_write_columns(in_writer, {variable['source']: values for variable, values in zip(in_writer['variables'], list_columns)})
+#
+#
+def func_nihpo_xpt_close (in_writer):
+	"""
+	This function pads the last observations to a full 80-byte record, and closes a transport file.
+	Inputs:
+		in_writer : [Dictionary] : Returned by func_nihpo_xpt_open().
+
+	Return:
+		Number of observations written.
+
+	To call this function:
+		func_nihpo_xpt_close(xpt_LB)
+	"""
+	in_writer['file'].write(b' ' * (-in_writer['bytes'] % CT_XPT_RECORD_LENGTH))
+	in_writer['file'].close()
+	return in_writer['rows']
+#
+#
+def func_nihpo_xpt_write_dataset (in_filename, in_dataset_name, in_dataset_label, in_columns, in_data, in_variables=None):
+	"""
+	This function writes a dataset already in memory as a transport file, converting CT_XPT_ROW_BATCH rows at a time.
+	Inputs:
+		in_filename : [String] : File to create.
+		in_dataset_name : [String] : Dataset name, up to 8 characters.
+		in_dataset_label : [String] : Dataset label, up to 40 characters.
+		in_columns : [List] : Column names, in dataset order.
+		in_data : [Dictionary] : Values of each column. NumPy numeric arrays become 'num' variables, everything else 'char'.
+		in_variables : [List] : Variables (see func_nihpo_xpt_variable), in column order, e.g. with labels. None to describe them from in_data (see func_nihpo_xpt_variables).
+
+	Return:
+		Number of observations written.
+
+	To call this function:
+		func_nihpo_xpt_write_dataset('ta.xpt', 'TA', 'Trial Arms', ['STUDYID', 'TAETORD'], {'STUDYID': ['EX1'], 'TAETORD': np.array([1], dtype=np.int32)})
+	"""
+	xpt_dataset = func_nihpo_xpt_open(in_filename, in_dataset_name, in_dataset_label, in_variables if (in_variables is not None) else func_nihpo_xpt_variables(in_columns, in_data))
+	var_number_rows = len(in_data[in_columns[0]]) if (len(in_columns) > 0) else 0
+	for var_start in range(0, var_number_rows, CT_XPT_ROW_BATCH):
+		func_nihpo_xpt_write_columns(xpt_dataset, {column: in_data[column][var_start:var_start + CT_XPT_ROW_BATCH] for column in in_columns})
+	#
+	return func_nihpo_xpt_close(xpt_dataset)
+#
+#
+def func_nihpo_xpt_ibm_to_ieee (in_bytes):
+	"""
+	This function converts IBM mainframe double precision values, as stored in SAS Transport files, to float64.
+	Inputs:
+		in_bytes : [Array of uint8] : One row of 3 to 8 bytes (big-endian) per value. Short (truncated) values are padded with zeros.
+
+	Return:
+		NumPy array of float64. SAS missing values ("." , "_" and ".A" to ".Z") are NaN.
+
+	To call this function:
+		func_nihpo_xpt_ibm_to_ieee(np.array([[65, 16, 0, 0, 0, 0, 0, 0]], dtype=np.uint8))
+	"""
+	var_number_values, var_length = in_bytes.shape
+	array_full = np.zeros((var_number_values, 8), dtype=np.uint8)
+	array_full[:, :var_length] = in_bytes
+	array_ibm = array_full.view('>u8').ravel().astype(np.uint64)
+	#
+	# value = fraction * 2**-56 * 16**(exponent - 64)
+	array_fraction = (array_ibm & np.uint64(0x00FFFFFFFFFFFFFF)).astype(np.float64)
+	array_exponent = ((array_ibm >> np.uint64(56)) & np.uint64(0x7F)).astype(np.int64)
+	array_values = np.ldexp(array_fraction, 4 * array_exponent - 312)
+	array_values[(array_ibm >> np.uint64(63)) == 1] *= -1
+	#
+	# Missing values: first byte is ".", "_" or a letter, all other bytes are zero.
+	array_first = array_full[:, 0]
+	array_missing = ((array_first == 0x2E) | (array_first == 0x5F) | ((array_first >= 0x41) & (array_first <= 0x5A))) & (array_full[:, 1:] == 0).all(axis=1)
+	array_values[array_missing] = np.nan
+	#
+	return array_values
+#
+#
+def func_nihpo_xpt_reader_open (in_filename):
+	"""
+	This function memory-maps a transport file and parses its headers once. Observations are not read until they are used.
+	Only the first dataset of the file is read (FDA submissions have one dataset per file).
+	Inputs:
+		in_filename : [String] : Transport file.
+
+	Return:
+		Dictionary with the dataset name, label, variables and number of observations.
+		Its 'observations' entry is a read-only NumPy view (one row of bytes per observation) over the file: slicing it does not copy or read the rest of the file.
+
+	To call this function:
+		xpt_LB = func_nihpo_xpt_reader_open('lb.xpt')
+	"""
+	file_xpt = open(in_filename, 'rb')
+	mmap_xpt = mmap.mmap(file_xpt.fileno(), 0, access=mmap.ACCESS_READ)
+	var_file_size = len(mmap_xpt)
+	assert (mmap_xpt[0:CT_XPT_RECORD_LENGTH] == CT_XPT_LIBRARY_HEADER),"[%s] is not a SAS Transport version 5 file." % (in_filename)
+	#
+	# Library header (3 records), member header, descriptor header, 2 descriptor records, namestr header:
+	var_member_header = mmap_xpt[3 * CT_XPT_RECORD_LENGTH:4 * CT_XPT_RECORD_LENGTH]
+	assert (var_member_header[:48] == CT_XPT_MEMBER_HEADER[:48]),"[%s] has no member header." % (in_filename)
+	var_namestr_length = int(var_member_header[74:78])		# 140, or 136 for files written on VAX/VMS.
+	var_descriptor_1 = mmap_xpt[5 * CT_XPT_RECORD_LENGTH:6 * CT_XPT_RECORD_LENGTH].decode(CT_XPT_ENCODING)
+	var_descriptor_2 = mmap_xpt[6 * CT_XPT_RECORD_LENGTH:7 * CT_XPT_RECORD_LENGTH].decode(CT_XPT_ENCODING)
+	var_number_variables = int(mmap_xpt[7 * CT_XPT_RECORD_LENGTH + 54:7 * CT_XPT_RECORD_LENGTH + 58])
+	#
+	var_namestr_start = 8 * CT_XPT_RECORD_LENGTH
+	list_variables = []
+	list_offsets = []
+	for var_number in range(var_number_variables):
+		var_start = var_namestr_start + var_number * var_namestr_length
+		var_namestr = mmap_xpt[var_start:var_start + var_namestr_length].ljust(CT_XPT_NAMESTR_LENGTH, b'\x00')
+		ntype, nhfun, nlng, nvar0, nname, nlabel, nform, nfl, nfd, nfj, nfill, niform, nifl, nifd, npos, rest = CT_XPT_NAMESTR_STRUCT.unpack(var_namestr)
+		var_name = nname.decode(CT_XPT_ENCODING).rstrip()
+		variable = func_nihpo_xpt_variable(var_name, 'num' if (ntype == 1) else 'char', nlng, nlabel.decode(CT_XPT_ENCODING).rstrip())
+		list_variables.append(variable)
+		list_offsets.append(npos)
+	#
+	var_namestr_end = var_namestr_start + var_number_variables * var_namestr_length
+	var_obs_header = var_namestr_end + (-var_namestr_end % CT_XPT_RECORD_LENGTH)
+	assert (mmap_xpt[var_obs_header:var_obs_header + CT_XPT_RECORD_LENGTH] == CT_XPT_OBS_HEADER),"[%s] has no observation header where expected." % (in_filename)
+	var_data_start = var_obs_header + CT_XPT_RECORD_LENGTH
+	var_row_length = max([offset + variable['length'] for variable, offset in zip(list_variables, list_offsets)] + [0])
+	#
+	# The last record is padded with blanks: rows made only of blanks, inside the last 80 bytes of the file, are padding.
+	# (A real observation with every value blank, in the last record, can not be told apart from padding. SAS has the same limitation.)
+	var_number_rows = ((var_file_size - var_data_start) // var_row_length) if (var_row_length > 0) else 0
+	array_observations = np.frombuffer(mmap_xpt, dtype=np.uint8, count=var_number_rows * var_row_length, offset=var_data_start).reshape(var_number_rows, var_row_length)
+	while (var_number_rows > 0) and (var_data_start + (var_number_rows - 1) * var_row_length >= var_file_size - CT_XPT_RECORD_LENGTH) and (array_observations[var_number_rows - 1] == 32).all():
+		var_number_rows -= 1
+	#
+	return {'file': file_xpt, 'mmap': mmap_xpt, 'filename': in_filename, 'dataset_name': var_descriptor_1[8:16].rstrip(), 'dataset_label': var_descriptor_2[32:72].rstrip(),
+		'variables': list_variables, 'offsets': list_offsets, 'names': {variable['name']: position for position, variable in enumerate(list_variables)},
+		'row_length': var_row_length, 'rows': var_number_rows, 'observations': array_observations[:var_number_rows]}
+#
+#
+def func_nihpo_xpt_reader_column (in_reader, in_name, in_start=0, in_stop=None):
+	"""
+	This function decodes the values of one variable, for a range of observations. Only the bytes of that range are read from the file.
+	Inputs:
+		in_reader : [Dictionary] : Returned by func_nihpo_xpt_reader_open().
+		in_name : [String] : Variable name.
+		in_start : [Integer] : First observation (0-based).
+		in_stop : [Integer] : Observation after the last one. None reads to the end.
+
+	Return:
+		NumPy array: float64 for 'num' variables (NaN for missing values), str for 'char' variables (trailing blanks removed).
+
+	To call this function:
+		func_nihpo_xpt_reader_column(xpt_LB, 'LBSTRESN', 1000000, 1000100)
+	"""
+	assert (in_name.upper() in in_reader['names']),"Variable [%s] is not in [%s]" % (in_name, in_reader['filename'])
+	var_position = in_reader['names'][in_name.upper()]
+	variable = in_reader['variables'][var_position]
+	var_offset = in_reader['offsets'][var_position]
+	array_bytes = in_reader['observations'][in_start:in_stop, var_offset:var_offset + variable['length']]
+	#
+	if (variable['type'] == 'num'):
+		return func_nihpo_xpt_ibm_to_ieee(array_bytes)
+	#
+	array_text = np.ascontiguousarray(array_bytes).view('S%d' % (variable['length'])).ravel()
+	return np.char.decode(np.char.rstrip(array_text, b' '), CT_XPT_ENCODING)
+#
+#
+def func_nihpo_xpt_reader_row (in_reader, in_row):
+	"""
+	This function decodes one observation.
+	Inputs:
+		in_reader : [Dictionary] : Returned by func_nihpo_xpt_reader_open().
+		in_row : [Integer] : Observation number (0-based).
+
+	Return:
+		Dictionary of values, keyed by variable name.
+
+	To call this function:
+		func_nihpo_xpt_reader_row(xpt_LB, 1000000)
+	"""
+	assert (0 <= in_row < in_reader['rows']),"[%s] has %d observations." % (in_reader['filename'], in_reader['rows'])
+	return {variable['name']: func_nihpo_xpt_reader_column(in_reader, variable['name'], in_row, in_row + 1)[0].item() for variable in in_reader['variables']}
+#
+#
+def func_nihpo_xpt_reader_close (in_reader):
+	"""
+	This function unmaps and closes a transport file. Arrays still referring to its observations must be deleted first.
+	Inputs:
+		in_reader : [Dictionary] : Returned by func_nihpo_xpt_reader_open().
+
+	To call this function:
+		func_nihpo_xpt_reader_close(xpt_LB)
+	"""
+	del in_reader['observations']
+	in_reader['mmap'].close()
+	in_reader['file'].close()
+#
+#
+def func_nihpo_xpt_compare (in_filename, in_columns, in_data):
+	"""
+	This function reads a transport file back and compares it with the data it was written from.
+	Inputs:
+		in_filename : [String] : Transport file.
+		in_columns : [List] : Column names, in dataset order.
+		in_data : [Dictionary] : Values of each column, as given to func_nihpo_xpt_write_dataset().
+
+	Return:
+		List of differences (empty when the file matches the data).
+
+	To call this function:
+		func_nihpo_xpt_compare('ta.xpt', ['STUDYID', 'TAETORD'], {'STUDYID': ['EX1'], 'TAETORD': np.array([1], dtype=np.int32)})
+	"""
+	list_differences = []
+	xpt_reader = func_nihpo_xpt_reader_open(in_filename)
+	list_expected_names = [column.upper()[:8] for column in in_columns]
+	list_names = [variable['name'] for variable in xpt_reader['variables']]
+	if (list_names != list_expected_names):
+		list_differences.append("Variables %s, expected %s" % (list_names, list_expected_names))
+	#
+	var_expected_rows = len(in_data[in_columns[0]]) if (len(in_columns) > 0) else 0
+	if (xpt_reader['rows'] != var_expected_rows):
+		list_differences.append("%d observations, expected %d" % (xpt_reader['rows'], var_expected_rows))
+	#
+	if (len(list_differences) == 0):
+		for column in in_columns:
+			array_read = func_nihpo_xpt_reader_column(xpt_reader, column)
+			values = in_data[column]
+			if isinstance(values, np.ndarray) and (values.dtype.kind in 'iufb'):
+				array_expected = values.astype(np.float64)
+				array_different = ~((array_read == array_expected) | (np.isnan(array_read) & np.isnan(array_expected)))
+			else:
+				array_expected = np.char.rstrip(np.char.decode(func_nihpo_xpt_encode(values), CT_XPT_ENCODING), ' ')
+				array_different = (array_read != array_expected)
+			#
+			if array_different.any():
+				var_first = int(np.flatnonzero(array_different)[0])
+				list_differences.append("%s: %d values differ, first at observation %d: [%s] expected [%s]" % (column, int(array_different.sum()), var_first, array_read[var_first], array_expected[var_first]))
+			del array_read
+	#
+	func_nihpo_xpt_reader_close(xpt_reader)
+	return list_differences
+#
+#
+if __name__ == '__main__':
+	# Quick look at transport files: python3 PHUSE_XPT.py lb.xpt [more files]
+	for var_filename in sys.argv[1:]:
+		xpt_reader = func_nihpo_xpt_reader_open(var_filename)
+		print ("%s: dataset %s (%s), %d observations of %d bytes" % (var_filename, xpt_reader['dataset_name'], xpt_reader['dataset_label'], xpt_reader['rows'], xpt_reader['row_length']))
+		for variable in xpt_reader['variables']:
+			print ("\t%-8s %-4s %3d  %s" % (variable['name'], variable['type'], variable['length'], variable['label']))
+		if (xpt_reader['rows'] > 0):
+			print ("\tFirst observation: %s" % (func_nihpo_xpt_reader_row(xpt_reader, 0)))
+		func_nihpo_xpt_reader_close(xpt_reader)
+#
@@ -18,6 +18,8 @@ For example:
 
 Requirements:
 * This script requires Pythin 3.7x
+* NumPy: pip3 install numpy
+* The files "PHUSE_ADaM_Dataset.py", "PHUSE_Adverse_Events.py", "PHUSE_Codelists.py" and "PHUSE_Row_Templates.py" must be in the same directory as this script.
 * The SQLite3 file "Synthetic_Health_Data_NIHPO.sqlite3" must be in the current directory. [Available at https://github.com/phuse-org/PODR/tree/master/sample_code]
 """
 
@@ -31,6 +33,19 @@ import sqlite3
 import sys
 import uuid
 #
+try:
+	import numpy as np
+except ImportError:
+	print("Install NumPy: pip3 install numpy")
+	sys.exit(1)
+#
+import PHUSE_ADaM_Dataset
+import PHUSE_Adverse_Events
+import PHUSE_Build_Database
+import PHUSE_Codelists
+import PHUSE_Row_Templates
+import PHUSE_Subject_Index
+#
 CT_DEBUG = 0		# Set to 0 (digit zero) to avoid debug messages.
 #
 # = = = Trial definition = = =
@@ -181,7 +196,15 @@ CT_INVESTIGATORS = [['Investigator 01', 'INV01'], ['Investigator 02', 'INV02'],
 CT_PERCENTAGE_DEATHS = ['DEATH'] * 15 + ['NONE'] * 85					# Percentage of subjects that die during the trial.
 CT_CAUSES_DEATH = ['CAUSE OF DEATH 01'] * 15 + ['CAUSE OF DEATH 02'] * 35 + ['CAUSE OF DEATH 03'] * 50
 CT_PERCENTAGE_DISCONTINUATION = ['DROP-OFF'] * 23 + ['FINISH'] * 77 	# Percentage of subjects that do not finish all phases of the trial.
-CT_PERCENTAGE_ADVERSE_EVENTS = ['ADV-EV'] * 10 + ['NONE'] * 90			# Percentage of subjects taht experience at least 01 adverse event.
+#
+# Number of Adverse Events per subject, by Arm code. Distribution is 'poisson' (with "mean") or 'negative_binomial' (with "mean" and "dispersion").
+# Optional "maximum" caps the number of Adverse Events per subject.
+CT_AE_EVENT_COUNT_BY_ARM = {
+	'ARM01': {"distribution": "poisson", "mean": 0.6},
+	'ARM02': {"distribution": "negative_binomial", "mean": 1.4, "dispersion": 0.8, "maximum": 25},
+	'ARM03': {"distribution": "negative_binomial", "mean": 2.1, "dispersion": 0.8, "maximum": 25},
+}
+CT_AE_BATCH_SUBJECTS = 10000		# Number of subjects whose Adverse Events are generated together.
 #
 CT_GROUPS = ['Group_01'] * 10 + ['Group_02'] * 20 + ['Group_03'] * 50 + ['Group_04'] * 20
 CT_ARM_NAMES = [['Arm 01', 'ARM01'], ['Arm 02', 'ARM02'], ['Arm 03', 'ARM03']]
@@ -190,6 +213,14 @@ CT_COUNTRY_ENROLLMENT = ['DE'] * 30 + ['ES'] * 20 + ['UK'] * 20 + ['VE'] * 10 +
 #
 CT_CSV_SEPARATOR = "|"	# Try NOT to use ',' (commas) to prevent file importing errors.
 #
+# ADSL and ADAE are also kept in memory as typed columns (see PHUSE_ADaM_Dataset.py), for derivations and checks on the generated data.
+# Codelist values are stored as small integer codes; columns not listed are text.
+CT_ADSL_COLUMN_TYPES = {'SITEID': ('category', 'SITEID'), 'AGE': 'integer', 'SEX': ('codelist', 'C66731'), 'RACE': ('codelist', 'C74457'), 'ETHNIC': ('category', 'ETHNIC'), 'COUNTRY': ('category', 'COUNTRY'),
+	'BRTHDTC': 'date', 'DTHDTC': 'date', 'DTHFL': ('codelist', 'C66742'), 'RFSTDTC': 'date', 'RFENDTC': 'date', 'ARMCD': ('category', 'ARMCD'), 'ITTFL': ('codelist', 'C66742'), 'SAFFL': ('codelist', 'C66742'),
+	'EOSSTT': ('codelist', 'C124296'), 'EOTSTT': ('codelist', 'C124296'), 'DCSREAS': ('codelist', 'C66727'), 'DTHDT': 'date', 'DTHADY': 'integer', 'AEWITHFL': ('codelist', 'C66742')}
+CT_ADAE_COLUMN_TYPES = {'AESEQ': 'integer', 'AESEV': ('codelist', 'C66769'), 'AESER': ('codelist', 'C66742'), 'AEOUT': ('codelist', 'C66768'), 'AESDTH': ('codelist', 'C66742'), 'EPOCH': ('codelist', 'C99079'),
+	'AESTDTC': 'date', 'AEENDTC': 'date', 'AESTDY': 'integer', 'AEENDY': 'integer'}
+#
 # = = = = = Do not change anything below this line = = = = =
 #
 if (len(sys.argv) != 6):
@@ -239,13 +270,15 @@ const_header_02 = """# This file was generated using the following parameters:
 #
 # Open SQLite3 file:
 try:
-	nihpo_conn = sqlite3.connect('file:Synthetic_Health_Data_NIHPO.sqlite3?mode=ro', uri=True)
+	nihpo_conn = PHUSE_Build_Database.func_nihpo_database_connect('Synthetic_Health_Data_NIHPO.sqlite3')		# Read-only and memory-mapped (immutable when built by PHUSE_Build_Database.py).
 	nihpo_cursor = nihpo_conn.cursor()
 except sqlite3.Error as e:
 	print ("The SQLite3 file 'Synthetic_Health_Data_NIHPO.sqlite3' should be in your local path.")
 	print ("Error {}:".format(e.args[0]))
 	sys.exit(1)
 #
+nihpo_rng = np.random.default_rng()
+#
 #
 # = = = Common functions = = =
 def func_nihpo_synth_data_random_value (in_sqlite3_cursor, in_codelist):
@@ -375,31 +408,48 @@ var_output_file_ADSL = csv.writer(open(r"ADSL.csv", "w"), delimiter=CT_CSV_SEPAR
 var_output_file_ADSL.writerow([const_header_01])
 var_output_file_ADSL.writerow([const_header_02])
 var_output_file_ADSL.writerow(["# Dataset: ADSL", "Description: Subject Level Analysis Dataset"])
-var_output_file_ADSL.writerow(["STUDYID", "USUBJID",  "SUBJID", "SITEID", "AGE", "AGEU", "SEX", "RACE", "ETHNIC", "COUNTRY", "DMDTC", "DMDY", "BRTHDTC", "DTHDTC", "DTHFL", "RFSTDTC", "RFENDTC", "RFXSTDTC", "RFXENDTC", "RFICDTC", "RFPENDTC", "INVID", "INVNAM", "ARM", "ARMCD", "ACTARM", "ACTARMCD", "BRTHDTF", "AAGE", "AAGEU", "AGEGR1", "ITTFL", "SAFFL", "PPROTFL", "FASFL", "TRT01P", "TRT01A", "RFICDT", "RANDDT", "BRTHDT", "TRTSDTM", "TRTSDT", "TRTEDTM", "TRTEDT", "TRTDURD", "EOSSTT", "EOSDT", "EOTSTT", "EOSDY", "EOSRDY", "DCSREAS", "DCSREASP", "DTHDT", "DTHCAUS", "ADTHAUT", "DTHADY", "AEWITHFL", "LSTALVDT"])
+list_header_ADSL = ["STUDYID", "USUBJID",  "SUBJID", "SITEID", "AGE", "AGEU", "SEX", "RACE", "ETHNIC", "COUNTRY", "DMDTC", "DMDY", "BRTHDTC", "DTHDTC", "DTHFL", "RFSTDTC", "RFENDTC", "RFXSTDTC", "RFXENDTC", "RFICDTC", "RFPENDTC", "INVID", "INVNAM", "ARM", "ARMCD", "ACTARM", "ACTARMCD", "BRTHDTF", "AAGE", "AAGEU", "AGEGR1", "ITTFL", "SAFFL", "PPROTFL", "FASFL", "TRT01P", "TRT01A", "RFICDT", "RANDDT", "BRTHDT", "TRTSDTM", "TRTSDT", "TRTEDTM", "TRTEDT", "TRTDURD", "EOSSTT", "EOSDT", "EOTSTT", "EOSDY", "EOSRDY", "DCSREAS", "DCSREASP", "DTHDT", "DTHCAUS", "ADTHAUT", "DTHADY", "AEWITHFL", "LSTALVDT"]
+var_output_file_ADSL.writerow(list_header_ADSL)
 #
-var_output_file_ADAE = csv.writer(open(r"ADAE.csv", "w"), delimiter=CT_CSV_SEPARATOR, quoting=csv.QUOTE_MINIMAL)
+var_output_handle_ADAE = open(r"ADAE.csv", "w")
+var_output_file_ADAE = csv.writer(var_output_handle_ADAE, delimiter=CT_CSV_SEPARATOR, quoting=csv.QUOTE_MINIMAL)
 var_output_file_ADAE.writerow([const_header_01])
 var_output_file_ADAE.writerow([const_header_02])
 var_output_file_ADAE.writerow(["# Dataset: ADAE", "Description: Adverse Events Analysis Dataset"])
-var_output_file_ADAE.writerow([	"STUDYID", "USUBJID", "SUBJID", "SITEID", "COUNTRY", "ETHNIC", "AGE", "AGEU", "AAGE", "AAGEU", "SEX", "RACE", "ITTFL", "SAFFL", "PPROTFL", "TRT01P", "TRT01A", "TRTSDTM", "TRTSDT", "TRTEDTM", "TRTEDT", "DOMAIN", "AESEQ", "AEGRPID", "AESPID", "AETERM", "AEMODIFY", "AELLT", "AELLTCD", "AEDECOD", "AEPTCD", "AEHLT", "AEHLTCD", "AEHLGT", "AEHLGTCD", "AECAT", "AESCAT", "AEPRESP", "AEBODSYS", "AEBDSYCD", "AESOC", "AESOCCD", "AELOC", "AESEV", "AESER", "AEACN", "AEACNOTH", "AEREL", "AERELNST", "AEPATT", "AEOUT", "AESCAN", "AESCONG", "AESDISAB", "AESDTH", "AESHOSP", "AESLIFE", "AESOD", "AESMIE", "AECONTRT", "AETOXGR", "EPOCH", "AESTDTC", "AEENDTC", "AESTDY", "AEENDY", "AEDUR", "AESTRTPT", "AESTTPT", "AEENRTPT", "AEENTPT", "AETRTEM", "ASTDTM", "ASTDT", "ASTDTF", "ASTTMF", "ASTDY", "AENDTM", "AENDT", "AENDTF", "AENTMF", "AENDY", "TRTEMFL", "PREFL", "FUPFL", "AREL", "ATOXGR", "ADURN", "ADURU", "LDOSEDTM", "LDOSEDT", "LDRELD", "AOCCIFL", "AOCCPIFL", "AOCCSIFL", "AOCXIFL", "AOCXPIFL", "AOCXSIFL", "ANL01FL"])
+list_header_ADAE = ["STUDYID", "USUBJID", "SUBJID", "SITEID", "COUNTRY", "ETHNIC", "AGE", "AGEU", "AAGE", "AAGEU", "SEX", "RACE", "ITTFL", "SAFFL", "PPROTFL", "TRT01P", "TRT01A", "TRTSDTM", "TRTSDT", "TRTEDTM", "TRTEDT", "DOMAIN", "AESEQ", "AEGRPID", "AESPID", "AETERM", "AEMODIFY", "AELLT", "AELLTCD", "AEDECOD", "AEPTCD", "AEHLT", "AEHLTCD", "AEHLGT", "AEHLGTCD", "AECAT", "AESCAT", "AEPRESP", "AEBODSYS", "AEBDSYCD", "AESOC", "AESOCCD", "AELOC", "AESEV", "AESER", "AEACN", "AEACNOTH", "AEREL", "AERELNST", "AEPATT", "AEOUT", "AESCAN", "AESCONG", "AESDISAB", "AESDTH", "AESHOSP", "AESLIFE", "AESOD", "AESMIE", "AECONTRT", "AETOXGR", "EPOCH", "AESTDTC", "AEENDTC", "AESTDY", "AEENDY", "AEDUR", "AESTRTPT", "AESTTPT", "AEENRTPT", "AEENTPT", "AETRTEM", "ASTDTM", "ASTDT", "ASTDTF", "ASTTMF", "ASTDY", "AENDTM", "AENDT", "AENDTF", "AENTMF", "AENDY", "TRTEMFL", "PREFL", "FUPFL", "AREL", "ATOXGR", "ADURN", "ADURU", "LDOSEDTM", "LDOSEDT", "LDRELD", "AOCCIFL", "AOCCPIFL", "AOCCSIFL", "AOCXIFL", "AOCXPIFL", "AOCXSIFL", "ANL01FL"]
+var_output_file_ADAE.writerow(list_header_ADAE)
 #
-var_output_file_ADLB = csv.writer(open(r"ADLB.csv", "w"), delimiter=CT_CSV_SEPARATOR, quoting=csv.QUOTE_MINIMAL)
+var_output_handle_ADLB = open(r"ADLB.csv", "w")
+var_output_file_ADLB = csv.writer(var_output_handle_ADLB, delimiter=CT_CSV_SEPARATOR, quoting=csv.QUOTE_MINIMAL)
 var_output_file_ADLB.writerow([const_header_01])
 var_output_file_ADLB.writerow([const_header_02])
 var_output_file_ADLB.writerow(["# Dataset: ADLB", "Description: Laboratory Analysis Dataset"])
-var_output_file_ADLB.writerow(['STUDYID', 'USUBJID', 'SUBJID', 'SITEID', 'ASEQ', 'COUNTRY', 'ETHNIC', 'AGE', 'AGEU', 'AAGE', 'AAGEU', 'SEX', 'RACE', 'ITTFL', 'SAFFL', 'PPROTFL', 'TRT01P', 'TRT01A', 'TRTSDTM', 'TRTSDT', 'TRTEDTM', 'TRTEDT', 'DOMAIN', 'LBSEQ', 'LBGRPID', 'LBREFID', 'LBSPID', 'LBTESTCD', 'LBTEST', 'LBCAT', 'LBSCAT', 'LBORRES', 'LBORRESU', 'LBORNRLO', 'LBORNRHI', 'LBSTRESC', 'LBSTRESN', 'LBSTRESU', 'LBSTNRLO', 'LBSTNRHI', 'LBSTNRC', 'LBNRIND', 'LBSTAT', 'LBREASND', 'LBNAM', 'LBSPEC', 'LBSPCCND', 'LBMETHOD', 'LBBLFL', 'LBFAST', 'VISITNUM', 'VISIT', 'EPOCH', 'LBDTC', 'LBENDTC', 'LBDY', 'LBENDY', 'LBTPT', 'LBTPTNUM', 'LBELTM', 'LBTPTREF', 'LBTSTDTL', 'PARAM', 'PARAMCD', 'PARCAT1', 'PARCAT2', 'AVAL', 'AVALC', 'AVALU', 'AVALCAT1', 'BASE', 'BASETYPE', 'ABLFL', 'CHG', 'PCHG', 'ANRHI', 'ANRLO', 'ANRIND', 'BNRIND', 'R2BASE', 'R2ANRLO', 'R2ANRHI', 'SHIFT1', 'ATOXGR', 'BTOXGR', 'ADTM', 'ADT', 'ADTF', 'ATMF', 'ADY', 'ATPT', 'ATPTN', 'AVISIT', 'AVISITN', 'ONTRTFL', 'LAST01FL', 'WORS01FL', 'WGRHIFL', 'WGRLOFL', 'WGRHIVFL', 'WGRLOVFL', 'ANL01FL'])
+list_header_ADLB = ['STUDYID', 'USUBJID', 'SUBJID', 'SITEID', 'ASEQ', 'COUNTRY', 'ETHNIC', 'AGE', 'AGEU', 'AAGE', 'AAGEU', 'SEX', 'RACE', 'ITTFL', 'SAFFL', 'PPROTFL', 'TRT01P', 'TRT01A', 'TRTSDTM', 'TRTSDT', 'TRTEDTM', 'TRTEDT', 'DOMAIN', 'LBSEQ', 'LBGRPID', 'LBREFID', 'LBSPID', 'LBTESTCD', 'LBTEST', 'LBCAT', 'LBSCAT', 'LBORRES', 'LBORRESU', 'LBORNRLO', 'LBORNRHI', 'LBSTRESC', 'LBSTRESN', 'LBSTRESU', 'LBSTNRLO', 'LBSTNRHI', 'LBSTNRC', 'LBNRIND', 'LBSTAT', 'LBREASND', 'LBNAM', 'LBSPEC', 'LBSPCCND', 'LBMETHOD', 'LBBLFL', 'LBFAST', 'VISITNUM', 'VISIT', 'EPOCH', 'LBDTC', 'LBENDTC', 'LBDY', 'LBENDY', 'LBTPT', 'LBTPTNUM', 'LBELTM', 'LBTPTREF', 'LBTSTDTL', 'PARAM', 'PARAMCD', 'PARCAT1', 'PARCAT2', 'AVAL', 'AVALC', 'AVALU', 'AVALCAT1', 'BASE', 'BASETYPE', 'ABLFL', 'CHG', 'PCHG', 'ANRHI', 'ANRLO', 'ANRIND', 'BNRIND', 'R2BASE', 'R2ANRLO', 'R2ANRHI', 'SHIFT1', 'ATOXGR', 'BTOXGR', 'ADTM', 'ADT', 'ADTF', 'ATMF', 'ADY', 'ATPT', 'ATPTN', 'AVISIT', 'AVISITN', 'ONTRTFL', 'LAST01FL', 'WORS01FL', 'WGRHIFL', 'WGRLOFL', 'WGRHIVFL', 'WGRLOVFL', 'ANL01FL']
+var_output_file_ADLB.writerow(list_header_ADLB)
 #
-var_output_file_ADHY = csv.writer(open(r"ADHY.csv", "w"), delimiter=CT_CSV_SEPARATOR, quoting=csv.QUOTE_MINIMAL)
+var_output_handle_ADHY = open(r"ADHY.csv", "w")
+var_output_file_ADHY = csv.writer(var_output_handle_ADHY, delimiter=CT_CSV_SEPARATOR, quoting=csv.QUOTE_MINIMAL)
 var_output_file_ADHY.writerow([const_header_01])
 var_output_file_ADHY.writerow([const_header_02])
 var_output_file_ADHY.writerow(["# Dataset: ADHY", "Description: Hys Law Analysis Dataset"])
-var_output_file_ADHY.writerow(['STUDYID','USUBJID','SUBJID','SITEID','ASEQ','COUNTRY','ETHNIC','AGE','AGEU','AAGE','AAGEU','SEX','RACE','ITTFL','SAFFL','PPROTFL','TRT01P','TRT01A','TRTSDTM','TRTSDT','TRTEDTM','TRTEDT','PARAM','PARAMCD','AVAL','AVALC','AVALU','BASE','BASEC','ABLFL','ANRLO','ANRHI','ADTM','ADT','ADY','ADTF','ATMF','AVISIT','AVISITN','ONTRTFL','CRIT1','CRIT1FL','CRIT1FN','CRIT2','CRIT2FL','CRIT2FN','MCRIT1','MCRIT1ML','SRCDOM','SRCVAR','SRCSEQ','ANL01FL'])
+list_header_ADHY = ['STUDYID','USUBJID','SUBJID','SITEID','ASEQ','COUNTRY','ETHNIC','AGE','AGEU','AAGE','AAGEU','SEX','RACE','ITTFL','SAFFL','PPROTFL','TRT01P','TRT01A','TRTSDTM','TRTSDT','TRTEDTM','TRTEDT','PARAM','PARAMCD','AVAL','AVALC','AVALU','BASE','BASEC','ABLFL','ANRLO','ANRHI','ADTM','ADT','ADY','ADTF','ATMF','AVISIT','AVISITN','ONTRTFL','CRIT1','CRIT1FL','CRIT1FN','CRIT2','CRIT2FL','CRIT2FN','MCRIT1','MCRIT1ML','SRCDOM','SRCVAR','SRCSEQ','ANL01FL']
+var_output_file_ADHY.writerow(list_header_ADHY)
 #
-var_output_file_ADSAFTTE = csv.writer(open(r"ADSAFTTE.csv", "w"), delimiter=CT_CSV_SEPARATOR, quoting=csv.QUOTE_MINIMAL)
+var_output_handle_ADSAFTTE = open(r"ADSAFTTE.csv", "w")
+var_output_file_ADSAFTTE = csv.writer(var_output_handle_ADSAFTTE, delimiter=CT_CSV_SEPARATOR, quoting=csv.QUOTE_MINIMAL)
 var_output_file_ADSAFTTE.writerow([const_header_01])
 var_output_file_ADSAFTTE.writerow([const_header_02])
 var_output_file_ADSAFTTE.writerow(["# Dataset: ADSAFTTE", "Description: Safety Time to Event Analysis Dataset"])
-var_output_file_ADSAFTTE.writerow(['STUDYID','USUBJID','SUBJID','SITEID','ASEQ','REGION1','COUNTRY','ETHNIC','AGE','AGEU','AAGE','AAGEU','AGEGR1','AGEGR2','AGEGR3','STRATwNM','STRATw','STRATwV','SEX','RACE','ITTFL','SAFFL','PPROTFL','TRT01P','TRTxxP','TRT01A','TRTxxA','TRTSEQP','TRTSEQA','TRTSDTM','TRTSDT','TRTEDTM','TRTEDT','DCUTDT','PARAM','PARAMCD','PARCAT1','AVAL','AVALU','STARTDT','STARTDTF','ADT','ADY','ADTF','CNSR','EVNTDESC','CNSDTDSC','SRCDOM','SRCVAR','SRCSEQ','ANL01FL'])
+list_header_ADSAFTTE = ['STUDYID','USUBJID','SUBJID','SITEID','ASEQ','REGION1','COUNTRY','ETHNIC','AGE','AGEU','AAGE','AAGEU','AGEGR1','AGEGR2','AGEGR3','STRATwNM','STRATw','STRATwV','SEX','RACE','ITTFL','SAFFL','PPROTFL','TRT01P','TRTxxP','TRT01A','TRTxxA','TRTSEQP','TRTSEQA','TRTSDTM','TRTSDT','TRTEDTM','TRTEDT','DCUTDT','PARAM','PARAMCD','PARCAT1','AVAL','AVALU','STARTDT','STARTDTF','ADT','ADY','ADTF','CNSR','EVNTDESC','CNSDTDSC','SRCDOM','SRCVAR','SRCSEQ','ANL01FL']
+var_output_file_ADSAFTTE.writerow(list_header_ADSAFTTE)
+#
+# = = Row templates = =
+# ADSL values repeated on each ADAE, ADLB, ADHY and ADSAFTTE record are written once per subject (see PHUSE_Row_Templates.py).
+# Subject columns: STUDYID to TRTEDT, except the Analysis Sequence Number.
+template_ADAE = PHUSE_Row_Templates.func_nihpo_row_template_compile(list_header_ADAE, list_header_ADAE[0:list_header_ADAE.index('TRTEDT') + 1], CT_CSV_SEPARATOR)
+template_ADLB = PHUSE_Row_Templates.func_nihpo_row_template_compile(list_header_ADLB, [column for column in list_header_ADLB[0:list_header_ADLB.index('TRTEDT') + 1] if column != 'ASEQ'], CT_CSV_SEPARATOR)
+template_ADHY = PHUSE_Row_Templates.func_nihpo_row_template_compile(list_header_ADHY, [column for column in list_header_ADHY[0:list_header_ADHY.index('TRTEDT') + 1] if column != 'ASEQ'], CT_CSV_SEPARATOR)
+template_ADSAFTTE = PHUSE_Row_Templates.func_nihpo_row_template_compile(list_header_ADSAFTTE, [column for column in list_header_ADSAFTTE[0:list_header_ADSAFTTE.index('TRTEDT') + 1] if column != 'ASEQ'], CT_CSV_SEPARATOR)
 #
 
 
@@ -408,13 +458,174 @@ var_output_file_ADSAFTTE.writerow(['STUDYID','USUBJID','SUBJID','SITEID','ASEQ',
 # = =
 
 
+#
+#
+# Codelist-valued ADAE variables drawn in bulk for each batch (AESEV, AESER, AEOUT and the seriousness criteria come from PHUSE_Adverse_Events):
+CT_ADAE_CODELIST_COLUMNS = [('AEPRESP', 'C66742'), ('AELOC', 'C74456'), ('AEACN', 'C66767'), ('AERELNST', 'C66742'), ('AECONTRT', 'C66742'), ('EPOCH', 'C99079'), ('AESTRTPT', 'C66728'), ('AEENRTPT', 'C66728'), ('AETRTEM', 'C66742'), ('ASTDTF', 'C81223'), ('ASTTMF', 'C81226'), ('AENDTF', 'C81223'), ('AENTMF', 'C81226'), ('ADURU', 'C71620')]
+list_header_ADAE_memory = ['USUBJID', 'AESEQ', 'AESEV', 'AESER', 'AEOUT', 'AESDTH', 'EPOCH', 'AESTDTC', 'AEENDTC', 'AESTDY', 'AEENDY']
+dataset_ADSL = PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_create('ADSL', list_header_ADSL, CT_ADSL_COLUMN_TYPES)
+dataset_ADAE = PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_create('ADAE', list_header_ADAE_memory, CT_ADAE_COLUMN_TYPES)
+dict_ADAE_codelists = {'AESEV': PHUSE_Codelists.func_nihpo_codelist_values(nihpo_cursor, 'C66769'), 'AEOUT': PHUSE_Codelists.func_nihpo_codelist_values(nihpo_cursor, 'C66768')}
+#
+def func_nihpo_subject_row_template (in_template, in_position, in_values=None):
+	"""
+	This function binds a row template to the ADSL values of one subject, read from the subject index (index_ADSL).
+	Inputs:
+		in_template		[Dictionary]	Template returned by PHUSE_Row_Templates.func_nihpo_row_template_compile().
+		in_position		[Integer]		Position of the subject in index_ADSL.
+		in_values		[Dictionary]	Values of the subject columns not taken from ADSL, keyed by column name.
+
+	Return:
+		Dictionary to pass to PHUSE_Row_Templates.func_nihpo_row_template_write() for each record of this subject.
+
+	To call this function:
+		func_nihpo_subject_row_template(template_ADLB, 0, {'AAGE': "-AAGE-"})
+	"""
+	dict_values = dict(in_values or {})
+	array_position = np.array([in_position], dtype=np.int64)
+	for column in in_template['subject_columns']:
+		if column not in dict_values:
+			dict_values[column] = PHUSE_Subject_Index.func_nihpo_subject_index_take(index_ADSL, column, array_position)[0]
+	return PHUSE_Row_Templates.func_nihpo_row_template_bind(in_template, dict_values)
+#
+#
+def func_nihpo_write_ADAE_batch (in_positions):
+	"""
+	This function generates all Adverse Events of a batch of subjects, writes them to the ADAE file and appends them to dataset_ADAE.
+	Arm, reference start date, study window and death of each subject are read from the subject index (index_ADSL):
+	Adverse Events start and end between RFSTDTC and the end of the study window (CurrentDate, or the date of death). Only subjects who die (DTHFL = 'Y') can have a fatal Adverse Event.
+	Inputs:
+		in_positions	[NumPy array of Integers]	Positions of the subjects in index_ADSL.
+
+	Return:
+		Number of ADAE records written.
+
+	To call this function:
+		func_nihpo_write_ADAE_batch(np.arange(0, 10000))
+	"""
+	array_reference_dates = index_ADSL['window_start'][in_positions]
+	array_window_ends = PHUSE_Subject_Index.func_nihpo_subject_index_clip(index_ADSL, in_positions, np.full(len(in_positions), np.datetime64(CT_DATE_CURRENT_DATE.date(), 'D')))
+	array_window_days = ((array_window_ends - array_reference_dates) / np.timedelta64(1, 'D')).astype(np.int64)
+	array_arm_codes = PHUSE_Subject_Index.func_nihpo_subject_index_take(index_ADSL, 'ARMCD', in_positions)
+	array_deaths = (PHUSE_Subject_Index.func_nihpo_subject_index_take(index_ADSL, 'DTHFL', in_positions) == 'Y')
+	list_subjects = [func_nihpo_subject_row_template(template_ADAE, position) for position in in_positions.tolist()]
+	#
+	dict_ADAE_events = PHUSE_Adverse_Events.func_nihpo_ae_generate_events(nihpo_rng, array_arm_codes, array_reference_dates, array_window_days, CT_AE_EVENT_COUNT_BY_ARM, dict_ADAE_codelists, array_deaths)
+	var_number_events = len(dict_ADAE_events['AESEQ'])
+	#
+	array_ADAE_AESTDTC = np.datetime_as_string(dict_ADAE_events['AESTDTC'])
+	array_ADAE_AEENDTC = np.datetime_as_string(dict_ADAE_events['AEENDTC'])
+	array_ADAE_groups = nihpo_rng.choice(CT_GROUPS, var_number_events)
+	dict_ADAE_codelist_samples = {}
+	for var_column, var_codelist in CT_ADAE_CODELIST_COLUMNS:
+		dict_ADAE_codelist_samples[var_column] = PHUSE_Codelists.func_nihpo_codelist_sample(nihpo_rng, PHUSE_Codelists.func_nihpo_codelist_values(nihpo_cursor, var_codelist), var_number_events)
+	#
+	# Keep the whole batch in memory, as typed columns:
+	dict_ADAE_columns = {column: dict_ADAE_events[column] for column in list_header_ADAE_memory if column in dict_ADAE_events}
+	dict_ADAE_columns['USUBJID'] = PHUSE_Subject_Index.func_nihpo_subject_index_take(index_ADSL, 'USUBJID', in_positions[dict_ADAE_events['SUBJECT_INDEX']])
+	dict_ADAE_columns['EPOCH'] = dict_ADAE_codelist_samples['EPOCH']
+	PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_append_columns(dataset_ADAE, dict_ADAE_columns)
+	#
+	var_event = 0
+	while var_event < var_number_events:
+		var_ADAE_DOMAIN = "-DOMAIN-"											# Domain Abbreviation	text	2	C66734	SDTM Domain Abbreviation
+		var_ADAE_AESEQ = dict_ADAE_events['AESEQ'][var_event]								# Sequence Number	integer	8
+		var_ADAE_AEGRPID = array_ADAE_groups[var_event]								# Group ID	text	40		
+		var_ADAE_AESPID = str(uuid.uuid4())										# Sponsor-Defined Identifier	text	200
+		#
+		var_ADAE_AETERM = "-AETERM-"											# Reported Term for the Adverse Event	text	200		
+		var_ADAE_AEMODIFY = "-AEMODIFY-"										# Modified Reported Term	text	200		
+		var_ADAE_AELLT = "-AELLT-"												# Lowest Level Term	text	100		MedDRA
+		var_ADAE_AELLTCD = "-AELLTCD-"											# Lowest Level Term Code	integer	8		MedDRA
+		var_ADAE_AEDECOD = "-AEDECOD-"											# Dictionary-Derived Term	text	200		MedDRA
+		var_ADAE_AEPTCD = "-AEPTCD-"											# Preferred Term Code	integer	8		MedDRA
+		var_ADAE_AEHLT = "-AEHLT-"												# High Level Term	text	100		MedDRA
+		var_ADAE_AEHLTCD = "-AEHLTCD-"											# High Level Term Code	integer	8		MedDRA
+		var_ADAE_AEHLGT = "-AEHLGT-"											# High Level Group Term	text	100		MedDRA
+		var_ADAE_AEHLGTCD = "-AEHLGTCD-"										# High Level Group Term Code	integer	8		MedDRA
+		var_ADAE_AECAT = "-AECAT-"												# Category for Adverse Event	text	100		*
+		var_ADAE_AESCAT = "-AESCAT-"											# Subcategory for Adverse Event	text	100		
+		var_ADAE_AEPRESP = dict_ADAE_codelist_samples['AEPRESP'][var_event]			# Pre-Specified Adverse Event	text	2	C66742	No Yes Response
+		var_ADAE_AEBODSYS = "-AEBODSYS-"										# Body System or Organ Class	text	200		MedDRA
+		var_ADAE_AEBDSYCD = "-AEBDSYCD-"										# Body System or Organ Class Code	integer	8		MedDRA
+		var_ADAE_AESOC = "-AESOC-"												# Primary System Organ Class	text	200		MedDRA
+		var_ADAE_AESOCCD = "-AESOCCD-"											# Primary System Organ Class Code	integer	8		MedDRA
+		var_ADAE_AELOC = dict_ADAE_codelist_samples['AELOC'][var_event]					# Location of Event	text	200	C74456	Anatomical Location
+		var_ADAE_AESEV = dict_ADAE_events['AESEV'][var_event]					# Severity/Intensity	text	10	C66769	Severity/Intensity Scale for Adverse Events
+		var_ADAE_AESER = dict_ADAE_events['AESER'][var_event]					# Serious Event	text	2	C66742	No Yes Response
+		var_ADAE_AEACN = dict_ADAE_codelist_samples['AEACN'][var_event]					# Action Taken with Study Treatment	text	16	C66767	Action Taken with Study Treatment
+		var_ADAE_AEACNOTH = "-AEACNOTH-"										# Other Action Taken	text	200		
+		var_ADAE_AEREL = "-AEREL-"												# Causality	text	20		*
+		var_ADAE_AERELNST = dict_ADAE_codelist_samples['AERELNST'][var_event]				# Relationship to Non-Study Treatment	text	200	C66742	No Yes Response
+		var_ADAE_AEPATT = "-AEPATT-"									#	Pattern of Adverse Event	text	40	L00004	Adverse Event Pattern
+		var_ADAE_AEOUT = dict_ADAE_events['AEOUT'][var_event]					# Outcome of Adverse Event	text	40	C66768	Outcome of Event
+		var_ADAE_AESCAN = dict_ADAE_events['AESCAN'][var_event]				# Involves Cancer	text	2	C66742	No Yes Response
+		var_ADAE_AESCONG = dict_ADAE_events['AESCONG'][var_event]				# Congenital Anomaly or Birth Defect	text	2	C66742	No Yes Response
+		var_ADAE_AESDISAB = dict_ADAE_events['AESDISAB'][var_event]				# Persist or Signif Disability/Incapacity	text	2	C66742	No Yes Response
+		var_ADAE_AESDTH = dict_ADAE_events['AESDTH'][var_event]				# Results in Death	text	2	C66742	No Yes Response
+		var_ADAE_AESHOSP = dict_ADAE_events['AESHOSP'][var_event]				# Requires or Prolongs Hospitalization	text	2	C66742	No Yes Response
+		var_ADAE_AESLIFE = dict_ADAE_events['AESLIFE'][var_event]				# Is Life Threatening	text	2	C66742	No Yes Response
+		var_ADAE_AESOD = dict_ADAE_events['AESOD'][var_event]					# Occurred with Overdose	text	2	C66742	No Yes Response
+		var_ADAE_AESMIE = dict_ADAE_events['AESMIE'][var_event]				# Other Medically Important Serious Event	text	2	C66742	No Yes Response
+		var_ADAE_AECONTRT = dict_ADAE_codelist_samples['AECONTRT'][var_event]				# Concomitant or Additional Trtmnt Given	text	2	C66742	No Yes Response
+		var_ADAE_AETOXGR = "-AETOXGR-"											# Standard Toxicity Grade	text	1		*
+		#
+		var_ADAE_EPOCH = dict_ADAE_codelist_samples['EPOCH'][var_event]									#	Epoch	text	40	C99079	Epoch
+		var_ADAE_AESTDTC = array_ADAE_AESTDTC[var_event]											# Start Date/Time of Adverse Event	dateTime	25		ISO 8601
+		var_ADAE_AEENDTC = array_ADAE_AEENDTC[var_event]											# End Date/Time of Adverse Event	dateTime	25		ISO 8601
+		var_ADAE_AESTDY = dict_ADAE_events['AESTDY'][var_event]											# Study Day of Start of Adverse Event	integer	8		
+		var_ADAE_AEENDY = dict_ADAE_events['AEENDY'][var_event]											# Study Day of End of Adverse Event	integer	8		
+		var_ADAE_AEDUR = "P%dD" % (dict_ADAE_events['AEDURD'][var_event])												# Duration of Adverse Event	duration	25		ISO 8601
+		var_ADAE_AESTRTPT = dict_ADAE_codelist_samples['AESTRTPT'][var_event]									#	Start Relative to Reference Time Point	text	20	C66728	Relation to Reference Period
+		var_ADAE_AESTTPT = "-AESTTPT-"											# Start Reference Time Point	text	40		
+		var_ADAE_AEENRTPT = dict_ADAE_codelist_samples['AEENRTPT'][var_event]									#	End Relative to Reference Time Point	text	20	C66728	Relation to Reference Period
+		var_ADAE_AEENTPT = "-AEENTPT-"											# End Reference Time Point	text	40		
+		var_ADAE_AETRTEM = dict_ADAE_codelist_samples['AETRTEM'][var_event]									#	Treatment Emergent Flag	text	2	C66742	No Yes Response
+		#
+		var_ADAE_ASTDTM = "-ASTDTM-"											# Analysis Start Date/Time	integer	8		
+		var_ADAE_ASTDT = "-ASTDT-"												# Analysis Start Date	integer	8		
+		var_ADAE_ASTDTF = dict_ADAE_codelist_samples['ASTDTF'][var_event]									#	Analysis Start Date Imputation Flag	text	1	C81223	Date Imputation Flag
+		var_ADAE_ASTTMF = dict_ADAE_codelist_samples['ASTTMF'][var_event]									#	Analysis Start Time Imputation Flag	text	1	C81226	Time Imputation Flag
+		var_ADAE_ASTDY = "-ASTDY-"												# Analysis Start Relative Day	integer	8		
+		var_ADAE_AENDTM = "-AENDTM-"											# Analysis End Date/Time	integer	8		
+		var_ADAE_AENDT = "-AENDT-"												# Analysis End Date	integer	8		
+		var_ADAE_AENDTF = dict_ADAE_codelist_samples['AENDTF'][var_event]									#	Analysis End Date Imputation Flag	text	1	C81223	Date Imputation Flag
+		var_ADAE_AENTMF = dict_ADAE_codelist_samples['AENTMF'][var_event]									#	Analysis End Time Imputation Flag	text	1	C81226	Time Imputation Flag
+		var_ADAE_AENDY = "-AENDY-"												# Analysis End Relative Day	integer	8		
+		#
+		var_ADAE_TRTEMFL = "-TRTEMFL-"											# Treatment Emergent Analysis Flag	text	1	L00052	Yes Response
+		var_ADAE_PREFL = "-PREFL-"												# Pre-treatment Flag	text	1	L00052	Yes Response
+		var_ADAE_FUPFL = "-FUPFL-"												# Follow-up Flag	text	1	L00052	Yes Response
+		var_ADAE_AREL = "-AREL-"												# Analysis Causality	text	50		*
+		var_ADAE_ATOXGR = "-ATOXGR-"											# Analysis Toxicity Grade	text	50		*
+		var_ADAE_ADURN = "-ADURN-"												# Analysis Duration (N)	float	8		
+		var_ADAE_ADURU = dict_ADAE_codelist_samples['ADURU'][var_event]									#	Analysis Duration Units	text	40	C71620	Unit
+		var_ADAE_LDOSEDTM = "-LDOSEDTM-"										# End Date/Time of Last Dose	integer	8		
+		var_ADAE_LDOSEDT = "-LDOSEDT-"											# End Date of Last Dose	integer	8		
+		var_ADAE_LDRELD = "-LDRELD-"											# Day Since Last Dose	integer	8		
+		var_ADAE_AOCCIFL = "-AOCCIFL-"											# 1st Max Sev./Int. Occurrence Flag	text	1	L00052	Yes Response
+		var_ADAE_AOCCPIFL = "-AOCCPIFL-"										# 1st Max Sev./Int. Occur Within PT Flag	text	1	L00052	Yes Response
+		var_ADAE_AOCCSIFL = "-AOCCSIFL-"										# 1st Max Sev./Int. Occur Within SOC Flag	text	1	L00052	Yes Response
+		var_ADAE_AOCXIFL = "-AOCXIFL-"											# 1st Max Sev./Int. Occ per Period	text	1	L00052	Yes Response
+		var_ADAE_AOCXPIFL = "-AOCXPIFL-"										# 1st Max Sev./Int. Occ in PT per Period	text	1	L00052	Yes Response
+		var_ADAE_AOCXSIFL = "-AOCXSIFL-"										# 1st Max Sev./Int. Occ in SOC per Period	text	1	L00052	Yes Response
+		var_ADAE_ANL01FL = "-ANL01FL-"											# Analysis Flag 01	text	1	L00052	Yes Response
+		#
+		# Write ADAE record to file:
+		PHUSE_Row_Templates.func_nihpo_row_template_write(var_output_handle_ADAE, list_subjects[dict_ADAE_events['SUBJECT_INDEX'][var_event]], [var_ADAE_DOMAIN, var_ADAE_AESEQ, var_ADAE_AEGRPID, var_ADAE_AESPID, var_ADAE_AETERM, var_ADAE_AEMODIFY, var_ADAE_AELLT, var_ADAE_AELLTCD, var_ADAE_AEDECOD, var_ADAE_AEPTCD, var_ADAE_AEHLT, var_ADAE_AEHLTCD, var_ADAE_AEHLGT, var_ADAE_AEHLGTCD, var_ADAE_AECAT, var_ADAE_AESCAT, var_ADAE_AEPRESP, var_ADAE_AEBODSYS, var_ADAE_AEBDSYCD, var_ADAE_AESOC, var_ADAE_AESOCCD, var_ADAE_AELOC, var_ADAE_AESEV, var_ADAE_AESER, var_ADAE_AEACN, var_ADAE_AEACNOTH, var_ADAE_AEREL, var_ADAE_AERELNST, var_ADAE_AEPATT, var_ADAE_AEOUT, var_ADAE_AESCAN, var_ADAE_AESCONG, var_ADAE_AESDISAB, var_ADAE_AESDTH, var_ADAE_AESHOSP, var_ADAE_AESLIFE, var_ADAE_AESOD, var_ADAE_AESMIE, var_ADAE_AECONTRT, var_ADAE_AETOXGR, var_ADAE_EPOCH, var_ADAE_AESTDTC, var_ADAE_AEENDTC, var_ADAE_AESTDY, var_ADAE_AEENDY, var_ADAE_AEDUR, var_ADAE_AESTRTPT, var_ADAE_AESTTPT, var_ADAE_AEENRTPT, var_ADAE_AEENTPT, var_ADAE_AETRTEM, var_ADAE_ASTDTM, var_ADAE_ASTDT, var_ADAE_ASTDTF, var_ADAE_ASTTMF, var_ADAE_ASTDY, var_ADAE_AENDTM, var_ADAE_AENDT, var_ADAE_AENDTF, var_ADAE_AENTMF, var_ADAE_AENDY, var_ADAE_TRTEMFL, var_ADAE_PREFL, var_ADAE_FUPFL, var_ADAE_AREL, var_ADAE_ATOXGR, var_ADAE_ADURN, var_ADAE_ADURU, var_ADAE_LDOSEDTM, var_ADAE_LDOSEDT, var_ADAE_LDRELD, var_ADAE_AOCCIFL, var_ADAE_AOCCPIFL, var_ADAE_AOCCSIFL, var_ADAE_AOCXIFL, var_ADAE_AOCXPIFL, var_ADAE_AOCXSIFL, var_ADAE_ANL01FL])
+		#
+		var_event += 1
+	#
+	return var_number_events
+#
 #
 # Global Counters:
 var_subject_counter = 1
-var_ADAE_Sequence_Number = 1
 var_Analysis_Sequence_Number = 1
 var_Specimen_ID = 12376
 #
+# = = ADSL: one record per subject = =
+# The other files read the attributes of their subjects from the subject index built from ADSL (see PHUSE_Subject_Index.py), not from these variables.
 while var_subject_counter <= CT_NUMBER_SUBJECTS:
 	print ("Processing subject # %d \n" % (var_subject_counter))
 	#
@@ -436,20 +647,23 @@ while var_subject_counter <= CT_NUMBER_SUBJECTS:
 	var_ADSL_DMDTC = "-DMDTC-"												# Date/Time of Collection	dateTime	25		ISO8601
 	var_ADSL_DMDY = "-DMDY-"												# Study Day of Collection	integer	8
 	#
+	# Reference start date of this subject, leaving at least 01 day before the current date:
+	var_ADSL_RFSTDTC, var_ADSL_reference_offset = func_nihpo_random_date_between_range(CT_DATE_START_RECRUITMENT, CT_DATE_CURRENT_DATE - datetime.timedelta(days=1))	# Subject Reference Start Date/Time	dateTime	25		ISO8601
+	var_ADSL_reference_date = datetime.datetime.strptime(var_ADSL_RFSTDTC, '%Y-%m-%d')
+	#
 	# - Death-related fields -	
 	# First, determine if this subject would die during the trial:
 	var_ADSL_death = random.choice(CT_PERCENTAGE_DEATHS)
 	if (var_ADSL_death == 'DEATH'):
-		var_ADSL_DTHFL = "YES"												# Subject Death Flag	text	2	C66742	No Yes Response
-		var_ADSL_DTHDTC, var_ADSL_DTHADY = func_nihpo_random_date_between_range(CT_DATE_START_RECRUITMENT, CT_DATE_CURRENT_DATE)
-		# DTHDTC = Date/Time of Death	dateTime	25		ISO8601
-		# DTHADY = Relative Day of Death	integer	8
+		var_ADSL_DTHFL = "Y"												# Subject Death Flag	text	2	C66742	No Yes Response
+		var_ADSL_DTHDTC, var_ADSL_death_offset = func_nihpo_random_date_between_range(var_ADSL_reference_date, CT_DATE_CURRENT_DATE)	# Date/Time of Death	dateTime	25		ISO8601
+		var_ADSL_DTHADY = var_ADSL_death_offset + 1							# Relative Day of Death	integer	8		Day 1 is the reference start date.
 		var_ADSL_DTHDT = var_ADSL_DTHDTC									# Date of Death	integer	8		
 		var_ADSL_DTHCAUS = random.choice(CT_CAUSES_DEATH)					# Cause of Death	text	200		
 		var_ADSL_ADTHAUT = func_nihpo_synth_data_random_value(nihpo_cursor, 'C66742')											# Autopsy Performed	text	1	C66742	No Yes Response												
 		var_ADSL_LSTALVDT = var_ADSL_DTHDTC									# Date Last Known Alive	integer	8
 	else:
-		var_ADSL_DTHFL = "NO"												# Subject Death Flag	text	2	C66742	No Yes Response
+		var_ADSL_DTHFL = "N"												# Subject Death Flag	text	2	C66742	No Yes Response
 		var_ADSL_DTHDTC = "-DTHDTC-"											# Date/Time of Death	dateTime	25		ISO8601
 		var_ADSL_DTHDT = "-DTHDT-"												# Date of Death	integer	8		
 		var_ADSL_DTHCAUS = "-DTHCAUS-"											# Cause of Death	text	200		
@@ -457,7 +671,6 @@ while var_subject_counter <= CT_NUMBER_SUBJECTS:
 		var_ADSL_DTHADY = "-DTHADY-"											# Relative Day of Death	integer	8		
 		var_ADSL_LSTALVDT = "-LSTALVDT-"										# Date Last Known Alive	integer	8
 	#
-	var_ADSL_RFSTDTC = "-RFSTDTC-"											# Subject Reference Start Date/Time	dateTime	25		ISO8601
 	var_ADSL_RFENDTC = "-RFENDTC-"											# Subject Reference End Date/Time	dateTime	25		ISO8601
 	var_ADSL_RFXSTDTC = "-RFXSTDTC-"										# Date/Time of First Study Treatment	dateTime	25		ISO8601
 	var_ADSL_RFXENDTC = "-RFXENDTC-"										# Date/Time of Last Study Treatment	dateTime	25		ISO8601
@@ -501,123 +714,28 @@ while var_subject_counter <= CT_NUMBER_SUBJECTS:
 	var_ADSL_DCSREASP = "DCSREASP"											# Reason Spec for Discont from Study	text	200		
 	var_ADSL_AEWITHFL = func_nihpo_synth_data_random_value(nihpo_cursor, 'C66742')				# AE Leading to Drug Withdrawal Flag	text	1	C66742	No Yes Response		
 	#
-	#
-	# = ADAE file =
-	# One record per each record in the corresponding SDTM domain.
-	# First, determine if this subject would suffer an Adverse Event during the trial:
-	var_ADAE_adverse_event = random.choice(CT_PERCENTAGE_ADVERSE_EVENTS)
-	if (var_ADAE_adverse_event == 'ADV-EV'):
-		#
-		var_ADAE_STUDYID = CT_STUDY_ID											# Study Identifier	text	8		
-		var_ADAE_USUBJID = var_ADSL_USUBJID										# Unique Subject Identifier	text	50		
-		var_ADAE_SUBJID = var_ADSL_SUBJID 										# Subject Identifier for the Study	text	50		
-		var_ADAE_SITEID = var_ADSL_SITEID										# Study Site Identifier	text	20		
-		var_ADAE_COUNTRY = var_ADSL_COUNTRY										# Country	text	3		ISO3166
-		var_ADAE_ETHNIC = var_ADSL_ETHNIC										# Ethnicity	text	200		
-		var_ADAE_AGE = var_ADSL_AGE												# Age	integer	8		
-		var_ADAE_AGEU = var_ADSL_AGEU 											# Age Units	text	6	C66781	Age Unit
-		var_ADAE_AAGE = var_ADSL_AAGE											# Analysis Age	integer	8		
-		var_ADAE_AAGEU = var_ADSL_AAGEU											# Analysis Age Unit	text	6	C66781	Age Unit
-		var_ADAE_SEX = var_ADSL_SEX												# Sex	text	2	C66731	Sex
-		var_ADAE_RACE = var_ADSL_RACE 											# Race	text	200	C74457	Race
-		var_ADAE_ITTFL = var_ADSL_ITTFL											# Intent-To-Treat Population Flag	text	1	C66742	No Yes Response
-		var_ADAE_SAFFL = var_ADSL_SAFFL											# Safety Population Flag	text	1	C66742	No Yes Response
-		var_ADAE_PPROTFL = var_ADSL_PPROTFL										# Per-Protocol Population Flag	text	1	C66742	No Yes Response
-		var_ADAE_TRT01P = var_ADSL_TRT01P										# Planned Treatment for Period 01	text	200		
-		var_ADAE_TRT01A = var_ADSL_TRT01A										# Actual Treatment for Period 01	text	200		
-		var_ADAE_TRTSDTM = var_ADSL_TRTSDTM										# Datetime of First Exposure to Treatment	integer	8		
-		var_ADAE_TRTSDT = var_ADSL_TRTSDT										# Date of First Exposure to Treatment	integer	8		
-		var_ADAE_TRTEDTM = var_ADSL_TRTEDTM										# Datetime of Last Exposure to Treatment	integer	8		
-		var_ADAE_TRTEDT = var_ADSL_TRTEDT										# Date of Last Exposure to Treatment	integer	8		
-		var_ADAE_DOMAIN = "-DOMAIN-"											# Domain Abbreviation	text	2	C66734	SDTM Domain Abbreviation
-		var_ADAE_AESEQ = var_ADAE_Sequence_Number								# Sequence Number	integer	8
-		var_ADAE_AEGRPID = random.choice(CT_GROUPS)								# Group ID	text	40		
-		var_ADAE_AESPID = str(uuid.uuid4())										# Sponsor-Defined Identifier	text	200
-		#
-		var_ADAE_AETERM = "-AETERM-"											# Reported Term for the Adverse Event	text	200		
-		var_ADAE_AEMODIFY = "-AEMODIFY-"										# Modified Reported Term	text	200		
-		var_ADAE_AELLT = "-AELLT-"												# Lowest Level Term	text	100		MedDRA
-		var_ADAE_AELLTCD = "-AELLTCD-"											# Lowest Level Term Code	integer	8		MedDRA
-		var_ADAE_AEDECOD = "-AEDECOD-"											# Dictionary-Derived Term	text	200		MedDRA
-		var_ADAE_AEPTCD = "-AEPTCD-"											# Preferred Term Code	integer	8		MedDRA
-		var_ADAE_AEHLT = "-AEHLT-"												# High Level Term	text	100		MedDRA
-		var_ADAE_AEHLTCD = "-AEHLTCD-"											# High Level Term Code	integer	8		MedDRA
-		var_ADAE_AEHLGT = "-AEHLGT-"											# High Level Group Term	text	100		MedDRA
-		var_ADAE_AEHLGTCD = "-AEHLGTCD-"										# High Level Group Term Code	integer	8		MedDRA
-		var_ADAE_AECAT = "-AECAT-"												# Category for Adverse Event	text	100		*
-		var_ADAE_AESCAT = "-AESCAT-"											# Subcategory for Adverse Event	text	100		
-		var_ADAE_AEPRESP = func_nihpo_synth_data_random_value(nihpo_cursor, 'C66742')			# Pre-Specified Adverse Event	text	2	C66742	No Yes Response
-		var_ADAE_AEBODSYS = "-AEBODSYS-"										# Body System or Organ Class	text	200		MedDRA
-		var_ADAE_AEBDSYCD = "-AEBDSYCD-"										# Body System or Organ Class Code	integer	8		MedDRA
-		var_ADAE_AESOC = "-AESOC-"												# Primary System Organ Class	text	200		MedDRA
-		var_ADAE_AESOCCD = "-AESOCCD-"											# Primary System Organ Class Code	integer	8		MedDRA
-		var_ADAE_AELOC = func_nihpo_synth_data_random_value(nihpo_cursor, 'C74456')					# Location of Event	text	200	C74456	Anatomical Location
-		var_ADAE_AESEV = func_nihpo_synth_data_random_value(nihpo_cursor, 'C66769')					# Severity/Intensity	text	10	C66769	Severity/Intensity Scale for Adverse Events
-		var_ADAE_AESER = func_nihpo_synth_data_random_value(nihpo_cursor, 'C66742')					# Serious Event	text	2	C66742	No Yes Response
-		var_ADAE_AEACN = func_nihpo_synth_data_random_value(nihpo_cursor, 'C66767')					# Action Taken with Study Treatment	text	16	C66767	Action Taken with Study Treatment
-		var_ADAE_AEACNOTH = "-AEACNOTH-"										# Other Action Taken	text	200		
-		var_ADAE_AEREL = "-AEREL-"												# Causality	text	20		*
-		var_ADAE_AERELNST = func_nihpo_synth_data_random_value(nihpo_cursor, 'C66742')				# Relationship to Non-Study Treatment	text	200	C66742	No Yes Response
-		var_ADAE_AEPATT = "-AEPATT-"									#	Pattern of Adverse Event	text	40	L00004	Adverse Event Pattern
-		var_ADAE_AEOUT = func_nihpo_synth_data_random_value(nihpo_cursor, 'C66768')					# Outcome of Adverse Event	text	40	C66768	Outcome of Event
-		var_ADAE_AESCAN = func_nihpo_synth_data_random_value(nihpo_cursor, 'C66742')				# Involves Cancer	text	2	C66742	No Yes Response
-		var_ADAE_AESCONG = func_nihpo_synth_data_random_value(nihpo_cursor, 'C66742')				# Congenital Anomaly or Birth Defect	text	2	C66742	No Yes Response
-		var_ADAE_AESDISAB = func_nihpo_synth_data_random_value(nihpo_cursor, 'C66742')				# Persist or Signif Disability/Incapacity	text	2	C66742	No Yes Response
-		var_ADAE_AESDTH = func_nihpo_synth_data_random_value(nihpo_cursor, 'C66742')				# Results in Death	text	2	C66742	No Yes Response
-		var_ADAE_AESHOSP = func_nihpo_synth_data_random_value(nihpo_cursor, 'C66742')				# Requires or Prolongs Hospitalization	text	2	C66742	No Yes Response
-		var_ADAE_AESLIFE = func_nihpo_synth_data_random_value(nihpo_cursor, 'C66742')				# Is Life Threatening	text	2	C66742	No Yes Response
-		var_ADAE_AESOD = func_nihpo_synth_data_random_value(nihpo_cursor, 'C66742')					# Occurred with Overdose	text	2	C66742	No Yes Response
-		var_ADAE_AESMIE = func_nihpo_synth_data_random_value(nihpo_cursor, 'C66742')				# Other Medically Important Serious Event	text	2	C66742	No Yes Response
-		var_ADAE_AECONTRT = func_nihpo_synth_data_random_value(nihpo_cursor, 'C66742')				# Concomitant or Additional Trtmnt Given	text	2	C66742	No Yes Response
-		var_ADAE_AETOXGR = "-AETOXGR-"											# Standard Toxicity Grade	text	1		*
-		#
-		var_ADAE_EPOCH = func_nihpo_synth_data_random_value(nihpo_cursor, 'C99079')									#	Epoch	text	40	C99079	Epoch
-		var_ADAE_AESTDTC = "-AESTDTC-"											# Start Date/Time of Adverse Event	dateTime	25		ISO 8601
-		var_ADAE_AEENDTC = "-AEENDTC-"											# End Date/Time of Adverse Event	dateTime	25		ISO 8601
-		var_ADAE_AESTDY = "-AESTDY-"											# Study Day of Start of Adverse Event	integer	8		
-		var_ADAE_AEENDY = "-AEENDY-"											# Study Day of End of Adverse Event	integer	8		
-		var_ADAE_AEDUR = "-AEDUR-"												# Duration of Adverse Event	duration	25		ISO 8601
-		var_ADAE_AESTRTPT = func_nihpo_synth_data_random_value(nihpo_cursor, 'C66728')									#	Start Relative to Reference Time Point	text	20	C66728	Relation to Reference Period
-		var_ADAE_AESTTPT = "-AESTTPT-"											# Start Reference Time Point	text	40		
-		var_ADAE_AEENRTPT = func_nihpo_synth_data_random_value(nihpo_cursor, 'C66728')									#	End Relative to Reference Time Point	text	20	C66728	Relation to Reference Period
-		var_ADAE_AEENTPT = "-AEENTPT-"											# End Reference Time Point	text	40		
-		var_ADAE_AETRTEM = func_nihpo_synth_data_random_value(nihpo_cursor, 'C66742')									#	Treatment Emergent Flag	text	2	C66742	No Yes Response
-		#
-		var_ADAE_ASTDTM = "-ASTDTM-"											# Analysis Start Date/Time	integer	8		
-		var_ADAE_ASTDT = "-ASTDT-"												# Analysis Start Date	integer	8		
-		var_ADAE_ASTDTF = func_nihpo_synth_data_random_value(nihpo_cursor, 'C81223')									#	Analysis Start Date Imputation Flag	text	1	C81223	Date Imputation Flag
-		var_ADAE_ASTTMF = func_nihpo_synth_data_random_value(nihpo_cursor, 'C81226')									#	Analysis Start Time Imputation Flag	text	1	C81226	Time Imputation Flag
-		var_ADAE_ASTDY = "-ASTDY-"												# Analysis Start Relative Day	integer	8		
-		var_ADAE_AENDTM = "-AENDTM-"											# Analysis End Date/Time	integer	8		
-		var_ADAE_AENDT = "-AENDT-"												# Analysis End Date	integer	8		
-		var_ADAE_AENDTF = func_nihpo_synth_data_random_value(nihpo_cursor, 'C81223')									#	Analysis End Date Imputation Flag	text	1	C81223	Date Imputation Flag
-		var_ADAE_AENTMF = func_nihpo_synth_data_random_value(nihpo_cursor, 'C81226')									#	Analysis End Time Imputation Flag	text	1	C81226	Time Imputation Flag
-		var_ADAE_AENDY = "-AENDY-"												# Analysis End Relative Day	integer	8		
-		#
-		var_ADAE_TRTEMFL = "-TRTEMFL-"											# Treatment Emergent Analysis Flag	text	1	L00052	Yes Response
-		var_ADAE_PREFL = "-PREFL-"												# Pre-treatment Flag	text	1	L00052	Yes Response
-		var_ADAE_FUPFL = "-FUPFL-"												# Follow-up Flag	text	1	L00052	Yes Response
-		var_ADAE_AREL = "-AREL-"												# Analysis Causality	text	50		*
-		var_ADAE_ATOXGR = "-ATOXGR-"											# Analysis Toxicity Grade	text	50		*
-		var_ADAE_ADURN = "-ADURN-"												# Analysis Duration (N)	float	8		
-		var_ADAE_ADURU = func_nihpo_synth_data_random_value(nihpo_cursor, 'C71620')									#	Analysis Duration Units	text	40	C71620	Unit
-		var_ADAE_LDOSEDTM = "-LDOSEDTM-"										# End Date/Time of Last Dose	integer	8		
-		var_ADAE_LDOSEDT = "-LDOSEDT-"											# End Date of Last Dose	integer	8		
-		var_ADAE_LDRELD = "-LDRELD-"											# Day Since Last Dose	integer	8		
-		var_ADAE_AOCCIFL = "-AOCCIFL-"											# 1st Max Sev./Int. Occurrence Flag	text	1	L00052	Yes Response
-		var_ADAE_AOCCPIFL = "-AOCCPIFL-"										# 1st Max Sev./Int. Occur Within PT Flag	text	1	L00052	Yes Response
-		var_ADAE_AOCCSIFL = "-AOCCSIFL-"										# 1st Max Sev./Int. Occur Within SOC Flag	text	1	L00052	Yes Response
-		var_ADAE_AOCXIFL = "-AOCXIFL-"											# 1st Max Sev./Int. Occ per Period	text	1	L00052	Yes Response
-		var_ADAE_AOCXPIFL = "-AOCXPIFL-"										# 1st Max Sev./Int. Occ in PT per Period	text	1	L00052	Yes Response
-		var_ADAE_AOCXSIFL = "-AOCXSIFL-"										# 1st Max Sev./Int. Occ in SOC per Period	text	1	L00052	Yes Response
-		var_ADAE_ANL01FL = "-ANL01FL-"											# Analysis Flag 01	text	1	L00052	Yes Response
+	# Write ADSL record to file:
+	if (CT_DEBUG == 1):
+		print (var_ADSL_STUDYID, var_ADSL_USUBJID, var_ADSL_SUBJID, var_ADSL_SITEID, var_ADSL_AGE, var_ADSL_AGEU, var_ADSL_SEX, var_ADSL_RACE, var_ADSL_ETHNIC, var_ADSL_COUNTRY, var_ADSL_DMDTC, var_ADSL_DMDY, var_ADSL_BRTHDTC, var_ADSL_DTHDTC, var_ADSL_DTHFL, var_ADSL_RFSTDTC, var_ADSL_RFENDTC, var_ADSL_RFXSTDTC, var_ADSL_RFXENDTC, var_ADSL_RFICDTC, var_ADSL_RFPENDTC, var_ADSL_INVID, var_ADSL_INVNAM, var_ADSL_ARM, var_ADSL_ARMCD, var_ADSL_ACTARM, var_ADSL_ACTARMCD, var_ADSL_BRTHDTF, var_ADSL_AAGE, var_ADSL_AAGEU, var_ADSL_AGEGR1, var_ADSL_ITTFL, var_ADSL_SAFFL, var_ADSL_PPROTFL, var_ADSL_FASFL, var_ADSL_TRT01P, var_ADSL_TRT01A, var_ADSL_RFICDT, var_ADSL_RANDDT, var_ADSL_BRTHDT, var_ADSL_TRTSDTM, var_ADSL_TRTSDT, var_ADSL_TRTEDTM, var_ADSL_TRTEDT, var_ADSL_TRTDURD, var_ADSL_EOSSTT, var_ADSL_EOSDT, var_ADSL_EOTSTT, var_ADSL_EOSDY, var_ADSL_EOSRDY, var_ADSL_DCSREAS, var_ADSL_DCSREASP, var_ADSL_DTHDT, var_ADSL_DTHCAUS, var_ADSL_ADTHAUT, var_ADSL_DTHADY, var_ADSL_AEWITHFL, var_ADSL_LSTALVDT)
 		#
-		var_ADAE_Sequence_Number += 1
-		# Write ADAE record to file:
-		var_output_file_ADAE.writerow([	var_ADAE_STUDYID, var_ADAE_USUBJID, var_ADAE_SUBJID, var_ADAE_SITEID, var_ADAE_COUNTRY, var_ADAE_ETHNIC, var_ADAE_AGE, var_ADAE_AGEU, var_ADAE_AAGE, var_ADAE_AAGEU, var_ADAE_SEX, var_ADAE_RACE, var_ADAE_ITTFL, var_ADAE_SAFFL, var_ADAE_PPROTFL, var_ADAE_TRT01P, var_ADAE_TRT01A, var_ADAE_TRTSDTM, var_ADAE_TRTSDT, var_ADAE_TRTEDTM, var_ADAE_TRTEDT, var_ADAE_DOMAIN, var_ADAE_AESEQ, var_ADAE_AEGRPID, var_ADAE_AESPID, var_ADAE_AETERM, var_ADAE_AEMODIFY, var_ADAE_AELLT, var_ADAE_AELLTCD, var_ADAE_AEDECOD, var_ADAE_AEPTCD, var_ADAE_AEHLT, var_ADAE_AEHLTCD, var_ADAE_AEHLGT, var_ADAE_AEHLGTCD, var_ADAE_AECAT, var_ADAE_AESCAT, var_ADAE_AEPRESP, var_ADAE_AEBODSYS, var_ADAE_AEBDSYCD, var_ADAE_AESOC, var_ADAE_AESOCCD, var_ADAE_AELOC, var_ADAE_AESEV, var_ADAE_AESER, var_ADAE_AEACN, var_ADAE_AEACNOTH, var_ADAE_AEREL, var_ADAE_AERELNST, var_ADAE_AEPATT, var_ADAE_AEOUT, var_ADAE_AESCAN, var_ADAE_AESCONG, var_ADAE_AESDISAB, var_ADAE_AESDTH, var_ADAE_AESHOSP, var_ADAE_AESLIFE, var_ADAE_AESOD, var_ADAE_AESMIE, var_ADAE_AECONTRT, var_ADAE_AETOXGR, var_ADAE_EPOCH, var_ADAE_AESTDTC, var_ADAE_AEENDTC, var_ADAE_AESTDY, var_ADAE_AEENDY, var_ADAE_AEDUR, var_ADAE_AESTRTPT, var_ADAE_AESTTPT, var_ADAE_AEENRTPT, var_ADAE_AEENTPT, var_ADAE_AETRTEM, var_ADAE_ASTDTM, var_ADAE_ASTDT, var_ADAE_ASTDTF, var_ADAE_ASTTMF, var_ADAE_ASTDY, var_ADAE_AENDTM, var_ADAE_AENDT, var_ADAE_AENDTF, var_ADAE_AENTMF, var_ADAE_AENDY, var_ADAE_TRTEMFL, var_ADAE_PREFL, var_ADAE_FUPFL, var_ADAE_AREL, var_ADAE_ATOXGR, var_ADAE_ADURN, var_ADAE_ADURU, var_ADAE_LDOSEDTM, var_ADAE_LDOSEDT, var_ADAE_LDRELD, var_ADAE_AOCCIFL, var_ADAE_AOCCPIFL, var_ADAE_AOCCSIFL, var_ADAE_AOCXIFL, var_ADAE_AOCXPIFL, var_ADAE_AOCXSIFL, var_ADAE_ANL01FL])
-
-
-
+	list_ADSL_record = [var_ADSL_STUDYID, var_ADSL_USUBJID, var_ADSL_SUBJID, var_ADSL_SITEID, var_ADSL_AGE, var_ADSL_AGEU, var_ADSL_SEX, var_ADSL_RACE, var_ADSL_ETHNIC, var_ADSL_COUNTRY, var_ADSL_DMDTC, var_ADSL_DMDY, var_ADSL_BRTHDTC, var_ADSL_DTHDTC, var_ADSL_DTHFL, var_ADSL_RFSTDTC, var_ADSL_RFENDTC, var_ADSL_RFXSTDTC, var_ADSL_RFXENDTC, var_ADSL_RFICDTC, var_ADSL_RFPENDTC, var_ADSL_INVID, var_ADSL_INVNAM, var_ADSL_ARM, var_ADSL_ARMCD, var_ADSL_ACTARM, var_ADSL_ACTARMCD, var_ADSL_BRTHDTF, var_ADSL_AAGE, var_ADSL_AAGEU, var_ADSL_AGEGR1, var_ADSL_ITTFL, var_ADSL_SAFFL, var_ADSL_PPROTFL, var_ADSL_FASFL, var_ADSL_TRT01P, var_ADSL_TRT01A, var_ADSL_RFICDT, var_ADSL_RANDDT, var_ADSL_BRTHDT, var_ADSL_TRTSDTM, var_ADSL_TRTSDT, var_ADSL_TRTEDTM, var_ADSL_TRTEDT, var_ADSL_TRTDURD, var_ADSL_EOSSTT, var_ADSL_EOSDT, var_ADSL_EOTSTT, var_ADSL_EOSDY, var_ADSL_EOSRDY, var_ADSL_DCSREAS, var_ADSL_DCSREASP, var_ADSL_DTHDT, var_ADSL_DTHCAUS, var_ADSL_ADTHAUT, var_ADSL_DTHADY, var_ADSL_AEWITHFL, var_ADSL_LSTALVDT]
+	var_output_file_ADSL.writerow(list_ADSL_record)
+	PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_append_row(dataset_ADSL, list_ADSL_record)
+	#
+	var_subject_counter += 1
+#
+# = = Subject index = =
+# Built once, after ADSL. Study window of each subject: from RFSTDTC to the earliest of RFENDTC and DTHDTC.
+index_ADSL = PHUSE_Subject_Index.func_nihpo_subject_index_build(dict([(column, PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_values(dataset_ADSL, column)) for column in list_header_ADSL]), 'RFSTDTC', ['RFENDTC', 'DTHDTC'])
+#
+# = = ADAE file = =
+# One record per each record in the corresponding SDTM domain.
+# Adverse Events are generated for a batch of subjects at once, by func_nihpo_write_ADAE_batch().
+for var_batch_start in range(0, index_ADSL['size'], CT_AE_BATCH_SUBJECTS):
+	func_nihpo_write_ADAE_batch(np.arange(var_batch_start, min(var_batch_start + CT_AE_BATCH_SUBJECTS, index_ADSL['size'])))
+#
+# = = ADLB, ADHY and ADSAFTTE files = =
+for var_subject_position in range(index_ADSL['size']):
 	# = = NOTE = =
 	# The following 03 files (ADLB; ADHY; and ADSAFTTE) contain records that are generated as follows:
 	# 		One record per subject per parameter per analysis visit per analysis date.
@@ -642,7 +760,13 @@ while var_subject_counter <= CT_NUMBER_SUBJECTS:
 			* Measure (each Visit)
 			* Compare measure with Baseline
 	"""
-
+	#
+	# = ADLB, ADHY and ADSAFTTE: ADSL values repeated on each record of this subject =
+	# Serialized once here, from the subject index; each record below only writes its own columns.
+	row_template_ADLB = func_nihpo_subject_row_template(template_ADLB, var_subject_position, {'AAGE': "-AAGE-", 'AAGEU': "-AAGEU"})
+	row_template_ADHY = func_nihpo_subject_row_template(template_ADHY, var_subject_position, dict([(column, "-%s-" % (column)) for column in ['AAGE', 'AAGEU', 'PPROTFL', 'TRT01P', 'TRT01A', 'TRTSDTM', 'TRTSDT', 'TRTEDTM', 'TRTEDT']]))
+	row_template_ADSAFTTE = func_nihpo_subject_row_template(template_ADSAFTTE, var_subject_position, dict([(column, "-%s-" % (column)) for column in ['REGION1', 'AGEGR1', 'AGEGR2', 'AGEGR3', 'STRATwNM', 'STRATw', 'STRATwV', 'PPROTFL', 'TRT01P', 'TRTxxP', 'TRT01A', 'TRTxxA', 'TRTSEQP', 'TRTSEQA', 'TRTSDTM', 'TRTSDT', 'TRTEDTM', 'TRTEDT']]))
+	#
 	#
 	# = = Process Visit = =
 	var_number_visits = len(CT_VISIT_ANALYSIS_PARAMETER['visits'])
@@ -696,38 +820,12 @@ while var_subject_counter <= CT_NUMBER_SUBJECTS:
 					print (func_nihpo_random_value (var_parameter_lower_limit, var_parameter_upper_limit, var_parameter_fuzz_factor))
 
 				# = ADLB file =
-				var_ADLB_STUDYID = CT_STUDY_ID 									# Study Identifier	text	8		
-				var_ADLB_USUBJID = var_ADSL_USUBJID 							# Unique Subject Identifier	text	50		
-				var_ADLB_SUBJID = var_ADSL_SUBJID 								# Subject Identifier for the Study	text	50		
-				var_ADLB_SITEID  = var_ADSL_SITEID 								# Study Site Identifier	text	20		
 				var_ADLB_ASEQ = var_Analysis_Sequence_Number 					# Analysis Sequence Number	integer	8		
-				var_ADLB_COUNTRY = var_ADSL_COUNTRY 							# Country	text	32		ISO3166
-				var_ADLB_ETHNIC = var_ADSL_ETHNIC								# Ethnicity	text	32		
-				var_ADLB_AGE = var_ADSL_AGE										# Age	integer	8		
-				var_ADLB_AGEU = var_ADSL_AGEU 									# Age Units	text	5	C66781	Age Unit
-				var_ADLB_AAGE = "-AAGE-" 										# Analysis Age	integer	8		
-				var_ADLB_AAGEU = "-AAGEU" 										# Analysis Age Unit	text	6	C66781	Age Unit
-				var_ADLB_SEX = var_ADSL_SEX										# Sex	text	1	C66731	Sex
-				var_ADLB_RACE = var_ADSL_RACE 									# Race	text	32	C74457	Race
-				var_ADLB_ITTFL = var_ADSL_ITTFL									# Intent-To-Treat Population Flag	text	1	C66742	No Yes Response
-				var_ADLB_SAFFL = var_ADSL_SAFFL									# Safety Population Flag	text	1	C66742	No Yes Response
-				var_ADLB_PPROTFL = var_ADSL_PPROTFL								# Per-Protocol Population Flag	text	1	C66742	No Yes Response
-				var_ADLB_TRT01P = var_ADSL_TRT01P									#	Planned Treatment for Period 01	text	200		
-				var_ADLB_TRT01A = var_ADSL_TRT01A									#	Actual Treatment for Period 01	text	200		
-				var_ADLB_TRTSDTM = var_ADSL_TRTSDTM									#	Datetime of First Exposure to Treatment	integer	8		
-				var_ADLB_TRTSDT = var_ADSL_TRTSDT									#	Date of First Exposure to Treatment	integer	8		
-				var_ADLB_TRTEDTM = var_ADSL_TRTEDTM									#	Datetime of Last Exposure to Treatment	integer	8		
-				var_ADLB_TRTEDT = var_ADSL_TRTEDT									#	Date of Last Exposure to Treatment	integer	8		
 				var_ADLB_DOMAIN = "-DOMAIN-"											# Domain Abbreviation	text	2	C66734	SDTM Domain Abbreviation
-				var_ADLB_LBSEQ = var_ADAE_Sequence_Number									# Sequence Number	integer	8		
+				var_ADLB_LBSEQ = var_Analysis_Sequence_Number									# Sequence Number	integer	8		
 				var_ADLB_LBGRPID = "-LBGRPID-"											# Group ID	text	40		
 				var_ADLB_LBREFID = var_Specimen_ID											# Specimen ID	text	40		
-				#
-				try:
-					var_ADLB_LBSPID = var_ADAE_AESPID											# Sponsor-Defined Identifier	text	200	
-				except NameError: 
-					var_ADLB_LBSPID = "-LBSPID-"
-				#
+				var_ADLB_LBSPID = "-LBSPID-"									#	Sponsor-Defined Identifier	text	200	
 				var_ADLB_LBTESTCD = func_nihpo_synth_data_random_value(nihpo_cursor, 'C65047')			# Lab Test or Examination Short Name	text	8	C65047	Laboratory Test Code
 				var_ADLB_LBTEST = func_nihpo_synth_data_random_value(nihpo_cursor, 'C67154')			# Lab Test or Examination Name	text	40	C67154	Laboratory Test Name
 				var_ADLB_LBCAT = "-LBCAT-"									#	Category for Lab Test	text	100		
@@ -808,10 +906,11 @@ while var_subject_counter <= CT_NUMBER_SUBJECTS:
 				var_Specimen_ID += 1
 				#
 				# Write ADLB record to file:
+				list_ADLB_record = [var_ADLB_ASEQ, var_ADLB_DOMAIN, var_ADLB_LBSEQ, var_ADLB_LBGRPID, var_ADLB_LBREFID, var_ADLB_LBSPID, var_ADLB_LBTESTCD, var_ADLB_LBTEST, var_ADLB_LBCAT, var_ADLB_LBSCAT, var_ADLB_LBORRES, var_ADLB_LBORRESU, var_ADLB_LBORNRLO, var_ADLB_LBORNRHI, var_ADLB_LBSTRESC, var_ADLB_LBSTRESN, var_ADLB_LBSTRESU, var_ADLB_LBSTNRLO, var_ADLB_LBSTNRHI, var_ADLB_LBSTNRC, var_ADLB_LBNRIND, var_ADLB_LBSTAT, var_ADLB_LBREASND, var_ADLB_LBNAM, var_ADLB_LBSPEC, var_ADLB_LBSPCCND, var_ADLB_LBMETHOD, var_ADLB_LBBLFL, var_ADLB_LBFAST, var_ADLB_VISITNUM, var_ADLB_VISIT, var_ADLB_EPOCH, var_ADLB_LBDTC, var_ADLB_LBENDTC, var_ADLB_LBDY, var_ADLB_LBENDY, var_ADLB_LBTPT, var_ADLB_LBTPTNUM, var_ADLB_LBELTM, var_ADLB_LBTPTREF, var_ADLB_LBTSTDTL, var_ADLB_PARAM, var_ADLB_PARAMCD, var_ADLB_PARCAT1, var_ADLB_PARCAT2, var_ADLB_AVAL, var_ADLB_AVALC, var_ADLB_AVALU, var_ADLB_AVALCAT1, var_ADLB_BASE, var_ADLB_BASETYPE, var_ADLB_ABLFL, var_ADLB_CHG, var_ADLB_PCHG, var_ADLB_ANRHI, var_ADLB_ANRLO, var_ADLB_ANRIND, var_ADLB_BNRIND, var_ADLB_R2BASE, var_ADLB_R2ANRLO, var_ADLB_R2ANRHI, var_ADLB_SHIFT1, var_ADLB_ATOXGR, var_ADLB_BTOXGR, var_ADLB_ADTM, var_ADLB_ADT, var_ADLB_ADTF, var_ADLB_ATMF, var_ADLB_ADY, var_ADLB_ATPT, var_ADLB_ATPTN, var_ADLB_AVISIT, var_ADLB_AVISITN, var_ADLB_ONTRTFL, var_ADLB_LAST01FL, var_ADLB_WORS01FL, var_ADLB_WGRHIFL, var_ADLB_WGRLOFL, var_ADLB_WGRHIVFL, var_ADLB_WGRLOVFL, var_ADLB_ANL01FL]
 				if (CT_DEBUG == 1):
-					print(var_ADLB_STUDYID, var_ADLB_USUBJID, var_ADLB_SUBJID, var_ADLB_SITEID, var_ADLB_ASEQ, var_ADLB_COUNTRY, var_ADLB_ETHNIC, var_ADLB_AGE, var_ADLB_AGEU, var_ADLB_AAGE, var_ADLB_AAGEU, var_ADLB_SEX, var_ADLB_RACE, var_ADLB_ITTFL, var_ADLB_SAFFL, var_ADLB_PPROTFL, var_ADLB_TRT01P, var_ADLB_TRT01A, var_ADLB_TRTSDTM, var_ADLB_TRTSDT, var_ADLB_TRTEDTM, var_ADLB_TRTEDT, var_ADLB_DOMAIN, var_ADLB_LBSEQ, var_ADLB_LBGRPID, var_ADLB_LBREFID, var_ADLB_LBSPID, var_ADLB_LBTESTCD, var_ADLB_LBTEST, var_ADLB_LBCAT, var_ADLB_LBSCAT, var_ADLB_LBORRES, var_ADLB_LBORRESU, var_ADLB_LBORNRLO, var_ADLB_LBORNRHI, var_ADLB_LBSTRESC, var_ADLB_LBSTRESN, var_ADLB_LBSTRESU, var_ADLB_LBSTNRLO, var_ADLB_LBSTNRHI, var_ADLB_LBSTNRC, var_ADLB_LBNRIND, var_ADLB_LBSTAT, var_ADLB_LBREASND, var_ADLB_LBNAM, var_ADLB_LBSPEC, var_ADLB_LBSPCCND, var_ADLB_LBMETHOD, var_ADLB_LBBLFL, var_ADLB_LBFAST, var_ADLB_VISITNUM, var_ADLB_VISIT, var_ADLB_EPOCH, var_ADLB_LBDTC, var_ADLB_LBENDTC, var_ADLB_LBDY, var_ADLB_LBENDY, var_ADLB_LBTPT, var_ADLB_LBTPTNUM, var_ADLB_LBELTM, var_ADLB_LBTPTREF, var_ADLB_LBTSTDTL, var_ADLB_PARAM, var_ADLB_PARAMCD, var_ADLB_PARCAT1, var_ADLB_PARCAT2, var_ADLB_AVAL, var_ADLB_AVALC, var_ADLB_AVALU, var_ADLB_AVALCAT1, var_ADLB_BASE, var_ADLB_BASETYPE, var_ADLB_ABLFL, var_ADLB_CHG, var_ADLB_PCHG, var_ADLB_ANRHI, var_ADLB_ANRLO, var_ADLB_ANRIND, var_ADLB_BNRIND, var_ADLB_R2BASE, var_ADLB_R2ANRLO, var_ADLB_R2ANRHI, var_ADLB_SHIFT1, var_ADLB_ATOXGR, var_ADLB_BTOXGR, var_ADLB_ADTM, var_ADLB_ADT, var_ADLB_ADTF, var_ADLB_ATMF, var_ADLB_ADY, var_ADLB_ATPT, var_ADLB_ATPTN, var_ADLB_AVISIT, var_ADLB_AVISITN, var_ADLB_ONTRTFL, var_ADLB_LAST01FL, var_ADLB_WORS01FL, var_ADLB_WGRHIFL, var_ADLB_WGRLOFL, var_ADLB_WGRHIVFL, var_ADLB_WGRLOVFL, var_ADLB_ANL01FL)
+					print(list_ADLB_record)
 					#
-				var_output_file_ADLB.writerow([var_ADLB_STUDYID, var_ADLB_USUBJID, var_ADLB_SUBJID, var_ADLB_SITEID, var_ADLB_ASEQ, var_ADLB_COUNTRY, var_ADLB_ETHNIC, var_ADLB_AGE, var_ADLB_AGEU, var_ADLB_AAGE, var_ADLB_AAGEU, var_ADLB_SEX, var_ADLB_RACE, var_ADLB_ITTFL, var_ADLB_SAFFL, var_ADLB_PPROTFL, var_ADLB_TRT01P, var_ADLB_TRT01A, var_ADLB_TRTSDTM, var_ADLB_TRTSDT, var_ADLB_TRTEDTM, var_ADLB_TRTEDT, var_ADLB_DOMAIN, var_ADLB_LBSEQ, var_ADLB_LBGRPID, var_ADLB_LBREFID, var_ADLB_LBSPID, var_ADLB_LBTESTCD, var_ADLB_LBTEST, var_ADLB_LBCAT, var_ADLB_LBSCAT, var_ADLB_LBORRES, var_ADLB_LBORRESU, var_ADLB_LBORNRLO, var_ADLB_LBORNRHI, var_ADLB_LBSTRESC, var_ADLB_LBSTRESN, var_ADLB_LBSTRESU, var_ADLB_LBSTNRLO, var_ADLB_LBSTNRHI, var_ADLB_LBSTNRC, var_ADLB_LBNRIND, var_ADLB_LBSTAT, var_ADLB_LBREASND, var_ADLB_LBNAM, var_ADLB_LBSPEC, var_ADLB_LBSPCCND, var_ADLB_LBMETHOD, var_ADLB_LBBLFL, var_ADLB_LBFAST, var_ADLB_VISITNUM, var_ADLB_VISIT, var_ADLB_EPOCH, var_ADLB_LBDTC, var_ADLB_LBENDTC, var_ADLB_LBDY, var_ADLB_LBENDY, var_ADLB_LBTPT, var_ADLB_LBTPTNUM, var_ADLB_LBELTM, var_ADLB_LBTPTREF, var_ADLB_LBTSTDTL, var_ADLB_PARAM, var_ADLB_PARAMCD, var_ADLB_PARCAT1, var_ADLB_PARCAT2, var_ADLB_AVAL, var_ADLB_AVALC, var_ADLB_AVALU, var_ADLB_AVALCAT1, var_ADLB_BASE, var_ADLB_BASETYPE, var_ADLB_ABLFL, var_ADLB_CHG, var_ADLB_PCHG, var_ADLB_ANRHI, var_ADLB_ANRLO, var_ADLB_ANRIND, var_ADLB_BNRIND, var_ADLB_R2BASE, var_ADLB_R2ANRLO, var_ADLB_R2ANRHI, var_ADLB_SHIFT1, var_ADLB_ATOXGR, var_ADLB_BTOXGR, var_ADLB_ADTM, var_ADLB_ADT, var_ADLB_ADTF, var_ADLB_ATMF, var_ADLB_ADY, var_ADLB_ATPT, var_ADLB_ATPTN, var_ADLB_AVISIT, var_ADLB_AVISITN, var_ADLB_ONTRTFL, var_ADLB_LAST01FL, var_ADLB_WORS01FL, var_ADLB_WGRHIFL, var_ADLB_WGRLOFL, var_ADLB_WGRHIVFL, var_ADLB_WGRLOVFL, var_ADLB_ANL01FL])
+				PHUSE_Row_Templates.func_nihpo_row_template_write(var_output_handle_ADLB, row_template_ADLB, list_ADLB_record)
 				#
 				#
 
@@ -819,28 +918,7 @@ while var_subject_counter <= CT_NUMBER_SUBJECTS:
 				# = ADHY file =
 				# One record per subject per parameter per analysis visit per analysis date.
 				# _x005F_x000D_ SDTM variables are populated on new records coming from other single records.  Otherwise, SDTM variables are left blank.
-				var_ADHY_STUDYID = var_ADSL_STUDYID							# Study Identifier	text	8		
-				var_ADHY_USUBJID = var_ADSL_USUBJID							# Unique Subject Identifier	text	50		
-				var_ADHY_SUBJID = var_ADSL_SUBJID							# Subject Identifier for the Study	text	50		
-				var_ADHY_SITEID = var_ADSL_SITEID							# Study Site Identifier	text	20		
 				var_ADHY_ASEQ = "Pending"									# Analysis Sequence Number	integer	8		
-				var_ADHY_COUNTRY = var_ADSL_COUNTRY							# Country	text	3		ISO3166
-				var_ADHY_ETHNIC = var_ADSL_ETHNIC							# Ethnicity	text	200		
-				var_ADHY_AGE = var_ADSL_AAGE								# Age	integer	8		
-				var_ADHY_AGEU = var_ADSL_AAGEU								# Age Units	text	6	C66781	Age Unit
-				var_ADHY_AAGE = "-AAGE-"										# Analysis Age	integer	8		
-				var_ADHY_AAGEU = "-AAGEU-"									# Analysis Age Unit	text	6	C66781	Age Unit
-				var_ADHY_SEX = var_ADSL_SEX									# Sex	text	2	C66731	Sex
-				var_ADHY_RACE = var_ADSL_RACE								# Race	text	200	C74457	Race
-				var_ADHY_ITTFL = var_ADLB_ITTFL									#	Intent-To-Treat Population Flag	text	1	C66742	No Yes Response
-				var_ADHY_SAFFL = var_ADSL_SAFFL									#	Safety Population Flag	text	1	C66742	No Yes Response
-				var_ADHY_PPROTFL = "-PPROTFL-"									#	Per-Protocol Population Flag	text	1	C66742	No Yes Response
-				var_ADHY_TRT01P = "-TRT01P-"									#	Planned Treatment for Period 01	text	200		
-				var_ADHY_TRT01A = "-TRT01A-"									#	Actual Treatment for Period 01	text	200		
-				var_ADHY_TRTSDTM = "-TRTSDTM-"									#	Datetime of First Exposure to Treatment	integer	8		
-				var_ADHY_TRTSDT = "-TRTSDT-"									#	Date of First Exposure to Treatment	integer	8		
-				var_ADHY_TRTEDTM = "-TRTEDTM-"									#	Datetime of Last Exposure to Treatment	integer	8		
-				var_ADHY_TRTEDT = "-TRTEDT-"									#	Date of Last Exposure to Treatment	integer	8		
 				var_ADHY_PARAM = "-PARAM-"									#	Parameter	text	200		
 				var_ADHY_PARAMCD = "-PARAMCD-"									#	Parameter Code	text	8		
 				var_ADHY_AVAL = var_ADLB_LBSTRESN									#	Analysis Value	float	8		
@@ -873,48 +951,17 @@ while var_subject_counter <= CT_NUMBER_SUBJECTS:
 				var_ADHY_ANL01FL = "-ANL01FL-"									#	Analysis Flag 01	text	1		
 				#
 				# Write ADHY record to file:
+				list_ADHY_record = [var_ADHY_ASEQ, var_ADHY_PARAM, var_ADHY_PARAMCD, var_ADHY_AVAL, var_ADHY_AVALC, var_ADHY_AVALU, var_ADHY_BASE, var_ADHY_BASEC, var_ADHY_ABLFL, var_ADHY_ANRLO, var_ADHY_ANRHI, var_ADHY_ADTM, var_ADHY_ADT, var_ADHY_ADY, var_ADHY_ADTF, var_ADHY_ATMF, var_ADHY_AVISIT, var_ADHY_AVISITN, var_ADHY_ONTRTFL, var_ADHY_CRIT1, var_ADHY_CRIT1FL, var_ADHY_CRIT1FN, var_ADHY_CRIT2, var_ADHY_CRIT2FL, var_ADHY_CRIT2FN, var_ADHY_MCRIT1, var_ADHY_MCRIT1ML, var_ADHY_SRCDOM, var_ADHY_SRCVAR, var_ADHY_SRCSEQ, var_ADHY_ANL01FL]
 				if (CT_DEBUG == 1):
-					print(var_ADHY_STUDYID, var_ADHY_USUBJID, var_ADHY_SUBJID, var_ADHY_SITEID, var_ADHY_ASEQ, var_ADHY_COUNTRY, var_ADHY_ETHNIC, var_ADHY_AGE, var_ADHY_AGEU, var_ADHY_AAGE, var_ADHY_AAGEU, var_ADHY_SEX, var_ADHY_RACE, var_ADHY_ITTFL, var_ADHY_SAFFL, var_ADHY_PPROTFL, var_ADHY_TRT01P, var_ADHY_TRT01A, var_ADHY_TRTSDTM, var_ADHY_TRTSDT, var_ADHY_TRTEDTM, var_ADHY_TRTEDT, var_ADHY_PARAM, var_ADHY_PARAMCD, var_ADHY_AVAL, var_ADHY_AVALC, var_ADHY_AVALU, var_ADHY_BASE, var_ADHY_BASEC, var_ADHY_ABLFL, var_ADHY_ANRLO, var_ADHY_ANRHI, var_ADHY_ADTM, var_ADHY_ADT, var_ADHY_ADY, var_ADHY_ADTF, var_ADHY_ATMF, var_ADHY_AVISIT, var_ADHY_AVISITN, var_ADHY_ONTRTFL, var_ADHY_CRIT1, var_ADHY_CRIT1FL, var_ADHY_CRIT1FN, var_ADHY_CRIT2, var_ADHY_CRIT2FL, var_ADHY_CRIT2FN, var_ADHY_MCRIT1, var_ADHY_MCRIT1ML, var_ADHY_SRCDOM, var_ADHY_SRCVAR, var_ADHY_SRCSEQ, var_ADHY_ANL01FL)
+					print(list_ADHY_record)
 					#
-				var_output_file_ADHY.writerow([var_ADHY_STUDYID, var_ADHY_USUBJID, var_ADHY_SUBJID, var_ADHY_SITEID, var_ADHY_ASEQ, var_ADHY_COUNTRY, var_ADHY_ETHNIC, var_ADHY_AGE, var_ADHY_AGEU, var_ADHY_AAGE, var_ADHY_AAGEU, var_ADHY_SEX, var_ADHY_RACE, var_ADHY_ITTFL, var_ADHY_SAFFL, var_ADHY_PPROTFL, var_ADHY_TRT01P, var_ADHY_TRT01A, var_ADHY_TRTSDTM, var_ADHY_TRTSDT, var_ADHY_TRTEDTM, var_ADHY_TRTEDT, var_ADHY_PARAM, var_ADHY_PARAMCD, var_ADHY_AVAL, var_ADHY_AVALC, var_ADHY_AVALU, var_ADHY_BASE, var_ADHY_BASEC, var_ADHY_ABLFL, var_ADHY_ANRLO, var_ADHY_ANRHI, var_ADHY_ADTM, var_ADHY_ADT, var_ADHY_ADY, var_ADHY_ADTF, var_ADHY_ATMF, var_ADHY_AVISIT, var_ADHY_AVISITN, var_ADHY_ONTRTFL, var_ADHY_CRIT1, var_ADHY_CRIT1FL, var_ADHY_CRIT1FN, var_ADHY_CRIT2, var_ADHY_CRIT2FL, var_ADHY_CRIT2FN, var_ADHY_MCRIT1, var_ADHY_MCRIT1ML, var_ADHY_SRCDOM, var_ADHY_SRCVAR, var_ADHY_SRCSEQ, var_ADHY_ANL01FL])
+				PHUSE_Row_Templates.func_nihpo_row_template_write(var_output_handle_ADHY, row_template_ADHY, list_ADHY_record)
 
 
 				# = ADSAFTTE file =
 				# One record per subject per parameter per analysis visit per analysis date.
 				# _x005F_x000D_ SDTM variables are populated on new records coming from other single records.  Otherwise, SDTM variables are left blank.
-				var_ADSAFTTE_STUDYID = var_ADSL_STUDYID				# Study Identifier	text	8		
-				var_ADSAFTTE_USUBJID = var_ADSL_USUBJID				# Unique Subject Identifier	text	50		
-				var_ADSAFTTE_SUBJID = var_ADSL_SUBJID				# Subject Identifier for the Study	text	50		
-				var_ADSAFTTE_SITEID = var_ADSL_SITEID				# Study Site Identifier	text	20		
 				var_ADSAFTTE_ASEQ = "-ASEQ-"						# Analysis Sequence Number	integer	8		
-				var_ADSAFTTE_REGION1 = "-REGION1-"					# Geographic Region 1	text	200		
-				var_ADSAFTTE_COUNTRY = var_ADSL_COUNTRY				# Country	text	3		ISO3166
-				var_ADSAFTTE_ETHNIC = var_ADSL_ETHNIC				# Ethnicity	text	200		
-				var_ADSAFTTE_AGE = var_ADSL_AGE						# Age	integer	8		
-				var_ADSAFTTE_AGEU = var_ADSL_AGEU					# Age Units	text	6	C66781	Age Unit
-				var_ADSAFTTE_AAGE = var_ADSL_AAGE					# Analysis Age	integer	8		
-				var_ADSAFTTE_AAGEU = var_ADSL_AAGEU					# Analysis Age Unit	text	6	C66781	Age Unit
-				var_ADSAFTTE_AGEGR1 = "-AGEGR1-"					# Pooled Age Group 1	text	10		
-				var_ADSAFTTE_AGEGR2 = "-AGEGR2-"					# Pooled Age Group 2	text	10		
-				var_ADSAFTTE_AGEGR3 = "-AGEGR3-"					# Pooled Age Group 3	text	10		
-				var_ADSAFTTE_STRATwNM = "-STRATwNM-"				# Description of Stratum w	text	200		
-				var_ADSAFTTE_STRATw = "-STRATw-"					# Randomized Value of Stratum w	text	200		
-				var_ADSAFTTE_STRATwV = "-STRATwV-"					# Verified Value of Stratum w	text	200		
-				var_ADSAFTTE_SEX = var_ADSL_SEX						# Sex	text	2	C66731	Sex
-				var_ADSAFTTE_RACE = var_ADSL_RACE					# Race	text	200	C74457	Race
-				var_ADSAFTTE_ITTFL = var_ADLB_ITTFL						# Intent-To-Treat Population Flag	text	1	C66742	No Yes Response
-				var_ADSAFTTE_SAFFL = var_ADSL_SAFFL						# Safety Population Flag	text	1	C66742	No Yes Response
-				var_ADSAFTTE_PPROTFL = "-PPROTFL-"					# Per-Protocol Population Flag	text	1	C66742	No Yes Response
-				var_ADSAFTTE_TRT01P = "-TRT01P-"					# Planned Treatment for Period 01	text	200		
-				var_ADSAFTTE_TRTxxP	= "-TRTxxP-"					# Planned Treatment for Period xx	text	200		
-				var_ADSAFTTE_TRT01A = "-TRT01A-"					# Actual Treatment for Period 01	text	200		
-				var_ADSAFTTE_TRTxxA = "-TRTxxA-"					# Actual Treatment for Period xx	text	200		
-				var_ADSAFTTE_TRTSEQP = "-TRTSEQP-"					# Planned Sequence of Treatments	text	200		
-				var_ADSAFTTE_TRTSEQA = "-TRTSEQA-"					# Actual Sequence of Treatments	text	200		
-				var_ADSAFTTE_TRTSDTM = "-TRTSDTM-"					# Datetime of First Exposure to Treatment	integer	8		
-				var_ADSAFTTE_TRTSDT = "-TRTSDT-"					# Date of First Exposure to Treatment	integer	8		
-				var_ADSAFTTE_TRTEDTM = "-TRTEDTM-"					# Datetime of Last Exposure to Treatment	integer	8		
-				var_ADSAFTTE_TRTEDT = "-TRTEDT-"					# Date of Last Exposure to Treatment	integer	8		
 				var_ADSAFTTE_DCUTDT = "-DCUTDT-"					# Date of Data Cut	integer	8		
 				var_ADSAFTTE_PARAM = "-PARAM-"						# Parameter	text	200		
 				var_ADSAFTTE_PARAMCD = "-PARAMCD-"					# Parameter Code	text	8		
@@ -935,10 +982,11 @@ while var_subject_counter <= CT_NUMBER_SUBJECTS:
 				var_ADSAFTTE_ANL01FL = "-ANL01FL-"					# Analysis Flag 01	text	1	L00052	Yes Response
 				#
 				# Write ADSAFTTE record to file:
+				list_ADSAFTTE_record = [var_ADSAFTTE_ASEQ, var_ADSAFTTE_DCUTDT, var_ADSAFTTE_PARAM, var_ADSAFTTE_PARAMCD, var_ADSAFTTE_PARCAT1, var_ADSAFTTE_AVAL, var_ADSAFTTE_AVALU, var_ADSAFTTE_STARTDT, var_ADSAFTTE_STARTDTF, var_ADSAFTTE_ADT, var_ADSAFTTE_ADY, var_ADSAFTTE_ADTF, var_ADSAFTTE_CNSR, var_ADSAFTTE_EVNTDESC, var_ADSAFTTE_CNSDTDSC, var_ADSAFTTE_SRCDOM, var_ADSAFTTE_SRCVAR, var_ADSAFTTE_SRCSEQ, var_ADSAFTTE_ANL01FL]
 				if (CT_DEBUG == 1):
-					print(var_ADSAFTTE_STUDYID, var_ADSAFTTE_USUBJID, var_ADSAFTTE_SUBJID, var_ADSAFTTE_SITEID, var_ADSAFTTE_ASEQ, var_ADSAFTTE_REGION1, var_ADSAFTTE_COUNTRY, var_ADSAFTTE_ETHNIC, var_ADSAFTTE_AGE, var_ADSAFTTE_AGEU, var_ADSAFTTE_AAGE, var_ADSAFTTE_AAGEU, var_ADSAFTTE_AGEGR1, var_ADSAFTTE_AGEGR2, var_ADSAFTTE_AGEGR3, var_ADSAFTTE_STRATwNM, var_ADSAFTTE_STRATw, var_ADSAFTTE_STRATwV, var_ADSAFTTE_SEX, var_ADSAFTTE_RACE, var_ADSAFTTE_ITTFL, var_ADSAFTTE_SAFFL, var_ADSAFTTE_PPROTFL, var_ADSAFTTE_TRT01P, var_ADSAFTTE_TRTxxP, var_ADSAFTTE_TRT01A, var_ADSAFTTE_TRTxxA, var_ADSAFTTE_TRTSEQP, var_ADSAFTTE_TRTSEQA, var_ADSAFTTE_TRTSDTM, var_ADSAFTTE_TRTSDT, var_ADSAFTTE_TRTEDTM, var_ADSAFTTE_TRTEDT, var_ADSAFTTE_DCUTDT, var_ADSAFTTE_PARAM, var_ADSAFTTE_PARAMCD, var_ADSAFTTE_PARCAT1, var_ADSAFTTE_AVAL, var_ADSAFTTE_AVALU, var_ADSAFTTE_STARTDT, var_ADSAFTTE_STARTDTF, var_ADSAFTTE_ADT, var_ADSAFTTE_ADY, var_ADSAFTTE_ADTF, var_ADSAFTTE_CNSR, var_ADSAFTTE_EVNTDESC, var_ADSAFTTE_CNSDTDSC, var_ADSAFTTE_SRCDOM, var_ADSAFTTE_SRCVAR, var_ADSAFTTE_SRCSEQ, var_ADSAFTTE_ANL01FL)
+					print(list_ADSAFTTE_record)
 					#
-				var_output_file_ADSAFTTE.writerow([var_ADSAFTTE_STUDYID, var_ADSAFTTE_USUBJID, var_ADSAFTTE_SUBJID, var_ADSAFTTE_SITEID, var_ADSAFTTE_ASEQ, var_ADSAFTTE_REGION1, var_ADSAFTTE_COUNTRY, var_ADSAFTTE_ETHNIC, var_ADSAFTTE_AGE, var_ADSAFTTE_AGEU, var_ADSAFTTE_AAGE, var_ADSAFTTE_AAGEU, var_ADSAFTTE_AGEGR1, var_ADSAFTTE_AGEGR2, var_ADSAFTTE_AGEGR3, var_ADSAFTTE_STRATwNM, var_ADSAFTTE_STRATw, var_ADSAFTTE_STRATwV, var_ADSAFTTE_SEX, var_ADSAFTTE_RACE, var_ADSAFTTE_ITTFL, var_ADSAFTTE_SAFFL, var_ADSAFTTE_PPROTFL, var_ADSAFTTE_TRT01P, var_ADSAFTTE_TRTxxP, var_ADSAFTTE_TRT01A, var_ADSAFTTE_TRTxxA, var_ADSAFTTE_TRTSEQP, var_ADSAFTTE_TRTSEQA, var_ADSAFTTE_TRTSDTM, var_ADSAFTTE_TRTSDT, var_ADSAFTTE_TRTEDTM, var_ADSAFTTE_TRTEDT, var_ADSAFTTE_DCUTDT, var_ADSAFTTE_PARAM, var_ADSAFTTE_PARAMCD, var_ADSAFTTE_PARCAT1, var_ADSAFTTE_AVAL, var_ADSAFTTE_AVALU, var_ADSAFTTE_STARTDT, var_ADSAFTTE_STARTDTF, var_ADSAFTTE_ADT, var_ADSAFTTE_ADY, var_ADSAFTTE_ADTF, var_ADSAFTTE_CNSR, var_ADSAFTTE_EVNTDESC, var_ADSAFTTE_CNSDTDSC, var_ADSAFTTE_SRCDOM, var_ADSAFTTE_SRCVAR, var_ADSAFTTE_SRCSEQ, var_ADSAFTTE_ANL01FL])
+				PHUSE_Row_Templates.func_nihpo_row_template_write(var_output_handle_ADSAFTTE, row_template_ADSAFTTE, list_ADSAFTTE_record)
 
 
 				# = = = = = End of Parameter = = =
@@ -951,18 +999,18 @@ while var_subject_counter <= CT_NUMBER_SUBJECTS:
 		var_counter_visit += 1
 		#
 	# = = = End of repeating records = = = =
-	#
-	# This is the LAST subject-specific file to be written.
-	# Write ADSL record to file:
-	if (CT_DEBUG == 1):
-		print (var_ADSL_STUDYID, var_ADSL_USUBJID, var_ADSL_SUBJID, var_ADSL_SITEID, var_ADSL_AGE, var_ADSL_AGEU, var_ADSL_SEX, var_ADSL_RACE, var_ADSL_ETHNIC, var_ADSL_COUNTRY, var_ADSL_DMDTC, var_ADSL_DMDY, var_ADSL_BRTHDTC, var_ADSL_DTHDTC, var_ADSL_DTHFL, var_ADSL_RFSTDTC, var_ADSL_RFENDTC, var_ADSL_RFXSTDTC, var_ADSL_RFXENDTC, var_ADSL_RFICDTC, var_ADSL_RFPENDTC, var_ADSL_INVID, var_ADSL_INVNAM, var_ADSL_ARM, var_ADSL_ARMCD, var_ADSL_ACTARM, var_ADSL_ACTARMCD, var_ADSL_BRTHDTF, var_ADSL_AAGE, var_ADSL_AAGEU, var_ADSL_AGEGR1, var_ADSL_ITTFL, var_ADSL_SAFFL, var_ADSL_PPROTFL, var_ADSL_FASFL, var_ADSL_TRT01P, var_ADSL_TRT01A, var_ADSL_RFICDT, var_ADSL_RANDDT, var_ADSL_BRTHDT, var_ADSL_TRTSDTM, var_ADSL_TRTSDT, var_ADSL_TRTEDTM, var_ADSL_TRTEDT, var_ADSL_TRTDURD, var_ADSL_EOSSTT, var_ADSL_EOSDT, var_ADSL_EOTSTT, var_ADSL_EOSDY, var_ADSL_EOSRDY, var_ADSL_DCSREAS, var_ADSL_DCSREASP, var_ADSL_DTHDT, var_ADSL_DTHCAUS, var_ADSL_ADTHAUT, var_ADSL_DTHADY, var_ADSL_AEWITHFL, var_ADSL_LSTALVDT)
-		#
-	var_output_file_ADSL.writerow([var_ADSL_STUDYID, var_ADSL_USUBJID, var_ADSL_SUBJID, var_ADSL_SITEID, var_ADSL_AGE, var_ADSL_AGEU, var_ADSL_SEX, var_ADSL_RACE, var_ADSL_ETHNIC, var_ADSL_COUNTRY, var_ADSL_DMDTC, var_ADSL_DMDY, var_ADSL_BRTHDTC, var_ADSL_DTHDTC, var_ADSL_DTHFL, var_ADSL_RFSTDTC, var_ADSL_RFENDTC, var_ADSL_RFXSTDTC, var_ADSL_RFXENDTC, var_ADSL_RFICDTC, var_ADSL_RFPENDTC, var_ADSL_INVID, var_ADSL_INVNAM, var_ADSL_ARM, var_ADSL_ARMCD, var_ADSL_ACTARM, var_ADSL_ACTARMCD, var_ADSL_BRTHDTF, var_ADSL_AAGE, var_ADSL_AAGEU, var_ADSL_AGEGR1, var_ADSL_ITTFL, var_ADSL_SAFFL, var_ADSL_PPROTFL, var_ADSL_FASFL, var_ADSL_TRT01P, var_ADSL_TRT01A, var_ADSL_RFICDT, var_ADSL_RANDDT, var_ADSL_BRTHDT, var_ADSL_TRTSDTM, var_ADSL_TRTSDT, var_ADSL_TRTEDTM, var_ADSL_TRTEDT, var_ADSL_TRTDURD, var_ADSL_EOSSTT, var_ADSL_EOSDT, var_ADSL_EOTSTT, var_ADSL_EOSDY, var_ADSL_EOSRDY, var_ADSL_DCSREAS, var_ADSL_DCSREASP, var_ADSL_DTHDT, var_ADSL_DTHCAUS, var_ADSL_ADTHAUT, var_ADSL_DTHADY, var_ADSL_AEWITHFL, var_ADSL_LSTALVDT])
-
-	#
-	var_subject_counter += 1
-
-
+#
+#
+# = = In-memory datasets = =
+# Every fatal Adverse Event must belong to a subject who died, and end on the date of death:
+array_ADAE_fatal = (PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_values(dataset_ADAE, 'AEOUT') == PHUSE_Adverse_Events.CT_AE_OUTCOME_FATAL)
+array_ADAE_subjects = PHUSE_Subject_Index.func_nihpo_subject_index_positions(index_ADSL, PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_column(dataset_ADAE, 'USUBJID')[array_ADAE_fatal])
+array_ADAE_death_dates = PHUSE_Subject_Index.func_nihpo_subject_index_take(index_ADSL, 'DTHDTC', array_ADAE_subjects)
+assert (np.all(PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_column(dataset_ADAE, 'AEENDTC')[array_ADAE_fatal] == array_ADAE_death_dates)),"Fatal Adverse Events must end on the date of death of their subject"
+#
+for dataset_in_memory in (dataset_ADSL, dataset_ADAE):
+	print ("%s: %d records, %.1f MB in memory." % (dataset_in_memory['name'], PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_length(dataset_in_memory), PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_nbytes(dataset_in_memory) / 1048576))
+#
 # = = Clean up files = =
 nihpo_conn.close()
 #
@@ -0,0 +1,106 @@
+"""
+Shared fixtures of the tests of sample_code. Run from sample_code/:
+	python3 -m pytest -q tests
+"""
+import os
+import sys
+#
+import pytest
+#
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+#
+#
+class NIHPO_Fake_Row (list):
+	"""
+	Row of a fake DictCursor: a list that also has the column names.
+	"""
+	def __init__ (self, in_columns, in_values):
+		super().__init__(in_values)
+		self.columns = in_columns
+	#
+	def keys (self):
+		return list(self.columns)
+#
+#
+class NIHPO_Fake_Cursor:
+	"""
+	Stand-in for a psycopg2 cursor: serves the rows the connection was given, and records the queries.
+	"""
+	def __init__ (self, in_connection, in_name=None):
+		self.connection = in_connection
+		self.name = in_name
+		self.position = 0
+		self.rows = []
+		self.description = None
+	#
+	def execute (self, in_query, in_parameters=None):
+		self.connection.queries.append((in_query, in_parameters))
+		if self.connection.error is not None:
+			raise self.connection.error
+		self.connection.status = 2		# psycopg2.extensions.STATUS_BEGIN
+		self.rows = [NIHPO_Fake_Row(self.connection.columns, values) for values in self.connection.rows]
+		self.description = [(column, 25) for column in self.connection.columns]
+	#
+	def fetchmany (self, in_size):
+		list_rows = self.rows[self.position:self.position + in_size]
+		self.position += len(list_rows)
+		return list_rows
+	#
+	def close (self):
+		self.connection.closed_cursors += 1
+#
+#
+class NIHPO_Fake_Connection:
+	"""
+	Stand-in for a psycopg2 connection to PODR.
+	"""
+	def __init__ (self, in_columns=('caseid', 'drugname'), in_rows=(), in_error=None):
+		self.columns = list(in_columns)
+		self.rows = [list(row) for row in in_rows]
+		self.error = in_error
+		self.autocommit = False
+		self.status = 1		# psycopg2.extensions.STATUS_READY
+		self.closed = 0
+		self.queries = []
+		self.closed_cursors = 0
+		self.rollbacks = 0
+	#
+	def cursor (self, name=None, cursor_factory=None, withhold=False):
+		return NIHPO_Fake_Cursor(self, name)
+	#
+	def rollback (self):
+		self.rollbacks += 1
+		self.status = 1
+	#
+	def close (self):
+		self.closed = 1
+#
+#
+@pytest.fixture
+def fake_podr_connection ():
+	return NIHPO_Fake_Connection
+#
+#
+# Codelists of the small SQLite3 file built by generator_database: (code, codelist_code, cdisc_submission_value). Header rows have no codelist_code.
+CT_TEST_TERMINOLOGY = [('C66731', '', 'SEX'), ('C16576', 'C66731', 'F'), ('C20197', 'C66731', 'M'),
+	('C66742', '', 'NY'), ('C49487', 'C66742', 'N'), ('C49488', 'C66742', 'Y'),
+	('C66769', '', 'AESEV'), ('C41338', 'C66769', 'MILD'), ('C41339', 'C66769', 'MODERATE'), ('C41340', 'C66769', 'SEVERE'),
+	('C66768', '', 'OUT'), ('C48275', 'C66768', 'FATAL'), ('C49498', 'C66768', 'RECOVERED/RESOLVED')]
+#
+#
+@pytest.fixture(scope='session')
+def generator_database (tmp_path_factory):
+	"""
+	Directory holding a small "Synthetic_Health_Data_NIHPO.sqlite3": the rules and definitions of PHUSE_Generate_SDTM.sql, and a few codelists.
+	"""
+	import sqlite3
+	var_directory = tmp_path_factory.mktemp('generator_database')
+	var_sample_code = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+	conn = sqlite3.connect(str(var_directory / 'Synthetic_Health_Data_NIHPO.sqlite3'))
+	with open(os.path.join(var_sample_code, 'PHUSE_Generate_SDTM.sql')) as file_sql:
+		conn.executescript(file_sql.read())
+	conn.execute("CREATE TABLE cdisc_terminology (code text, codelist_code text, codelist_extensible text, codelist_name text, cdisc_submission_value text, cdisc_synonyms text, cdisc_definition text, nci_preferred_term text);")
+	conn.executemany("INSERT INTO cdisc_terminology (code, codelist_code, cdisc_submission_value) VALUES (?, ?, ?);", CT_TEST_TERMINOLOGY)
+	conn.commit()
+	conn.close()
+	return var_directory
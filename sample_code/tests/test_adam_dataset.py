@@ -0,0 +1,47 @@
+"""
+Tests of PHUSE_ADaM_Dataset.py: typed columns, shared codelist dictionaries, and loading a file written by Roche_ADaM_Generation.py.
+"""
+import numpy as np
+import pytest
+#
+import PHUSE_ADaM_Dataset
+#
+CT_COLUMN_TYPES = {'SEX': ('codelist', 'TEST_SEX'), 'AGE': 'integer', 'TRTSDT': 'date', 'AVAL': 'float'}
+#
+#
+def test_columns_are_typed_and_codes_are_shared ():
+	dataset_ADSL = PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_create('ADSL', ['USUBJID', 'SEX', 'AGE', 'TRTSDT', 'AVAL'], CT_COLUMN_TYPES)
+	dataset_ADLB = PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_create('ADLB', ['USUBJID', 'SEX'], {'SEX': ('codelist', 'TEST_SEX')})
+	PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_append_row(dataset_ADSL, ['S1', 'F', '54', '2017-03-02', '1.5'])
+	PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_append_columns(dataset_ADSL, {'USUBJID': ['S2', 'S3'], 'SEX': ['M', ''], 'AGE': ['-AGE-', 61], 'TRTSDT': ['-TRTSDT-', '2018-01-31'], 'AVAL': ['x', 2]})
+	PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_append_columns(dataset_ADLB, {'USUBJID': ['S3', 'S1'], 'SEX': ['M', 'F']})
+	#
+	assert PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_length(dataset_ADSL) == 3
+	assert PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_column(dataset_ADSL, 'SEX').dtype == np.int8
+	assert PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_column(dataset_ADSL, 'SEX').tolist() == [0, 1, -1]
+	assert PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_column(dataset_ADLB, 'SEX').tolist() == [1, 0]
+	assert PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_values(dataset_ADSL, 'SEX').tolist() == ['F', 'M', None]
+	assert PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_column(dataset_ADSL, 'AGE').tolist() == [54, 0, 61]
+	assert PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_missing(dataset_ADSL, 'AGE').tolist() == [False, True, False]
+	array_dates = PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_column(dataset_ADSL, 'TRTSDT')
+	assert array_dates.dtype == np.dtype('datetime64[D]')
+	assert np.isnat(array_dates).tolist() == [False, True, False]
+	assert np.isnan(PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_column(dataset_ADSL, 'AVAL')).tolist() == [False, True, False]
+#
+#
+def test_to_pandas_keeps_codes ():
+	pytest.importorskip('pandas')
+	dataset_ADSL = PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_create('ADSL', ['SEX', 'AGE'], {'SEX': ('codelist', 'TEST_SEX_PANDAS'), 'AGE': 'integer'})
+	PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_append_columns(dataset_ADSL, {'SEX': ['F', 'M', 'F'], 'AGE': ['54', '-AGE-', '33']})
+	df_ADSL = PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_to_pandas(dataset_ADSL)
+	assert df_ADSL['SEX'].cat.codes.tolist() == [0, 1, 0]
+	assert df_ADSL['AGE'].isna().tolist() == [False, True, False]
+#
+#
+def test_from_csv_skips_comment_lines (tmp_path):
+	var_filename = tmp_path / 'ADSL.csv'
+	var_filename.write_text('"# Header line"\n# Dataset: ADSL|Description\nUSUBJID|SEX|AGE\nS1|F|54\nS2|M|-AGE-\n')
+	dataset_ADSL = PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_from_csv(str(var_filename), 'ADSL', {'SEX': ('codelist', 'TEST_SEX_CSV'), 'AGE': 'integer'})
+	assert dataset_ADSL['columns'] == ['USUBJID', 'SEX', 'AGE']
+	assert PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_values(dataset_ADSL, 'SEX').tolist() == ['F', 'M']
+	assert PHUSE_ADaM_Dataset.func_nihpo_adam_dataset_missing(dataset_ADSL, 'AGE').tolist() == [False, True]
@@ -0,0 +1,63 @@
+"""
+Tests of PHUSE_Adverse_Events.py: event counts, AESEQ, and fatal events that only happen to subjects who die.
+"""
+import numpy as np
+#
+import PHUSE_Adverse_Events
+#
+CT_CODELISTS = {'AESEV': ['MILD', 'MODERATE', 'SEVERE'], 'AEOUT': ['FATAL', 'NOT RECOVERED/NOT RESOLVED', 'RECOVERED/RESOLVED', 'RECOVERING/RESOLVING', 'UNKNOWN']}
+CT_EVENT_COUNTS = {'ARM01': {'distribution': 'poisson', 'mean': 3.0}, 'ARM02': {'distribution': 'negative_binomial', 'mean': 2.0, 'dispersion': 0.9, 'maximum': 6}}
+#
+#
+def func_cohort (in_number_subjects=2000, in_seed=7):
+	rng = np.random.default_rng(in_seed)
+	array_arm_codes = np.where(np.arange(in_number_subjects) % 2 == 0, 'ARM01', 'ARM02')
+	array_reference_dates = np.datetime64('2016-01-01') + rng.integers(0, 300, in_number_subjects)
+	array_deaths = rng.random(in_number_subjects) < 0.2
+	array_window_days = np.where(array_deaths, rng.integers(1, 60, in_number_subjects), 400)
+	dict_events = PHUSE_Adverse_Events.func_nihpo_ae_generate_events(rng, array_arm_codes, array_reference_dates, array_window_days, CT_EVENT_COUNTS, CT_CODELISTS, array_deaths)
+	return array_reference_dates, array_window_days, array_deaths, dict_events
+#
+#
+def test_aeseq_restarts_and_follows_onset ():
+	_, _, _, dict_events = func_cohort()
+	array_subjects = dict_events['SUBJECT_INDEX']
+	mask_new_subject = np.r_[True, array_subjects[1:] != array_subjects[:-1]]
+	assert np.all(dict_events['AESEQ'][mask_new_subject] == 1)
+	assert np.all(dict_events['AESEQ'][~mask_new_subject] == dict_events['AESEQ'][np.flatnonzero(~mask_new_subject) - 1] + 1)
+	assert np.all(dict_events['AESTDTC'][~mask_new_subject] >= dict_events['AESTDTC'][np.flatnonzero(~mask_new_subject) - 1])
+#
+#
+def test_dates_follow_each_subject_reference_date ():
+	array_reference_dates, array_window_days, _, dict_events = func_cohort()
+	array_subjects = dict_events['SUBJECT_INDEX']
+	array_start = array_reference_dates[array_subjects]
+	assert np.all(dict_events['AESTDTC'] >= array_start)
+	assert np.all((dict_events['AESTDTC'] - array_start).astype(np.int64) + 1 == dict_events['AESTDY'])
+	assert np.all(dict_events['AEENDTC'] >= dict_events['AESTDTC'])
+	assert np.all(dict_events['AEENDTC'] <= array_start + array_window_days[array_subjects])
+#
+#
+def test_fatal_only_last_event_of_subjects_who_die ():
+	array_reference_dates, array_window_days, array_deaths, dict_events = func_cohort()
+	array_subjects = dict_events['SUBJECT_INDEX']
+	mask_fatal = (dict_events['AEOUT'] == 'FATAL')
+	assert mask_fatal.any()
+	assert np.all(array_deaths[array_subjects[mask_fatal]])
+	# At most 01 per subject, and it is the last one:
+	assert len(np.unique(array_subjects[mask_fatal])) == mask_fatal.sum()
+	mask_last = np.r_[array_subjects[1:] != array_subjects[:-1], True]
+	assert np.all(mask_last[mask_fatal])
+	# Every subject who dies and has events dies of the last one, on the date of death:
+	assert set(array_subjects[mask_fatal]) == set(np.flatnonzero(array_deaths)) & set(array_subjects)
+	assert np.all(dict_events['AEENDTC'][mask_fatal] == (array_reference_dates + array_window_days)[array_subjects[mask_fatal]])
+	assert np.all((dict_events['AESDTH'] == 'Y') == mask_fatal)
+	assert np.all(dict_events['AESER'][mask_fatal] == 'Y')
+#
+#
+def test_no_deaths_no_fatal_events ():
+	rng = np.random.default_rng(3)
+	dict_events = PHUSE_Adverse_Events.func_nihpo_ae_generate_events(rng, ['ARM01'] * 500, np.datetime64('2016-01-01'), 365, CT_EVENT_COUNTS, CT_CODELISTS)
+	assert len(dict_events['AEOUT']) > 0
+	assert not np.any(dict_events['AEOUT'] == 'FATAL')
+	assert not np.any(dict_events['AESDTH'] == 'Y')
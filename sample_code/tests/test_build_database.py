@@ -0,0 +1,64 @@
+"""
+Tests of PHUSE_Build_Database.py: which files func_nihpo_database_connect() opens as immutable.
+"""
+import sqlite3
+#
+import pytest
+#
+import PHUSE_Build_Database
+#
+#
+def func_source (in_filename):
+	conn = sqlite3.connect(str(in_filename))
+	conn.execute("CREATE TABLE cdisc_terminology (code text, codelist_code text, cdisc_submission_value text);")
+	conn.execute("INSERT INTO cdisc_terminology VALUES ('C66731', '', 'SEX');")
+	conn.commit()
+	conn.close()
+#
+#
+def func_read_while_locked (in_filename):
+	"""
+	Reads the file while another connection holds an EXCLUSIVE lock: only an immutable connection does not wait for it.
+	"""
+	conn_writer = sqlite3.connect(str(in_filename), isolation_level=None)
+	conn_writer.execute("BEGIN EXCLUSIVE;")
+	try:
+		conn = PHUSE_Build_Database.func_nihpo_database_connect(str(in_filename))
+		conn.execute("PRAGMA busy_timeout=0;")
+		return conn.execute("SELECT COUNT(*) FROM cdisc_terminology;").fetchone()[0]
+	finally:
+		conn_writer.execute("ROLLBACK;")
+		conn_writer.close()
+#
+#
+def test_built_file_is_immutable (tmp_path):
+	var_directory = tmp_path / 'odd #name? 100%'
+	var_directory.mkdir()
+	func_source(var_directory / 'source.sqlite3')
+	PHUSE_Build_Database.func_nihpo_database_build(str(var_directory / 'source.sqlite3'), str(var_directory / 'built.sqlite3'))
+	assert func_read_while_locked(var_directory / 'built.sqlite3') == 1
+#
+#
+def test_other_file_is_not_immutable (tmp_path):
+	func_source(tmp_path / 'plain.sqlite3')
+	with pytest.raises(sqlite3.OperationalError, match='locked'):
+		func_read_while_locked(tmp_path / 'plain.sqlite3')
+	#
+	conn = PHUSE_Build_Database.func_nihpo_database_connect(str(tmp_path / 'plain.sqlite3'))
+	conn_writer = sqlite3.connect(str(tmp_path / 'plain.sqlite3'))
+	conn_writer.execute("INSERT INTO cdisc_terminology VALUES ('C16576', 'C66731', 'F');")
+	conn_writer.commit()
+	conn_writer.close()
+	assert conn.execute("SELECT COUNT(*) FROM cdisc_terminology;").fetchone()[0] == 2		# Sees the change.
+#
+#
+def test_built_file_in_wal_mode_is_not_immutable (tmp_path):
+	func_source(tmp_path / 'source.sqlite3')
+	PHUSE_Build_Database.func_nihpo_database_build(str(tmp_path / 'source.sqlite3'), str(tmp_path / 'built.sqlite3'))
+	conn_writer = sqlite3.connect(str(tmp_path / 'built.sqlite3'))
+	conn_writer.execute("PRAGMA journal_mode=WAL;")
+	conn = PHUSE_Build_Database.func_nihpo_database_connect(str(tmp_path / 'built.sqlite3'))
+	conn_writer.execute("INSERT INTO cdisc_terminology VALUES ('C16576', 'C66731', 'F');")
+	conn_writer.commit()
+	assert conn.execute("SELECT COUNT(*) FROM cdisc_terminology;").fetchone()[0] == 2
+	conn_writer.close()
@@ -0,0 +1,78 @@
+"""
+Tests of PHUSE_Codelists.py: codelists published once in shared memory, and sampled by worker processes straight from it.
+"""
+import multiprocessing
+import os
+import subprocess
+import sys
+from multiprocessing import shared_memory
+#
+import numpy as np
+import pytest
+#
+import PHUSE_Codelists
+#
+#
+CT_VALUES = {'C66742': ['N', 'Y'], 'C66731': ['F', 'M', 'U', 'UNDIFFERENTIATED'], '(EMPTY)': [], 'C00000': ['Ä', 'ß']}
+#
+#
+def func_worker_sample (in_arguments):
+	var_codelist, var_seed = in_arguments
+	return PHUSE_Codelists.func_nihpo_codelists_shared_sample(np.random.default_rng(var_seed), var_codelist, 50).tolist(), PHUSE_Codelists.func_nihpo_codelist_values(None, var_codelist), len(PHUSE_Codelists.dict_codelist_cache)
+#
+#
+@pytest.fixture
+def published ():
+	shm_codelists, dict_descriptor = PHUSE_Codelists.func_nihpo_codelists_publish_values(CT_VALUES)
+	yield shm_codelists, dict_descriptor
+	PHUSE_Codelists.func_nihpo_codelists_detach()
+	PHUSE_Codelists.func_nihpo_codelists_release(shm_codelists)
+#
+#
+def test_shared_sample_draws_like_the_in_process_sample (published):
+	shm_codelists, dict_descriptor = published
+	PHUSE_Codelists.func_nihpo_codelists_attach(dict_descriptor)
+	for codelist in ('C66742', 'C66731', 'C00000'):
+		array_shared = PHUSE_Codelists.func_nihpo_codelists_shared_sample(np.random.default_rng(5), codelist, 200)
+		array_local = PHUSE_Codelists.func_nihpo_codelist_sample(np.random.default_rng(5), CT_VALUES[codelist], 200)
+		assert array_shared.tolist() == array_local.tolist()
+		assert PHUSE_Codelists.func_nihpo_codelist_values(None, codelist) == CT_VALUES[codelist]
+	assert 'C66742' not in PHUSE_Codelists.dict_codelist_cache		# Not copied out of the shared block.
+#
+#
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(), reason="Needs the fork start method.")
+def test_workers_attach_and_the_block_outlives_them (published):
+	shm_codelists, dict_descriptor = published
+	with multiprocessing.get_context('fork').Pool(2, initializer=PHUSE_Codelists.func_nihpo_codelists_attach, initargs=(dict_descriptor,)) as pool:
+		list_results = pool.map(func_worker_sample, [('C66731', 1), ('C66742', 2), ('C66731', 1)])
+	assert list_results[0] == list_results[2]
+	assert list_results[0][0] == PHUSE_Codelists.func_nihpo_codelist_sample(np.random.default_rng(1), CT_VALUES['C66731'], 50).tolist()
+	assert [one_result[1] for one_result in list_results] == [CT_VALUES['C66731'], CT_VALUES['C66742'], CT_VALUES['C66731']]
+	assert [one_result[2] for one_result in list_results] == [0, 0, 0]
+	#
+	shm_again = shared_memory.SharedMemory(name=dict_descriptor['name'])		# The workers have exited: the block is still there.
+	shm_again.close()
+#
+#
+def test_release_is_clean_with_a_pool ():
+	# In a new interpreter, so the resource tracker reports (leaked or unknown blocks) can be read from stderr:
+	var_script = """
+import multiprocessing
+from multiprocessing import shared_memory
+import PHUSE_Codelists
+shm_codelists, dict_descriptor = PHUSE_Codelists.func_nihpo_codelists_publish_values({'C66742': ['N', 'Y']})
+with multiprocessing.get_context('fork').Pool(2, initializer=PHUSE_Codelists.func_nihpo_codelists_attach, initargs=(dict_descriptor,)) as pool:
+	pool.map(abs, range(4))
+PHUSE_Codelists.func_nihpo_codelists_release(shm_codelists)
+try:
+	shared_memory.SharedMemory(name=dict_descriptor['name'])
+	print('still there')
+except FileNotFoundError:
+	print('removed')
+"""
+	if ('fork' not in multiprocessing.get_all_start_methods()):
+		pytest.skip("Needs the fork start method.")
+	completed = subprocess.run([sys.executable, '-c', var_script], cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), capture_output=True, text=True, timeout=60)
+	assert (completed.returncode == 0), completed.stderr
+	assert completed.stdout.strip() == 'removed'
+	assert completed.stderr == ''
@@ -0,0 +1,98 @@
+"""
+Tests of the batch mode of Generate_SDTM.py (trial design domains from JSON files, no user input).
+"""
+import json
+import os
+import subprocess
+import sys
+#
+import pytest
+#
+pytest.importorskip('pandas')
+import PHUSE_XPT
+#
+CT_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Generate_SDTM.py')
+CT_SQL_FILENAME = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'PHUSE_Generate_SDTM.sql')		# Types of the variables.
+#
+#
+def func_design (in_studyid, in_visits=(), in_assessments=(), in_criteria=()):
+	return {"studyid": in_studyid,
+		"trial_design_matrix": {"domain": "TA", "tdm": [
+			{"arm": "Placebo", "armcd": "P", "epochs": [
+				{"etcd": "SCRN", "element": "Screen", "tabranch": "", "tatrans": "", "epoch": "SCREENING"},
+				{"etcd": "P", "element": "Placebo", "tabranch": "", "tatrans": "", "epoch": "TREATMENT"}]}]},
+		"trial_element_matrix": {"domain": "TE", "elements": [
+			{"etcd": "SCRN", "testrl": "Informed consent", "teenrl": "2 weeks after start of Element", "tedur": "P14D"},
+			{"etcd": "P", "testrl": "First dose of placebo", "teenrl": "2 weeks after start of Element", "tedur": "P14D"}]},
+		"trial_visit_matrix": {"domain": "TV", "visits": list(in_visits)},
+		"trial_disease_assessment_matrix": {"domain": "TD", "assessments": list(in_assessments)},
+		"trial_inclusion_exclusion_matrix": {"domain": "TI", "criteria": list(in_criteria)}}
+#
+#
+CT_ASSESSMENTS = [{"tdorder": "1", "tdancvar": "ANCH1DT", "tdstoff": "P0D", "tdtgtpai": "P8W", "tdminpai": "P53D", "tdmaxpai": "P9W", "tdnumrpt": "3"}]
+CT_CRITERIA = [{"ietestcd": "INCL01", "ietest": "Has disease under study", "iecat": "INCLUSION", "iescat": "", "tirl": "..", "tivers": "1"}]
+CT_VISITS = [
+	{"visitnum": "10", "visit": "Visit 10", "visitdy": "1", "armcd": "", "arm": "", "tvstrl": "Start of Screen Epoch", "tvenrl": "1 hour after start of Visit"},
+	{"visitnum": "20", "visit": "Visit 20", "visitdy": "8", "armcd": "", "arm": "", "tvstrl": "1 week after start of Treatment Epoch", "tvenrl": "1 hour after start of Visit"}]
+#
+#
+def func_run (in_directory, in_designs, in_options=()):
+	list_filenames = []
+	for var_number, dict_design in enumerate(in_designs):
+		var_filename = os.path.join(str(in_directory), 'design_%02d.json' % (var_number))
+		with open(var_filename, 'w') as file_design:
+			json.dump(dict_design, file_design)
+		list_filenames.append(var_filename)
+	return subprocess.run([sys.executable, CT_SCRIPT, '--sql', CT_SQL_FILENAME] + list(in_options) + list_filenames, cwd=str(in_directory), capture_output=True, text=True, timeout=300)
+#
+#
+def func_read_xpt_column (in_filename, in_name):
+	reader_xpt = PHUSE_XPT.func_nihpo_xpt_reader_open(in_filename)
+	try:
+		return PHUSE_XPT.func_nihpo_xpt_reader_column(reader_xpt, in_name).tolist()
+	finally:
+		PHUSE_XPT.func_nihpo_xpt_reader_close(reader_xpt)
+#
+#
+def test_design_without_visits_writes_td_and_ti (tmp_path):
+	completed = func_run(tmp_path, [func_design('NOVIS', in_assessments=CT_ASSESSMENTS, in_criteria=CT_CRITERIA)])
+	assert (completed.returncode == 0), completed.stdout + completed.stderr
+	assert "Processing Assessment [1] : [ANCH1DT]" in completed.stdout
+	assert "Processing Inclusion / Exclusion Criteria [INCL01] : [Has disease under study]" in completed.stdout
+	for domain in ['TA', 'TE', 'TV', 'TD', 'TI']:
+		assert os.path.isfile(os.path.join(str(tmp_path), 'NOVIS', '%s.xpt' % (domain)))
+#
+#
+def test_visitnum_comes_from_the_design (tmp_path):
+	completed = func_run(tmp_path, [func_design('VISNUM', in_visits=CT_VISITS)])
+	assert (completed.returncode == 0), completed.stdout + completed.stderr
+	assert func_read_xpt_column(os.path.join(str(tmp_path), 'VISNUM', 'TV.xpt'), 'VISITNUM') == [10.0, 20.0]
+#
+#
+def test_one_failing_design_does_not_stop_the_batch (tmp_path):
+	list_bad_visits = [dict(CT_VISITS[0], visitnum="V1")]		# Valid text for the validator, but VISITNUM is numeric.
+	completed = func_run(tmp_path, [func_design('BAD', in_visits=list_bad_visits), func_design('GOOD', in_visits=CT_VISITS)])
+	assert (completed.returncode == 1)
+	assert "Trial design [%s] failed: ValueError" % (os.path.join(str(tmp_path), 'design_00.json')) in completed.stdout
+	assert "2 trial design(s) processed, 1 with errors." in completed.stdout
+	assert os.path.isfile(os.path.join(str(tmp_path), 'GOOD', 'TV.xpt'))
+#
+#
+@pytest.mark.parametrize('in_studyid', ['../OUT', 'A/B', '..', ''])
+def test_studyid_must_be_a_plain_file_name (tmp_path, in_studyid):
+	os.makedirs(str(tmp_path / 'run'))
+	completed = func_run(tmp_path / 'run', [func_design(in_studyid, in_visits=CT_VISITS), func_design('GOOD', in_visits=CT_VISITS)])
+	assert (completed.returncode == 1)
+	assert "Trial design [%s]: studyid [%s] must be a plain file name" % (os.path.join(str(tmp_path / 'run'), 'design_00.json'), in_studyid) in completed.stdout
+	assert "2 trial design(s) processed, 1 with errors." in completed.stdout
+	assert sorted(os.listdir(str(tmp_path))) == ['run']
+	assert os.path.isfile(os.path.join(str(tmp_path), 'run', 'GOOD', 'TV.xpt'))
+#
+#
+def test_duplicate_studyid_in_a_batch_fails (tmp_path):
+	completed = func_run(tmp_path, [func_design('SAME', in_visits=CT_VISITS), func_design('SAME', in_visits=CT_VISITS[0:1])])
+	assert (completed.returncode == 1)
+	assert "Trial design [%s]: studyid [SAME] is also the studyid of trial design [%s]." % (os.path.join(str(tmp_path), 'design_01.json'), os.path.join(str(tmp_path), 'design_00.json')) in completed.stdout
+	assert "2 trial design(s) processed, 1 with errors." in completed.stdout
+	# The first design is written, and not overwritten by the second one:
+	assert func_read_xpt_column(os.path.join(str(tmp_path), 'SAME', 'TV.xpt'), 'VISITNUM') == [10.0, 20.0]
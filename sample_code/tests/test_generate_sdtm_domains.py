@@ -0,0 +1,90 @@
+"""
+Tests of the rules-driven domain generator of PHUSE_Generate_SDTM.py: timing variables, test codes, "Num" variables without a source, and the same files from 1 or N processes.
+"""
+import os
+import shutil
+import subprocess
+import sys
+#
+import pytest
+#
+pd = pytest.importorskip('pandas')
+#
+CT_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'PHUSE_Generate_SDTM.py')
+#
+#
+def func_generate (in_database_directory, in_directory, in_options=()):
+	shutil.copy(os.path.join(str(in_database_directory), 'Synthetic_Health_Data_NIHPO.sqlite3'), str(in_directory))
+	os.makedirs(os.path.join(str(in_directory), 'out'), exist_ok=True)
+	completed = subprocess.run([sys.executable, CT_SCRIPT, 'STUDY01', 'out', '40', '2016-01-01', '2020-01-01'] + list(in_options), cwd=str(in_directory), capture_output=True, text=True, timeout=600)
+	assert (completed.returncode == 0), completed.stdout[-2000:] + completed.stderr
+	return os.path.join(str(in_directory), 'out')
+#
+#
+def func_read_domain (in_directory, in_domain):
+	return pd.read_csv(os.path.join(in_directory, 'PHUSE_TDF_%s.csv' % (in_domain)), sep='|', dtype=str, keep_default_na=False)
+#
+#
+@pytest.fixture(scope='module')
+def generated (generator_database, tmp_path_factory):
+	return func_generate(generator_database, tmp_path_factory.mktemp('domains'), ['--seed', '20201008'])
+#
+#
+@pytest.mark.parametrize('in_domain', ['AE', 'CM', 'EX'])
+def test_end_day_and_duration_follow_the_dates (generated, in_domain):
+	df_domain = func_read_domain(generated, in_domain)
+	assert len(df_domain) > 0
+	array_start = pd.to_datetime(df_domain[in_domain + 'STDTC'])
+	array_end = pd.to_datetime(df_domain[in_domain + 'ENDTC'])
+	array_days = (array_end - array_start).dt.days
+	assert (array_days >= 0).all()
+	assert (df_domain[in_domain + 'DUR'] == 'P' + array_days.astype(str) + 'D').all()
+	# Study days count from the same reference date, and skip day 0:
+	array_start_day = df_domain[in_domain + 'STDY'].astype(int)
+	array_end_day = df_domain[in_domain + 'ENDY'].astype(int)
+	array_expected = array_start_day + array_days
+	array_expected = array_expected.where((array_start_day > 0) | (array_expected < 0), array_expected + 1)
+	assert (array_end_day == array_expected).all()
+#
+#
+@pytest.mark.parametrize('in_domain', ['EX', 'LB', 'VS'])
+def test_elapsed_time_is_a_duration (generated, in_domain):
+	df_domain = func_read_domain(generated, in_domain)
+	assert df_domain[in_domain + 'ELTM'].str.fullmatch(r'PT\d+H').all()
+#
+#
+@pytest.mark.parametrize('in_domain', ['LB', 'VS'])
+def test_test_codes_are_valid (generated, in_domain):
+	df_domain = func_read_domain(generated, in_domain)
+	assert df_domain[in_domain + 'TESTCD'].str.fullmatch(r'[A-Z][A-Z0-9_]{0,7}').all()
+	# One test name per test code:
+	assert (df_domain.groupby(in_domain + 'TESTCD')[in_domain + 'TEST'].nunique() == 1).all()
+#
+#
+def test_adverse_events_per_subject_follow_the_arm_distributions (generated):
+	# At most "maximum" (5) adverse events per subject, and with a mean of 0.6 to 2.1 per subject some subjects have none:
+	df_domain = func_read_domain(generated, 'AE')
+	array_counts = df_domain.groupby('USUBJID').size()
+	assert array_counts.max() <= 5
+	assert len(array_counts) < len(func_read_domain(generated, 'DM'))
+	assert (df_domain.groupby('USUBJID')['AESEQ'].apply(lambda sequence: list(sequence.astype(int))) == array_counts.apply(lambda count: list(range(1, count + 1)))).all()
+#
+#
+def test_num_without_source_is_missing (generated):
+	# EXDOSE is "Num" without controlled terms: nothing to derive it from.
+	df_domain = func_read_domain(generated, 'EX')
+	assert (df_domain['EXDOSE'] == '').all()
+#
+#
+def test_same_files_whatever_the_number_of_processes (generator_database, tmp_path):
+	dict_files = {}
+	for var_processes in ('1', '3'):
+		os.makedirs(str(tmp_path / var_processes))
+		var_directory = func_generate(generator_database, tmp_path / var_processes, ['--processes', var_processes, '--seed', '20201008'])
+		dict_files[var_processes] = {}
+		for var_filename in sorted(os.listdir(var_directory)):
+			with open(os.path.join(var_directory, var_filename), 'rb') as file_domain:
+				dict_files[var_processes][var_filename] = file_domain.read()
+	assert len(dict_files['1']) > 0
+	assert sorted(dict_files['1']) == sorted(dict_files['3'])
+	assert [var_filename for var_filename in dict_files['1'] if (dict_files['1'][var_filename] != dict_files['3'][var_filename])] == []
@@ -0,0 +1,77 @@
+"""
+Tests of the incremental build of Generate_SDTM.py: only the domains whose inputs changed are rewritten.
+"""
+import copy
+import json
+import os
+#
+import pytest
+#
+pytest.importorskip('pandas')
+from test_generate_sdtm_batch import CT_ASSESSMENTS, CT_CRITERIA, CT_VISITS, func_design, func_read_xpt_column, func_run
+#
+CT_DOMAINS = ['TA', 'TE', 'TV', 'TD', 'TM', 'TI', 'TS']
+#
+#
+def func_mtimes (in_directory):
+	return {domain: os.stat(os.path.join(in_directory, '%s.xpt' % (domain))).st_mtime_ns for domain in CT_DOMAINS}
+#
+#
+def func_rewritten (in_before, in_after):
+	return sorted([domain for domain in CT_DOMAINS if (in_before[domain] != in_after[domain])])
+#
+#
+@pytest.fixture
+def built_design (tmp_path):
+	dict_design = func_design('INC', in_visits=CT_VISITS, in_assessments=CT_ASSESSMENTS, in_criteria=CT_CRITERIA)
+	completed = func_run(tmp_path, [dict_design], ['--incremental'])
+	assert (completed.returncode == 0), completed.stdout + completed.stderr
+	return tmp_path, dict_design
+#
+#
+def test_nothing_changed_nothing_rewritten (built_design):
+	var_directory, dict_design = built_design
+	dict_before = func_mtimes(os.path.join(str(var_directory), 'INC'))
+	completed = func_run(var_directory, [dict_design], ['--incremental'])
+	assert (completed.returncode == 0), completed.stdout + completed.stderr
+	assert "rewriting nothing" in completed.stdout
+	assert func_rewritten(dict_before, func_mtimes(os.path.join(str(var_directory), 'INC'))) == []
+#
+#
+@pytest.mark.parametrize('in_section, in_entries, in_domain, in_column, in_expected', [
+	('trial_disease_assessment_matrix', 'assessments', 'TD', 'TDNUMRPT', ['7']),
+	('trial_inclusion_exclusion_matrix', 'criteria', 'TI', 'IETESTCD', ['INCL99'])])
+def test_td_or_ti_alone_is_rewritten (built_design, in_section, in_entries, in_domain, in_column, in_expected):
+	# TD and TI are rebuilt without TV: nothing they print or write may depend on the visits.
+	var_directory, dict_design = built_design
+	var_target = os.path.join(str(var_directory), 'INC')
+	dict_before = func_mtimes(var_target)
+	dict_changed = copy.deepcopy(dict_design)
+	dict_entry = dict_changed[in_section][in_entries][0]
+	dict_entry['tdnumrpt' if (in_domain == 'TD') else 'ietestcd'] = in_expected[0]
+	completed = func_run(var_directory, [dict_changed], ['--incremental'])
+	assert (completed.returncode == 0), completed.stdout + completed.stderr
+	assert func_rewritten(dict_before, func_mtimes(var_target)) == [in_domain]
+	assert [str(value) for value in func_read_xpt_column(os.path.join(var_target, '%s.xpt' % (in_domain)), in_column)] == in_expected
+#
+#
+def test_changed_arms_rewrite_ta_and_te (built_design):
+	var_directory, dict_design = built_design
+	var_target = os.path.join(str(var_directory), 'INC')
+	dict_before = func_mtimes(var_target)
+	dict_changed = copy.deepcopy(dict_design)
+	dict_changed['trial_design_matrix']['tdm'][0]['arm'] = 'Placebo 2'
+	completed = func_run(var_directory, [dict_changed], ['--incremental'])
+	assert (completed.returncode == 0), completed.stdout + completed.stderr
+	assert func_rewritten(dict_before, func_mtimes(var_target)) == ['TA', 'TE']
+#
+#
+def test_modified_file_is_rewritten (built_design):
+	var_directory, dict_design = built_design
+	var_target = os.path.join(str(var_directory), 'INC')
+	with open(os.path.join(var_target, 'TI.xpt'), 'ab') as file_xpt:
+		file_xpt.write(b' ' * 80)
+	dict_before = func_mtimes(var_target)
+	completed = func_run(var_directory, [dict_design], ['--incremental'])
+	assert (completed.returncode == 0), completed.stdout + completed.stderr
+	assert func_rewritten(dict_before, func_mtimes(var_target)) == ['TI']
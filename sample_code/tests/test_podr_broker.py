@@ -0,0 +1,104 @@
+"""
+Tests of PHUSE_PODR_Broker.py: fair scheduling, and errors that must end one query, not the broker.
+"""
+import threading
+#
+import pytest
+#
+pytest.importorskip('psycopg2')
+import PHUSE_PODR_Broker
+#
+#
+def func_start_worker (in_broker):
+	thread_worker = threading.Thread(target=PHUSE_PODR_Broker.func_nihpo_broker_worker, args=(in_broker,), daemon=True)
+	thread_worker.start()
+	return thread_worker
+#
+#
+def func_stop_worker (in_broker, in_thread):
+	with in_broker['condition']:
+		in_broker['stop'] = True
+		in_broker['condition'].notify_all()
+	in_thread.join(timeout=5)
+	assert not in_thread.is_alive(),"The worker did not stop."
+#
+#
+def func_replies (in_request):
+	list_replies = []
+	while True:
+		dict_reply = in_request['replies'].get(timeout=5)
+		list_replies.append(dict_reply)
+		if ('done' in dict_reply) or ('error' in dict_reply):
+			return list_replies
+#
+#
+def test_rows_are_streamed_in_batches (fake_podr_connection):
+	broker = PHUSE_PODR_Broker.func_nihpo_broker_create(lambda: fake_podr_connection(in_rows=[(number, 'IMURAN') for number in range(5)]))
+	thread_worker = func_start_worker(broker)
+	list_replies = func_replies(PHUSE_PODR_Broker.func_nihpo_broker_submit(broker, 'c1', "SELECT caseid, drugname FROM t;", None, 2))
+	func_stop_worker(broker, thread_worker)
+	assert list_replies[0] == {'columns': ['caseid', 'drugname']}
+	assert [len(reply['rows']) for reply in list_replies[1:-1]] == [2, 2, 1]
+	assert list_replies[-1]['done'] and (list_replies[-1]['rows'] == 5)
+#
+#
+def test_error_in_query_does_not_stop_the_worker (fake_podr_connection):
+	list_connections = []
+	def func_connect ():
+		list_connections.append(fake_podr_connection(in_rows=[(1, 'IMURAN')], in_error=TypeError("not all arguments converted during string formatting")))
+		return list_connections[-1]
+	broker = PHUSE_PODR_Broker.func_nihpo_broker_create(func_connect)
+	thread_worker = func_start_worker(broker)
+	list_failed = func_replies(PHUSE_PODR_Broker.func_nihpo_broker_submit(broker, 'c1', "SELECT 1;"))
+	assert list_failed == [{'error': "TypeError: not all arguments converted during string formatting"}]
+	#
+	list_connections[-1].error = None		# The next query, from another client, must still be served.
+	list_replies = func_replies(PHUSE_PODR_Broker.func_nihpo_broker_submit(broker, 'c2', "SELECT 1;"))
+	assert list_replies[-1]['done']
+	dict_stats = PHUSE_PODR_Broker.func_nihpo_broker_stats(broker)
+	func_stop_worker(broker, thread_worker)
+	assert (dict_stats['queries_failed'] == 1) and (dict_stats['queries_done'] == 1)
+	assert (dict_stats['running_client'] is None) and (dict_stats['queue_depth'] == 0)
+#
+#
+def test_failed_connect_is_reported_and_retried ():
+	list_attempts = []
+	def func_connect ():
+		list_attempts.append(1)
+		raise OSError("connection refused")
+	broker = PHUSE_PODR_Broker.func_nihpo_broker_create(func_connect)
+	thread_worker = func_start_worker(broker)
+	assert func_replies(PHUSE_PODR_Broker.func_nihpo_broker_submit(broker, 'c1', "SELECT 1;")) == [{'error': "OSError: connection refused"}]
+	assert func_replies(PHUSE_PODR_Broker.func_nihpo_broker_submit(broker, 'c1', "SELECT 1;")) == [{'error': "OSError: connection refused"}]
+	func_stop_worker(broker, thread_worker)
+	assert (len(list_attempts) == 2)
+#
+#
+@pytest.mark.parametrize('in_query, in_parameters, in_batch_size', [
+	("SELECT %s;", [1], -1),
+	("SELECT %s;", [1], 0),
+	("SELECT %s;", [1], 'many'),
+	("SELECT %s;", [1], True),
+	("SELECT %s;", [1, 2], 10),
+	("SELECT %s, %s;", [1], 10),
+	("SELECT 1;", 'IMURAN', 10),
+	("", None, 10),
+	(None, None, 10)])
+def test_invalid_requests_are_rejected_before_queueing (in_query, in_parameters, in_batch_size):
+	broker = PHUSE_PODR_Broker.func_nihpo_broker_create(lambda: None)
+	with pytest.raises(ValueError):
+		PHUSE_PODR_Broker.func_nihpo_broker_submit(broker, 'c1', in_query, in_parameters, in_batch_size)
+	assert (len(broker['queues']) == 0)
+#
+#
+def test_literal_percent_and_named_parameters_are_accepted ():
+	PHUSE_PODR_Broker.func_nihpo_broker_check("SELECT drugname FROM t WHERE drugname LIKE 'IMU%%' AND caseid = %s;", [1], 10)
+	PHUSE_PODR_Broker.func_nihpo_broker_check("SELECT %(a)s, %(a)s;", {'a': 1}, 10)
+#
+#
+def test_clients_take_turns (fake_podr_connection):
+	broker = PHUSE_PODR_Broker.func_nihpo_broker_create(lambda: fake_podr_connection(in_rows=[(1, 'IMURAN')]))
+	list_requests = [PHUSE_PODR_Broker.func_nihpo_broker_submit(broker, 'heavy', "SELECT %d;" % (number)) for number in range(3)]
+	list_requests.append(PHUSE_PODR_Broker.func_nihpo_broker_submit(broker, 'notebook', "SELECT 99;"))
+	list_order = [PHUSE_PODR_Broker.func_nihpo_broker_next(broker)['query'] for _ in range(4)]
+	assert list_order == ["SELECT 0;", "SELECT 99;", "SELECT 1;", "SELECT 2;"]
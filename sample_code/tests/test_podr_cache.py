@@ -0,0 +1,72 @@
+"""
+Tests of PHUSE_PODR_Cache.py: tables read by a query, expiry (TTL), least recently used eviction, and empty results.
+"""
+import types
+#
+import pytest
+#
+pytest.importorskip('psycopg2')
+import PHUSE_PODR_Cache
+#
+#
+@pytest.fixture
+def cache_clock (monkeypatch):
+	"""
+	Clock of the cache, moved by the test: [seconds].
+	"""
+	list_now = [1000000.0]
+	monkeypatch.setattr(PHUSE_PODR_Cache, 'time', types.SimpleNamespace(time=lambda: list_now[0]))
+	return list_now
+#
+#
+@pytest.mark.parametrize('in_query, in_tables', [
+	("SELECT * FROM nihpo_fda_aers_drug d, nihpo_who_drug AS w WHERE d.drugname = w.drugname;", ['nihpo_fda_aers_drug', 'nihpo_who_drug']),
+	("SELECT * FROM nihpo_ema_case, public.nihpo_who_drug JOIN nihpo_fda_aers_reac r ON true;", ['nihpo_ema_case', 'nihpo_fda_aers_reac', 'public.nihpo_who_drug']),
+	("SELECT * FROM (SELECT caseid FROM nihpo_fda_aers_drug) AS d, nihpo_ema_case e;", ['nihpo_ema_case', 'nihpo_fda_aers_drug']),
+	("SELECT 'a, b FROM x' FROM Nihpo_FDA_AERS_Drug;", ['nihpo_fda_aers_drug'])])
+def test_tables_of_query (in_query, in_tables):
+	assert PHUSE_PODR_Cache.func_nihpo_podr_cache_ttl(in_query)[0] == in_tables
+#
+#
+def test_ttl_is_the_shortest_of_the_tables ():
+	dict_ttl = {'nihpo_fda_aers_': 500, 'information_schema.': 20}
+	assert PHUSE_PODR_Cache.func_nihpo_podr_cache_ttl("SELECT * FROM nihpo_fda_aers_drug, information_schema.tables;", dict_ttl)[1] == 20
+	assert PHUSE_PODR_Cache.func_nihpo_podr_cache_ttl("SELECT * FROM other_table;", dict_ttl)[1] == PHUSE_PODR_Cache.CT_CACHE_TTL_SECONDS
+#
+#
+def test_result_expires_after_ttl (tmp_path, cache_clock):
+	conn_cache = PHUSE_PODR_Cache.func_nihpo_podr_cache_open(str(tmp_path / 'cache.sqlite3'))
+	var_key = PHUSE_PODR_Cache.func_nihpo_podr_cache_key("SELECT caseid FROM t;")
+	assert PHUSE_PODR_Cache.func_nihpo_podr_cache_put(conn_cache, var_key, "SELECT caseid FROM t;", ['caseid'], [(1,), (2,)], in_ttl=60) == cache_clock[0] + 60
+	cache_clock[0] += 59
+	assert PHUSE_PODR_Cache.func_nihpo_podr_cache_get(conn_cache, var_key)['rows'] == [(1,), (2,)]
+	cache_clock[0] += 1
+	assert PHUSE_PODR_Cache.func_nihpo_podr_cache_get(conn_cache, var_key) is None
+	assert PHUSE_PODR_Cache.func_nihpo_podr_cache_stats(conn_cache)['results'] == 0		# Removed when found expired.
+	conn_cache.close()
+#
+#
+def test_least_recently_used_result_is_evicted (tmp_path, cache_clock):
+	conn_cache = PHUSE_PODR_Cache.func_nihpo_podr_cache_open(str(tmp_path / 'cache.sqlite3'))
+	list_keys = [PHUSE_PODR_Cache.func_nihpo_podr_cache_key("SELECT caseid FROM t%d;" % (number)) for number in range(3)]
+	for number in range(2):
+		PHUSE_PODR_Cache.func_nihpo_podr_cache_put(conn_cache, list_keys[number], "SELECT caseid FROM t%d;" % (number), ['caseid'], [(value,) for value in range(100 * number, 100 * number + 100)])
+		cache_clock[0] += 1
+	PHUSE_PODR_Cache.func_nihpo_podr_cache_get(conn_cache, list_keys[0])		# Now the result of t1 is the least recently used.
+	cache_clock[0] += 1
+	PHUSE_PODR_Cache.func_nihpo_podr_cache_put(conn_cache, list_keys[2], "SELECT caseid FROM t2;", ['caseid'], [(value,) for value in range(200, 300)])
+	assert PHUSE_PODR_Cache.func_nihpo_podr_cache_evict(conn_cache, PHUSE_PODR_Cache.func_nihpo_podr_cache_stats(conn_cache)['bytes'] - 1) == 1
+	assert PHUSE_PODR_Cache.func_nihpo_podr_cache_get(conn_cache, list_keys[1]) is None
+	assert PHUSE_PODR_Cache.func_nihpo_podr_cache_get(conn_cache, list_keys[0]) is not None
+	assert PHUSE_PODR_Cache.func_nihpo_podr_cache_get(conn_cache, list_keys[2]) is not None
+	conn_cache.close()
+#
+#
+def test_empty_result_keeps_its_columns (tmp_path, fake_podr_connection):
+	conn_podr = fake_podr_connection(in_rows=[])
+	var_cache_filename = str(tmp_path / 'cache.sqlite3')
+	dict_result = PHUSE_PODR_Cache.func_nihpo_podr_cache_query(conn_podr, "SELECT caseid, drugname FROM nihpo_fda_aers_drug WHERE drugname = %s;", ('NONE',), in_cache=var_cache_filename)
+	assert (dict_result['columns'], dict_result['rows'], dict_result['cached']) == (['caseid', 'drugname'], [], False)
+	dict_result = PHUSE_PODR_Cache.func_nihpo_podr_cache_query(conn_podr, "SELECT caseid, drugname FROM nihpo_fda_aers_drug WHERE drugname = %s;", ('NONE',), in_cache=var_cache_filename)
+	assert (dict_result['columns'], dict_result['rows'], dict_result['cached']) == (['caseid', 'drugname'], [], True)
+	assert len(conn_podr.queries) == 1
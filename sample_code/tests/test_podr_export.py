@@ -0,0 +1,64 @@
+"""
+Tests of PHUSE_PODR_Export.py: PostgreSQL types of a COPY export mapped to Parquet types, and CSV written by COPY converted to Parquet.
+"""
+import datetime
+import gzip
+#
+import pytest
+#
+pytest.importorskip('psycopg2')
+pa = pytest.importorskip('pyarrow')
+import pyarrow.parquet
+from psycopg2 import sql
+#
+import PHUSE_PODR_Export
+#
+#
+# (column, PostgreSQL type OID, pyarrow type expected):
+CT_COLUMNS = [('flag', 16, pa.bool_()), ('caseid', 20, pa.int64()), ('dose', 21, pa.int16()), ('visit', 23, pa.int32()), ('weight', 700, pa.float32()), ('height', 701, pa.float64()),
+	('fda_dt', 1082, pa.date32()), ('received', 1114, pa.timestamp('us')), ('updated', 1184, pa.timestamp('us', tz='UTC')), ('amount', 1700, pa.string()), ('drugname', 25, pa.string())]
+#
+#
+class NIHPO_Description_Cursor:
+	"""
+	Cursor that only describes the columns of CT_COLUMNS, as psycopg2 does after "LIMIT 0".
+	"""
+	def __init__ (self):
+		self.queries = []
+		self.description = None
+	#
+	def execute (self, in_query, in_parameters=None):
+		self.queries.append(in_query)
+		self.description = [(column, type_oid) for column, type_oid, type_arrow in CT_COLUMNS]
+#
+#
+def test_postgresql_types_map_to_arrow_types ():
+	cur_describe = NIHPO_Description_Cursor()
+	dict_types = PHUSE_PODR_Export.func_nihpo_podr_export_arrow_schema(cur_describe, sql.SQL("SELECT * FROM nihpo_fda_aers_drug"))
+	assert list(dict_types.keys()) == [column for column, type_oid, type_arrow in CT_COLUMNS]
+	for column, type_oid, type_arrow in CT_COLUMNS:
+		assert dict_types[column] == type_arrow, column
+	assert len(cur_describe.queries) == 1
+#
+#
+def test_copy_csv_to_parquet (tmp_path):
+	dict_types = PHUSE_PODR_Export.func_nihpo_podr_export_arrow_schema(NIHPO_Description_Cursor(), sql.SQL("SELECT * FROM nihpo_fda_aers_drug"))
+	var_csv_filename = str(tmp_path / 'export.csv.gz')
+	with gzip.open(var_csv_filename, 'wb') as file_csv:		# As written by COPY .. WITH (FORMAT csv, HEADER true): NULL is an empty field, an empty string is "".
+		file_csv.write(b'flag,caseid,dose,visit,weight,height,fda_dt,received,updated,amount,drugname\n')
+		file_csv.write(b't,9007199254740993,2,3,70.5,1.8,2020-01-02,2020-01-02 10:30:00,2020-01-02 10:30:00+02,12.50,"IMURAN, 50 MG"\n')
+		file_csv.write(b'f,,,,,,,,,,""\n')
+	assert PHUSE_PODR_Export.func_nihpo_podr_export_parquet(var_csv_filename, str(tmp_path / 'export.parquet'), dict_types) == 2
+	#
+	table_parquet = pyarrow.parquet.read_table(str(tmp_path / 'export.parquet'))
+	assert [table_parquet.schema.field(column).type for column, type_oid, type_arrow in CT_COLUMNS] == [type_arrow for column, type_oid, type_arrow in CT_COLUMNS]
+	list_rows = table_parquet.to_pylist()
+	assert list_rows[0]['flag'] is True
+	assert list_rows[0]['caseid'] == 9007199254740993		# Not exact as a float64.
+	assert list_rows[0]['fda_dt'] == datetime.date(2020, 1, 2)
+	assert list_rows[0]['received'] == datetime.datetime(2020, 1, 2, 10, 30)
+	assert list_rows[0]['updated'] == datetime.datetime(2020, 1, 2, 8, 30, tzinfo=datetime.timezone.utc)
+	assert (list_rows[0]['amount'], list_rows[0]['drugname']) == ('12.50', 'IMURAN, 50 MG')		# numeric stays text: no rounding.
+	assert list_rows[1]['flag'] is False
+	assert [list_rows[1][column] for column in ('caseid', 'dose', 'visit', 'weight', 'height', 'fda_dt', 'received', 'updated', 'amount')] == [None] * 9
+	assert list_rows[1]['drugname'] == ''
@@ -0,0 +1,62 @@
+"""
+Tests of PHUSE_Subject_Index.py: positions of keys, attributes of records with and without a subject, and the study window of each subject.
+"""
+import pytest
+#
+np = pytest.importorskip('numpy')
+import PHUSE_Subject_Index
+#
+#
+def func_dates (in_values):
+	return np.array([value or 'NaT' for value in in_values], dtype='datetime64[D]')
+#
+#
+@pytest.fixture
+def index_subjects ():
+	# S1 is alive and has an end of participation, S2 died before its end of participation, S3 died without one, S4 has neither:
+	dict_columns = {'USUBJID': np.array(['S1', 'S2', 'S3', 'S4'], dtype=object), 'ARMCD': np.array(['ARM01', 'ARM02', 'ARM01', 'ARM03'], dtype=object),
+		'AGE': np.array([34, 51, 67, 45]),
+		'RFSTDTC': func_dates(['2016-01-10', '2016-02-01', '2016-03-01', '2016-04-01']),
+		'RFENDTC': func_dates(['2016-06-30', '2016-09-30', None, None]),
+		'DTHDTC': func_dates([None, '2016-05-15', '2016-07-04', None])}
+	return PHUSE_Subject_Index.func_nihpo_subject_index_build(dict_columns, 'RFSTDTC', ['RFENDTC', 'DTHDTC'])
+#
+#
+def test_unknown_keys_have_position_minus_one (index_subjects):
+	array_positions = PHUSE_Subject_Index.func_nihpo_subject_index_positions(index_subjects, ['S3', 'S9', 'S1', '', 'S3'])
+	assert array_positions.dtype == np.int64
+	assert array_positions.tolist() == [2, -1, 0, -1, 2]
+	assert PHUSE_Subject_Index.func_nihpo_subject_index_positions(index_subjects, []).tolist() == []
+#
+#
+def test_take_fills_records_without_a_subject (index_subjects):
+	array_positions = np.array([1, -1, 3, 1])
+	assert PHUSE_Subject_Index.func_nihpo_subject_index_take(index_subjects, 'ARMCD', array_positions).tolist() == ['ARM02', '', 'ARM03', 'ARM02']
+	assert PHUSE_Subject_Index.func_nihpo_subject_index_take(index_subjects, 'AGE', array_positions, -1).tolist() == [51, -1, 45, 51]
+	array_dates = PHUSE_Subject_Index.func_nihpo_subject_index_take(index_subjects, 'DTHDTC', array_positions)
+	assert array_dates.dtype == np.dtype('datetime64[D]')
+	assert array_dates.astype(str).tolist() == ['2016-05-15', 'NaT', 'NaT', '2016-05-15']
+	# All records with a subject: the values of the index, as they are:
+	assert PHUSE_Subject_Index.func_nihpo_subject_index_take(index_subjects, 'AGE', np.array([0, 2])).tolist() == [34, 67]
+#
+#
+def test_window_end_is_the_earliest_end_date (index_subjects):
+	assert index_subjects['window_start'].astype(str).tolist() == ['2016-01-10', '2016-02-01', '2016-03-01', '2016-04-01']
+	# Only RFENDTC, both (death first), only DTHDTC, none:
+	assert index_subjects['window_end'].astype(str).tolist() == ['2016-06-30', '2016-05-15', '2016-07-04', 'NaT']
+	# Same result whatever the order of the end columns:
+	index_reversed = PHUSE_Subject_Index.func_nihpo_subject_index_build(dict(index_subjects['columns']), 'RFSTDTC', ['DTHDTC', 'RFENDTC'])
+	assert index_reversed['window_end'].astype(str).tolist() == index_subjects['window_end'].astype(str).tolist()
+#
+#
+def test_dates_are_clipped_to_the_window (index_subjects):
+	array_positions = np.array([0, 1, 2, 3, -1])
+	array_dates = func_dates(['2015-12-31', '2016-08-01', '2016-07-04', '2030-01-01', '2030-01-01'])
+	array_clipped = PHUSE_Subject_Index.func_nihpo_subject_index_clip(index_subjects, array_positions, array_dates)
+	assert array_clipped.astype(str).tolist() == ['2016-01-10', '2016-05-15', '2016-07-04', '2030-01-01', '2030-01-01']
+	assert PHUSE_Subject_Index.func_nihpo_subject_index_within(index_subjects, array_positions, array_dates).tolist() == [False, False, True, True, True]
+#
+#
+def test_duplicate_keys_are_refused ():
+	with pytest.raises(AssertionError, match=r"1 duplicate values of \[USUBJID\]"):
+		PHUSE_Subject_Index.func_nihpo_subject_index_build({'USUBJID': ['S1', 'S1'], 'RFSTDTC': func_dates(['2016-01-01', '2016-01-01'])}, 'RFSTDTC', [])
@@ -0,0 +1,88 @@
+"""
+Tests of PHUSE_Terminology_Pack.py: a compiled pack answers as the SQLite3 file does, and func_nihpo_pack_open() refuses missing or stale packs.
+"""
+import os
+import shutil
+import sqlite3
+import struct
+#
+import pytest
+#
+pytest.importorskip('numpy')
+import PHUSE_Terminology_Pack
+#
+#
+@pytest.fixture
+def compiled (generator_database, tmp_path):
+	"""
+	Pack compiled from a copy of the generator database, in a directory whose name is not URI syntax. Returns (SQLite3 file, pack file).
+	"""
+	var_directory = tmp_path / 'a #b'
+	var_directory.mkdir()
+	var_sqlite3_filename = str(var_directory / 'S.sqlite3')
+	shutil.copy2(os.path.join(str(generator_database), 'Synthetic_Health_Data_NIHPO.sqlite3'), var_sqlite3_filename)
+	var_pack_filename = str(var_directory / 'S.pack')
+	PHUSE_Terminology_Pack.func_nihpo_pack_compile(var_sqlite3_filename, var_pack_filename)
+	return var_sqlite3_filename, var_pack_filename
+#
+#
+def func_text (in_row):
+	return tuple([('' if (value is None) else str(value).strip()) for value in in_row])
+#
+#
+def test_pack_answers_as_the_sqlite3_file (compiled):
+	var_sqlite3_filename, var_pack_filename = compiled
+	pack_terminology = PHUSE_Terminology_Pack.func_nihpo_pack_open(var_pack_filename, var_sqlite3_filename)
+	assert pack_terminology is not None
+	conn = sqlite3.connect(var_sqlite3_filename)
+	try:
+		list_codelists = [one_row[0] for one_row in conn.execute("SELECT DISTINCT codelist_code FROM cdisc_terminology WHERE codelist_code <> '';")]
+		assert len(list_codelists) > 0
+		for var_codelist in list_codelists:
+			list_expected = [one_row[0] for one_row in conn.execute("SELECT cdisc_submission_value FROM cdisc_terminology WHERE codelist_code = ? ORDER BY 1;", (var_codelist,))]
+			assert PHUSE_Terminology_Pack.func_nihpo_pack_codelist_values(pack_terminology, var_codelist) == list_expected
+		for var_name, var_code in conn.execute("SELECT cdisc_submission_value, code FROM cdisc_terminology WHERE codelist_code = '';"):
+			assert PHUSE_Terminology_Pack.func_nihpo_pack_codelist_code(pack_terminology, var_name.lower()) == var_code
+		assert PHUSE_Terminology_Pack.func_nihpo_pack_codelist_values(pack_terminology, 'C99999') is None
+		assert PHUSE_Terminology_Pack.func_nihpo_pack_codelist_code(pack_terminology, 'NOT A CODELIST') is None
+		#
+		for var_section, var_table, list_columns, var_order in [('rules_values', 'cdisc_sdtm_domain_rules', PHUSE_Terminology_Pack.CT_PACK_RULES_COLUMNS, 'domain_code'),
+			('definitions_values', 'cdisc_sdtm_domain_definitions', PHUSE_Terminology_Pack.CT_PACK_DEFINITIONS_COLUMNS, 'domain_code, variable_name')]:
+			var_sql = "SELECT %s FROM %s" % (", ".join(list_columns), var_table)
+			list_expected = [func_text(one_row) for one_row in conn.execute(var_sql + " ORDER BY %s;" % (var_order))]
+			assert len(list_expected) > 0
+			assert PHUSE_Terminology_Pack.func_nihpo_pack_table_rows(pack_terminology, var_section) == list_expected
+			list_expected = [func_text(one_row) for one_row in conn.execute(var_sql + " WHERE domain_code IN ('AE', 'DM') ORDER BY %s;" % (var_order))]
+			assert PHUSE_Terminology_Pack.func_nihpo_pack_table_rows(pack_terminology, var_section, ['AE', 'DM']) == list_expected
+	finally:
+		conn.close()
+#
+#
+def test_missing_pack_is_not_opened (compiled):
+	var_sqlite3_filename, var_pack_filename = compiled
+	assert PHUSE_Terminology_Pack.func_nihpo_pack_open(var_pack_filename + '.missing', var_sqlite3_filename) is None
+#
+#
+def test_pack_of_another_version_is_not_opened (compiled):
+	var_sqlite3_filename, var_pack_filename = compiled
+	with open(var_pack_filename, 'r+b') as file_pack:
+		file_pack.seek(struct.calcsize('<8s'))
+		file_pack.write(struct.pack('<I', PHUSE_Terminology_Pack.CT_PACK_VERSION + 1))
+	assert PHUSE_Terminology_Pack.func_nihpo_pack_open(var_pack_filename, var_sqlite3_filename) is None
+#
+#
+@pytest.mark.parametrize('in_change', ['mtime', 'size'])
+def test_pack_of_a_changed_source_is_not_opened (compiled, in_change):
+	var_sqlite3_filename, var_pack_filename = compiled
+	var_size, var_mtime_ns = PHUSE_Terminology_Pack.func_nihpo_pack_source_signature(var_sqlite3_filename)
+	if (in_change == 'size'):
+		with open(var_sqlite3_filename, 'ab') as file_source:
+			file_source.write(b'\x00' * 512)
+		os.utime(var_sqlite3_filename, ns=(var_mtime_ns, var_mtime_ns))
+	else:
+		os.utime(var_sqlite3_filename, ns=(var_mtime_ns + 10 ** 9, var_mtime_ns + 10 ** 9))
+	assert PHUSE_Terminology_Pack.func_nihpo_pack_source_signature(var_sqlite3_filename) != (var_size, var_mtime_ns)
+	assert PHUSE_Terminology_Pack.func_nihpo_pack_open(var_pack_filename, var_sqlite3_filename) is None
+	# Compiled again, the pack is current:
+	PHUSE_Terminology_Pack.func_nihpo_pack_compile(var_sqlite3_filename, var_pack_filename)
+	assert PHUSE_Terminology_Pack.func_nihpo_pack_open(var_pack_filename, var_sqlite3_filename) is not None
@@ -0,0 +1,110 @@
+"""
+Tests of the Therapeutic Area User Guides of PHUSE_Generate_SDTM.py: func_nihpo_ta_definitions and func_nihpo_ta_plan_compile, on small TA tables.
+PHUSE_Generate_SDTM.py generates a study when it is imported, so the tests run only its generation plan functions and constants (see func_load_plan_functions).
+"""
+import ast
+import os
+import shutil
+import sqlite3
+#
+import pytest
+#
+CT_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'PHUSE_Generate_SDTM.py')
+CT_PLAN_NAMES = ['CT_PLAN_RULE_FLAGS', 'CT_PLAN_DEFINITION_FIELDS', 'CT_TA_DOMAINS_TABLE', 'CT_TA_VARIABLES_TABLE', 'CT_TA_DOMAIN_COLUMNS', 'CT_TA_VARIABLE_COLUMNS',
+	'CT_TA_CLASS_RULES', 'dict_ta_definitions_cache', 'func_nihpo_rule_flag', 'func_nihpo_generation_plan_compile', 'func_nihpo_ta_columns',
+	'func_nihpo_ta_definitions', 'func_nihpo_ta_plan_compile']
+#
+# Two TAs. Breast Cancer has a new Findings domain (BR), a new Trial Design domain (TZ), a new domain without class (XX), and two AE variables: one new, one AE already has.
+CT_TA_DOMAINS = [('Breast Cancer', 'BR', 'Findings'), ('Breast Cancer', 'TZ', 'Trial Design'), ('Breast Cancer', 'AE', 'Events'), ('Asthma', 'RE', 'Findings')]
+CT_TA_VARIABLES = [('Breast Cancer', 'BR', 'BRTESTCD', 'Short Name of Measurement', 'Char'), ('Breast Cancer', 'BR', 'BRORRES', 'Result in Original Units', 'Char'),
+	('Breast Cancer', 'TZ', 'TZPARM', 'Trial Parameter', 'Char'), ('Breast Cancer', 'XX', 'XXSEQ', 'Sequence Number', 'Num'),
+	('Breast Cancer', 'AE', 'AEBRSITE', 'Breast Cancer Site', 'Char'), ('Breast Cancer', 'AE', 'AETERM', 'Reported Term (TA label)', 'Char'),
+	(' asthma ', 'RE', 'RETESTCD', 'Short Name of Respiratory Test', 'Char')]
+#
+#
+def func_load_plan_functions ():
+	"""
+	Runs the imports, the constants and the functions of CT_PLAN_NAMES of PHUSE_Generate_SDTM.py, and nothing else. Returns their namespace.
+	"""
+	with open(CT_SCRIPT) as file_script:
+		tree_script = ast.parse(file_script.read(), CT_SCRIPT)
+	list_nodes = []
+	for one_node in tree_script.body:
+		if isinstance(one_node, ast.Import) and all(alias.name != 'xport' and not alias.name.startswith('xport.') for alias in one_node.names):
+			list_nodes.append(one_node)
+		elif isinstance(one_node, ast.FunctionDef) and (one_node.name in CT_PLAN_NAMES):
+			list_nodes.append(one_node)
+		elif isinstance(one_node, ast.Assign) and any(isinstance(target, ast.Name) and (target.id in CT_PLAN_NAMES) for target in one_node.targets):
+			list_nodes.append(one_node)
+	dict_namespace = {'CT_DEBUG': [], 'pack_terminology': None}
+	exec(compile(ast.Module(body=list_nodes, type_ignores=[]), CT_SCRIPT, 'exec'), dict_namespace)
+	return dict_namespace
+#
+#
+@pytest.fixture
+def plan (generator_database, tmp_path):
+	var_filename = str(tmp_path / 'Synthetic_Health_Data_NIHPO.sqlite3')
+	shutil.copy(os.path.join(str(generator_database), 'Synthetic_Health_Data_NIHPO.sqlite3'), var_filename)
+	conn = sqlite3.connect(var_filename)
+	conn.execute("CREATE TABLE cdisc_ta_domains (ta_name text, dataset_name text, class text);")
+	conn.executemany("INSERT INTO cdisc_ta_domains VALUES (?, ?, ?);", CT_TA_DOMAINS)
+	conn.execute("CREATE TABLE cdisc_ta_variables (ta_name text, dataset_name text, variable_name text, label text, data_type text, codelist text, role text, notes text, core text);")
+	conn.executemany("INSERT INTO cdisc_ta_variables (ta_name, dataset_name, variable_name, label, data_type) VALUES (?, ?, ?, ?, ?);", CT_TA_VARIABLES)
+	conn.commit()
+	dict_namespace = func_load_plan_functions()
+	dict_namespace['conn'] = conn
+	yield dict_namespace
+	conn.close()
+#
+#
+def test_one_ta_is_read (plan):
+	dict_definitions = plan['func_nihpo_ta_definitions'](plan['conn'], 'breast cancer')
+	assert sorted(dict_definitions['variables']) == ['AE', 'BR', 'TZ', 'XX']
+	assert [variable['variable_name'] for variable in dict_definitions['variables']['BR']] == ['BRORRES', 'BRTESTCD']
+	assert dict_definitions['variables']['BR'][0]['variable_label'] == 'Result in Original Units'
+	assert dict_definitions['variables']['BR'][0]['controlled_terms'] is None
+	assert dict_definitions['classes'] == {'BR': 'FINDINGS', 'TZ': 'TRIAL DESIGN', 'AE': 'EVENTS'}
+	# Names are matched after TRIM and UPPER:
+	assert list(plan['func_nihpo_ta_definitions'](plan['conn'], 'ASTHMA')['variables']) == ['RE']
+#
+#
+def test_second_call_is_a_cache_hit (plan):
+	dict_definitions = plan['func_nihpo_ta_definitions'](plan['conn'], 'Breast Cancer')
+	plan['conn'].execute("DELETE FROM cdisc_ta_variables;")
+	assert plan['func_nihpo_ta_definitions'](plan['conn'], ' BREAST CANCER') is dict_definitions
+	assert list(plan['dict_ta_definitions_cache']) == ['BREAST CANCER']
+#
+#
+def test_unknown_ta_is_an_error (plan):
+	with pytest.raises(ValueError, match=r"Therapeutic Area \[Oncology\] not found. Available: \['Breast Cancer', 'asthma'\]"):
+		plan['func_nihpo_ta_definitions'](plan['conn'], 'Oncology')
+	assert plan['dict_ta_definitions_cache'] == {}
+	plan['conn'].execute("DROP TABLE cdisc_ta_variables;")
+	with pytest.raises(sqlite3.OperationalError, match=r"Therapeutic Area table \[cdisc_ta_variables\] not found"):
+		plan['func_nihpo_ta_definitions'](plan['conn'], 'Breast Cancer')
+#
+#
+def test_new_domains_take_their_flags_from_their_class (plan):
+	dict_plan = plan['func_nihpo_ta_plan_compile'](plan['conn'], 'Breast Cancer', plan['func_nihpo_generation_plan_compile'](plan['conn']))
+	for var_domain_code, var_rule in [('BR', 'per_visit'), ('TZ', 'per_trial'), ('XX', 'per_subject')]:
+		assert [flag for flag in plan['CT_PLAN_RULE_FLAGS'] if dict_plan[var_domain_code][flag]] == [var_rule]
+		assert dict_plan[var_domain_code]['domain'] == var_domain_code
+	assert dict_plan['BR']['variable_names'] == ('BRORRES', 'BRTESTCD')
+	assert dict_plan['XX']['schema']['XXSEQ']['type'] == 'num'
+	with pytest.raises(TypeError):
+		dict_plan['BR'] = None
+#
+#
+def test_ta_variables_are_merged_into_existing_domains (plan):
+	dict_base_plan = plan['func_nihpo_generation_plan_compile'](plan['conn'])
+	dict_plan = plan['func_nihpo_ta_plan_compile'](plan['conn'], 'Breast Cancer', dict_base_plan)
+	assert set(dict_plan) == set(dict_base_plan) | {'BR', 'TZ', 'XX'}
+	assert dict_plan['DM'] is dict_base_plan['DM']
+	# The flags of AE stay those of "cdisc_sdtm_domain_rules", AEBRSITE is added in order, AETERM keeps the definition AE already had:
+	assert [dict_plan['AE'][flag] for flag in plan['CT_PLAN_RULE_FLAGS']] == [dict_base_plan['AE'][flag] for flag in plan['CT_PLAN_RULE_FLAGS']]
+	assert dict_plan['AE']['variable_names'] == tuple(sorted(dict_base_plan['AE']['variable_names'] + ('AEBRSITE',)))
+	dict_variables = dict([(variable['variable_name'], variable) for variable in dict_plan['AE']['variables']])
+	assert dict_variables['AETERM'] is dict([(variable['variable_name'], variable) for variable in dict_base_plan['AE']['variables']])['AETERM']
+	assert dict_variables['AEBRSITE']['variable_label'] == 'Breast Cancer Site'
+	assert list(dict_plan['AE']['schema']) == list(dict_plan['AE']['variable_names'])
+	assert dict_base_plan['AE']['variable_names'].count('AEBRSITE') == 0
@@ -0,0 +1,124 @@
+"""
+Tests of PHUSE_Visit_Schedule.py: TVSTRL/TVENRL rules, planned Visit windows, and the expansion of disease assessments (TD).
+"""
+import numpy as np
+import pytest
+#
+import PHUSE_Visit_Schedule
+#
+#
+CT_TDM = [
+	{"arm": "Placebo", "armcd": "P", "epochs": [
+		{"etcd": "SCRN", "element": "Screen", "epoch": "SCREENING"},
+		{"etcd": "RI", "element": "Run-in", "epoch": "RUN-IN"},
+		{"etcd": "P", "element": "Placebo", "epoch": "TREATMENT"}]},
+	{"arm": "A", "armcd": "A", "epochs": [
+		{"etcd": "SCRN", "element": "Screen", "epoch": "SCREENING"},
+		{"etcd": "A", "element": "Drug A", "epoch": "TREATMENT"}]}]
+CT_ELEMENT_DURATIONS = {'SCRN': 'P7D', 'RI': 'P14D', 'P': 'P8W', 'A': ''}		# Drug A lasts the default duration.
+#
+#
+@pytest.mark.parametrize('in_duration, in_minutes', [('P14D', 20160), ('P2W', 20160), ('PT30M', 30), ('P1DT12H', 2160), ('P1M', 43200), ('PT90S', 2), ('P', None), ('PT', None), ('14 days', None), (None, None)])
+def test_iso8601_duration_minutes (in_duration, in_minutes):
+	assert PHUSE_Visit_Schedule.func_nihpo_iso8601_duration_minutes(in_duration) == in_minutes
+#
+#
+@pytest.mark.parametrize('in_rule, in_parsed', [
+	("Start of Screen Epoch", ('epoch', 'Screen', 'start', 0)),
+	("30 minutes before end of Screen Epoch", ('epoch', 'Screen', 'end', -30)),
+	("1 week after start of Treatment Epoch", ('epoch', 'Treatment', 'start', 10080)),
+	("2 Days after END of the Run-in Element.", ('element', 'Run-in', 'end', 2880)),
+	("1 hour after start of Visit", ('visit', None, 'start', 60)),
+	("Day 3", None),
+	("1 fortnight after start of Treatment Epoch", None)])
+def test_rule_parse (in_rule, in_parsed):
+	assert PHUSE_Visit_Schedule.func_nihpo_visit_rule_parse(in_rule) == in_parsed
+#
+#
+def test_schedule_compile_resolves_rules_per_arm ():
+	list_visits = [
+		{"visitnum": "1", "visit": "SCREEN", "armcd": "", "tvstrl": "Start of Screen Epoch", "tvenrl": "1 hour after start of Visit"},
+		{"visitnum": "2", "visit": "RUN-IN", "armcd": "P", "tvstrl": "30 minutes before end of Screen Epoch", "tvenrl": "30 minutes after start of Run-in Epoch"},
+		{"visitnum": "3", "visit": "WEEK 1", "armcd": "", "tvstrl": "1 week after start of Treatment Epoch", "tvenrl": "1 hour after start of Visit"}]
+	schedule, list_errors = PHUSE_Visit_Schedule.func_nihpo_visit_schedule_compile(CT_TDM, CT_ELEMENT_DURATIONS, list_visits)
+	assert list_errors == []
+	assert schedule['arms'] == ['P', 'A']
+	list_rows = list(zip(schedule['visit_arm'].tolist(), schedule['visitnum'].tolist(), schedule['start'].tolist(), schedule['end'].tolist()))
+	assert list_rows == [
+		(0, '1', 0, 60), (1, '1', 0, 60),
+		(0, '2', 10080 - 30, 10080 + 30),
+		(0, '3', 10080 + 20160 + 10080, 10080 + 20160 + 10080 + 60),		# Placebo: Screen and Run-in before Treatment.
+		(1, '3', 10080 + 10080, 10080 + 10080 + 60)]						# Drug A: Screen only.
+#
+#
+def test_schedule_compile_reports_bad_visits ():
+	list_visits = [
+		{"visitnum": "1", "visit": "UNKNOWN RULE", "armcd": "", "tvstrl": "Day 3", "tvenrl": "1 hour after start of Visit"},
+		{"visitnum": "2", "visit": "NO RUN-IN", "armcd": "A", "tvstrl": "Start of Run-in Epoch", "tvenrl": "1 hour after start of Visit"},
+		{"visitnum": "3", "visit": "BACKWARDS", "armcd": "P", "tvstrl": "End of Screen Epoch", "tvenrl": "Start of Screen Epoch"},
+		{"visitnum": "4", "visit": "GOOD", "armcd": "P", "tvstrl": "Start of Treatment Epoch", "tvenrl": "End of Treatment Epoch"}]
+	schedule, list_errors = PHUSE_Visit_Schedule.func_nihpo_visit_schedule_compile(CT_TDM, CT_ELEMENT_DURATIONS, list_visits)
+	assert schedule['visitnum'].tolist() == ['4']
+	assert len(list_errors) == 3
+	assert list_errors[0].startswith("visits[0].tvstrl: rule [Day 3]")
+	assert "Epoch [Run-in] is not part of this Arm" in list_errors[1]
+	assert "ends 10080 minutes before it starts" in list_errors[2]
+#
+#
+def test_schedule_windows_per_subject ():
+	list_visits = [
+		{"visitnum": "1", "visit": "SCREEN", "armcd": "", "tvstrl": "Start of Screen Epoch", "tvenrl": "1 hour after start of Visit"},
+		{"visitnum": "3", "visit": "WEEK 1", "armcd": "", "tvstrl": "1 week after start of Treatment Epoch", "tvenrl": "1 hour after start of Visit"}]
+	schedule, list_errors = PHUSE_Visit_Schedule.func_nihpo_visit_schedule_compile(CT_TDM, CT_ELEMENT_DURATIONS, list_visits)
+	array_anchor = np.array(['2020-01-06', '2020-01-08', '2020-02-01'], dtype='datetime64[D]')
+	dict_windows = PHUSE_Visit_Schedule.func_nihpo_visit_schedule_windows(schedule, ['A', 'SCRNFAIL', 'P'], array_anchor)
+	assert dict_windows['subject'].tolist() == [0, 0, 2, 2]		# The screen failure has no Visits.
+	assert dict_windows['planned_start'].astype('datetime64[D]').astype(str).tolist() == ['2020-01-06', '2020-01-20', '2020-02-01', '2020-02-29']
+	assert (dict_windows['actual_start'] == dict_windows['planned_start']).all()
+	#
+	dict_jittered = PHUSE_Visit_Schedule.func_nihpo_visit_schedule_windows(schedule, ['A', 'SCRNFAIL', 'P'], array_anchor, np.random.default_rng(1), 'P2D')
+	array_shift = (dict_jittered['actual_start'] - dict_jittered['planned_start']).astype(np.int64)
+	assert (np.abs(array_shift) <= 2 * 1440).all()
+	assert ((dict_jittered['actual_end'] - dict_jittered['actual_start']) == (dict_jittered['planned_end'] - dict_jittered['planned_start'])).all()
+#
+#
+CT_ASSESSMENTS = [
+	{"tdorder": "1", "tdancvar": "ANCH1DT", "tdstoff": "P0D", "tdtgtpai": "P8W", "tdminpai": "P53D", "tdmaxpai": "P9W", "tdnumrpt": "3"},
+	{"tdorder": "2", "tdancvar": "ANCH1DT", "tdstoff": "P60W", "tdtgtpai": "P12W", "tdminpai": "P11W", "tdmaxpai": "P13W", "tdnumrpt": "2"}]
+#
+#
+def test_assessment_compile_expands_blocks ():
+	assessments, list_errors = PHUSE_Visit_Schedule.func_nihpo_assessment_schedule_compile(CT_ASSESSMENTS)
+	assert list_errors == []
+	assert assessments['tdorder'].tolist() == ['1', '1', '1', '2', '2']
+	assert assessments['repeat'].tolist() == [1, 2, 3, 1, 2]
+	assert assessments['offset'].tolist() == [56, 112, 168, 420 + 84, 420 + 168]
+	assert (assessments['offset'] - assessments['window_low']).tolist() == [3, 3, 3, 7, 7]
+	assert (assessments['window_high'] - assessments['offset']).tolist() == [7, 7, 7, 7, 7]
+#
+#
+def test_assessment_compile_reports_bad_blocks ():
+	list_blocks = [dict(CT_ASSESSMENTS[0], tdtgtpai="8 weeks"), dict(CT_ASSESSMENTS[0], tdnumrpt="six"), dict(CT_ASSESSMENTS[0], tdminpai="P9W", tdmaxpai="P10W"), CT_ASSESSMENTS[1]]
+	assessments, list_errors = PHUSE_Visit_Schedule.func_nihpo_assessment_schedule_compile(list_blocks)
+	assert assessments['tdorder'].tolist() == ['2', '2']
+	assert list_errors == [
+		"assessments[0].tdtgtpai: [8 weeks] is not an ISO 8601 duration.",
+		"assessments[1].tdnumrpt: [six] is not a number.",
+		"assessments[2]: TDTGTPAI must be between TDMINPAI and TDMAXPAI."]
+#
+#
+def test_assessment_expand_per_subject ():
+	assessments, list_errors = PHUSE_Visit_Schedule.func_nihpo_assessment_schedule_compile(CT_ASSESSMENTS)
+	array_anchor = np.array(['2020-01-06', 'NaT', '2020-02-11'], dtype='datetime64[D]')
+	dict_dates = PHUSE_Visit_Schedule.func_nihpo_assessment_schedule_expand(assessments, {'ANCH1DT': array_anchor})
+	assert dict_dates['subject'].tolist() == [0] * 5 + [2] * 5		# No anchor date: no assessments.
+	assert dict_dates['planned'][:5].astype(str).tolist() == ['2020-03-02', '2020-04-27', '2020-06-22', '2021-05-24', '2021-08-16']
+	assert (dict_dates['actual'] == dict_dates['planned']).all()
+	assert (np.diff(dict_dates['planned'][5:]).astype(np.int64) > 0).all()
+	#
+	dict_random = PHUSE_Visit_Schedule.func_nihpo_assessment_schedule_expand(assessments, {'ANCH1DT': array_anchor}, np.random.default_rng(7))
+	assert ((dict_random['window_low'] <= dict_random['actual']) & (dict_random['actual'] <= dict_random['window_high'])).all()
+	assert (dict_random['planned'] == dict_dates['planned']).all()
+	#
+	with pytest.raises(AssertionError, match='ANCH1DT'):
+		PHUSE_Visit_Schedule.func_nihpo_assessment_schedule_expand(assessments, {'ANCH2DT': array_anchor})
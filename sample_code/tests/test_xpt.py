@@ -0,0 +1,70 @@
+"""
+Tests of PHUSE_XPT.py: IBM double precision, and datasets read back as they were written.
+"""
+import numpy as np
+import pytest
+#
+import PHUSE_XPT
+#
+#
+@pytest.mark.parametrize('in_value, in_ibm', [
+	(1.0, '4110000000000000'),
+	(-118.625, 'C276A00000000000'),
+	(0.1, '401999999999999A'),
+	(0.0, '0000000000000000'),
+	(np.nan, '2E00000000000000')])
+def test_ieee_to_ibm_known_values (in_value, in_ibm):
+	assert PHUSE_XPT.func_nihpo_xpt_ieee_to_ibm(np.array([in_value]))[0].tobytes().hex().upper() == in_ibm
+#
+#
+def test_ibm_round_trip_is_exact ():
+	generator_random = np.random.default_rng(20201111)
+	array_values = np.concatenate([generator_random.standard_normal(2000) * (10.0 ** generator_random.integers(-60, 60, 2000)), [1.0, -1.0, 2.0 ** 52 + 1, 1e-75, -7.25e74]])
+	array_back = PHUSE_XPT.func_nihpo_xpt_ibm_to_ieee(PHUSE_XPT.func_nihpo_xpt_ieee_to_ibm(array_values))
+	assert np.array_equal(array_back, array_values)
+#
+#
+def test_ibm_missing_and_short_values ():
+	array_bytes = np.array([[0x2E, 0, 0], [0x5F, 0, 0], [0x41, 0, 0], [0x41, 0x10, 0], [0xC1, 0x20, 0]], dtype=np.uint8)		# ".", "_", ".A", 1.0, -2.0 in 3 bytes.
+	array_values = PHUSE_XPT.func_nihpo_xpt_ibm_to_ieee(array_bytes)
+	assert np.isnan(array_values[:3]).all()
+	assert array_values[3:].tolist() == [1.0, -2.0]
+#
+#
+def test_dataset_round_trip (tmp_path):
+	var_filename = str(tmp_path / 'ta.xpt')
+	list_columns = ['STUDYID', 'ARMCD', 'TAETORD', 'TADUR']
+	dict_data = {'STUDYID': ['EX1', 'EX1', 'EX1'], 'ARMCD': ['A', None, 'Über'], 'TAETORD': np.array([1, 2, 3], dtype=np.int32), 'TADUR': np.array([1.5, np.nan, -3.0])}
+	PHUSE_XPT.func_nihpo_xpt_write_dataset(var_filename, 'TA', 'Trial Arms', list_columns, dict_data)
+	assert PHUSE_XPT.func_nihpo_xpt_compare(var_filename, list_columns, dict_data) == []
+	#
+	xpt_TA = PHUSE_XPT.func_nihpo_xpt_reader_open(var_filename)
+	try:
+		assert (xpt_TA['dataset_name'], xpt_TA['dataset_label'], xpt_TA['rows']) == ('TA', 'Trial Arms', 3)
+		assert [variable['type'] for variable in xpt_TA['variables']] == ['char', 'char', 'num', 'num']
+		assert PHUSE_XPT.func_nihpo_xpt_reader_column(xpt_TA, 'ARMCD').tolist() == ['A', '', 'Über']
+		assert PHUSE_XPT.func_nihpo_xpt_reader_row(xpt_TA, 2) == {'STUDYID': 'EX1', 'ARMCD': 'Über', 'TAETORD': 3.0, 'TADUR': -3.0}
+		assert np.isnan(PHUSE_XPT.func_nihpo_xpt_reader_column(xpt_TA, 'TADUR', 1, 2)[0])
+	finally:
+		PHUSE_XPT.func_nihpo_xpt_reader_close(xpt_TA)
+#
+#
+def test_batches_and_rows_give_the_same_file (tmp_path):
+	list_variables = [PHUSE_XPT.func_nihpo_xpt_variable('USUBJID', 'char', 12), PHUSE_XPT.func_nihpo_xpt_variable('LBSTRESN', 'num', in_label='Numeric Result')]
+	list_rows = [['S%04d' % (number), number / 7.0] for number in range(1000)]
+	xpt_columns = PHUSE_XPT.func_nihpo_xpt_open(str(tmp_path / 'columns.xpt'), 'LB', 'Laboratory Test Results', list_variables)
+	for var_start in range(0, 1000, 300):
+		PHUSE_XPT.func_nihpo_xpt_write_columns(xpt_columns, {'USUBJID': [row[0] for row in list_rows[var_start:var_start + 300]], 'LBSTRESN': np.array([row[1] for row in list_rows[var_start:var_start + 300]])})
+	PHUSE_XPT.func_nihpo_xpt_close(xpt_columns)
+	xpt_rows = PHUSE_XPT.func_nihpo_xpt_open(str(tmp_path / 'rows.xpt'), 'LB', 'Laboratory Test Results', list_variables)
+	PHUSE_XPT.func_nihpo_xpt_write_rows(xpt_rows, list_rows)
+	PHUSE_XPT.func_nihpo_xpt_close(xpt_rows)
+	#
+	with open(str(tmp_path / 'columns.xpt'), 'rb') as file_columns, open(str(tmp_path / 'rows.xpt'), 'rb') as file_rows:
+		assert file_columns.read()[560:] == file_rows.read()[560:]		# The header and descriptor records before hold the time of writing.
+	xpt_LB = PHUSE_XPT.func_nihpo_xpt_reader_open(str(tmp_path / 'rows.xpt'))
+	try:
+		assert xpt_LB['rows'] == 1000
+		assert PHUSE_XPT.func_nihpo_xpt_reader_column(xpt_LB, 'LBSTRESN', 990).tolist() == [row[1] for row in list_rows[990:]]
+	finally:
+		PHUSE_XPT.func_nihpo_xpt_reader_close(xpt_LB)